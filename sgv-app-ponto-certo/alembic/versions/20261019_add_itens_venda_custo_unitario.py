@@ -0,0 +1,34 @@
+"""add custo_unitario to itens_venda
+
+Revision ID: 20261019_add_itens_venda_custo_unitario
+Revises: 20260112_add_vendas_payment_cols
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261019_add_itens_venda_custo_unitario"
+down_revision = "20260112_add_vendas_payment_cols"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # snapshot do custo do produto no momento da venda
+    with op.batch_alter_table("itens_venda", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("custo_unitario", sa.Float(), nullable=True))
+
+    # backfill: itens já existentes recebem o custo atual do produto
+    op.execute(
+        "UPDATE itens_venda SET custo_unitario = ("
+        "SELECT p.preco_custo FROM produtos p WHERE p.id = itens_venda.produto_id"
+        ") WHERE custo_unitario IS NULL"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table("itens_venda", schema=None) as batch_op:
+        batch_op.drop_column("custo_unitario")
@@ -0,0 +1,43 @@
+"""add categoria, lote and ativo to produtos
+
+Revision ID: 20261019_add_produtos_catalogo_cols
+Revises: 20261019_add_itens_venda_custo_unitario
+Create Date: 2026-10-19 00:10:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261019_add_produtos_catalogo_cols"
+down_revision = "20261019_add_itens_venda_custo_unitario"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # catálogo do Estoque passa a viver no banco (antes em data/produtos.json);
+    # os dados do JSON são migrados uma única vez por init_db()
+    with op.batch_alter_table("produtos", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("categoria", sa.String(length=50), nullable=True))
+        batch_op.add_column(sa.Column("lote", sa.String(length=50), nullable=True))
+        batch_op.add_column(
+            sa.Column(
+                "ativo",
+                sa.Boolean(),
+                nullable=False,
+                server_default=sa.text("1"),
+            )
+        )
+        batch_op.create_index("ix_produtos_categoria", ["categoria"])
+        batch_op.create_index("ix_produtos_ativo", ["ativo"])
+
+
+def downgrade():
+    with op.batch_alter_table("produtos", schema=None) as batch_op:
+        batch_op.drop_index("ix_produtos_ativo")
+        batch_op.drop_index("ix_produtos_categoria")
+        batch_op.drop_column("ativo")
+        batch_op.drop_column("lote")
+        batch_op.drop_column("categoria")
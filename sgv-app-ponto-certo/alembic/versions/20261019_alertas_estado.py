@@ -0,0 +1,40 @@
+"""alertas_estado table (resolved / dismissed alerts)
+
+Revision ID: 20261019_alertas_estado
+Revises: 20261019_contas_vencimento_date
+Create Date: 2026-10-19 00:50:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261019_alertas_estado"
+down_revision = "20261019_contas_vencimento_date"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "alertas_estado",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("alerta_id", sa.String(length=60), nullable=False, unique=True),
+        sa.Column("produto_id", sa.Integer(), nullable=True),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("data_resolucao", sa.DateTime(), nullable=False),
+        sa.Column("dados", sa.Text(), nullable=True),
+    )
+    op.create_index("ix_alertas_estado_produto_id", "alertas_estado", ["produto_id"])
+    op.create_index(
+        "ix_alertas_estado_status_data",
+        "alertas_estado",
+        ["status", "data_resolucao"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_alertas_estado_status_data", table_name="alertas_estado")
+    op.drop_index("ix_alertas_estado_produto_id", table_name="alertas_estado")
+    op.drop_table("alertas_estado")
@@ -0,0 +1,61 @@
+"""NF-e stock entry: supplier item code mapping and posting mark
+
+Revision ID: 20261019_codigos_produto_fornecedor
+Revises: 20261019_imported_xmls
+Create Date: 2026-10-19 03:00:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261019_codigos_produto_fornecedor"
+down_revision = "20261019_imported_xmls"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "codigos_produto_fornecedor",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("cnpj", sa.String(length=20), nullable=False),
+        sa.Column("codigo", sa.String(length=60), nullable=False),
+        sa.Column("ean", sa.String(length=14), nullable=True),
+        sa.Column("produto_id", sa.Integer(), nullable=False),
+        sa.Column("atualizado_em", sa.DateTime(), nullable=False),
+    )
+    op.create_index(
+        "ix_codigos_produto_fornecedor_cnpj_codigo",
+        "codigos_produto_fornecedor",
+        ["cnpj", "codigo"],
+        unique=True,
+    )
+    op.create_index(
+        "ix_codigos_produto_fornecedor_ean", "codigos_produto_fornecedor", ["ean"]
+    )
+    op.create_index(
+        "ix_codigos_produto_fornecedor_produto_id",
+        "codigos_produto_fornecedor",
+        ["produto_id"],
+    )
+    op.add_column(
+        "imported_xmls", sa.Column("estoque_lancado_em", sa.DateTime(), nullable=True)
+    )
+
+
+def downgrade():
+    op.drop_column("imported_xmls", "estoque_lancado_em")
+    op.drop_index(
+        "ix_codigos_produto_fornecedor_produto_id",
+        table_name="codigos_produto_fornecedor",
+    )
+    op.drop_index(
+        "ix_codigos_produto_fornecedor_ean", table_name="codigos_produto_fornecedor"
+    )
+    op.drop_index(
+        "ix_codigos_produto_fornecedor_cnpj_codigo",
+        table_name="codigos_produto_fornecedor",
+    )
+    op.drop_table("codigos_produto_fornecedor")
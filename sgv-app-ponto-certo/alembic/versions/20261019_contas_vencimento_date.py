@@ -0,0 +1,61 @@
+"""expenses/receivables.vencimento as DATE (indexed)
+
+Revision ID: 20261019_contas_vencimento_date
+Revises: 20261019_produtos_deficit_estoque_idx
+Create Date: 2026-10-19 00:40:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261019_contas_vencimento_date"
+down_revision = "20261019_produtos_deficit_estoque_idx"
+branch_labels = None
+depends_on = None
+
+TABELAS = ("expenses", "receivables")
+
+
+def upgrade():
+    for tabela in TABELAS:
+        # vencimento era texto dd/mm/aaaa (ou ISO com hora); converte para
+        # aaaa-mm-dd e usa a data de cadastro quando o texto não é uma data
+        op.execute(
+            f"UPDATE {tabela} SET vencimento = CASE "
+            "WHEN vencimento GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9]' "
+            "THEN substr(vencimento, 7, 4) || '-' || substr(vencimento, 4, 2) "
+            "|| '-' || substr(vencimento, 1, 2) "
+            "WHEN vencimento GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*' "
+            "THEN substr(vencimento, 1, 10) "
+            "ELSE substr(data_cadastro, 1, 10) END"
+        )
+        with op.batch_alter_table(tabela, schema=None) as batch_op:
+            batch_op.alter_column(
+                "vencimento",
+                existing_type=sa.String(length=10),
+                type_=sa.Date(),
+                existing_nullable=False,
+            )
+            batch_op.create_index(f"ix_{tabela}_vencimento", ["vencimento"])
+            batch_op.create_index(
+                f"ix_{tabela}_status_vencimento", ["status", "vencimento"]
+            )
+
+
+def downgrade():
+    for tabela in TABELAS:
+        with op.batch_alter_table(tabela, schema=None) as batch_op:
+            batch_op.drop_index(f"ix_{tabela}_status_vencimento")
+            batch_op.drop_index(f"ix_{tabela}_vencimento")
+            batch_op.alter_column(
+                "vencimento",
+                existing_type=sa.Date(),
+                type_=sa.String(length=10),
+                existing_nullable=False,
+            )
+        op.execute(
+            f"UPDATE {tabela} SET vencimento = substr(vencimento, 9, 2) || '/' "
+            "|| substr(vencimento, 6, 2) || '/' || substr(vencimento, 1, 4)"
+        )
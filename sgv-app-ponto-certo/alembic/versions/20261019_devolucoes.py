@@ -0,0 +1,49 @@
+"""devolucoes table (replaces data/devolucoes.json)
+
+Revision ID: 20261019_devolucoes
+Revises: 20261019_alertas_estado
+Create Date: 2026-10-19 01:00:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261019_devolucoes"
+down_revision = "20261019_alertas_estado"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # os registros de devolucoes.json são importados uma única vez no init_db
+    op.create_table(
+        "devolucoes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("venda_id", sa.Integer(), nullable=True),
+        sa.Column("item_venda_id", sa.Integer(), nullable=True),
+        sa.Column("produto_id", sa.Integer(), nullable=True),
+        sa.Column("produto_nome", sa.String(length=200), nullable=True),
+        sa.Column("quantidade", sa.Integer(), nullable=False),
+        sa.Column("valor_total", sa.Float(), nullable=False),
+        sa.Column("motivo", sa.String(length=200), nullable=True),
+        sa.Column("data", sa.DateTime(), nullable=False),
+        sa.Column("foi_trocado", sa.Boolean(), nullable=False),
+        sa.Column("troca_para_id", sa.Integer(), nullable=True),
+        sa.Column("troca_para_nome", sa.String(length=200), nullable=True),
+        sa.Column("troca_data", sa.DateTime(), nullable=True),
+        sa.Column("oculta", sa.Boolean(), nullable=False),
+    )
+    op.create_index("ix_devolucoes_venda_id", "devolucoes", ["venda_id"])
+    op.create_index("ix_devolucoes_produto_id", "devolucoes", ["produto_id"])
+    op.create_index("ix_devolucoes_data", "devolucoes", ["data"])
+    op.create_index("ix_devolucoes_oculta_data", "devolucoes", ["oculta", "data"])
+
+
+def downgrade():
+    op.drop_index("ix_devolucoes_oculta_data", table_name="devolucoes")
+    op.drop_index("ix_devolucoes_data", table_name="devolucoes")
+    op.drop_index("ix_devolucoes_produto_id", table_name="devolucoes")
+    op.drop_index("ix_devolucoes_venda_id", table_name="devolucoes")
+    op.drop_table("devolucoes")
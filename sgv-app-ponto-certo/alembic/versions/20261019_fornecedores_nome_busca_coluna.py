@@ -0,0 +1,56 @@
+"""supplier search key column (accent- and case-insensitive)
+
+Revision ID: 20261019_fornecedores_nome_busca_coluna
+Revises: 20261019_migracoes_aplicadas
+Create Date: 2026-10-19 07:00:00.000000
+"""
+
+import unicodedata
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261019_fornecedores_nome_busca_coluna"
+down_revision = "20261019_migracoes_aplicadas"
+branch_labels = None
+depends_on = None
+
+
+def _chave(texto):
+    # mesma normalização de estoque.busca.normalizar_busca
+    if not texto:
+        return ""
+    nf = unicodedata.normalize("NFD", str(texto))
+    return "".join(c for c in nf if unicodedata.category(c) != "Mn").lower().strip()
+
+
+def upgrade():
+    # lower() do SQLite só trata ASCII: o índice de expressão anterior não
+    # encontrava nem ordenava nomes acentuados ("Água", "Óleos")
+    op.drop_index("ix_fornecedores_nome_busca", table_name="fornecedores")
+    op.add_column(
+        "fornecedores", sa.Column("nome_busca", sa.String(length=200), nullable=True)
+    )
+    bind = op.get_bind()
+    fornecedores = bind.execute(
+        sa.text("SELECT id, nome_razao_social FROM fornecedores")
+    ).all()
+    if fornecedores:
+        bind.execute(
+            sa.text("UPDATE fornecedores SET nome_busca = :chave WHERE id = :id"),
+            [{"id": fid, "chave": _chave(nome)} for fid, nome in fornecedores],
+        )
+    op.create_index("ix_fornecedores_nome_busca", "fornecedores", ["nome_busca"])
+
+
+def downgrade():
+    op.drop_index("ix_fornecedores_nome_busca", table_name="fornecedores")
+    with op.batch_alter_table("fornecedores", schema=None) as batch_op:
+        batch_op.drop_column("nome_busca")
+    op.create_index(
+        "ix_fornecedores_nome_busca",
+        "fornecedores",
+        [sa.text("lower(nome_razao_social)")],
+    )
@@ -0,0 +1,29 @@
+"""expression index for supplier name prefix search
+
+Revision ID: 20261019_fornecedores_nome_busca_idx
+Revises: 20261019_codigos_produto_fornecedor
+Create Date: 2026-10-19 04:00:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261019_fornecedores_nome_busca_idx"
+down_revision = "20261019_codigos_produto_fornecedor"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # o literal precisa ser igual ao de models.db_models.NOME_FORNECEDOR_BUSCA
+    op.create_index(
+        "ix_fornecedores_nome_busca",
+        "fornecedores",
+        [sa.text("lower(nome_razao_social)")],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_fornecedores_nome_busca", table_name="fornecedores")
@@ -0,0 +1,52 @@
+"""imported_xmls table (replaces data/imported_xmls.json)
+
+Revision ID: 20261019_imported_xmls
+Revises: 20261019_devolucoes
+Create Date: 2026-10-19 02:00:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261019_imported_xmls"
+down_revision = "20261019_devolucoes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # os registros de imported_xmls.json são importados uma única vez no init_db
+    op.create_table(
+        "imported_xmls",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("chave", sa.String(length=44), nullable=True),
+        sa.Column("numero", sa.String(length=20), nullable=True),
+        sa.Column("data_emissao", sa.Date(), nullable=True),
+        sa.Column("fornecedor_id", sa.Integer(), nullable=True),
+        sa.Column("fornecedor_nome", sa.String(length=200), nullable=True),
+        sa.Column("cnpj", sa.String(length=20), nullable=True),
+        sa.Column("total", sa.Float(), nullable=False),
+        sa.Column("itens", sa.Text(), nullable=True),
+        sa.Column("path", sa.String(length=500), nullable=True),
+        sa.Column("data_importacao", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_imported_xmls_chave", "imported_xmls", ["chave"], unique=True)
+    op.create_index("ix_imported_xmls_data_emissao", "imported_xmls", ["data_emissao"])
+    op.create_index("ix_imported_xmls_cnpj", "imported_xmls", ["cnpj"])
+    op.create_index("ix_imported_xmls_total", "imported_xmls", ["total"])
+    op.create_index(
+        "ix_imported_xmls_fornecedor_data",
+        "imported_xmls",
+        ["fornecedor_id", "data_emissao"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_imported_xmls_fornecedor_data", table_name="imported_xmls")
+    op.drop_index("ix_imported_xmls_total", table_name="imported_xmls")
+    op.drop_index("ix_imported_xmls_cnpj", table_name="imported_xmls")
+    op.drop_index("ix_imported_xmls_data_emissao", table_name="imported_xmls")
+    op.drop_index("ix_imported_xmls_chave", table_name="imported_xmls")
+    op.drop_table("imported_xmls")
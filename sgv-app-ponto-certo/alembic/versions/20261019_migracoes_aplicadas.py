@@ -0,0 +1,28 @@
+"""one-time data migration flags stored in the database
+
+Revision ID: 20261019_migracoes_aplicadas
+Revises: 20261019_precos_fornecedor
+Create Date: 2026-10-19 06:00:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261019_migracoes_aplicadas"
+down_revision = "20261019_precos_fornecedor"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "migracoes_aplicadas",
+        sa.Column("chave", sa.String(length=60), primary_key=True),
+        sa.Column("aplicada_em", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("migracoes_aplicadas")
@@ -0,0 +1,42 @@
+"""supplier cost history for best recent cost lookups
+
+Revision ID: 20261019_precos_fornecedor
+Revises: 20261019_fornecedores_nome_busca_idx
+Create Date: 2026-10-19 05:00:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261019_precos_fornecedor"
+down_revision = "20261019_fornecedores_nome_busca_idx"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "precos_fornecedor",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("produto_id", sa.Integer(), nullable=False),
+        sa.Column("fornecedor_id", sa.Integer(), nullable=True),
+        sa.Column("custo", sa.Float(), nullable=False),
+        sa.Column("data", sa.Date(), nullable=False),
+        sa.Column("origem", sa.String(length=10), nullable=False),
+        sa.Column("chave_nfe", sa.String(length=44), nullable=True),
+        sa.Column("registrado_em", sa.DateTime(), nullable=False),
+    )
+    op.create_index(
+        "ix_precos_fornecedor_produto_fornecedor_data",
+        "precos_fornecedor",
+        ["produto_id", "fornecedor_id", "data"],
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "ix_precos_fornecedor_produto_fornecedor_data", table_name="precos_fornecedor"
+    )
+    op.drop_table("precos_fornecedor")
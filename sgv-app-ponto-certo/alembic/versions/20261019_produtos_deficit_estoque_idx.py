@@ -0,0 +1,31 @@
+"""partial expression index for per-product low stock
+
+Revision ID: 20261019_produtos_deficit_estoque_idx
+Revises: 20261019_produtos_validade_date_lotes
+Create Date: 2026-10-19 00:30:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261019_produtos_deficit_estoque_idx"
+down_revision = "20261019_produtos_validade_date_lotes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # déficit = estoque mínimo do produto (padrão 10) - estoque atual; o
+    # literal precisa ser igual ao de models.db_models.DEFICIT_ESTOQUE
+    op.create_index(
+        "ix_produtos_deficit_estoque",
+        "produtos",
+        [sa.text("(coalesce(estoque_minimo, 10) - estoque_atual)")],
+        sqlite_where=sa.text("ativo = 1"),
+    )
+
+
+def downgrade():
+    op.drop_index("ix_produtos_deficit_estoque", table_name="produtos")
@@ -0,0 +1,71 @@
+"""produtos.validade as DATE (indexed) and lotes_produto table
+
+Revision ID: 20261019_produtos_validade_date_lotes
+Revises: 20261019_add_produtos_catalogo_cols
+Create Date: 2026-10-19 00:20:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20261019_produtos_validade_date_lotes"
+down_revision = "20261019_add_produtos_catalogo_cols"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # validade era texto dd/mm/aaaa; converte para ISO (aaaa-mm-dd) antes de
+    # mudar o tipo, e descarta valores que não são datas válidas
+    op.execute(
+        "UPDATE produtos SET validade = CASE "
+        "WHEN validade GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9]' "
+        "THEN substr(validade, 7, 4) || '-' || substr(validade, 4, 2) "
+        "|| '-' || substr(validade, 1, 2) "
+        "WHEN validade GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*' "
+        "THEN substr(validade, 1, 10) "
+        "ELSE NULL END "
+        "WHERE validade IS NOT NULL"
+    )
+    with op.batch_alter_table("produtos", schema=None) as batch_op:
+        batch_op.alter_column(
+            "validade",
+            existing_type=sa.String(length=20),
+            type_=sa.Date(),
+            existing_nullable=True,
+        )
+        batch_op.create_index("ix_produtos_validade", ["validade"])
+
+    op.create_table(
+        "lotes_produto",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "produto_id", sa.Integer(), sa.ForeignKey("produtos.id"), nullable=False
+        ),
+        sa.Column("lote", sa.String(length=50), nullable=True),
+        sa.Column("validade", sa.Date(), nullable=True),
+        sa.Column("quantidade", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("data_entrada", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_lotes_produto_validade", "lotes_produto", ["validade"])
+    op.create_index(
+        "ix_lotes_produto_produto_validade",
+        "lotes_produto",
+        ["produto_id", "validade"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_lotes_produto_produto_validade", table_name="lotes_produto")
+    op.drop_index("ix_lotes_produto_validade", table_name="lotes_produto")
+    op.drop_table("lotes_produto")
+    with op.batch_alter_table("produtos", schema=None) as batch_op:
+        batch_op.drop_index("ix_produtos_validade")
+        batch_op.alter_column(
+            "validade",
+            existing_type=sa.Date(),
+            type_=sa.String(length=20),
+            existing_nullable=True,
+        )
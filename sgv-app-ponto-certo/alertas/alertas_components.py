@@ -5,6 +5,11 @@ Exibe alertas em cards visuais no dashboard gerencial
 
 import flet as ft
 
+from produtos.relatorio_produtos import format_brl
+
+# Quantidade de cards de alerta carregados por vez no painel
+ALERTAS_POR_PAGINA = 50
+
 
 def criar_card_alerta(
     alerta: dict, on_resolver=None, on_descartar=None
@@ -35,6 +40,12 @@ def criar_card_alerta(
     else:
         percentual_falta = min((alerta["falta"] / alerta["estoque_minimo"]) * 100, 100)
 
+    texto_melhor_custo = ""
+    if alerta.get("melhor_custo") is not None:
+        texto_melhor_custo = f"Melhor custo: {format_brl(alerta['melhor_custo'])}"
+        if alerta.get("melhor_fornecedor"):
+            texto_melhor_custo += f" ({alerta['melhor_fornecedor']})"
+
     return ft.Container(
         content=ft.Column(
             [
@@ -61,6 +72,13 @@ def criar_card_alerta(
                     size=11,
                     color="#666",
                 ),
+                # Sugestão de compra: melhor custo recente entre os fornecedores
+                ft.Text(
+                    texto_melhor_custo,
+                    size=11,
+                    color="#2E7D32",
+                    visible=bool(texto_melhor_custo),
+                ),
                 # Estoque
                 ft.Row(
                     [
@@ -307,6 +325,38 @@ def criar_panel_alertas(page, pdv_core) -> ft.Container:
     # Referências para atualização
     alertas_list_ref = ft.Ref[ft.Column]()
     resumo_container_ref = ft.Ref[ft.Container]()
+    mais_btn_ref = ft.Ref[ft.TextButton]()
+    # Cards carregados por páginas (maior déficit primeiro)
+    estado = {"pagina": 0, "total": 0}
+
+    def _cards_da_pagina(pagina: int) -> list:
+        resultado = alertas_manager.listar_alertas_estoque(
+            pdv_core, pagina, ALERTAS_POR_PAGINA
+        )
+        estado["pagina"] = pagina
+        estado["total"] = resultado["total"]
+        return [
+            criar_card_alerta(
+                alerta, on_resolver=_resolver_alerta, on_descartar=_descartar_alerta
+            )
+            for alerta in resultado["itens"]
+        ]
+
+    def _tem_mais() -> bool:
+        return estado["pagina"] * ALERTAS_POR_PAGINA < estado["total"]
+
+    def _carregar_mais(e=None):
+        try:
+            if alertas_list_ref.current:
+                alertas_list_ref.current.controls.extend(
+                    _cards_da_pagina(estado["pagina"] + 1)
+                )
+                alertas_list_ref.current.update()
+            if mais_btn_ref.current:
+                mais_btn_ref.current.visible = _tem_mais()
+                mais_btn_ref.current.update()
+        except Exception as e:
+            print(f"[ALERTAS-UI] ❌ Erro ao carregar mais alertas: {e}")
 
     def _atualizar_alertas():
         """Atualiza a exibição de alertas"""
@@ -318,21 +368,13 @@ def criar_panel_alertas(page, pdv_core) -> ft.Container:
                 resumo_container_ref.current.content = criar_resumo_alertas(resumo)
                 resumo_container_ref.current.update()
 
-            # Atualizar lista de alertas
+            # Atualizar lista de alertas (volta para a primeira página)
             if alertas_list_ref.current:
-                alertas_controls = []
-                for alerta in resumo.get("produtos_criticos", []) + resumo.get(
-                    "produtos_moderados", []
-                ):
-                    card = criar_card_alerta(
-                        alerta,
-                        on_resolver=_resolver_alerta,
-                        on_descartar=_descartar_alerta,
-                    )
-                    alertas_controls.append(card)
-
-                alertas_list_ref.current.controls = alertas_controls
+                alertas_list_ref.current.controls = _cards_da_pagina(1)
                 alertas_list_ref.current.update()
+            if mais_btn_ref.current:
+                mais_btn_ref.current.visible = _tem_mais()
+                mais_btn_ref.current.update()
         except Exception as e:
             print(f"[ALERTAS-UI] ❌ Erro ao atualizar: {e}")
 
@@ -348,20 +390,34 @@ def criar_panel_alertas(page, pdv_core) -> ft.Container:
             _atualizar_alertas()
             print(f"[ALERTAS-UI] ℹ️  Alerta {alerta_id} descartado")
 
+    def _resolver_todos(e=None):
+        """Resolve todos os alertas de estoque pendentes (uma transação)"""
+        ids = [a["alerta_id"] for a in alertas_manager.obter_alertas_ativos(pdv_core)]
+        if alertas_manager.resolver_alertas(ids, pdv_core=pdv_core):
+            _atualizar_alertas()
+            print(f"[ALERTAS-UI] ✅ {len(ids)} alerta(s) resolvido(s)")
+
     # Criar conteúdo inicial
-    alertas_controls = []
-    for alerta in resumo.get("produtos_criticos", []) + resumo.get(
-        "produtos_moderados", []
-    ):
-        card = criar_card_alerta(
-            alerta, on_resolver=_resolver_alerta, on_descartar=_descartar_alerta
-        )
-        alertas_controls.append(card)
+    alertas_controls = _cards_da_pagina(1)
 
     return ft.Container(
         content=ft.Column(
             [
-                ft.Text("⚠️  ALERTAS DE ESTOQUE", size=18, weight=ft.FontWeight.BOLD),
+                ft.Row(
+                    [
+                        ft.Text(
+                            "⚠️  ALERTAS DE ESTOQUE",
+                            size=18,
+                            weight=ft.FontWeight.BOLD,
+                        ),
+                        ft.TextButton(
+                            "Resolver todos",
+                            icon=ft.Icons.DONE_ALL,
+                            on_click=_resolver_todos,
+                        ),
+                    ],
+                    alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                ),
                 # Resumo dos alertas
                 ft.Container(
                     content=criar_resumo_alertas(resumo), ref=resumo_container_ref
@@ -374,6 +430,13 @@ def criar_panel_alertas(page, pdv_core) -> ft.Container:
                     scroll=ft.ScrollMode.AUTO,
                     expand=True,
                 ),
+                ft.TextButton(
+                    "Carregar mais alertas",
+                    icon=ft.Icons.EXPAND_MORE,
+                    on_click=_carregar_mais,
+                    visible=_tem_mais(),
+                    ref=mais_btn_ref,
+                ),
             ],
             spacing=10,
             expand=True,
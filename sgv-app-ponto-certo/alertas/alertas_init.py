@@ -10,6 +10,9 @@ def inicializar_alertas(page, pdv_core):
     """Inicializa o sistema de alertas ao abrir a aplicação"""
     try:
         alertas_manager = AlertasManager()
+        # Alertas (e o resumo em cache) passam a ser atualizados pelos eventos
+        # de estoque e de contas a pagar do PDVCore
+        alertas_manager.conectar(pdv_core)
 
         # Fazer verificação inicial de estoque
         resumo = alertas_manager.obter_resumo_alertas(pdv_core)
@@ -4,15 +4,20 @@ Monitora produtos com estoque abaixo do mínimo configurado
 """
 
 import json
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Set
 
-# Alinha fonte de dados de estoque com a tela de Estoque (JSON)
-try:
-    from estoque.repository import carregar_produtos as carregar_produtos_estoque
-except Exception:
-    carregar_produtos_estoque = None
+from sqlalchemy import true
+
+from financeiro.financeiro_utils import format_date
+from models.db_models import DEFICIT_ESTOQUE, ESTOQUE_MINIMO_PADRAO, Produto
+
+# Quantidade máxima de ids por consulta IN (...) na reavaliação incremental
+LOTE_IDS_CONSULTA = 500
+
+# Janela (em dias, a partir de hoje) das contas a pagar "próximas ao vencimento"
+DIAS_ALERTA_CONTAS = 3
 
 
 class AlertasManager:
@@ -22,157 +27,335 @@ class AlertasManager:
         """Inicializa o gerenciador de alertas"""
         self.alertas_dir = Path(alertas_dir)
         self.alertas_dir.mkdir(exist_ok=True)
+        # Arquivo legado: alertas tratados agora ficam na tabela alertas_estado
+        # (PDVCore); o conteúdo é importado uma vez em `conectar`
         self.arquivo_alertas = self.alertas_dir / "alertas_estoque.json"
-        self.carregados = self._carregar_alertas()
-
-    def _carregar_alertas(self) -> Dict:
-        """Carrega alertas salvos do arquivo"""
-        try:
-            if self.arquivo_alertas.exists():
-                with open(self.arquivo_alertas, "r", encoding="utf-8") as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"[ALERTAS] [WARN] Erro ao carregar alertas: {e}")
-        return {}
-
-    def _salvar_alertas(self):
-        """Salva alertas em arquivo JSON"""
+        self._pdv_core = None
+        # Alertas de estoque mantidos de forma incremental (produto_id -> alerta):
+        # a carga completa ocorre uma vez; depois só os produtos alterados
+        # (eventos do PDVCore) são reavaliados
+        self._alertas_estoque: Dict[int, Dict] = {}
+        self._criticos_estoque: Set[int] = set()
+        self._estoque_ordenado: Optional[List[Dict]] = None
+        self._estoque_carregado = False
+        # Produtos com alerta resolvido/descartado (tabela alertas_estado):
+        # ficam fora das contagens e do resumo, como na listagem do painel.
+        # Carregados sob demanda; None = recarregar do banco
+        self._tratados_estoque: Optional[Set[int]] = None
+        # Resumo (estoque + contas) reaproveitado enquanto nada mudar. A chave
+        # é (versão do estoque, versão das contas, dia): o dia entra porque
+        # contas passam a vencer com a virada da data
+        self._versao_estoque = 0
+        self._versao_contas = 0
+        self._resumo_cache: Optional[tuple] = None
+
+    def conectar(self, pdv_core) -> None:
+        """Registra os ouvintes de estoque e de contas a pagar no PDVCore.
+
+        O PDVCore também passa a guardar os alertas tratados pelo usuário.
+        """
+        if pdv_core is None:
+            return
+        self._pdv_core = pdv_core
+        pdv_core.registrar_ouvinte_estoque(self.atualizar_alertas_estoque)
+        pdv_core.registrar_ouvinte_contas(self.invalidar_contas)
+        self._importar_json_legado(pdv_core)
+
+    def _importar_json_legado(self, pdv_core) -> None:
+        """Move os alertas tratados do JSON antigo para o banco (uma vez)."""
         try:
-            with open(self.arquivo_alertas, "w", encoding="utf-8") as f:
-                json.dump(self.carregados, f, ensure_ascii=False, indent=2)
+            if not self.arquivo_alertas.exists():
+                return
+            with open(self.arquivo_alertas, "r", encoding="utf-8") as f:
+                legados = json.load(f) or {}
+            por_status: Dict[str, Dict[str, Dict]] = {}
+            for alerta_id, alerta in legados.items():
+                status = alerta.get("status")
+                if status in ("resolvido", "nao_aplicavel"):
+                    por_status.setdefault(status, {})[alerta_id] = alerta
+            for status, alertas in por_status.items():
+                if pdv_core.marcar_alertas(list(alertas), status, alertas) != len(
+                    alertas
+                ):
+                    return
+            if legados:
+                self._invalidar_tratados()
+                with open(self.arquivo_alertas, "w", encoding="utf-8") as f:
+                    json.dump({}, f)
+                print(
+                    f"[ALERTAS] [INFO] {sum(map(len, por_status.values()))} alerta(s) tratado(s) importado(s) do JSON"
+                )
         except Exception as e:
-            print(f"[ALERTAS] [ERROR] Erro ao salvar alertas: {e}")
+            print(f"[ALERTAS] [WARN] Erro ao importar alertas do JSON: {e}")
 
-    def verificar_estoque_baixo(self, pdv_core) -> List[Dict]:
-        """
-        Verifica produtos com estoque abaixo do mínimo,
-        usando a mesma fonte da tela de Estoque (JSON via estoque.repository).
-        Retorna lista de alertas calculados no momento.
-        """
-        alertas: List[Dict] = []
-        try:
-            print(
-                "\n[ALERTAS-MANAGER] [INFO] Iniciando verificação de estoque baixo (JSON)..."
-            )
+    def invalidar_contas(self, pdv_core=None) -> None:
+        """Ouvinte de gravações em contas a pagar: descarta o resumo em cache."""
+        self._versao_contas += 1
 
-            if carregar_produtos_estoque is None:
-                raise RuntimeError(
-                    "estoque.repository indisponível para leitura de produtos"
-                )
+    def _chave_resumo(self) -> tuple:
+        return (self._versao_estoque, self._versao_contas, date.today())
 
-            produtos_json = carregar_produtos_estoque() or []
-            print(
-                f"[ALERTAS-MANAGER] [INFO] Total de produtos (JSON): {len(produtos_json)}"
+    def _produtos_tratados(self, pdv_core) -> Set[int]:
+        """Ids dos produtos cujo alerta de estoque já foi tratado."""
+        if self._tratados_estoque is None:
+            self._tratados_estoque = (
+                pdv_core.produtos_com_alerta_tratado() if pdv_core else set()
             )
+        return self._tratados_estoque
+
+    def _invalidar_tratados(self) -> None:
+        """Tratamentos gravados/apagados: recarrega os ids e descarta o resumo."""
+        self._tratados_estoque = None
+        self._versao_estoque += 1
+
+    # ========== ALERTAS DE ESTOQUE (INCREMENTAIS) ==========
+
+    @staticmethod
+    def _produto_do_alerta(alerta_id: str) -> Optional[int]:
+        """Id do produto de um alerta de estoque ("produto_<id>")."""
+        prefixo, _, sufixo = str(alerta_id).partition("_")
+        return int(sufixo) if prefixo == "produto" and sufixo.isdigit() else None
+
+    @staticmethod
+    def _eh_critico(alerta: Dict) -> bool:
+        # Estoque zerado é sempre crítico
+        return (
+            alerta["estoque_atual"] == 0
+            or alerta["falta"] >= alerta["estoque_minimo"] * 0.5
+        )
 
-            if not produtos_json:
-                print("[ALERTAS-MANAGER] [WARN] Nenhum produto encontrado no JSON!")
-                return alertas
+    def _aplicar_linha(
+        self, produto_id, codigo, nome, estoque_atual, estoque_minimo, ativo
+    ) -> None:
+        """Cria, atualiza ou remove o alerta de um produto a partir da sua linha.
 
-            # Mantém o limiar de 'baixo estoque' consistente com a tela (quantidade < 10)
-            LIMIAR_MINIMO = 10
+        Usa o estoque mínimo do produto (ou ESTOQUE_MINIMO_PADRAO, se vazio),
+        com a mesma regra de `PDVCore.listar_estoque_baixo`.
+        """
+        estoque_atual = int(estoque_atual or 0)
+        if estoque_minimo is None:
+            estoque_minimo = ESTOQUE_MINIMO_PADRAO
+        if not ativo or estoque_atual >= estoque_minimo:
+            self._remover_alerta_estoque(produto_id)
+            return
+        anterior = self._alertas_estoque.get(produto_id)
+        alerta = {
+            "id": produto_id,
+            "alerta_id": f"produto_{produto_id}",
+            "codigo": codigo or "",
+            "nome": nome,
+            "estoque_atual": estoque_atual,
+            "estoque_minimo": estoque_minimo,
+            "falta": estoque_minimo - estoque_atual,
+            # Mantém a data da primeira detecção enquanto o alerta continuar
+            "data_deteccao": (
+                anterior["data_deteccao"] if anterior else datetime.now().isoformat()
+            ),
+            "status": "ativo",
+        }
+        self._alertas_estoque[produto_id] = alerta
+        if self._eh_critico(alerta):
+            self._criticos_estoque.add(produto_id)
+        else:
+            self._criticos_estoque.discard(produto_id)
+        self._estoque_ordenado = None
+
+    def _remover_alerta_estoque(self, produto_id) -> None:
+        if self._alertas_estoque.pop(produto_id, None) is not None:
+            self._criticos_estoque.discard(produto_id)
+            self._estoque_ordenado = None
+
+    @staticmethod
+    def _colunas_alerta():
+        return (
+            Produto.id,
+            Produto.codigo_barras,
+            Produto.nome,
+            Produto.estoque_atual,
+            Produto.estoque_minimo,
+            Produto.ativo,
+        )
 
-            for i, p in enumerate(produtos_json):
-                estoque_atual = int(p.get("quantidade") or 0)
-                estoque_minimo = LIMIAR_MINIMO
+    def _recarregar_estoque(self, pdv_core) -> None:
+        """Carga completa: consulta apenas os produtos ativos abaixo do mínimo."""
+        self._versao_estoque += 1
+        linhas = (
+            pdv_core.session.query(*self._colunas_alerta())
+            .filter(Produto.ativo == true(), DEFICIT_ESTOQUE > 0)
+            .all()
+        )
+        anteriores = self._alertas_estoque
+        self._alertas_estoque = {}
+        self._criticos_estoque = set()
+        for linha in linhas:
+            anterior = anteriores.get(linha[0])
+            if anterior:
+                self._alertas_estoque[linha[0]] = anterior
+            self._aplicar_linha(*linha)
+        self._estoque_ordenado = None
+        self._estoque_carregado = True
+        # Tratamentos de produtos que saíram do déficit deixam de valer
+        if pdv_core.reabrir_alertas_estoque():
+            self._invalidar_tratados()
+        print(
+            f"[ALERTAS-MANAGER] [INFO] Estoque recarregado: {len(self._alertas_estoque)} alerta(s)"
+        )
 
-                is_zerado = estoque_atual <= 0
-                is_baixo = estoque_atual < estoque_minimo
-                comparacao = (
-                    "OK"
-                    if (not is_zerado and not is_baixo)
-                    else ("ZERADO" if is_zerado else "BAIXO")
-                )
+    def atualizar_alertas_estoque(
+        self, pdv_core, produto_ids: Optional[Iterable[int]] = None
+    ) -> None:
+        """Ouvinte de alterações de estoque do PDVCore.
 
-                print(
-                    f"[ALERTAS-MANAGER] #{i + 1} {p.get('nome')}: atual={estoque_atual}, minimo={estoque_minimo} -> {comparacao}"
-                )
+        Reavalia apenas os produtos informados (uma consulta por lote de ids);
+        `produto_ids=None` indica alteração em massa e recarrega tudo.
+        """
+        if pdv_core is None:
+            return
+        self._versao_estoque += 1
+        try:
+            if produto_ids is None or not self._estoque_carregado:
+                self._recarregar_estoque(pdv_core)
+                return
+            ids = list({int(i) for i in produto_ids if i is not None})
+            antes = set(self._alertas_estoque)
+            encontrados = set()
+            for i in range(0, len(ids), LOTE_IDS_CONSULTA):
+                for linha in (
+                    pdv_core.session.query(*self._colunas_alerta())
+                    .filter(Produto.id.in_(ids[i : i + LOTE_IDS_CONSULTA]))
+                    .all()
+                ):
+                    encontrados.add(linha[0])
+                    self._aplicar_linha(*linha)
+            # Produtos removidos do banco deixam de gerar alerta
+            for produto_id in set(ids) - encontrados:
+                self._remover_alerta_estoque(produto_id)
+            saidas = (antes - set(self._alertas_estoque)) & set(ids)
+            if saidas and pdv_core.reabrir_alertas_estoque(saidas):
+                self._invalidar_tratados()
+        except Exception as e:
+            print(f"[ALERTAS] [ERROR] Erro ao atualizar alertas de estoque: {e}")
 
-                if is_zerado or is_baixo:
-                    alerta_id = f"produto_{p.get('id')}"
-                    alerta = {
-                        "id": p.get("id"),
-                        "alerta_id": alerta_id,
-                        "codigo": p.get("codigo_barras") or "",
-                        "nome": p.get("nome"),
-                        "estoque_atual": estoque_atual,
-                        "estoque_minimo": estoque_minimo,
-                        "falta": estoque_minimo - estoque_atual,
-                        "data_deteccao": datetime.now().isoformat(),
-                        "status": "ativo",
-                    }
-                    alertas.append(alerta)
-                    print(
-                        f"[ALERTAS-MANAGER] [ALERT] ALERTA DETECTADO: {p.get('nome')}"
-                    )
+    def verificar_estoque_baixo(self, pdv_core) -> List[Dict]:
+        """
+        Retorna os alertas de estoque baixo/zerado, do maior para o menor déficit.
 
-            print(
-                f"[ALERTAS-MANAGER] [OK] Verificação concluída: {len(alertas)} alerta(s)"
+        Na primeira chamada faz a carga completa (banco); depois o estado é
+        mantido por `atualizar_alertas_estoque` e a lista ordenada é reaproveitada
+        enquanto nenhum produto mudar.
+        """
+        if pdv_core is None:
+            return []
+        if not self._estoque_carregado:
+            try:
+                self._recarregar_estoque(pdv_core)
+            except Exception as e:
+                print(f"[ALERTAS] [ERROR] Erro ao verificar estoque: {e}")
+                return []
+        if self._estoque_ordenado is None:
+            self._estoque_ordenado = sorted(
+                self._alertas_estoque.values(), key=lambda a: a["falta"], reverse=True
             )
-            return alertas
+        return list(self._estoque_ordenado)
 
-        except Exception as e:
-            print(f"[ALERTAS] [ERROR] Erro ao verificar estoque: {e}")
+    def listar_alertas_estoque(self, pdv_core, pagina=1, por_pagina=50) -> Dict:
+        """Página de alertas de estoque para o painel (consulta paginada no banco).
+
+        Omite os alertas já resolvidos/descartados. Mesmo formato de
+        `PDVCore.listar_estoque_baixo`, com os campos de alerta (`alerta_id`,
+        `data_deteccao`, `status`) em cada item.
+        """
+        if pdv_core is None:
+            return {"itens": [], "total": 0, "pagina": 1, "por_pagina": por_pagina}
+        resultado = pdv_core.listar_estoque_baixo(
+            pagina, por_pagina, ocultar_tratados=True
+        )
+        agora = datetime.now().isoformat()
+        for item in resultado["itens"]:
+            conhecido = self._alertas_estoque.get(item["id"])
+            item["alerta_id"] = f"produto_{item['id']}"
+            item["data_deteccao"] = conhecido["data_deteccao"] if conhecido else agora
+            item["status"] = "ativo"
+        return resultado
+
+    def contar_alertas_estoque(self, pdv_core) -> Dict[str, int]:
+        """Contagens dos alertas de estoque ainda não tratados.
+
+        Usa o estado incremental e os ids tratados em memória (sem consulta
+        após a carga inicial).
+        """
+        if pdv_core is not None and not self._estoque_carregado:
+            self.verificar_estoque_baixo(pdv_core)
+        tratados = self._produtos_tratados(pdv_core or self._pdv_core)
+        total = len(self._alertas_estoque.keys() - tratados)
+        critico = len(self._criticos_estoque - tratados)
+        return {"total": total, "critico": critico, "moderado": total - critico}
+
+    def obter_alertas_ativos(self, pdv_core=None) -> List[Dict]:
+        """Retorna os alertas de estoque ainda não tratados (maior déficit primeiro)"""
+        pdv_core = pdv_core or self._pdv_core
+        if pdv_core is None:
             return []
+        por_pagina = max(1, self.contar_alertas_estoque(pdv_core)["total"])
+        return self.listar_alertas_estoque(pdv_core, 1, por_pagina)["itens"]
 
-    def obter_alertas_ativos(self) -> List[Dict]:
-        """Retorna todos os alertas ainda ativos"""
-        alertas_ativos = [
-            alerta
-            for alerta in self.carregados.values()
-            if alerta.get("status") == "ativo"
-        ]
-        return sorted(alertas_ativos, key=lambda x: x["falta"], reverse=True)
+    def resolver_alertas(
+        self, alerta_ids: Iterable[str], status: str = "resolvido", pdv_core=None
+    ) -> int:
+        """Marca vários alertas como tratados em uma única transação.
+
+        Retorna quantos foram gravados (0 se nada foi gravado).
+        """
+        pdv_core = pdv_core or self._pdv_core
+        if pdv_core is None:
+            print("[ALERTAS] [WARN] Alertas sem PDVCore conectado")
+            return 0
+        ids = list(alerta_ids)
+        dados = {}
+        for alerta_id in ids:
+            alerta = self._alertas_estoque.get(self._produto_do_alerta(alerta_id))
+            if alerta:
+                dados[alerta_id] = alerta
+        gravados = pdv_core.marcar_alertas(ids, status, dados)
+        if gravados:
+            self._invalidar_tratados()
+            print(f"[ALERTAS] [OK] {gravados} alerta(s) marcado(s) como {status}")
+        return gravados
 
     def marcar_como_resolvido(self, alerta_id: str) -> bool:
         """Marca um alerta como resolvido"""
-        try:
-            if alerta_id in self.carregados:
-                self.carregados[alerta_id]["status"] = "resolvido"
-                self.carregados[alerta_id][
-                    "data_resolucao"
-                ] = datetime.now().isoformat()
-                self._salvar_alertas()
-                print(f"[ALERTAS] [OK] Alerta {alerta_id} marcado como resolvido")
-                return True
-        except Exception as e:
-            print(f"[ALERTAS] [ERROR] Erro ao resolver alerta: {e}")
-        return False
+        return self.resolver_alertas([alerta_id]) == 1
 
     def marcar_como_nao_aplicavel(self, alerta_id: str) -> bool:
         """Marca um alerta como não aplicável (produto descontinuado, etc)"""
-        try:
-            if alerta_id in self.carregados:
-                self.carregados[alerta_id]["status"] = "nao_aplicavel"
-                self.carregados[alerta_id]["data_na"] = datetime.now().isoformat()
-                self._salvar_alertas()
-                print(f"[ALERTAS] [INFO] Alerta {alerta_id} marcado como não aplicável")
-                return True
-        except Exception as e:
-            print(f"[ALERTAS] [ERROR] Erro ao marcar N/A: {e}")
-        return False
+        return self.resolver_alertas([alerta_id], "nao_aplicavel") == 1
 
     def obter_resumo_alertas(self, pdv_core) -> Dict:
-        """Retorna resumo de TODOS os alertas: estoque + contas a pagar - SEM usar cache"""
+        """Retorna resumo de TODOS os alertas: estoque (incremental) + contas a pagar
+
+        O resumo fica em cache até a próxima gravação de estoque ou de contas
+        (ouvintes registrados por `conectar`) ou até a virada do dia.
+        """
+        if self._resumo_cache and self._resumo_cache[0] == self._chave_resumo():
+            return dict(self._resumo_cache[1])
         print("\n[ALERTAS-MANAGER] [INFO] obter_resumo_alertas: INICIO")
-        # ========== Alertas de Estoque - Sempre calcular do zero ==========
-        print("[ALERTAS-MANAGER] [INFO] Verificando estoque...")
-        alertas_estoque = self.verificar_estoque_baixo(pdv_core)
-        print(
-            f"[ALERTAS-MANAGER] [INFO] Alertas de estoque encontrados: {len(alertas_estoque)}"
-        )
-        # Estoque zerado deve ser considerado crítico mesmo se mínimo for 0
+        # ========== Alertas de Estoque - estado incremental ==========
+        # (sem os alertas já resolvidos/descartados)
+        tratados = self._produtos_tratados(pdv_core)
+        alertas_estoque = [
+            a for a in self.verificar_estoque_baixo(pdv_core) if a["id"] not in tratados
+        ]
         critico_estoque = [
-            a
-            for a in alertas_estoque
-            if a["estoque_atual"] == 0 or a["falta"] >= a["estoque_minimo"] * 0.5
+            a for a in alertas_estoque if a["id"] in self._criticos_estoque
+        ]
+        moderado_estoque = [
+            a for a in alertas_estoque if a["id"] not in self._criticos_estoque
         ]
-        moderado_estoque = [a for a in alertas_estoque if a not in critico_estoque]
         print(
             f"[ALERTAS-MANAGER] [INFO] Estoque - Críticos: {len(critico_estoque)}, Moderados: {len(moderado_estoque)}"
         )
 
-        # ========== Alertas de Contas a Pagar - Sempre calcular do zero ==========
+        # ========== Alertas de Contas a Pagar - consultas por faixa de data ==========
         print("[ALERTAS-MANAGER] [INFO] Verificando contas a pagar...")
         contas_info = self.verificar_contas_pagar(pdv_core)
         contas_vencidas = contas_info.get("vencidas", [])
@@ -209,44 +392,29 @@ class AlertasManager:
         )
         print(f"[ALERTAS-MANAGER] [INFO] Chaves do resultado: {list(resultado.keys())}")
         print("[ALERTAS-MANAGER] [INFO] obter_resumo_alertas: FIM\n")
-        return resultado
+        # Chave calculada depois: a carga inicial do estoque altera a versão
+        self._resumo_cache = (self._chave_resumo(), resultado)
+        return dict(resultado)
 
-    def limpar_alertas_resolvidos(self, dias_retencao=30):
+    def limpar_alertas_resolvidos(self, dias_retencao=30, pdv_core=None):
         """Remove alertas resolvidos com mais de X dias"""
-        try:
-            agora = datetime.now()
-            limite = agora - timedelta(days=dias_retencao)
-
-            removidos = 0
-            para_remover = []
-
-            for alerta_id, alerta in self.carregados.items():
-                if alerta.get("status") in ["resolvido", "nao_aplicavel"]:
-                    data_resolucao = alerta.get("data_resolucao") or alerta.get(
-                        "data_na"
-                    )
-                    if data_resolucao:
-                        data = datetime.fromisoformat(data_resolucao)
-                        if data < limite:
-                            para_remover.append(alerta_id)
-                            removidos += 1
-
-            for alerta_id in para_remover:
-                del self.carregados[alerta_id]
-
-            if removidos > 0:
-                self._salvar_alertas()
-                print(f"[ALERTAS] [INFO] {removidos} alerta(s) antigo(s) removido(s)")
-
-            return removidos
-
-        except Exception as e:
-            print(f"[ALERTAS] [ERROR] Erro ao limpar alertas: {e}")
+        pdv_core = pdv_core or self._pdv_core
+        if pdv_core is None:
             return 0
+        limite = datetime.now() - timedelta(days=dias_retencao)
+        removidos = pdv_core.limpar_alertas_tratados(limite)
+        if removidos:
+            self._invalidar_tratados()
+            print(f"[ALERTAS] [INFO] {removidos} alerta(s) antigo(s) removido(s)")
+        return removidos
 
     def obter_historico_alerta(self, alerta_id: str) -> Optional[Dict]:
-        """Retorna o histórico completo de um alerta"""
-        return self.carregados.get(alerta_id)
+        """Retorna o tratamento registrado de um alerta (ou o alerta, se ativo)"""
+        if self._pdv_core is not None:
+            estado = self._pdv_core.obter_estado_alerta(alerta_id)
+            if estado:
+                return estado
+        return self._alertas_estoque.get(self._produto_do_alerta(alerta_id))
 
     def exportar_alertas_csv(self, pdv_core, caminho_export="alertas_estoque.csv"):
         """Exporta alertas atuais em formato CSV"""
@@ -279,7 +447,7 @@ class AlertasManager:
         """
         Verifica contas a pagar e retorna resumo de alertas
         - Contas vencidas (vencimento ANTES de hoje - atrasadas)
-        - Contas próximas ao vencimento (hoje até próximos 3 dias)
+        - Contas próximas ao vencimento (hoje até próximos DIAS_ALERTA_CONTAS dias)
         """
         resultado = {
             "vencidas": [],
@@ -289,124 +457,45 @@ class AlertasManager:
         }
 
         try:
-            # Usar get_pending_expenses para contas a pagar
-            if hasattr(pdv_core, "get_pending_expenses"):
-                contas = pdv_core.get_pending_expenses()
-            else:
+            # Vencidas e a vencer vêm de consultas por faixa de data no banco
+            # (vencimento é DATE indexado); nada é convertido linha a linha
+            if not hasattr(pdv_core, "get_overdue_expenses"):
                 print(
-                    "[ALERTAS-CONTAS] [WARN] PDVCore não possui método get_pending_expenses"
+                    "[ALERTAS-CONTAS] [WARN] PDVCore não possui método get_overdue_expenses"
                 )
                 return resultado
 
             agora = datetime.now().date()
-            print(f"\n[ALERTAS-CONTAS] [INFO] Data de hoje: {agora}")
-            print(
-                f"[ALERTAS-CONTAS] [INFO] Total de contas a pagar: {len(contas) if contas else 0}"
-            )
-
-            for i, conta in enumerate(contas):
-                try:
-                    # Obtém a data de vencimento - pode ser 'vencimento' ou 'due_date'
-                    data_vencimento = getattr(conta, "vencimento", None) or getattr(
-                        conta, "due_date", None
-                    )
-                    if not data_vencimento:
-                        print(
-                            f"[ALERTAS-CONTAS] [WARN] Conta #{i + 1} SEM data de vencimento"
-                        )
-                        continue
-
-                    # DEBUG: Mostrar tipo e valor original
-                    print(
-                        f"[ALERTAS-CONTAS] #{i + 1} Vencimento bruto: {data_vencimento} (tipo: {type(data_vencimento).__name__})"
-                    )
-
-                    if isinstance(data_vencimento, str):
-                        # Se for string em formato "DD/MM/YYYY", converter
-                        try:
-                            data_vencimento = datetime.strptime(
-                                data_vencimento, "%d/%m/%Y"
-                            ).date()
-                            print(
-                                f"[ALERTAS-CONTAS]    -> Convertido de DD/MM/YYYY: {data_vencimento}"
-                            )
-                        except Exception as e:
-                            print(
-                                f"[ALERTAS-CONTAS]    [WARN] Falhou DD/MM/YYYY, tentando ISO: {e}"
-                            )
-                            data_vencimento = datetime.fromisoformat(
-                                data_vencimento
-                            ).date()
-                            print(
-                                f"[ALERTAS-CONTAS]    -> Convertido de ISO: {data_vencimento}"
-                            )
-
-                    valor = float(conta.valor or getattr(conta, "value", 0))
-                    descricao = conta.descricao or getattr(
-                        conta, "description", "Sem descrição"
-                    )
-
-                    print(f"[ALERTAS-CONTAS]    Descricao: {descricao}, Valor: {valor}")
-                    print(
-                        f"[ALERTAS-CONTAS]    Comparacao: {data_vencimento} < {agora}? {data_vencimento < agora}"
-                    )
-
-                    # CONTAS VENCIDAS (atrasadas - vencimento ANTES de hoje)
-                    if data_vencimento < agora:
-                        dias_atraso = (agora - data_vencimento).days
-                        print(
-                            f"[ALERTAS-CONTAS]    [CRITICO] VENCIDA! Atraso: {dias_atraso} dia(s)"
-                        )
-                        resultado["vencidas"].append(
-                            {
-                                "id": conta.id,
-                                "descricao": descricao,
-                                "valor": valor,
-                                "vencimento": str(data_vencimento),
-                                "dias_atraso": dias_atraso,
-                                "categoria": getattr(
-                                    conta,
-                                    "categoria",
-                                    getattr(conta, "category", "Geral"),
-                                ),
-                            }
-                        )
-                        resultado["total_vencido"] += valor
-
-                    # CONTAS PRÓXIMAS AO VENCIMENTO (hoje ou próximos 3 dias)
-                    elif data_vencimento <= agora + timedelta(days=3):
-                        dias_para_vencer = (data_vencimento - agora).days
-                        print(
-                            f"[ALERTAS-CONTAS]    [WARN] PROXIMA! Dias: {dias_para_vencer}"
-                        )
-                        resultado["proximas"].append(
-                            {
-                                "id": conta.id,
-                                "descricao": descricao,
-                                "valor": valor,
-                                "vencimento": str(data_vencimento),
-                                "dias_para_vencer": dias_para_vencer,
-                                "categoria": getattr(
-                                    conta,
-                                    "categoria",
-                                    getattr(conta, "category", "Geral"),
-                                ),
-                            }
-                        )
-                        resultado["total_proximo_vencimento"] += valor
-                    else:
-                        dias_futuro = (data_vencimento - agora).days
-                        print(
-                            f"[ALERTAS-CONTAS]    [INFO] OK (vence em {dias_futuro} dias)"
-                        )
-
-                except Exception as e:
-                    print(
-                        f"[ALERTAS-CONTAS] [WARN] Erro ao processar conta #{i + 1}: {e}"
-                    )
-                    import traceback
-
-                    traceback.print_exc()
+            vencidas = pdv_core.get_overdue_expenses(hoje=agora)
+            proximas = pdv_core.get_expenses_due_within(DIAS_ALERTA_CONTAS, hoje=agora)
+
+            for conta in vencidas:
+                valor = float(conta.valor or 0)
+                resultado["vencidas"].append(
+                    {
+                        "id": conta.id,
+                        "descricao": conta.descricao or "Sem descrição",
+                        "valor": valor,
+                        "vencimento": format_date(conta.vencimento),
+                        "dias_atraso": (agora - conta.vencimento).days,
+                        "categoria": conta.categoria or "Geral",
+                    }
+                )
+                resultado["total_vencido"] += valor
+
+            for conta in proximas:
+                valor = float(conta.valor or 0)
+                resultado["proximas"].append(
+                    {
+                        "id": conta.id,
+                        "descricao": conta.descricao or "Sem descrição",
+                        "valor": valor,
+                        "vencimento": format_date(conta.vencimento),
+                        "dias_para_vencer": (conta.vencimento - agora).days,
+                        "categoria": conta.categoria or "Geral",
+                    }
+                )
+                resultado["total_proximo_vencimento"] += valor
 
             # Log de resumo
             print(
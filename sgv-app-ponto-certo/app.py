@@ -10,6 +10,7 @@
 # - Proteger rotas por perfil (gerente, caixa, estoque, etc.)
 
 import importlib
+import multiprocessing
 import sys
 import time
 
@@ -1666,6 +1667,10 @@ def main(page: ft.Page):
     # (debug) não iniciar simulação automática aqui em produção
 
 
-ft.app(
-    target=main, assets_dir="assets"
-)  # , view=ft.AppView.WEB_BROWSER) ---run in browser
+# Guarda de __main__: processos do pool de importação (utils.processamento_paralelo)
+# reimportam este módulo e não devem abrir outra janela do app
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    ft.app(
+        target=main, assets_dir="assets"
+    )  # , view=ft.AppView.WEB_BROWSER) ---run in browser
@@ -7,8 +7,6 @@ passados pela `view` para não depender de variáveis globais.
 """
 
 import io
-import json
-import os
 from typing import Any
 
 import flet as ft
@@ -540,20 +538,10 @@ class CaixaActions:
             pass
 
     def persistir_estoque_apos_venda(self):
+        # O estoque já foi baixado no banco por pdv_core.finalizar_venda;
+        # apenas descarta o estado em cache da sessão para releituras frescas
         try:
-            base_dir = os.path.dirname(os.path.dirname(__file__))
-            caminho = os.path.join(base_dir, "data", "produtos.json")
-            try:
-                from .logic import persistir_estoque_json
-
-                persistir_estoque_json(caminho, self.cart_data)
-            except Exception:
-                # fallback: escrever localmente se a função não estiver disponível
-                try:
-                    with open(caminho, "w", encoding="utf-8") as f:
-                        json.dump([], f)
-                except Exception:
-                    pass
+            self.pdv_core.session.expire_all()
         except Exception:
             pass
 
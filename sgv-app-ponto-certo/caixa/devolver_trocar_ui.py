@@ -3,15 +3,13 @@ Componentes de UI para Devolver & Trocar no Caixa
 Modal e botões para gerenciar devoluções e trocas direto da tela de vendas
 """
 
-import os
 import time
 
 import flet as ft
 
-from models.db_models import Produto
 from vendas.vendas_devolucoes_logic import (
     buscar_vendas_do_caixa,
-    processar_devolucao_e_trocar,
+    buscar_vendas_para_devolucao,
 )
 
 # Cores padrão
@@ -26,10 +24,10 @@ _modais_cache = {}
 
 
 def buscar_produto_por_barras(pdv_core, codigo_barras: str):
-    """Busca produto por código de barras ou ID; fallback para JSON se necessário.
+    """Busca produto por código de barras ou ID no banco.
 
-    - Tenta via `validar_produto_existe` (ID ou barras) no banco.
-    - Se não existir, tenta localizar em data/produtos.json e cria Produto mínimo.
+    - Tenta via `validar_produto_existe` (ID ou barras).
+    - Depois via `pdv_core.buscar_produto` (código de barras).
     """
     try:
         valor = str(codigo_barras or "").strip()
@@ -66,150 +64,6 @@ def buscar_produto_por_barras(pdv_core, codigo_barras: str):
         except Exception as ex_core:
             print(f"[DEVOLVER TROCAR] Falha ao buscar via core: {ex_core}")
 
-        # Fallback: tentar via JSON e criar produto mínimo no banco
-        try:
-            base_dir = os.path.dirname(os.path.dirname(__file__))
-            arquivo = os.path.join(base_dir, "data", "produtos.json")
-            if os.path.exists(arquivo):
-                import json
-
-                with open(arquivo, "r", encoding="utf-8") as f:
-                    dados_json = json.load(f)
-
-                match = None
-                # 1) Match exato
-                for pj in dados_json:
-                    codigo_json = str(
-                        pj.get("codigo_barras") or pj.get("codigo") or ""
-                    ).strip()
-                    if codigo_json and codigo_json == valor:
-                        match = pj
-                        break
-
-                # 2) Match sem zeros à esquerda
-                if not match:
-                    valor_sem_zeros = valor.lstrip("0")
-                    for pj in dados_json:
-                        codigo_json = str(
-                            pj.get("codigo_barras") or pj.get("codigo") or ""
-                        ).strip()
-                        if codigo_json.lstrip("0") == valor_sem_zeros and codigo_json:
-                            match = pj
-                            break
-
-                # 3) Match por prefixo único (evita ambiguidade)
-                if not match:
-                    candidatos = []
-                    valor_sem_zeros = valor.lstrip("0")
-                    for pj in dados_json:
-                        codigo_json = str(
-                            pj.get("codigo_barras") or pj.get("codigo") or ""
-                        ).strip()
-                        if not codigo_json:
-                            continue
-                        if codigo_json.startswith(valor) or codigo_json.lstrip(
-                            "0"
-                        ).startswith(valor_sem_zeros):
-                            candidatos.append(pj)
-                    if len(candidatos) == 1:
-                        match = candidatos[0]
-
-                if match:
-                    try:
-                        session = pdv_core.session
-                        # Determinar valores mínimos para campos obrigatórios
-                        preco_v = float(
-                            match.get("preco_venda") or match.get("preco") or 0.0
-                        )
-                        preco_c = float(
-                            match.get("preco_custo") or match.get("custo") or preco_v
-                        )
-                        estoque_min = int(match.get("estoque_minimo") or 10)
-
-                        novo = Produto(
-                            nome=match.get("nome") or match.get("descricao") or valor,
-                            codigo_barras=str(
-                                match.get("codigo_barras")
-                                or match.get("codigo")
-                                or valor
-                            ),
-                            preco_venda=preco_v,
-                            estoque_atual=int(
-                                match.get("estoque_atual") or match.get("estoque") or 0
-                            ),
-                            estoque_minimo=estoque_min,
-                        )
-                        # Alguns campos podem ser NOT NULL no modelo
-                        try:
-                            setattr(novo, "preco_custo", preco_c)
-                        except Exception:
-                            pass
-                        session.add(novo)
-                        try:
-                            session.commit()
-                        except Exception as ex_commit:
-                            # Se falhar por UNIQUE, fazer rollback e retornar o existente
-                            try:
-                                session.rollback()
-                            except Exception:
-                                pass
-                            msg = str(ex_commit)
-                            if (
-                                "UNIQUE constraint failed: produtos.codigo_barras"
-                                in msg
-                            ):
-                                try:
-                                    # Procurar pelo código realmente utilizado na criação
-                                    codigo_alvo = (
-                                        getattr(novo, "codigo_barras", None) or valor
-                                    )
-                                    existente = (
-                                        session.query(Produto)
-                                        .filter_by(codigo_barras=codigo_alvo)
-                                        .first()
-                                    )
-                                    if existente:
-                                        return {
-                                            "id": existente.id,
-                                            "nome": existente.nome,
-                                            "preco": existente.preco_venda,
-                                            "estoque": existente.estoque_atual,
-                                        }
-                                    # Tentar sem zeros à esquerda tanto do valor quanto do código alvo
-                                    candidato = (codigo_alvo or "").lstrip("0")
-                                    existente2 = (
-                                        session.query(Produto)
-                                        .filter_by(codigo_barras=candidato)
-                                        .first()
-                                    )
-                                    if existente2:
-                                        return {
-                                            "id": existente2.id,
-                                            "nome": existente2.nome,
-                                            "preco": existente2.preco_venda,
-                                            "estoque": existente2.estoque_atual,
-                                        }
-                                except Exception:
-                                    pass
-                            # Se outro erro, propagar para o bloco externo
-                            raise ex_commit
-                        return {
-                            "id": novo.id,
-                            "nome": novo.nome,
-                            "preco": novo.preco_venda,
-                            "estoque": novo.estoque_atual,
-                        }
-                    except Exception as ex_create:
-                        try:
-                            session.rollback()
-                        except Exception:
-                            pass
-                        print(
-                            f"[DEVOLVER TROCAR] Erro ao criar Produto mínimo: {ex_create}"
-                        )
-        except Exception as ex_json:
-            print(f"[DEVOLVER TROCAR] Falha no fallback JSON: {ex_json}")
-
         return None
     except Exception as e:
         print(f"[DEVOLVER TROCAR] Erro ao buscar produto: {e}")
@@ -851,13 +705,18 @@ def criar_modal_devolver_trocar(
             },
         )
 
-    def atualizar_lista_vendas():
+    def atualizar_lista_vendas(termo: str = ""):
         """Atualiza a lista de vendas exibidas no modal"""
         vendas_column.controls.clear()
         estado["venda_selecionada"] = None
 
-        # Buscar vendas do caixa
-        vendas = buscar_vendas_do_caixa(pdv_core, usuario_responsavel, limite=20)
+        # Com termo: busca por número, transação ou código de barras vendido;
+        # sem termo: vendas recentes do caixa (itens já carregados em ambos)
+        termo = (termo or "").strip()
+        if termo:
+            vendas = buscar_vendas_para_devolucao(pdv_core, termo, limite=20)
+        else:
+            vendas = buscar_vendas_do_caixa(pdv_core, usuario_responsavel, limite=20)
 
         if not vendas:
             vendas_column.controls.append(
@@ -875,13 +734,12 @@ def criar_modal_devolver_trocar(
                 def handler(e):
                     print(f"[DEVOLVER TROCAR] Selecionada venda #{venda_data['id']}")
 
-                    # Processar devolução
-                    sucesso, mensagem, carrinho = processar_devolucao_e_trocar(
-                        pdv_core, venda_data["id"], usuario_responsavel
-                    )
+                    # Itens vieram junto com a venda (sem nova consulta)
+                    carrinho = venda_data.get("itens") or []
+                    mensagem = "Venda sem itens para trocar."
 
-                    if sucesso:
-                        # Registrar devoluções no JSON para aparecerem na tela de Devoluções
+                    if carrinho:
+                        # Registrar devoluções na tabela para aparecerem na tela de Devoluções
                         try:
                             from estoque.devolucoes import (
                                 registrar_devolucoes_por_venda,
@@ -894,11 +752,11 @@ def criar_modal_devolver_trocar(
                             )
                             if not registrado:
                                 print(
-                                    "[DEVOLVER TROCAR] Aviso: venda preparada para troca, mas não foi possível salvar em devolucoes.json"
+                                    "[DEVOLVER TROCAR] Aviso: venda preparada para troca, mas não foi possível registrar as devoluções"
                                 )
                         except Exception as ex_reg:
                             print(
-                                f"[DEVOLVER TROCAR] Erro ao registrar devoluções JSON: {ex_reg}"
+                                f"[DEVOLVER TROCAR] Erro ao registrar devoluções: {ex_reg}"
                             )
 
                         estado["venda_selecionada"] = venda_data["id"]
@@ -1006,6 +864,19 @@ def criar_modal_devolver_trocar(
             )
             vendas_column.controls.append(venda_row)
 
+    def on_buscar_venda(e):
+        atualizar_lista_vendas(campo_busca_venda.value)
+        page.update()
+
+    campo_busca_venda = ft.TextField(
+        hint_text="Nº da venda, transação ou código de barras",
+        prefix_icon=ft.Icons.SEARCH,
+        height=44,
+        text_size=12,
+        border_radius=8,
+        on_submit=on_buscar_venda,
+    )
+
     # Criar conteúdo do modal (UMA ÚNICA VEZ)
     # Painel esquerdo: Lista de vendas
     painel_vendas = ft.Column(
@@ -1016,6 +887,7 @@ def criar_modal_devolver_trocar(
                 weight=ft.FontWeight.BOLD,
                 color=TEXT_COLOR,
             ),
+            campo_busca_venda,
             ft.Container(
                 content=vendas_column,
                 height=300,
@@ -1070,16 +942,10 @@ def criar_modal_devolver_trocar(
                     from estoque.devolucoes import (
                         adicionar_troca,
                         atualizar_estoque_troca,
-                        carregar_devol,
+                        buscar_devolucao_para_troca,
                     )
 
-                    devs = carregar_devol() or []
                     venda_id_sel = estado.get("venda_selecionada")
-                    motivo_match = (
-                        f"Devolução/Troca da venda #{venda_id_sel}"
-                        if venda_id_sel
-                        else None
-                    )
 
                     # Mapa de quantidades por produto original
                     qtd_por_prod = {}
@@ -1100,43 +966,23 @@ def criar_modal_devolver_trocar(
                         if not prod_id:
                             continue
 
-                        # Encontrar devolução correspondente
-                        dev_alvo = None
-                        for d in devs:
-                            try:
-                                if int(d.get("produto_id") or 0) != prod_id:
-                                    continue
-                                if d.get("foi_trocado"):
-                                    continue
-                                if motivo_match and d.get("motivo") != motivo_match:
-                                    continue
-                                dev_alvo = d
-                                break
-                            except Exception:
-                                continue
-
-                        # Fallback: primeira devolução não trocada do mesmo produto
-                        if dev_alvo is None:
-                            for d in devs:
-                                try:
-                                    if int(
-                                        d.get("produto_id") or 0
-                                    ) == prod_id and not d.get("foi_trocado"):
-                                        dev_alvo = d
-                                        break
-                                except Exception:
-                                    continue
+                        # Devolução não trocada do produto (de preferência da
+                        # venda selecionada), buscada pelo índice da tabela
+                        dev_alvo = buscar_devolucao_para_troca(
+                            pdv_core, prod_id, venda_id_sel
+                        )
 
                         if dev_alvo:
                             try:
                                 adicionar_troca(
+                                    pdv_core,
                                     devolucao_id=int(dev_alvo.get("id")),
                                     novo_produto_id=int(novo_prod.get("id")),
                                     novo_produto_nome=str(novo_prod.get("nome")),
                                 )
                             except Exception as ex_add:
                                 print(
-                                    f"[DEVOLVER TROCAR] Erro ao marcar troca em JSON: {ex_add}"
+                                    f"[DEVOLVER TROCAR] Erro ao marcar troca: {ex_add}"
                                 )
 
                             # Atualizar estoque: original +, novo -
@@ -1300,6 +1146,7 @@ def criar_modal_devolver_trocar(
             pass
 
         # Atualizar lista de vendas
+        campo_busca_venda.value = ""
         atualizar_lista_vendas()
 
         # Limpar trocas anteriores
@@ -101,14 +101,12 @@ def create_price_check_overlay(
 def create_cancel_sale_dialog(
     COLORS: Dict[str, Any],
     vendas_dia: List[Dict[str, Any]],
-    produtos_por_codigo: Dict[str, Any],
     handle_confirm: Callable[[str, str, int, int], Tuple[bool, str]],
     on_close: Callable[[], None],
 ) -> ft.Container:
     """Cria o diálogo (F7) para estornar vendas.
 
-    - vendas_dia: lista de vendas (dicts) do dia
-    - produtos_por_codigo: mapa auxiliar para detalhar itens
+    - vendas_dia: lista de vendas (dicts) do dia, com os itens lidos do banco
     - handle_confirm: recebe (username, password, venda_id) e retorna (ok, msg)
     - on_close: callback de fechamento
     """
@@ -127,23 +125,15 @@ def create_cancel_sale_dialog(
                 or str(it.get("produto_id") or "").strip()
             )
             qtd = it.get("quantidade", 0)
-
-            pj = produtos_por_codigo.get(cod)
-            if pj:
-                nome = pj.get("nome") or pj.get("descricao") or "Produto"
-                pu = float(
-                    pj.get(
-                        "preco_venda", pj.get("preco", it.get("preco_unitario", 0.0))
-                    )
-                    or 0.0
-                )
-                pid = pj.get("id", "?")
+            nome = it.get("produto") or "Produto"
+            # preço praticado na venda (não o preço atual do catálogo)
+            pu = float(it.get("preco_unitario", 0.0) or 0.0)
+            pid = it.get("produto_id")
+            if pid is not None:
                 itens_parts.append(
                     f"{idx}) ID {pid} • {cod} - {nome} x{qtd} R$ {pu:.2f}"
                 )
             else:
-                nome = it.get("produto", "Produto")
-                pu = float(it.get("preco_unitario", 0.0))
                 itens_parts.append(f"{idx}) {cod or '?'} - {nome} x{qtd} R$ {pu:.2f}")
 
         if len(itens) > 3:
@@ -361,13 +351,7 @@ def create_cancel_sale_dialog(
             for it in itens:
                 # identificar item via id do item na venda ou índice
                 item_id = it.get("id") or it.get("produto_id")
-                nome = (
-                    it.get("produto")
-                    or produtos_por_codigo.get(
-                        str(it.get("codigo_barras") or it.get("produto_id") or ""), {}
-                    ).get("nome")
-                    or "Produto"
-                )
+                nome = it.get("produto") or "Produto"
                 qtd = it.get("quantidade", 0)
                 pu = float(it.get("preco_unitario", 0.0) or 0.0)
                 label = f"ID {item_id} • {nome} x{qtd} R$ {pu:.2f}"
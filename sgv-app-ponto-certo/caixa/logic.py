@@ -7,11 +7,8 @@ usa estas funções para montar UI e reagir a eventos.
 
 from __future__ import annotations
 
-import json
-import os
 from dataclasses import dataclass
-from types import SimpleNamespace
-from typing import Any, Dict, Iterable, List, Mapping, Sequence, Tuple
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
 
 
 @dataclass
@@ -23,25 +20,6 @@ class ProdutoBasico:
     codigo_barras: str | None = None
 
 
-def carregar_produtos_de_json(
-    dados: Sequence[Mapping[str, Any]],
-) -> List[SimpleNamespace]:
-    """Normaliza lista de dicts de produtos vindos do JSON.
-
-    Não toca em Flet, apenas normaliza campos e devolve objetos simples.
-    """
-
-    produtos: List[SimpleNamespace] = []
-    for p in dados:
-        p = dict(p)
-        p.setdefault("preco_venda", float(p.get("preco_venda", p.get("preco", 0.0))))
-        p.setdefault("codigo_barras", p.get("codigo", p.get("codigo_barras", "")))
-        p.setdefault("nome", p.get("nome", p.get("descricao", "Produto")))
-        p.setdefault("quantidade", int(p.get("quantidade", 0)))
-        produtos.append(SimpleNamespace(**p))
-    return produtos
-
-
 def montar_cache_produtos(
     produtos: Iterable[Any],
     overlay_por_codigo: Mapping[str, Any] | None = None,
@@ -132,41 +110,6 @@ def validar_estoque_disponivel(
     return True, None
 
 
-def persistir_estoque_json(
-    caminho_arquivo: str, cart_data: Mapping[str, Mapping[str, Any]]
-) -> None:
-    """Atualiza o arquivo JSON de produtos decrementando as quantidades vendidas.
-
-    Esta função não conhece Flet nem UI; apenas lê e escreve JSON.
-    """
-
-    if not os.path.exists(caminho_arquivo):
-        print(f"⚠️ Não encontrou {caminho_arquivo} para persistir estoque")
-        return
-
-    try:
-        with open(caminho_arquivo, "r", encoding="utf-8") as f:
-            dados = json.load(f)
-
-        for codigo, item in list(cart_data.items()):
-            vendida = int(item.get("qtd", 0))
-            if vendida <= 0:
-                continue
-            for p in dados:
-                p_codigo = str(
-                    p.get("codigo_barras", p.get("codigo", p.get("id", "")))
-                ).strip()
-                if p_codigo == str(codigo).strip():
-                    p["quantidade"] = max(0, int(p.get("quantidade", 0)) - vendida)
-                    break
-
-        with open(caminho_arquivo, "w", encoding="utf-8") as f:
-            json.dump(dados, f, ensure_ascii=False, indent=2)
-        print("✅ Estoque atualizado em produtos.json após venda")
-    except Exception as e:
-        print(f"❌ Falha ao persistir estoque: {e}")
-
-
 def montar_payload_pix(
     merchant_name: str,
     valor_total: float,
@@ -1,11 +1,8 @@
-import json
-import os
-from types import SimpleNamespace
 from typing import Any, Dict
 
 import flet as ft
 
-from .logic import carregar_produtos_de_json, montar_cache_produtos
+from .logic import montar_cache_produtos
 
 
 def carregar_produtos_cache(
@@ -16,7 +13,7 @@ def carregar_produtos_cache(
     cache_marker: object,
     force_reload: bool = False,
 ) -> bool:
-    """Carrega produtos em cache combinando JSON e banco via pdv_core.
+    """Carrega produtos em cache a partir do banco via pdv_core.
 
     Atualiza `produtos_cache` e marca `cache_loaded_ref.current = cache_marker` quando concluído.
     Retorna True em sucesso, False caso contrário.
@@ -29,25 +26,10 @@ def carregar_produtos_cache(
 
     try:
         produtos = []
-        base_dir = os.path.dirname(os.path.dirname(__file__))
-        arquivo = os.path.join(base_dir, "data", "produtos.json")
-        if os.path.exists(arquivo):
-            try:
-                with open(arquivo, "r", encoding="utf-8") as f:
-                    dados = json.load(f)
-                produtos = carregar_produtos_de_json(dados)
-                print(f"✅ Carregou {len(produtos)} produtos de {arquivo} (priorizado)")
-            except Exception as e:
-                print(f" Falha ao ler {arquivo}: {e}")
-
-        if not produtos:
-            pdv_core_local = page.app_data.get("pdv_core")
-            if not pdv_core_local:
-                print(
-                    " pdv_core não encontrado em page.app_data e produtos.json vazio!"
-                )
-                return False
 
+        # Banco é a fonte de verdade do catálogo (mesma base da tela de Estoque)
+        pdv_core_local = page.app_data.get("pdv_core") or pdv_core
+        if pdv_core_local is not None:
             if hasattr(pdv_core_local, "get_produtos_list"):
                 produtos = pdv_core_local.get_produtos_list()
                 print(
@@ -60,48 +42,16 @@ def carregar_produtos_cache(
                 )
             else:
                 print(" Nenhum método de busca de produtos encontrado no pdv_core!")
-                return False
+        else:
+            print(" pdv_core não encontrado em page.app_data!")
 
+        # produtos.json é apenas exportação: o caixa não vende com dados dele
         if not produtos:
-            print(
-                " Nenhum produto disponível após tentativas de fallback (json e pdv_core)"
-            )
+            print(" Nenhum produto disponível no banco (pdv_core)")
             return False
 
-        id_map = {}
-        for p in produtos:
-            if isinstance(p, dict):
-                id_map[str(p.get("id", "")).strip()] = p
-            else:
-                id_map[str(getattr(p, "id", "")).strip()] = p
-
-        extra_mappings = {}
-        if os.path.exists(arquivo):
-            try:
-                with open(arquivo, "r", encoding="utf-8") as f:
-                    dados_json = json.load(f)
-                for pj in dados_json:
-                    cod = str(pj.get("codigo_barras") or pj.get("codigo", "")).strip()
-                    idv = str(pj.get("id", "")).strip()
-                    if not cod:
-                        continue
-                    if idv and idv in id_map:
-                        extra_mappings[cod] = id_map[idv]
-                    else:
-                        pj.setdefault(
-                            "preco_venda",
-                            float(pj.get("preco_venda", pj.get("preco", 0.0))),
-                        )
-                        pj.setdefault(
-                            "nome", pj.get("nome", pj.get("descricao", "Produto"))
-                        )
-                        pj.setdefault("quantidade", int(pj.get("quantidade", 0)))
-                        extra_mappings[cod] = SimpleNamespace(**pj)
-            except Exception as e:
-                print(f" Falha ao ler {arquivo} para overlay de códigos: {e}")
-
         produtos_cache.clear()
-        produtos_cache.update(montar_cache_produtos(produtos, extra_mappings))
+        produtos_cache.update(montar_cache_produtos(produtos))
 
         cache_loaded_ref.current = cache_marker
         sample_keys = list(produtos_cache.keys())[:10]
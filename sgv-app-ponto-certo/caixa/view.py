@@ -5,8 +5,6 @@
 """
 
 import io
-import json
-import os
 import re
 import threading
 import time
@@ -31,7 +29,6 @@ from .logic import (
     calcular_troco,
     montar_itens_cupom,
     montar_payload_pix,
-    persistir_estoque_json,
     validar_estoque_disponivel,
 )
 from .manipuladores import build_caixa_keyboard_handler
@@ -291,7 +288,7 @@ def create_caixa_view(
 
     # leitura por câmera removida — operação mantida apenas por código de barras
 
-    # Carrega produtos para o cache a partir do JSON e/ou banco (pdv_core)
+    # Carrega produtos para o cache a partir do banco (pdv_core)
     def carregar_produtos_cache(force_reload: bool = False) -> bool:
         return carregar_produtos_cache_repo(
             page=page,
@@ -637,6 +634,17 @@ def create_caixa_view(
                 page.update()
                 return
 
+            # preço e estoque lidos do banco na hora (o cache só localiza o
+            # produto pelo código e pode estar defasado após vendas/edições)
+            atual = None
+            try:
+                atual = pdv_core.buscar_produto(
+                    getattr(produto, "codigo_barras", None) or codigo
+                )
+            except Exception:
+                pass
+            if atual is not None:
+                produto = atual
             if isinstance(produto, dict):
                 nome = produto.get("nome", "")
                 preco = float(produto.get("preco_venda", 0.0))
@@ -646,27 +654,6 @@ def create_caixa_view(
                 preco = float(getattr(produto, "preco_venda", 0.0))
                 estoque = int(getattr(produto, "estoque_atual", 0))
 
-            # Fallback: se estoque vier 0 (ex.: objeto do banco sem sincronizar),
-            # tentar obter a quantidade real do JSON que alimenta a tela de Estoque.
-            try:
-                if estoque <= 0:
-                    base_dir = os.path.dirname(os.path.dirname(__file__))
-                    arquivo = os.path.join(base_dir, "data", "produtos.json")
-                    if os.path.exists(arquivo):
-                        with open(arquivo, "r", encoding="utf-8") as f:
-                            dados_json = json.load(f)
-                        for pj in dados_json:
-                            cod_json = str(
-                                pj.get("codigo_barras") or pj.get("codigo") or ""
-                            ).strip()
-                            if cod_json == codigo:
-                                estoque_json = int(pj.get("quantidade", 0))
-                                if estoque_json > 0:
-                                    estoque = estoque_json
-                                break
-            except Exception:
-                pass
-
             ov_res = getattr(price_check_overlay, "__result_text__", None)
             if ov_res:
                 ov_res.value = f"{nome} — R$ {preco:.2f} — Estoque: {estoque}"
@@ -816,22 +803,6 @@ def create_caixa_view(
             show_snackbar("Nenhuma venda encontrada para hoje.", COLORS["warning"])
             return
 
-        # Carrega produtos do JSON para detalhar itens (nome, preço, id)
-        produtos_por_codigo = {}
-        try:
-            base_dir = os.path.dirname(os.path.dirname(__file__))
-            arquivo = os.path.join(base_dir, "data", "produtos.json")
-            if os.path.exists(arquivo):
-                with open(arquivo, "r", encoding="utf-8") as f:
-                    dados_json = json.load(f)
-                for pj in dados_json:
-                    cod = str(pj.get("codigo_barras") or pj.get("codigo") or "").strip()
-                    if not cod:
-                        continue
-                    produtos_por_codigo[cod] = pj
-        except Exception as ex:
-            print(f"[F7] Erro ao carregar produtos.json para detalhes da venda: {ex}")
-
         def close_cancel_sale_dialog(e=None):
             try:
                 pass
@@ -1040,19 +1011,7 @@ def create_caixa_view(
                     )
                 except Exception:
                     pass
-                # Registrar devoluções (estorno) no arquivo consumido pela tela de Devoluções
-                try:
-                    from estoque.devolucoes import registrar_devolucoes_por_venda
-
-                    registrado = registrar_devolucoes_por_venda(
-                        pdv_core, venda_id, motivo=f"Estorno da venda #{venda_id}"
-                    )
-                    if not registrado:
-                        print(
-                            "[F7] Aviso: estorno registrado no banco, mas não foi possível salvar em devolucoes.json"
-                        )
-                except Exception as ex_reg:
-                    print(f"[F7] Erro ao registrar devoluções JSON: {ex_reg}")
+                # As devoluções já são registradas por estornar_venda/estornar_item
             return ok, msg
 
         cancel_sale_dialog_ref = ft.Ref[ft.AlertDialog]()
@@ -1066,7 +1025,6 @@ def create_caixa_view(
                 page._cancel_sale_overlay = create_cancel_sale_dialog(
                     COLORS,
                     vendas_dia,
-                    produtos_por_codigo,
                     handle_confirm=handle_confirm,
                     on_close=close_cancel_sale_dialog,
                 )
@@ -1080,7 +1038,6 @@ def create_caixa_view(
             page._cancel_sale_overlay = create_cancel_sale_dialog(
                 COLORS,
                 vendas_dia,
-                produtos_por_codigo,
                 handle_confirm=handle_confirm,
                 on_close=close_cancel_sale_dialog,
             )
@@ -1826,11 +1783,12 @@ def create_caixa_view(
         except Exception:
             pass
 
-    # Atualiza o JSON de estoque com base no carrinho (pós-venda)
+    # Pós-venda: o estoque já foi baixado no banco por pdv_core.finalizar_venda
     def persistir_estoque_apos_venda():
-        base_dir = os.path.dirname(os.path.dirname(__file__))
-        caminho = os.path.join(base_dir, "data", "produtos.json")
-        persistir_estoque_json(caminho, cart_data)
+        try:
+            pdv_core.session.expire_all()
+        except Exception:
+            pass
 
     # Busca um produto no cache pelo identificador
     def get_product_from_cache(product_id):
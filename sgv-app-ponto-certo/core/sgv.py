@@ -7,22 +7,50 @@ pelas telas (login, caixa, estoque, fornecedores, financeiro, etc.).
 
 import json
 import os
-from datetime import date, datetime
-
-from sqlalchemy import func
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import (
+    DateTime,
+    and_,
+    bindparam,
+    String,
+    case,
+    exists,
+    false,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    true,
+    update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
+from estoque.busca import normalizar_busca
+from estoque.custos import registrar_custos_manuais
+from estoque.lotes import conciliar_lotes, selecionar_fefo
 from models.db_models import (
+    DEFICIT_ESTOQUE,
+    AlertaEstado,
+    ESTOQUE_MINIMO_PADRAO,
     CaixaSchedule,
     CaixaSession,
+    CodigoProdutoFornecedor,
+    Devolucao,
     Expense,
     Fornecedor,
+    ImportedXml,
     ItemVenda,
+    LoteProduto,
     MovimentoFinanceiro,
+    PrecoFornecedor,
     Produto,
     Receivable,
     User,
     Venda,
+    validade_para_date,
 )
 
 # Hash de senha com passlib: priorizar pbkdf2_sha256 (mais portátil),
@@ -65,6 +93,18 @@ def _hash_password_prefer_portable(password: str) -> str:
     return password
 
 
+def _faixa_prefixo(coluna, prefixo):
+    """Condição "coluna começa com prefixo" como faixa, usável por índice."""
+    return and_(coluna >= prefixo, coluna < prefixo + "\U0010ffff")
+
+
+def _documento_emitente(nota):
+    """CNPJ (ou CPF) do emitente de uma NF-e lida por `parse_nfe`, só dígitos."""
+    emitente = nota.get("emitente") or {}
+    bruto = emitente.get("cnpj") or emitente.get("cpf") or ""
+    return "".join(filter(str.isdigit, bruto))
+
+
 class PDVCore:
     """Classe principal de lógica de negócios para o SGV.
 
@@ -82,6 +122,10 @@ class PDVCore:
         base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
         self._config_dir = os.path.join(base_dir, "data")
         self._config_file = os.path.join(self._config_dir, "app_config.json")
+        # Ouvintes avisados após gravações que alteram o estoque de produtos
+        self._ouvintes_estoque = []
+        # Ouvintes avisados após gravações em contas a pagar (despesas)
+        self._ouvintes_contas = []
 
     # ====================================================================
     # CONFIGURAÇÕES (IMPRESSORA)
@@ -336,6 +380,7 @@ class PDVCore:
             )
 
         total_venda = 0.0
+        alterados = set()
         try:
             # trata caso usuario_id venha None ou usuário não seja encontrado
             usuario = self.get_user_by_id(usuario_id) if usuario_id else None
@@ -380,32 +425,28 @@ class PDVCore:
                         produto = None
 
                 # Registrar item usando preço do carrinho; se produto foi criado, vincular o id
+                # e gravar o custo vigente para cálculo de lucro real
                 item_venda = ItemVenda(
                     venda_id=venda.id,
                     produto_id=(produto.id if produto else None),
                     quantidade=qtd,
                     preco_unitario=preco_ui,
+                    custo_unitario=(produto.preco_custo if produto else None),
                 )
                 self.session.add(item_venda)
                 total_venda += preco_ui * qtd
-                # Se produto criado acima, não atualizamos estoque (mantém 0)
-                continue
 
-                if (produto.estoque_atual or 0) < qtd:
-                    raise Exception(f"Estoque insuficiente para {produto.nome}")
-                produto.estoque_atual = (produto.estoque_atual or 0) - qtd
-
-                item_venda = ItemVenda(
-                    venda_id=venda.id,
-                    produto_id=produto.id,
-                    quantidade=qtd,
-                    preco_unitario=produto.preco_venda,
-                )
-                self.session.add(item_venda)
-                total_venda += float(produto.preco_venda) * qtd
+                # Baixa o estoque no banco (fonte de verdade do catálogo);
+                # o Caixa já validou a disponibilidade, então apenas evita negativo
+                if produto is not None:
+                    produto.estoque_atual = max(0, (produto.estoque_atual or 0) - qtd)
+                    alterados.add(produto.id)
 
             venda.total = total_venda
+            # baixa dos lotes em ordem FEFO
+            conciliar_lotes(self.session, alterados)
             self.session.commit()
+            self.notificar_estoque_alterado(alterados)
             troco = max(0.0, valor_pago - total_venda)
             return True, total_venda, troco
         except Exception as e:
@@ -413,6 +454,44 @@ class PDVCore:
             print(f"[ERRO FINALIZAR_VENDA] {e}")
             return False, str(e), 0.0
 
+    # ====================================================================
+    # EVENTOS DE ESTOQUE E CONTAS
+    # ====================================================================
+
+    def registrar_ouvinte_estoque(self, ouvinte):
+        """Registra `ouvinte(pdv_core, produto_ids)` para alterações de estoque.
+
+        `produto_ids` é o conjunto de produtos alterados, ou None quando a
+        alteração foi em massa (ex.: importação) e tudo deve ser reavaliado.
+        """
+        if ouvinte not in self._ouvintes_estoque:
+            self._ouvintes_estoque.append(ouvinte)
+
+    def notificar_estoque_alterado(self, produto_ids=None):
+        """Avisa os ouvintes de que o estoque dos produtos informados mudou."""
+        if produto_ids is not None:
+            produto_ids = {int(i) for i in produto_ids if i is not None}
+            if not produto_ids:
+                return
+        for ouvinte in list(self._ouvintes_estoque):
+            try:
+                ouvinte(self, produto_ids)
+            except Exception as e:
+                print(f"[CORE] Erro ao notificar alteração de estoque: {e}")
+
+    def registrar_ouvinte_contas(self, ouvinte):
+        """Registra `ouvinte(pdv_core)` para gravações em contas a pagar."""
+        if ouvinte not in self._ouvintes_contas:
+            self._ouvintes_contas.append(ouvinte)
+
+    def notificar_contas_alteradas(self):
+        """Avisa os ouvintes de que as contas a pagar mudaram."""
+        for ouvinte in list(self._ouvintes_contas):
+            try:
+                ouvinte(self)
+            except Exception as e:
+                print(f"[CORE] Erro ao notificar alteração de contas: {e}")
+
     # ====================================================================
     # MÉTODOS DE INVENTÁRIO/PRODUTO
     # ====================================================================
@@ -425,12 +504,15 @@ class PDVCore:
         """
         cod = dados_produto["codigo_barras"]
         produto = self.session.query(Produto).filter_by(codigo_barras=cod).first()
+        custo_anterior = produto.preco_custo if produto else None
         try:
             if produto:
+                # estoque anterior fica no lote que já tinha
+                conciliar_lotes(self.session, [produto.id])
                 produto.nome = dados_produto["nome"]
                 produto.preco_custo = dados_produto["preco_custo"]
                 produto.preco_venda = dados_produto["preco_venda"]
-                produto.validade = dados_produto["validade"]
+                produto.validade = validade_para_date(dados_produto["validade"])
                 produto.estoque_atual += dados_produto["quantidade"]
                 acao = "atualizado (Entrada de estoque)"
             else:
@@ -440,12 +522,16 @@ class PDVCore:
                     preco_custo=dados_produto["preco_custo"],
                     preco_venda=dados_produto["preco_venda"],
                     estoque_atual=dados_produto["quantidade"],
-                    validade=dados_produto["validade"],
+                    validade=validade_para_date(dados_produto["validade"]),
                 )
                 self.session.add(produto)
                 acao = "cadastrado"
 
+            self._registrar_custo_manual(produto, custo_anterior)
+            # a entrada vira lote com a validade informada
+            conciliar_lotes(self.session, [produto.id])
             self.session.commit()
+            self.notificar_estoque_alterado([produto.id])
             return True, f"Produto '{produto.nome}' {acao} com sucesso!"
         except Exception as e:
             self.session.rollback()
@@ -453,6 +539,116 @@ class PDVCore:
                 return False, "Erro: Código de Barras já cadastrado."
             return False, f"Erro ao {acao}: {e}"
 
+    # ------------------------------------------------------------------
+    # Histórico de custos por fornecedor
+    # ------------------------------------------------------------------
+    def _registrar_custo_manual(self, produto, custo_anterior):
+        """Grava no histórico (precos_fornecedor) a edição manual do custo.
+
+        Só registra quando o custo mudou; o fornecedor é o do cadastro do
+        produto (sem fornecedor o registro não entra no melhor custo, veja
+        `melhores_custos`). Não faz commit: entra na transação da edição.
+        """
+        if produto.id is None:
+            self.session.flush()
+        registrar_custos_manuais(
+            self.session,
+            [
+                (
+                    produto.id,
+                    produto.fornecedor_id,
+                    custo_anterior,
+                    produto.preco_custo,
+                )
+            ],
+        )
+
+    def melhores_custos(self, produto_ids=None, dias=180):
+        """Melhor custo recente de cada produto entre os fornecedores.
+
+        Para cada par (produto, fornecedor) vale o último custo registrado
+        nos últimos `dias`; o menor desses é o melhor custo do produto.
+        Registros sem fornecedor (edição manual de produto sem fornecedor no
+        cadastro) ficam só no histórico: não concorrem como melhor custo. A
+        consulta percorre o índice (produto_id, fornecedor_id, data) de
+        precos_fornecedor. `produto_ids` None = todos os produtos. Retorna
+        {produto_id: {"custo", "fornecedor_id", "fornecedor_nome", "data"}},
+        só para produtos com histórico no período.
+        """
+        consulta = select(
+            PrecoFornecedor.produto_id,
+            PrecoFornecedor.fornecedor_id,
+            PrecoFornecedor.custo,
+            PrecoFornecedor.data,
+            func.row_number()
+            .over(
+                partition_by=(
+                    PrecoFornecedor.produto_id,
+                    PrecoFornecedor.fornecedor_id,
+                ),
+                order_by=(PrecoFornecedor.data.desc(), PrecoFornecedor.id.desc()),
+            )
+            .label("ordem"),
+        ).where(
+            PrecoFornecedor.fornecedor_id.is_not(None),
+            PrecoFornecedor.data >= date.today() - timedelta(days=dias),
+        )
+        if produto_ids is not None:
+            ids = {int(pid) for pid in produto_ids if pid}
+            if not ids:
+                return {}
+            consulta = consulta.where(PrecoFornecedor.produto_id.in_(ids))
+        ultimos = consulta.subquery()
+        linhas = self.session.execute(
+            select(
+                ultimos.c.produto_id,
+                ultimos.c.fornecedor_id,
+                ultimos.c.custo,
+                ultimos.c.data,
+                Fornecedor.nome_razao_social,
+            )
+            .outerjoin(Fornecedor, Fornecedor.id == ultimos.c.fornecedor_id)
+            .where(ultimos.c.ordem == 1)
+            .order_by(ultimos.c.produto_id, ultimos.c.custo, ultimos.c.data.desc())
+        )
+        melhores = {}
+        for produto_id, fornecedor_id, custo, data, nome in linhas:
+            melhores.setdefault(
+                produto_id,
+                {
+                    "custo": custo,
+                    "fornecedor_id": fornecedor_id,
+                    "fornecedor_nome": nome,
+                    "data": data,
+                },
+            )
+        return melhores
+
+    def historico_custos_produto(self, produto_id, limite=50):
+        """Custos registrados de um produto, do mais recente ao mais antigo.
+
+        Cada item: data, custo, origem ("nfe"/"manual"), chave_nfe,
+        fornecedor_id e fornecedor_nome (compara fornecedores sem reler XMLs).
+        """
+        linhas = self.session.execute(
+            select(PrecoFornecedor, Fornecedor.nome_razao_social)
+            .outerjoin(Fornecedor, Fornecedor.id == PrecoFornecedor.fornecedor_id)
+            .where(PrecoFornecedor.produto_id == produto_id)
+            .order_by(PrecoFornecedor.data.desc(), PrecoFornecedor.id.desc())
+            .limit(limite)
+        )
+        return [
+            {
+                "data": preco.data,
+                "custo": preco.custo,
+                "origem": preco.origem,
+                "chave_nfe": preco.chave_nfe,
+                "fornecedor_id": preco.fornecedor_id,
+                "fornecedor_nome": nome,
+            }
+            for preco, nome in linhas
+        ]
+
     def get_produtos_list(self):
         """Retorna lista de produtos ordenada pelo nome."""
         # Garantir dados frescos antes de consultar
@@ -469,9 +665,11 @@ class PDVCore:
         """
         self.session.expire_all()
         produtos = self.session.query(Produto).all()
+        melhores = self.melhores_custos()
         relatorio = []
         for p in produtos:
             margem_lucro = p.preco_venda - p.preco_custo if p.preco_custo > 0 else 0
+            melhor = melhores.get(p.id) or {}
             relatorio.append(
                 {
                     "id": p.id,
@@ -481,10 +679,282 @@ class PDVCore:
                     "custo": p.preco_custo,
                     "venda": p.preco_venda,
                     "margem": margem_lucro,
+                    "melhor_custo": melhor.get("custo"),
+                    "melhor_fornecedor": melhor.get("fornecedor_nome"),
                 }
             )
         return relatorio
 
+    def listar_estoque_baixo(self, pagina=1, por_pagina=50, ocultar_tratados=False):
+        """Produtos ativos abaixo do estoque mínimo, do maior para o menor déficit.
+
+        Usa o mínimo de cada produto (`estoque_minimo`) ou, se vazio,
+        ESTOQUE_MINIMO_PADRAO; a consulta percorre o índice parcial
+        `ix_produtos_deficit_estoque`. Com `ocultar_tratados`, omite os
+        produtos cujo alerta foi resolvido/descartado. Retorna dict com `itens`
+        (id, codigo, nome, estoque_atual, estoque_minimo, falta e, para a
+        sugestão de compra, melhor_custo/melhor_fornecedor de
+        `melhores_custos`), `total`, `pagina` e `por_pagina`.
+        """
+        pagina = max(1, int(pagina or 1))
+        filtro = (Produto.ativo == true(), DEFICIT_ESTOQUE > 0)
+        if ocultar_tratados:
+            filtro += (~exists().where(AlertaEstado.produto_id == Produto.id),)
+        total = self.session.query(func.count(Produto.id)).filter(*filtro).scalar()
+        linhas = (
+            self.session.query(
+                Produto.id,
+                Produto.codigo_barras,
+                Produto.nome,
+                Produto.estoque_atual,
+                Produto.estoque_minimo,
+                DEFICIT_ESTOQUE.label("falta"),
+            )
+            .filter(*filtro)
+            .order_by(DEFICIT_ESTOQUE.desc(), Produto.id.desc())
+            .limit(por_pagina)
+            .offset((pagina - 1) * por_pagina)
+            .all()
+        )
+        itens = [
+            {
+                "id": linha.id,
+                "codigo": linha.codigo_barras or "",
+                "nome": linha.nome,
+                "estoque_atual": int(linha.estoque_atual or 0),
+                "estoque_minimo": (
+                    ESTOQUE_MINIMO_PADRAO
+                    if linha.estoque_minimo is None
+                    else int(linha.estoque_minimo)
+                ),
+                "falta": int(linha.falta),
+            }
+            for linha in linhas
+        ]
+        melhores = self.melhores_custos([item["id"] for item in itens])
+        for item in itens:
+            melhor = melhores.get(item["id"]) or {}
+            item["melhor_custo"] = melhor.get("custo")
+            item["melhor_fornecedor"] = melhor.get("fornecedor_nome")
+        return {
+            "itens": itens,
+            "total": int(total or 0),
+            "pagina": pagina,
+            "por_pagina": por_pagina,
+        }
+
+    # ====================================================================
+    # ALERTAS TRATADOS (RESOLVIDOS / NÃO APLICÁVEIS)
+    # ====================================================================
+
+    def marcar_alertas(self, alerta_ids, status, dados=None):
+        """Grava o tratamento de vários alertas em uma única transação.
+
+        `status` é "resolvido" ou "nao_aplicavel"; `dados` (opcional) mapeia
+        alerta_id -> retrato do alerta. Alertas já tratados são sobrescritos.
+        Retorna a quantidade gravada (0 em caso de erro).
+        """
+        if status not in ("resolvido", "nao_aplicavel"):
+            raise ValueError(f"Status de alerta inválido: {status}")
+        ids = list(dict.fromkeys(a for a in alerta_ids if a))
+        if not ids:
+            return 0
+        agora = datetime.now()
+        dados = dados or {}
+        linhas = []
+        for alerta_id in ids:
+            prefixo, _, sufixo = alerta_id.partition("_")
+            linhas.append(
+                {
+                    "alerta_id": alerta_id,
+                    "produto_id": (
+                        int(sufixo)
+                        if prefixo == "produto" and sufixo.isdigit()
+                        else None
+                    ),
+                    "status": status,
+                    "data_resolucao": agora,
+                    "dados": (
+                        json.dumps(dados[alerta_id], ensure_ascii=False)
+                        if alerta_id in dados
+                        else None
+                    ),
+                }
+            )
+        try:
+            stmt = sqlite_insert(AlertaEstado)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[AlertaEstado.alerta_id],
+                set_={
+                    "status": stmt.excluded.status,
+                    "data_resolucao": stmt.excluded.data_resolucao,
+                    "dados": func.coalesce(stmt.excluded.dados, AlertaEstado.dados),
+                },
+            )
+            self.session.execute(stmt, linhas)
+            self.session.commit()
+            return len(linhas)
+        except Exception as e:
+            self.session.rollback()
+            print(f"❌ ERRO ao gravar alertas tratados: {e}")
+            return 0
+
+    def produtos_com_alerta_tratado(self):
+        """Ids dos produtos cujo alerta de estoque foi resolvido/descartado."""
+        return set(
+            self.session.scalars(
+                select(AlertaEstado.produto_id).where(
+                    AlertaEstado.produto_id.isnot(None)
+                )
+            )
+        )
+
+    def obter_estado_alerta(self, alerta_id):
+        """Tratamento registrado de um alerta (dict) ou None se estiver ativo."""
+        estado = self.session.query(AlertaEstado).filter_by(alerta_id=alerta_id).first()
+        if not estado:
+            return None
+        resultado = json.loads(estado.dados) if estado.dados else {}
+        resultado.update(
+            {
+                "alerta_id": estado.alerta_id,
+                "status": estado.status,
+                "data_resolucao": estado.data_resolucao.isoformat(),
+            }
+        )
+        return resultado
+
+    def reabrir_alertas_estoque(self, produto_ids=None):
+        """Apaga o tratamento dos alertas de produtos que saíram do déficit.
+
+        Se o produto voltar a ficar abaixo do mínimo, o alerta reaparece.
+        `produto_ids=None` verifica todos os alertas de estoque tratados.
+        """
+        try:
+            em_deficit = self.session.query(Produto.id).filter(
+                Produto.ativo == true(), DEFICIT_ESTOQUE > 0
+            )
+            query = self.session.query(AlertaEstado).filter(
+                AlertaEstado.produto_id.isnot(None),
+                AlertaEstado.produto_id.notin_(em_deficit),
+            )
+            if produto_ids is not None:
+                query = query.filter(AlertaEstado.produto_id.in_(list(produto_ids)))
+            removidos = query.delete(synchronize_session=False)
+            self.session.commit()
+            return removidos
+        except Exception as e:
+            self.session.rollback()
+            print(f"❌ ERRO ao reabrir alertas de estoque: {e}")
+            return 0
+
+    def limpar_alertas_tratados(self, antes_de):
+        """Remove, em um único DELETE, os alertas tratados antes de `antes_de`."""
+        try:
+            removidos = (
+                self.session.query(AlertaEstado)
+                .filter(
+                    AlertaEstado.status.in_(("resolvido", "nao_aplicavel")),
+                    AlertaEstado.data_resolucao < antes_de,
+                )
+                .delete(synchronize_session=False)
+            )
+            self.session.commit()
+            return removidos
+        except Exception as e:
+            self.session.rollback()
+            print(f"❌ ERRO ao limpar alertas tratados: {e}")
+            return 0
+
+    # ====================================================================
+    # VALIDADE E LOTES (FEFO)
+    # ====================================================================
+
+    def contar_validade(self, dias=30, hoje=None):
+        """Conta os produtos ativos vencidos e os que vencem em até `dias` dias.
+
+        Uma única consulta por faixa de data (índice de `produtos.validade`).
+        Retorna dict com `vencidos` e `vencendo`.
+        """
+        hoje = hoje or date.today()
+        limite = hoje + timedelta(days=dias)
+        vencidos, vencendo = (
+            self.session.query(
+                func.coalesce(func.sum(case((Produto.validade < hoje, 1), else_=0)), 0),
+                func.coalesce(
+                    func.sum(case((Produto.validade >= hoje, 1), else_=0)), 0
+                ),
+            )
+            .filter(Produto.ativo.is_(True), Produto.validade <= limite)
+            .one()
+        )
+        return {"vencidos": int(vencidos), "vencendo": int(vencendo)}
+
+    def lotes_vencendo(self, dias=30, incluir_vencidos=False, hoje=None):
+        """Lotes com saldo que vencem em até `dias` dias (ordem de validade)."""
+        hoje = hoje or date.today()
+        query = self.session.query(LoteProduto).filter(
+            LoteProduto.validade <= hoje + timedelta(days=dias),
+            LoteProduto.quantidade > 0,
+        )
+        if not incluir_vencidos:
+            query = query.filter(LoteProduto.validade >= hoje)
+        return query.order_by(LoteProduto.validade, LoteProduto.id).all()
+
+    def registrar_lote(self, produto_id, quantidade, validade=None, lote=None):
+        """Registra a entrada de um lote e soma a quantidade ao estoque do produto.
+
+        A validade/lote exibidos no produto passam a ser os do próximo lote a
+        vencer. Retorna (sucesso, mensagem).
+        """
+        produto = self.session.get(Produto, produto_id)
+        if produto is None:
+            return False, "Produto não encontrado."
+        try:
+            qtd = int(quantidade)
+        except (TypeError, ValueError):
+            qtd = 0
+        if qtd <= 0:
+            return False, "A quantidade do lote deve ser maior que zero."
+        try:
+            # estoque anterior aos lotes fica com a validade que já exibia
+            conciliar_lotes(self.session, [produto.id])
+            produto.validade = validade_para_date(validade)
+            produto.lote = lote or None
+            produto.estoque_atual = (produto.estoque_atual or 0) + qtd
+            conciliar_lotes(self.session, [produto.id])
+            self.session.commit()
+            self.notificar_estoque_alterado([produto.id])
+            return True, f"Lote registrado para '{produto.nome}'."
+        except Exception as e:
+            self.session.rollback()
+            return False, f"Erro ao registrar lote: {e}"
+
+    def selecionar_lotes_fefo(self, produto_id, quantidade, hoje=None):
+        """Escolhe os lotes para retirar `quantidade` (primeiro a vencer, primeiro a sair).
+
+        Usa a mesma regra da baixa das vendas (`estoque.lotes.selecionar_fefo`):
+        lotes não vencidos do mais próximo ao mais distante, sem validade por
+        último, e só então os vencidos. Retorna lista de (lote,
+        quantidade_retirada); se o saldo não cobrir o pedido, a soma fica
+        abaixo de `quantidade`.
+        """
+        lotes = {
+            lote.id: lote
+            for lote in self.session.query(LoteProduto).filter(
+                LoteProduto.produto_id == produto_id, LoteProduto.quantidade > 0
+            )
+        }
+        selecao = selecionar_fefo(
+            (
+                {"id": l.id, "validade": l.validade, "quantidade": l.quantidade}
+                for l in lotes.values()
+            ),
+            quantidade,
+            hoje or date.today(),
+        )
+        return [(lotes[l["id"]], retirar) for l, retirar in selecao]
+
     def buscar_vendas_detalhadas(self):
         """Retorna vendas com informações resumidas para relatórios.
 
@@ -552,6 +1022,7 @@ class PDVCore:
                             "codigo_barras": codigo,
                             "quantidade": it.quantidade,
                             "preco_unitario": it.preco_unitario,
+                            "custo_unitario": it.custo_unitario,
                         }
                     )
 
@@ -574,6 +1045,14 @@ class PDVCore:
                         "status": v.status,
                         "descricao_breve": f"Venda {v.id}",
                         "itens": itens_list,
+                        "lucro": sum(
+                            (it["quantidade"] or 0)
+                            * (
+                                (it["preco_unitario"] or 0.0)
+                                - (it["custo_unitario"] or 0.0)
+                            )
+                            for it in itens_list
+                        ),
                     }
                 )
 
@@ -585,6 +1064,35 @@ class PDVCore:
             print(f"Erro em buscar_vendas_por_intervalo: {ex}")
             return []
 
+    def calcular_lucro_bruto_periodo(
+        self, start_dt: datetime, end_dt: datetime, forma_pagamento: str = None
+    ):
+        """Retorna o lucro bruto (venda - custo) das vendas no intervalo.
+
+        Usa o custo gravado em cada `ItemVenda` no momento da venda, com um
+        único SUM agregado (sem consultar `produtos`). Vendas ESTORNADAS são
+        ignoradas; `forma_pagamento` opcional filtra pelo meio de pagamento.
+        """
+        try:
+            lucro_item = ItemVenda.quantidade * (
+                ItemVenda.preco_unitario - func.coalesce(ItemVenda.custo_unitario, 0.0)
+            )
+            query = (
+                self.session.query(func.coalesce(func.sum(lucro_item), 0.0))
+                .join(Venda, Venda.id == ItemVenda.venda_id)
+                .filter(
+                    Venda.data_venda >= start_dt,
+                    Venda.data_venda <= end_dt,
+                    Venda.status != "ESTORNADA",
+                )
+            )
+            if forma_pagamento and forma_pagamento != "Todos":
+                query = query.filter(Venda.forma_pagamento == forma_pagamento)
+            return float(query.scalar() or 0.0)
+        except Exception as ex:
+            print(f"Erro em calcular_lucro_bruto_periodo: {ex}")
+            return 0.0
+
     def atualizar_preco_produto(
         self, produto_id: int, novo_custo: float, novo_venda: float
     ):
@@ -597,8 +1105,10 @@ class PDVCore:
             produto = self.session.query(Produto).filter_by(id=produto_id).first()
             if not produto:
                 return False, "Produto não encontrado"
+            custo_anterior = produto.preco_custo
             produto.preco_custo = float(novo_custo or 0)
             produto.preco_venda = float(novo_venda or 0)
+            self._registrar_custo_manual(produto, custo_anterior)
             self.session.commit()
             return True, f"Produto '{produto.nome}' atualizado"
         except Exception as e:
@@ -627,7 +1137,10 @@ class PDVCore:
                 estoque_atual=int(estoque or 0),
             )
             self.session.add(produto)
+            self.session.flush()
+            conciliar_lotes(self.session, [produto.id])
             self.session.commit()
+            self.notificar_estoque_alterado([produto.id])
             return True, produto
         except Exception as e:
             self.session.rollback()
@@ -638,50 +1151,152 @@ class PDVCore:
 
         Retorna (True, mensagem) em sucesso ou (False, mensagem) em erro.
         """
+        ok, resultado = self.estornar_vendas([venda_id], usuario)
+        if not ok:
+            return False, resultado
+        if resultado["ignoradas"]:
+            return False, resultado["ignoradas"][int(venda_id)]
+        return True, "Venda estornada com sucesso."
+
+    def estornar_vendas(self, venda_ids, usuario: str = None, motivo: str = None):
+        """Estorna várias vendas em uma única transação.
+
+        O estoque de todos os itens é reposto com um único UPDATE agrupado por
+        produto, as vendas são marcadas como ESTORNADA e as devoluções (uma
+        por item) entram com INSERT ... SELECT, sem carregar os itens.
+        `motivo` substitui o padrão "Estorno da venda #<id>".
+
+        Retorna (True, {"estornadas": [ids], "ignoradas": {id: motivo},
+        "itens": n}) ou (False, mensagem).
+        """
+        ids = {int(i) for i in venda_ids if i is not None}
+        if not ids:
+            return False, "Nenhuma venda informada."
         try:
-            venda = self.session.query(Venda).filter_by(id=venda_id).first()
-            if not venda:
-                return False, "Venda não encontrada."
-            if venda.status == "ESTORNADA":
-                return False, "Venda já estornada."
+            status = dict(
+                self.session.query(Venda.id, Venda.status).filter(Venda.id.in_(ids))
+            )
+            ignoradas = {}
+            for venda_id in sorted(ids):
+                if venda_id not in status:
+                    ignoradas[venda_id] = "Venda não encontrada."
+                elif status[venda_id] == "ESTORNADA":
+                    ignoradas[venda_id] = "Venda já estornada."
+            validas = sorted(ids - set(ignoradas))
+            resultado = {"estornadas": validas, "ignoradas": ignoradas, "itens": 0}
+            if not validas:
+                return True, resultado
+
+            dos_itens = ItemVenda.venda_id.in_(validas)
+            produto_ids = [
+                pid
+                for (pid,) in self.session.query(ItemVenda.produto_id)
+                .filter(dos_itens)
+                .distinct()
+            ]
+
+            # repor estoque: soma das quantidades estornadas de cada produto
+            reposicao = (
+                select(func.sum(ItemVenda.quantidade))
+                .where(ItemVenda.produto_id == Produto.id, dos_itens)
+                .scalar_subquery()
+            )
+            self.session.execute(
+                update(Produto)
+                .where(Produto.id.in_(produto_ids))
+                .values(
+                    estoque_atual=func.coalesce(Produto.estoque_atual, 0) + reposicao
+                )
+                .execution_options(synchronize_session=False)
+            )
+            self.session.execute(
+                update(Venda)
+                .where(Venda.id.in_(validas))
+                .values(status="ESTORNADA")
+                .execution_options(synchronize_session=False)
+            )
 
-            # repor estoque
-            for it in venda.itens:
-                try:
-                    produto = (
-                        self.session.query(Produto).filter_by(id=it.produto_id).first()
+            # Registrar devoluções na tabela para exibição na tela de Devoluções
+            texto_motivo = (
+                literal(motivo.strip(), String)
+                if motivo and motivo.strip()
+                else literal("Estorno da venda #", String).concat(ItemVenda.venda_id)
+            )
+            registradas = self.session.execute(
+                insert(Devolucao).from_select(
+                    [
+                        "venda_id",
+                        "item_venda_id",
+                        "produto_id",
+                        "produto_nome",
+                        "quantidade",
+                        "valor_total",
+                        "motivo",
+                        "data",
+                        "foi_trocado",
+                        "oculta",
+                    ],
+                    select(
+                        ItemVenda.venda_id,
+                        ItemVenda.id,
+                        ItemVenda.produto_id,
+                        func.coalesce(Produto.nome, "Produto"),
+                        ItemVenda.quantidade,
+                        ItemVenda.preco_unitario * ItemVenda.quantidade,
+                        texto_motivo,
+                        literal(datetime.now(), DateTime),
+                        false(),
+                        false(),
                     )
-                    if produto:
-                        produto.estoque_atual = (produto.estoque_atual or 0) + (
-                            it.quantidade or 0
-                        )
-                except Exception:
-                    # continua mesmo que um item falhe
-                    pass
-
-            venda.status = "ESTORNADA"
-            self.session.commit()
-
-            # Registrar devoluções em JSON para exibição na tela de Devoluções
-            try:
-                from estoque.devolucoes import registrar_devolucoes_por_venda
-
-                ok_reg = registrar_devolucoes_por_venda(
-                    self, venda.id, motivo=f"Estorno da venda #{venda.id}"
+                    .select_from(ItemVenda)
+                    .outerjoin(Produto, Produto.id == ItemVenda.produto_id)
+                    .where(dos_itens)
+                    .order_by(ItemVenda.id),
                 )
-                if not ok_reg:
-                    print(
-                        f"[CORE] Aviso: estorno #{venda.id} registrado no banco, mas falhou ao salvar em devolucoes.json"
-                    )
-            except Exception as ex_reg:
-                print(f"[CORE] Erro ao registrar devoluções JSON: {ex_reg}")
-
-            return True, "Venda estornada com sucesso."
+            )
+            # estoque reposto volta para os lotes
+            conciliar_lotes(self.session, produto_ids)
+            self.session.commit()
+            # os UPDATEs acima não passam pelos objetos já carregados
+            self.session.expire_all()
+            resultado["itens"] = registradas.rowcount or 0
+            self.notificar_estoque_alterado(produto_ids)
+            print(
+                f"[CORE] {len(validas)} venda(s) estornada(s) por {usuario or '-'} "
+                f"({resultado['itens']} item(ns))"
+            )
+            return True, resultado
         except Exception as ex:
             self.session.rollback()
-            print(f"Erro em estornar_venda: {ex}")
+            print(f"Erro em estornar_vendas: {ex}")
             return False, str(ex)
 
+    def estornar_sessao_caixa(self, sessao_id: int, usuario: str = None):
+        """Estorna todas as vendas (não estornadas) de uma sessão de caixa.
+
+        Para sessões operadas por engano: as vendas do operador entre a
+        abertura e o fechamento (ou agora, se aberta) são estornadas de uma
+        vez por `estornar_vendas`.
+        """
+        sessao = self.session.get(CaixaSession, int(sessao_id))
+        if not sessao or not sessao.user:
+            return False, "Sessão de caixa não encontrada."
+        fim = sessao.closing_time or datetime.now()
+        venda_ids = [
+            vid
+            for (vid,) in self.session.query(Venda.id).filter(
+                Venda.usuario_responsavel == sessao.user.username,
+                Venda.data_venda >= sessao.opening_time,
+                Venda.data_venda <= fim,
+                Venda.status != "ESTORNADA",
+            )
+        ]
+        if not venda_ids:
+            return False, "Nenhuma venda a estornar nesta sessão."
+        return self.estornar_vendas(
+            venda_ids, usuario, motivo=f"Estorno da sessão de caixa #{sessao.id}"
+        )
+
     def estornar_item(self, venda_id: int, item_id: int, usuario: str = None):
         """Estorna um item específico de uma venda: repõe estoque, atualiza total e registra devolução.
 
@@ -715,7 +1330,7 @@ class PDVCore:
             if not item:
                 return False, "Item não encontrado na venda."
 
-            # Registrar devolução do item em JSON antes de remover a linha do banco
+            # Registrar devolução do item antes de remover a linha do banco
             try:
                 from estoque.devolucoes import registrar_devolucao_item
 
@@ -724,25 +1339,26 @@ class PDVCore:
                     venda_id,
                     int(item.id),
                     motivo=f"Estorno parcial da venda #{venda_id}",
+                    commit=False,
                 )
                 if not registrado:
                     print(
-                        f"[CORE] Aviso: estorno parcial #{venda_id}/{item.id} registrado no banco, mas falhou ao salvar em devolucoes.json"
+                        f"[CORE] Aviso: estorno parcial #{venda_id}/{item.id} registrado no banco, mas falhou ao registrar a devolução"
                     )
             except Exception as ex_reg:
-                print(f"[CORE] Erro ao registrar estorno parcial em JSON: {ex_reg}")
-
-            # atualizar estoque
-            try:
-                produto = (
-                    self.session.query(Produto).filter_by(id=item.produto_id).first()
+                print(f"[CORE] Erro ao registrar estorno parcial: {ex_reg}")
+
+            # atualizar estoque (sem carregar o produto)
+            produto_id = item.produto_id
+            self.session.execute(
+                update(Produto)
+                .where(Produto.id == produto_id)
+                .values(
+                    estoque_atual=func.coalesce(Produto.estoque_atual, 0)
+                    + (item.quantidade or 0)
                 )
-                if produto:
-                    produto.estoque_atual = (produto.estoque_atual or 0) + (
-                        item.quantidade or 0
-                    )
-            except Exception:
-                pass
+                .execution_options(synchronize_session=False)
+            )
 
             # ajustar total da venda e remover o item
             try:
@@ -758,7 +1374,11 @@ class PDVCore:
             if len(remaining) == 0:
                 venda.status = "ESTORNADA"
 
+            conciliar_lotes(self.session, [produto_id])
+            # devolução, estoque e venda gravados na mesma transação
             self.session.commit()
+            self.session.expire_all()
+            self.notificar_estoque_alterado([produto_id])
 
             return True, "Item estornado com sucesso."
         except Exception as ex:
@@ -874,20 +1494,27 @@ class PDVCore:
             raise e
 
     def create_expense(
-        self, descricao: str, valor: float, vencimento: str, categoria: str
+        self, descricao: str, valor: float, vencimento: date, categoria: str
     ):
-        """Cria uma despesa para ser exibida na tela Financeiro."""
+        """Cria uma despesa para ser exibida na tela Financeiro.
+
+        `vencimento` aceita date/datetime ou texto dd/mm/aaaa / aaaa-mm-dd.
+        """
         try:
+            vencimento_data = validade_para_date(vencimento)
+            if vencimento_data is None:
+                return False, "Data de vencimento inválida (use dd/mm/aaaa)."
             expense = Expense(
                 descricao=descricao,
                 valor=valor,
-                vencimento=vencimento,
+                vencimento=vencimento_data,
                 categoria=categoria,
                 status="Pendente",
                 data_cadastro=datetime.now(),
             )
             self.session.add(expense)
             self.session.commit()
+            self.notificar_contas_alteradas()
             print(f"✅ Expense criado: ID={expense.id}")
             return True, "Despesa criada com sucesso!"
         except Exception as e:
@@ -896,14 +1523,20 @@ class PDVCore:
             return False, f"Erro: {str(e)}"
 
     def create_receivable(
-        self, descricao: str, valor: float, vencimento: str, origem: str
+        self, descricao: str, valor: float, vencimento: date, origem: str
     ):
-        """Cria uma receita (recebível) para a tela Financeiro."""
+        """Cria uma receita (recebível) para a tela Financeiro.
+
+        `vencimento` aceita date/datetime ou texto dd/mm/aaaa / aaaa-mm-dd.
+        """
         try:
+            vencimento_data = validade_para_date(vencimento)
+            if vencimento_data is None:
+                return False, "Data de vencimento inválida (use dd/mm/aaaa)."
             receivable = Receivable(
                 descricao=descricao,
                 valor=valor,
-                vencimento=vencimento,
+                vencimento=vencimento_data,
                 origem=origem,
                 status="Pendente",
                 data_cadastro=datetime.now(),
@@ -925,6 +1558,7 @@ class PDVCore:
                 expense.status = "Pago"
                 expense.data_pagamento = datetime.now()
                 self.session.commit()
+                self.notificar_contas_alteradas()
                 print(f"✅ Expense marcado como pago: ID={expense_id}")
                 return True
             return False
@@ -941,6 +1575,7 @@ class PDVCore:
                 expense.status = "Pendente"
                 expense.data_pagamento = None
                 self.session.commit()
+                self.notificar_contas_alteradas()
                 print(f"✅ Expense desmarcado como pago: ID={expense_id}")
                 return True
             return False
@@ -987,7 +1622,7 @@ class PDVCore:
             return (
                 self.session.query(Expense)
                 .filter_by(status="Pendente")
-                .order_by(Expense.vencimento)
+                .order_by(Expense.vencimento, Expense.id)
                 .all()
             )
         except Exception as e:
@@ -1000,7 +1635,7 @@ class PDVCore:
             return (
                 self.session.query(Receivable)
                 .filter_by(status="Pendente")
-                .order_by(Receivable.vencimento)
+                .order_by(Receivable.vencimento, Receivable.id)
                 .all()
             )
         except Exception as e:
@@ -1013,21 +1648,20 @@ class PDVCore:
             today = datetime.now().date()
 
             if status_filter == "Todos":
-                return self.session.query(Expense).order_by(Expense.vencimento).all()
-            elif status_filter == "Atrasado":
-                # Atrasado = vencimento no passado E status != Pago
                 return (
                     self.session.query(Expense)
-                    .filter(Expense.vencimento < today, Expense.status != "Pago")
-                    .order_by(Expense.vencimento)
+                    .order_by(Expense.vencimento, Expense.id)
                     .all()
                 )
+            elif status_filter == "Atrasado":
+                # Atrasado = vencimento no passado E ainda pendente
+                return self.get_overdue_expenses(hoje=today)
             else:
                 # Pago, Pendente, etc
                 return (
                     self.session.query(Expense)
                     .filter_by(status=status_filter)
-                    .order_by(Expense.vencimento)
+                    .order_by(Expense.vencimento, Expense.id)
                     .all()
                 )
         except Exception as e:
@@ -1040,31 +1674,67 @@ class PDVCore:
             today = datetime.now().date()
 
             if status_filter == "Todos":
-                return (
-                    self.session.query(Receivable).order_by(Receivable.vencimento).all()
-                )
-            elif status_filter == "Atrasado":
-                # Atrasado = vencimento no passado E status != Recebido
                 return (
                     self.session.query(Receivable)
-                    .filter(
-                        Receivable.vencimento < today, Receivable.status != "Recebido"
-                    )
-                    .order_by(Receivable.vencimento)
+                    .order_by(Receivable.vencimento, Receivable.id)
                     .all()
                 )
+            elif status_filter == "Atrasado":
+                # Atrasado = vencimento no passado E ainda pendente
+                return self.get_overdue_receivables(hoje=today)
             else:
                 # Recebido, Pendente, etc
                 return (
                     self.session.query(Receivable)
                     .filter_by(status=status_filter)
-                    .order_by(Receivable.vencimento)
+                    .order_by(Receivable.vencimento, Receivable.id)
                     .all()
                 )
         except Exception as e:
             print(f"❌ ERRO ao filtrar recebíveis: {str(e)}")
             return []
 
+    def _contas_pendentes_por_vencimento(self, modelo, inicio=None, fim=None):
+        """Contas pendentes com vencimento em [inicio, fim) — faixa no índice
+        (status, vencimento), sem converter datas linha a linha."""
+        query = self.session.query(modelo).filter(modelo.status == "Pendente")
+        if inicio is not None:
+            query = query.filter(modelo.vencimento >= inicio)
+        if fim is not None:
+            query = query.filter(modelo.vencimento < fim)
+        return query.order_by(modelo.vencimento, modelo.id).all()
+
+    def get_overdue_expenses(self, hoje=None):
+        """Despesas pendentes com vencimento antes de hoje."""
+        try:
+            return self._contas_pendentes_por_vencimento(
+                Expense, fim=hoje or date.today()
+            )
+        except Exception as e:
+            print(f"❌ ERRO ao buscar despesas vencidas: {str(e)}")
+            return []
+
+    def get_expenses_due_within(self, dias: int, hoje=None):
+        """Despesas pendentes que vencem de hoje até `dias` dias à frente."""
+        hoje = hoje or date.today()
+        try:
+            return self._contas_pendentes_por_vencimento(
+                Expense, inicio=hoje, fim=hoje + timedelta(days=dias + 1)
+            )
+        except Exception as e:
+            print(f"❌ ERRO ao buscar despesas a vencer: {str(e)}")
+            return []
+
+    def get_overdue_receivables(self, hoje=None):
+        """Recebíveis pendentes com vencimento antes de hoje."""
+        try:
+            return self._contas_pendentes_por_vencimento(
+                Receivable, fim=hoje or date.today()
+            )
+        except Exception as e:
+            print(f"❌ ERRO ao buscar recebíveis vencidos: {str(e)}")
+            return []
+
     # ====================================================================
     # MÉTODO DASHBOARD FINANCEIRO
     # ====================================================================
@@ -1161,6 +1831,39 @@ class PDVCore:
                 pass
             return []
 
+    def listar_fornecedores(self, termo=None, pagina=1, por_pagina=50):
+        """Página de fornecedores em ordem alfabética (tela de Fornecedores).
+
+        `termo` filtra pelo início do nome (sem diferenciar maiúsculas nem
+        acentos) ou do CNPJ/CPF. As buscas são faixas sobre os índices de
+        `nome_busca` e de cnpj_cpf, e a ordem segue o índice do nome, então a primeira
+        página não depende do tamanho do cadastro. Retorna {"itens":
+        [Fornecedor], "total", "pagina", "por_pagina"}.
+        """
+        consulta = select(Fornecedor)
+        termo = (termo or "").strip()
+        if termo:
+            condicoes = [_faixa_prefixo(Fornecedor.nome_busca, normalizar_busca(termo))]
+            digitos = "".join(filter(str.isdigit, termo))
+            for documento in {termo, digitos} - {""}:
+                condicoes.append(_faixa_prefixo(Fornecedor.cnpj_cpf, documento))
+            consulta = consulta.where(or_(*condicoes))
+        total = self.session.scalar(
+            select(func.count()).select_from(consulta.subquery())
+        )
+        pagina = max(1, int(pagina or 1))
+        itens = self.session.scalars(
+            consulta.order_by(Fornecedor.nome_busca, Fornecedor.id)
+            .offset((pagina - 1) * por_pagina)
+            .limit(por_pagina)
+        ).all()
+        return {
+            "itens": itens,
+            "total": total or 0,
+            "pagina": pagina,
+            "por_pagina": por_pagina,
+        }
+
     def get_fornecedor_by_id(self, fornecedor_id):
         try:
             return self.session.query(Fornecedor).filter_by(id=fornecedor_id).first()
@@ -1277,6 +1980,642 @@ class PDVCore:
                 return False, "Erro: O CNPJ/CPF informado já está cadastrado."
             return False, f"Erro ao salvar fornecedor: {e}"
 
+    def importar_fornecedores(self, registros):
+        """Cria/atualiza vários fornecedores em uma única transação.
+
+        O cadastro é lido uma vez (só id, documento e nome) e indexado por
+        CNPJ/CPF normalizado para dígitos e por nome (sem diferenciar
+        maiúsculas); registros sem documento casam pelo nome, e um nome igual
+        com documento diferente é outro fornecedor. As gravações saem em dois
+        comandos em lote (INSERT e UPDATE por id). Um registro que cai em um
+        fornecedor já gravado neste lote conta como duplicado (o último
+        prevalece). Retorna dict com `criados`, `atualizados`, `duplicados` e
+        `erro`.
+        """
+        resumo = {"criados": 0, "atualizados": 0, "duplicados": 0, "erro": None}
+        campos = ("contato", "condicao_pagamento", "prazo_entrega_medio")
+
+        def _digitos(valor):
+            return "".join(filter(str.isdigit, str(valor or "")))
+
+        try:
+            por_doc, por_nome = {}, {}
+            for fid, doc, nome in self.session.execute(
+                select(Fornecedor.id, Fornecedor.cnpj_cpf, Fornecedor.nome_razao_social)
+            ):
+                alvo = {"id": fid, "cnpj_cpf": doc}
+                if _digitos(doc):
+                    por_doc[_digitos(doc)] = alvo
+                por_nome[normalizar_busca(nome)] = alvo
+
+            novos, atualizacoes = [], {}
+            gravados = set()  # id(alvo) já gravado neste lote
+            for dados in registros:
+                doc = _digitos(dados.get("cnpj_cpf"))
+                nome = (dados.get("nome_razao_social") or "").strip()
+                alvo = por_doc.get(doc) if doc else None
+                if alvo is None:
+                    alvo = por_nome.get(normalizar_busca(nome))
+                    if alvo is not None and doc and _digitos(alvo["cnpj_cpf"]):
+                        # mesmo nome, documento diferente: é outro fornecedor
+                        alvo = None
+
+                valores = {
+                    "nome_razao_social": nome,
+                    "nome_busca": normalizar_busca(nome),
+                    **{campo: dados.get(campo) for campo in campos},
+                    "status": dados.get("status") or "ativo",
+                }
+                if alvo is None:
+                    alvo = {"id": None, "cnpj_cpf": doc or None}
+                    novos.append(alvo)
+                    resumo["criados"] += 1
+                elif id(alvo) in gravados:
+                    resumo["duplicados"] += 1
+                elif alvo["id"] is not None:
+                    resumo["atualizados"] += 1
+                gravados.add(id(alvo))
+                # documento já cadastrado é mantido como está (pode ter máscara)
+                alvo["cnpj_cpf"] = alvo["cnpj_cpf"] or doc or None
+                alvo.update(valores)
+                if alvo["id"] is not None:
+                    atualizacoes[alvo["id"]] = alvo
+                if doc:
+                    por_doc[doc] = alvo
+                por_nome[normalizar_busca(nome)] = alvo
+
+            if novos:
+                self.session.execute(
+                    insert(Fornecedor),
+                    [{k: v for k, v in n.items() if k != "id"} for n in novos],
+                )
+            if atualizacoes:
+                self.session.execute(update(Fornecedor), list(atualizacoes.values()))
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            resumo = {
+                "criados": 0,
+                "atualizados": 0,
+                "duplicados": 0,
+                "erro": f"Erro ao importar fornecedores: {e}",
+            }
+        return resumo
+
+    def _fornecedores_por_documento(self, documentos):
+        """{CNPJ/CPF só dígitos: Fornecedor} para os `documentos` (só dígitos).
+
+        O cadastro pode guardar o documento com ou sem máscara: como em
+        `importar_fornecedores`, a comparação é feita só pelos dígitos (com
+        dois cadastros do mesmo documento, vale o mais antigo).
+        """
+        documentos = set(documentos) - {"", None}
+        if not documentos:
+            return {}
+        ids = {}
+        for fid, doc in self.session.execute(
+            select(Fornecedor.id, Fornecedor.cnpj_cpf)
+            .where(Fornecedor.cnpj_cpf.is_not(None))
+            .order_by(Fornecedor.id)
+        ):
+            digitos = "".join(filter(str.isdigit, doc))
+            if digitos in documentos:
+                ids.setdefault(digitos, fid)
+        if not ids:
+            return {}
+        por_id = {
+            f.id: f
+            for f in self.session.query(Fornecedor).filter(
+                Fornecedor.id.in_(ids.values())
+            )
+        }
+        return {doc: por_id[fid] for doc, fid in ids.items()}
+
+    def importar_lote_nfe(self, notas, forma_pagamento="Boleto", vencimento=None):
+        """Grava um lote de NF-e (saída de `preparar_lote_nfe`) em uma transação.
+
+        Notas cuja chave já está em imported_xmls são ignoradas (duplicadas);
+        as demais são registradas na tabela junto com o fornecedor. Emitentes
+        são casados com o cadastro pelo CNPJ/CPF (só dígitos, com ou sem
+        máscara no cadastro); sem documento, pelo nome. Emitentes desconhecidos viram
+        fornecedores novos. Com pagamento em Boleto, cada nota gera uma conta a
+        pagar pendente (vencimento padrão: hoje + 7 dias).
+        Retorna dict com `notas`, `duplicadas`, `fornecedores_criados`,
+        `contas_criadas`, `valor_total`, `fornecedor_ids` (na ordem das notas
+        gravadas) e `erro`.
+        """
+        from fornecedores.nfe_lote import registro_xml
+
+        resumo = {
+            "notas": 0,
+            "duplicadas": 0,
+            "fornecedores_criados": 0,
+            "contas_criadas": 0,
+            "valor_total": 0.0,
+            "fornecedor_ids": [],
+            "erro": None,
+        }
+        if not notas:
+            return resumo
+        try:
+            vencimento_data = (
+                validade_para_date(vencimento)
+                if vencimento
+                else date.today() + timedelta(days=7)
+            )
+            if vencimento_data is None:
+                resumo["erro"] = "Data de vencimento inválida (use dd/mm/aaaa)."
+                return resumo
+
+            registradas = self.chaves_xml_registradas(n["chave"] for n in notas)
+            if registradas:
+                resumo["duplicadas"] = sum(n["chave"] in registradas for n in notas)
+                notas = [n for n in notas if n["chave"] not in registradas]
+
+            por_doc = self._fornecedores_por_documento(
+                _documento_emitente(n) for n in notas
+            )
+            nomes = {
+                normalizar_busca(n["emitente"].get("nome"))
+                for n in notas
+                if not _documento_emitente(n)
+            } - {""}
+            por_nome = {}
+            if nomes:
+                por_nome = {
+                    f.nome_busca: f
+                    for f in self.session.query(Fornecedor).filter(
+                        Fornecedor.nome_busca.in_(nomes)
+                    )
+                }
+
+            fornecedores, xmls = [], []
+            agora = datetime.now()
+            for nota in notas:
+                doc = _documento_emitente(nota)
+                nome = (nota["emitente"].get("nome") or "").strip()
+                fornecedor = (
+                    por_doc.get(doc) if doc else por_nome.get(normalizar_busca(nome))
+                )
+                if fornecedor is None:
+                    fornecedor = Fornecedor(
+                        nome_razao_social=nome or doc or "Fornecedor",
+                        cnpj_cpf=doc or None,
+                        condicao_pagamento=forma_pagamento,
+                        status="ativo",
+                    )
+                    self.session.add(fornecedor)
+                    resumo["fornecedores_criados"] += 1
+                    if doc:
+                        por_doc[doc] = fornecedor
+                    else:
+                        por_nome[normalizar_busca(nome)] = fornecedor
+                fornecedores.append(fornecedor)
+                xmls.append(ImportedXml().preencher(registro_xml(nota)))
+
+                valor = float(nota.get("total") or 0.0)
+                if forma_pagamento == "Boleto":
+                    self.session.add(
+                        Expense(
+                            descricao=(
+                                f"Boleto NF-e {nota.get('numero') or '-'} - "
+                                f"{fornecedor.nome_razao_social}"
+                            ),
+                            valor=valor,
+                            vencimento=vencimento_data,
+                            categoria="Fornecedores",
+                            status="Pendente",
+                            data_cadastro=agora,
+                        )
+                    )
+                    resumo["contas_criadas"] += 1
+                resumo["notas"] += 1
+                resumo["valor_total"] += valor
+
+            self.session.flush()
+            resumo["fornecedor_ids"] = [f.id for f in fornecedores]
+            for xml, fornecedor_id in zip(xmls, resumo["fornecedor_ids"]):
+                xml.fornecedor_id = fornecedor_id
+            self.session.add_all(xmls)
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            print(f"❌ ERRO ao importar lote de NF-e: {e}")
+            return {
+                "notas": 0,
+                "duplicadas": 0,
+                "fornecedores_criados": 0,
+                "contas_criadas": 0,
+                "valor_total": 0.0,
+                "fornecedor_ids": [],
+                "erro": f"Erro ao importar NF-e: {e}",
+            }
+        if resumo["contas_criadas"]:
+            self.notificar_contas_alteradas()
+        print(
+            f"✅ Lote de NF-e importado: {resumo['notas']} nota(s), "
+            f"{resumo['fornecedores_criados']} fornecedor(es) novo(s), "
+            f"{resumo['contas_criadas']} conta(s) a pagar"
+        )
+        return resumo
+
+    # ------------------------------------------------------------------
+    # XMLs de NF-e importados (tabela imported_xmls)
+    # ------------------------------------------------------------------
+    def save_imported_xml(self, registro):
+        """Registra (ou atualiza, pela chave de acesso) um XML importado.
+
+        `registro` segue o formato da tela: nf, chave, data, fornecedor, cnpj,
+        total, itens, path e, opcionalmente, fornecedor_id. Sem fornecedor_id,
+        o fornecedor é vinculado pelo CNPJ/CPF quando cadastrado.
+        """
+        try:
+            xml = None
+            if registro.get("chave"):
+                xml = (
+                    self.session.query(ImportedXml)
+                    .filter(ImportedXml.chave == registro["chave"])
+                    .first()
+                )
+            if xml is None:
+                xml = ImportedXml()
+                self.session.add(xml)
+            xml.preencher(registro)
+            if xml.fornecedor_id is None and xml.cnpj:
+                xml.fornecedor_id = self.session.scalar(
+                    select(Fornecedor.id).where(Fornecedor.cnpj_cpf == xml.cnpj)
+                )
+            self.session.commit()
+            return True, "XML registrado."
+        except Exception as e:
+            self.session.rollback()
+            print(f"❌ ERRO ao registrar XML importado: {e}")
+            return False, f"Erro: {e}"
+
+    def chaves_xml_registradas(self, chaves):
+        """Subconjunto de `chaves` (de acesso) que já está em imported_xmls."""
+        chaves = {c for c in chaves if c}
+        if not chaves:
+            return set()
+        return set(
+            self.session.scalars(
+                select(ImportedXml.chave).where(ImportedXml.chave.in_(chaves))
+            )
+        )
+
+    def listar_imported_xmls(
+        self, pagina=1, por_pagina=50, fornecedor_id=None, termo=None
+    ):
+        """Página de XMLs importados, mais recentes (emissão) primeiro.
+
+        `termo` filtra por número da nota, início da chave ou nome do emitente.
+        Retorna {"itens": [registros], "total", "pagina", "por_pagina"}.
+        """
+        consulta = select(ImportedXml)
+        if fornecedor_id is not None:
+            consulta = consulta.where(ImportedXml.fornecedor_id == fornecedor_id)
+        termo = (termo or "").strip()
+        if termo:
+            consulta = consulta.where(
+                or_(
+                    ImportedXml.numero == termo,
+                    ImportedXml.chave.startswith(termo),
+                    ImportedXml.fornecedor_nome.ilike(f"%{termo}%"),
+                )
+            )
+        total = self.session.scalar(
+            select(func.count()).select_from(consulta.subquery())
+        )
+        pagina = max(1, int(pagina or 1))
+        xmls = self.session.scalars(
+            consulta.order_by(ImportedXml.data_emissao.desc(), ImportedXml.id.desc())
+            .offset((pagina - 1) * por_pagina)
+            .limit(por_pagina)
+        )
+        return {
+            "itens": [x.para_registro() for x in xmls],
+            "total": total or 0,
+            "pagina": pagina,
+            "por_pagina": por_pagina,
+        }
+
+    def get_all_imported_xmls(self):
+        """Todos os XMLs importados (mais recentes primeiro)."""
+        try:
+            xmls = self.session.scalars(
+                select(ImportedXml).order_by(
+                    ImportedXml.data_emissao.desc(), ImportedXml.id.desc()
+                )
+            )
+            return [x.para_registro() for x in xmls]
+        except Exception:
+            return []
+
+    def get_imported_xmls_for_fornecedor(self, fornecedor_id, limit=5):
+        """Últimos XMLs de um fornecedor: vinculados pelo id ou, sem vínculo,
+        pelo CNPJ/CPF do cadastro."""
+        try:
+            condicao = ImportedXml.fornecedor_id == fornecedor_id
+            doc = self.session.scalar(
+                select(Fornecedor.cnpj_cpf).where(Fornecedor.id == fornecedor_id)
+            )
+            doc = "".join(filter(str.isdigit, doc or ""))
+            if doc:
+                condicao = or_(
+                    condicao,
+                    (ImportedXml.fornecedor_id.is_(None)) & (ImportedXml.cnpj == doc),
+                )
+            xmls = self.session.scalars(
+                select(ImportedXml)
+                .where(condicao)
+                .order_by(ImportedXml.data_emissao.desc(), ImportedXml.id.desc())
+                .limit(limit)
+            )
+            return [x.para_registro() for x in xmls]
+        except Exception:
+            return []
+
+    def delete_imported_xml(self, xml_id: int) -> bool:
+        """Remove o registro de um XML importado (o arquivo não é tocado)."""
+        try:
+            xml = self.session.get(ImportedXml, xml_id)
+            if not xml:
+                return False
+            self.session.delete(xml)
+            self.session.commit()
+            return True
+        except Exception:
+            self.session.rollback()
+            return False
+
+    # ------------------------------------------------------------------
+    # Entrada de mercadoria pela NF-e
+    # ------------------------------------------------------------------
+    def casar_itens_nfe(self, nota):
+        """Sugere o produto do estoque para cada item de uma NF-e (`parse_nfe`).
+
+        Ordem de busca: código do item (cProd) já vinculado para o emitente,
+        EAN já vinculado em qualquer nota e, por fim, EAN igual ao código de
+        barras de um produto. Cada etapa é uma consulta IN sobre índice; só
+        produtos ativos entram. Retorna cópias dos itens com `produto_id`,
+        `produto_nome` e `origem` ("codigo", "ean", "barras" ou None).
+        """
+        cnpj = _documento_emitente(nota)
+        itens = nota.get("itens") or []
+        codigos = {it["codigo"] for it in itens if it.get("codigo")}
+        eans = {it["ean"] for it in itens if it.get("ean")}
+        vinculado = select(
+            CodigoProdutoFornecedor.codigo,
+            CodigoProdutoFornecedor.ean,
+            Produto.id,
+            Produto.nome,
+        ).join(Produto, Produto.id == CodigoProdutoFornecedor.produto_id)
+
+        por_codigo, por_ean, por_barras = {}, {}, {}
+        if cnpj and codigos:
+            for codigo, _ean, pid, nome in self.session.execute(
+                vinculado.where(
+                    CodigoProdutoFornecedor.cnpj == cnpj,
+                    CodigoProdutoFornecedor.codigo.in_(codigos),
+                    Produto.ativo == true(),
+                )
+            ):
+                por_codigo[codigo] = (pid, nome)
+        if eans:
+            # o vínculo mais recente de cada EAN prevalece
+            for _codigo, ean, pid, nome in self.session.execute(
+                vinculado.where(
+                    CodigoProdutoFornecedor.ean.in_(eans), Produto.ativo == true()
+                ).order_by(CodigoProdutoFornecedor.atualizado_em)
+            ):
+                por_ean[ean] = (pid, nome)
+            for barras, pid, nome in self.session.execute(
+                select(Produto.codigo_barras, Produto.id, Produto.nome).where(
+                    Produto.codigo_barras.in_(eans), Produto.ativo == true()
+                )
+            ):
+                por_barras[barras] = (pid, nome)
+
+        casados = []
+        for item in itens:
+            achado, origem = None, None
+            for origem, indice, valor in (
+                ("codigo", por_codigo, item.get("codigo")),
+                ("ean", por_ean, item.get("ean")),
+                ("barras", por_barras, item.get("ean")),
+            ):
+                achado = indice.get(valor) if valor else None
+                if achado:
+                    break
+            casados.append(
+                dict(
+                    item,
+                    produto_id=achado[0] if achado else None,
+                    produto_nome=achado[1] if achado else None,
+                    origem=origem if achado else None,
+                )
+            )
+        return casados
+
+    def lancar_entrada_nfe(self, nota, produto_ids, atualizar_custo=True):
+        """Lança no estoque os itens de uma NF-e em uma única transação.
+
+        `produto_ids` acompanha `nota["itens"]` (None = item fora da entrada).
+        Quantidades e valores são somados por produto: o estoque recebe a soma
+        e, com `atualizar_custo`, o custo passa a ser a média ponderada entre
+        o estoque já existente (pelo custo atual) e a entrada (pelo valor
+        unitário da nota). O estoque é inteiro: itens com quantidade
+        fracionada (ex.: 2,5 KG) não entram e são informados em
+        `fracionados`. A entrada vira lotes com o rastro do item (lote e
+        validade) quando a nota traz; o restante vai para o lote exibido no
+        produto. Os vínculos cProd/cEAN -> produto do emitente são aprendidos
+        (upsert). A nota é marcada como lançada em imported_xmls no início da
+        mesma transação (a linha é criada se o XML não tiver sido salvo), só
+        se ainda não estiver marcada: assim um segundo lançamento é recusado
+        mesmo com dois lançamentos simultâneos. O custo unitário de cada produto vai
+        para o histórico (precos_fornecedor) com a data de emissão. Retorna
+        (True, resumo) com `produtos`, `quantidade`, `ignorados`,
+        `fracionados` (nomes dos itens) e `vinculos`, ou (False, mensagem).
+        """
+        chave = nota.get("chave")
+        cnpj = _documento_emitente(nota)
+        entradas = {}  # produto_id -> [quantidade, valor]
+        vinculos = {}  # cProd -> linha de codigos_produto_fornecedor
+        recebidos = {}  # produto_id -> [(validade, lote, quantidade)] do rastro
+        fracionados = []
+        agora = datetime.now()
+        ignorados = 0
+        for item, produto_id in zip(nota.get("itens") or [], produto_ids):
+            if not produto_id:
+                ignorados += 1
+                continue
+            quantidade = item.get("quantidade") or 0.0
+            if quantidade != int(quantidade):
+                fracionados.append(item.get("nome") or item.get("codigo") or "-")
+                continue
+            entrada = entradas.setdefault(int(produto_id), [0, 0.0])
+            entrada[0] += int(quantidade)
+            entrada[1] += item.get("valor_total") or 0.0
+            rastros = item.get("rastros") or []
+            for rastro in rastros:
+                recebidos.setdefault(int(produto_id), []).append(
+                    (
+                        validade_para_date(rastro.get("validade")),
+                        rastro.get("lote") or None,
+                        # um único rastro sem qLote cobre o item inteiro
+                        int(
+                            rastro.get("quantidade")
+                            or (quantidade if len(rastros) == 1 else 0)
+                        ),
+                    )
+                )
+            if cnpj and item.get("codigo"):
+                vinculos[item["codigo"]] = {
+                    "cnpj": cnpj,
+                    "codigo": item["codigo"],
+                    "ean": item.get("ean") or None,
+                    "produto_id": int(produto_id),
+                    "atualizado_em": agora,
+                }
+        if not entradas:
+            if fracionados:
+                return False, (
+                    "Itens com quantidade fracionada não entram no estoque: "
+                    + ", ".join(fracionados)
+                )
+            return False, "Nenhum item da nota foi vinculado a um produto."
+
+        try:
+            fornecedor_id = None
+            if chave:
+                # marca a nota antes de tudo: cria a linha se o XML não foi
+                # salvo e só atualiza a que ainda não foi lançada; nenhuma
+                # linha alterada = já lançada
+                marcar = sqlite_insert(ImportedXml).values(
+                    chave=chave,
+                    numero=nota.get("numero"),
+                    data_emissao=validade_para_date(nota.get("data_emissao")),
+                    fornecedor_nome=(nota.get("emitente") or {}).get("nome"),
+                    cnpj=cnpj or None,
+                    total=float(nota.get("total") or 0.0),
+                    data_importacao=agora,
+                    estoque_lancado_em=agora,
+                )
+                marcar = marcar.on_conflict_do_update(
+                    index_elements=[ImportedXml.chave],
+                    set_={"estoque_lancado_em": marcar.excluded.estoque_lancado_em},
+                    where=ImportedXml.estoque_lancado_em.is_(None),
+                )
+                if self.session.execute(marcar).rowcount != 1:
+                    self.session.rollback()
+                    return False, "Esta NF-e já foi lançada no estoque."
+                fornecedor_id = self.session.scalar(
+                    select(ImportedXml.fornecedor_id).where(ImportedXml.chave == chave)
+                )
+
+            encontrados = set(
+                self.session.scalars(select(Produto.id).where(Produto.id.in_(entradas)))
+            )
+            faltando = sorted(set(entradas) - encontrados)
+            if faltando:
+                self.session.rollback()
+                return False, f"Produto(s) não encontrado(s): {faltando}"
+            custos = {
+                pid: round(valor / qtd, 4) if qtd > 0 and valor > 0 else None
+                for pid, (qtd, valor) in entradas.items()
+            }
+
+            # estoque anterior aos lotes fica com a validade que já exibia
+            conciliar_lotes(self.session, entradas)
+
+            produtos = Produto.__table__
+            estoque_anterior = func.coalesce(produtos.c.estoque_atual, 0)
+            valores = {"estoque_atual": estoque_anterior + bindparam("qtd")}
+            if atualizar_custo:
+                # média ponderada com o estoque existente (os valores do SET
+                # leem a linha antes do UPDATE); sem estoque, o custo da nota
+                custo_medio = case(
+                    (
+                        and_(estoque_anterior > 0, produtos.c.preco_custo.isnot(None)),
+                        (
+                            estoque_anterior * produtos.c.preco_custo
+                            + bindparam("qtd") * bindparam("custo")
+                        )
+                        / (estoque_anterior + bindparam("qtd")),
+                    ),
+                    else_=bindparam("custo"),
+                )
+                valores["preco_custo"] = func.coalesce(
+                    func.round(custo_medio, 4), produtos.c.preco_custo
+                )
+            self.session.execute(
+                update(produtos)
+                .where(produtos.c.id == bindparam("pid"))
+                .values(**valores),
+                [
+                    {"pid": pid, "qtd": qtd, "custo": custos[pid]}
+                    for pid, (qtd, _valor) in entradas.items()
+                ],
+            )
+            # a entrada vira lotes: rastro da nota, o restante no lote exibido
+            conciliar_lotes(self.session, entradas, recebidos=recebidos)
+
+            if fornecedor_id is None and cnpj:
+                emitente = self._fornecedores_por_documento([cnpj]).get(cnpj)
+                fornecedor_id = emitente.id if emitente else None
+            data_nota = validade_para_date(nota.get("data_emissao")) or agora.date()
+            precos = [
+                {
+                    "produto_id": pid,
+                    "fornecedor_id": fornecedor_id,
+                    "custo": custo,
+                    "data": data_nota,
+                    "origem": "nfe",
+                    "chave_nfe": chave or None,
+                    "registrado_em": agora,
+                }
+                for pid, custo in custos.items()
+                if custo is not None
+            ]
+            if precos:
+                self.session.execute(insert(PrecoFornecedor), precos)
+
+            if vinculos:
+                stmt = sqlite_insert(CodigoProdutoFornecedor)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[
+                        CodigoProdutoFornecedor.cnpj,
+                        CodigoProdutoFornecedor.codigo,
+                    ],
+                    set_={
+                        "ean": stmt.excluded.ean,
+                        "produto_id": stmt.excluded.produto_id,
+                        "atualizado_em": stmt.excluded.atualizado_em,
+                    },
+                )
+                self.session.execute(stmt, list(vinculos.values()))
+            self.session.commit()
+            # os UPDATEs acima não passam pelos objetos já carregados
+            self.session.expire_all()
+        except Exception as e:
+            self.session.rollback()
+            print(f"❌ ERRO ao lançar entrada da NF-e: {e}")
+            return False, f"Erro ao lançar entrada: {e}"
+
+        self.notificar_estoque_alterado(entradas)
+        resumo = {
+            "produtos": len(entradas),
+            "quantidade": sum(q for q, _ in entradas.values()),
+            "ignorados": ignorados,
+            "fracionados": fracionados,
+            "vinculos": len(vinculos),
+        }
+        print(
+            f"✅ Entrada da NF-e {nota.get('numero') or '-'}: "
+            f"{resumo['produtos']} produto(s), {resumo['quantidade']} unidade(s)"
+        )
+        return True, resumo
+
     def delete_expense(self, expense_id: int) -> bool:
         """Deleta uma despesa do banco de dados."""
         try:
@@ -1285,6 +2624,7 @@ class PDVCore:
                 return False
             self.session.delete(expense)
             self.session.commit()
+            self.notificar_contas_alteradas()
             return True
         except Exception:
             self.session.rollback()
@@ -1315,6 +2655,7 @@ class PDVCore:
                 expense.status = "Pago"
                 expense.data_pagamento = datetime.now()
                 self.session.commit()
+                self.notificar_contas_alteradas()
                 return True
 
             # Se pagou parcial
@@ -1334,6 +2675,7 @@ class PDVCore:
                 )
                 self.session.add(new_expense)
                 self.session.commit()
+                self.notificar_contas_alteradas()
                 return True
 
             return False
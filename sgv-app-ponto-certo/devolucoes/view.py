@@ -7,13 +7,15 @@ from pathlib import Path
 import flet as ft
 
 from estoque.devolucoes import (
-    add_hidden_id,
-    carregar_devol,
-    carregar_hidden_ids,
-    remover_devolucao,
+    estatisticas_devolucoes,
+    listar_devolucoes,
+    ocultar_devolucoes,
 )
 from utils.export_utils import generate_pdf_file
 
+# Linhas carregadas por página na tabela (botão "Carregar mais")
+DEVOLUCOES_POR_PAGINA = 50
+
 # Color palette
 COLORS = {
     "primary": "#034986",
@@ -132,6 +134,7 @@ def show_modal_troca(page: ft.Page, devolucao: dict, pdv_core, on_troca_callback
                 return
 
             adicionar_troca(
+                pdv_core,
                 devolucao_id=devolucao.get("id"),
                 novo_produto_id=novo_id,
                 novo_produto_nome=novo_nome,
@@ -256,8 +259,11 @@ def create_devolucoes_view(page: ft.Page, pdv_core, handle_back):
     stats_container_ref = ft.Ref[ft.Container]()
     filtro_periodo_ref = ft.Ref[ft.RadioGroup]()
     refresh_slot_ref = ft.Ref[ft.Container]()
-    # Cache das devoluções filtradas para exportação
-    devol_filtradas_cache = []
+    carregar_mais_ref = ft.Ref[ft.TextButton]()
+    mais_devolvidos_ref = ft.Ref[ft.Column]()
+    # Período e página exibidos (remoção em massa e exportação usam o período)
+    periodo_filtro = {"inicio": None, "fim": None}
+    paginacao = {"pagina": 1, "total": 0}
 
     # --- Refresh com animação ---
     def _make_refresh_icon():
@@ -273,7 +279,7 @@ def create_devolucoes_view(page: ft.Page, pdv_core, handle_back):
                 modal=True,
                 title=ft.Text("Remover devoluções"),
                 content=ft.Text(
-                    "Deseja realmente remover todas as devoluções atualmente exibidas? Esta ação não pode ser desfeita."
+                    "Deseja realmente remover todas as devoluções do período exibido? Elas deixarão de aparecer nesta tela."
                 ),
                 actions=[
                     ft.TextButton("Cancelar", on_click=lambda ev: _close(ev)),
@@ -290,48 +296,18 @@ def create_devolucoes_view(page: ft.Page, pdv_core, handle_back):
 
             def _confirm(ev=None):
                 try:
-                    # remover cada devolução filtrada (apenas registros do JSON)
-                    prev_ids = []
-                    for d in list(devol_filtradas_cache):
-                        try:
-                            prev_ids.append(int(d.get("id")))
-                        except Exception:
-                            pass
-
-                    count_removed = 0
-                    for did in prev_ids:
-                        try:
-                            remover_devolucao(did)
-                            count_removed += 1
-                        except Exception:
-                            pass
+                    # um único UPDATE oculta todas as devoluções do período
+                    count_removed = ocultar_devolucoes(
+                        pdv_core,
+                        data_inicio=periodo_filtro["inicio"],
+                        data_fim=periodo_filtro["fim"],
+                    )
 
                     # fechar diálogo e recarregar tabela
                     dlg.open = False
                     page.update()
                     carregar_tabela()
 
-                    # verificar quantos dos ids ainda existem no JSON (provavelmente linhas oriundas do DB)
-                    try:
-                        from estoque.devolucoes import carregar_devol
-
-                        remaining = [
-                            d
-                            for d in carregar_devol()
-                            if int(d.get("id", -1)) in prev_ids
-                        ]
-                        remaining_count = len(remaining)
-                    except Exception:
-                        remaining_count = 0
-
-                    # esconder qualquer id que ainda permaneça (vindo do DB)
-                    try:
-                        for d in prev_ids:
-                            add_hidden_id(d)
-                        remaining_count = 0
-                    except Exception:
-                        pass
-
                     show_snackbar(
                         page,
                         f"Removidas {count_removed} devoluções (visão atualizada).",
@@ -414,324 +390,215 @@ def create_devolucoes_view(page: ft.Page, pdv_core, handle_back):
             border=ft.border.all(1, ft.Colors.with_opacity(0.2, cor)),
         )
 
-    def calcular_stats(devol_list):
-        """Calcula estatísticas das devoluções"""
-        if not devol_list:
-            return {
-                "total": "0",
-                "taxa_devolucao": "0%",
-                "valor": "R$ 0,00",
-                "valor_medio": "R$ 0,00",
-            }
-
-        total_valor = sum(d.get("valor_total", 0) for d in devol_list)
-        quantidade_itens = sum(d.get("quantidade", 0) for d in devol_list)
-
-        taxa = (len(devol_list) / max(len(devol_list) + 100, 1)) * 100
-        valor_medio = total_valor / quantidade_itens if quantidade_itens > 0 else 0
-
-        return {
-            "total": str(len(devol_list)),
-            "taxa_devolucao": f"{taxa:.1f}%",
-            "valor": format_brl(total_valor),
-            "valor_medio": format_brl(valor_medio),
-        }
-
-    def atualizar_stats(devol_list):
-        """Atualiza cards de estatísticas"""
+    def atualizar_stats():
+        """Atualiza cards e ranking com as estatísticas do período (SQL agregado)"""
+        stats = estatisticas_devolucoes(
+            pdv_core, periodo_filtro["inicio"], periodo_filtro["fim"]
+        )
+
+        if mais_devolvidos_ref.current:
+            mais_devolvidos_ref.current.controls = [
+                ft.Text(
+                    f"{p['produto_nome'][:22]} · {format_brl(p['valor_total'])}",
+                    **TYPOGRAPHY["caption"],
+                    color=COLORS["text_secondary"],
+                    tooltip=f"{p['devolucoes']} devolução(ões), {p['quantidade']} item(ns)",
+                )
+                for p in stats["por_produto"]
+            ] or [ft.Text("Nenhuma devolução", **TYPOGRAPHY["caption"], italic=True)]
+            mais_devolvidos_ref.current.update()
+
         if not stats_container_ref.current:
             return
 
-        stats = calcular_stats(devol_list)
-
         # O content é um Row diretamente
         row = stats_container_ref.current.content
         cards = row.controls
 
         # Atualizar cada card
         if len(cards) > 0:
-            cards[0].content.controls[1].value = stats["total"]
+            cards[0].content.controls[1].value = str(stats["total"])
         if len(cards) > 1:
-            cards[1].content.controls[1].value = stats["taxa_devolucao"]
+            trocadas = f"{stats['trocadas']} de {stats['total']}"
+            cards[1].content.controls[1].value = trocadas
         if len(cards) > 2:
-            cards[2].content.controls[1].value = stats["valor"]
+            cards[2].content.controls[1].value = format_brl(stats["valor_total"])
         if len(cards) > 3:
-            cards[3].content.controls[1].value = stats["valor_medio"]
+            cards[3].content.controls[1].value = format_brl(stats["valor_medio"])
 
         stats_container_ref.current.update()
 
     # ========== TABELA DE DEVOLUÇÕES ==========
-    def carregar_tabela():
-        """Carrega e exibe devoluções na tabela"""
-        nonlocal devol_filtradas_cache
-        try:
-            if loading_ref.current:
-                loading_ref.current.visible = True
-                loading_ref.current.update()
-        except Exception:
-            pass
-
-        try:
-            # Obter período selecionado
-            periodo = "7"
-            if filtro_periodo_ref.current:
-                periodo = filtro_periodo_ref.current.value or "7"
+    def criar_linha(d):
+        """Monta a linha da tabela para uma devolução"""
+        data_formatada = datetime.fromisoformat(d.get("data", "")).strftime(
+            "%d/%m/%Y %H:%M"
+        )
 
-            dias = int(periodo) if periodo != "todos" else 365
+        def criar_botao_remover(dev_id):
+            def remover(e):
+                try:
+                    print(f"[DEVOLUCOES] remover called for id={dev_id}")
+                    if ocultar_devolucoes(pdv_core, [dev_id]):
+                        show_snackbar(
+                            page,
+                            "Devolução removida da visualização.",
+                            COLORS["danger"],
+                        )
+                    carregar_tabela()
+                except Exception as ex:
+                    print(f"[DEVOLUCOES] remover erro: {ex}")
+                    show_snackbar(page, "Erro ao remover devolução.", COLORS["danger"])
 
-            data_inicio = (
-                datetime.now() - timedelta(days=dias)
-                if dias != 365
-                else datetime(2000, 1, 1)
+            return ft.IconButton(
+                ft.Icons.DELETE,
+                icon_color=COLORS["danger"],
+                on_click=remover,
             )
-            data_fim = datetime.now()
 
-            devol_list = carregar_devol()
+        def criar_botao_troca(devolucao_id, devolucao_data):
+            """Cria botão de troca com melhor captura de variáveis"""
+            print(f"[TROCA] Criando botão para devolução {devolucao_id}")
 
-            # Fallback: se não houver registros em JSON, buscar estornos diretamente do banco
-            if not devol_list:
+            def handle_click(e):
+                print(
+                    f"[TROCA] ✓✓✓ CLIQUE DISPARADO! {devolucao_id}",
+                    flush=True,
+                )
                 try:
-                    from models.db_models import Venda
-
-                    q = (
-                        pdv_core.session.query(Venda)
-                        .filter(
-                            Venda.status == "ESTORNADA",
-                            Venda.data_venda >= data_inicio,
-                            Venda.data_venda <= data_fim,
-                        )
-                        .order_by(Venda.data_venda.desc())
+                    dev = devolucao_data
+                    print(
+                        f"[TROCA] Dados capturados: {dev.get('produto_nome')}",
+                        flush=True,
                     )
-                    vendas_estornadas = q.all()
-
-                    devol_from_db = []
-                    hidden_ids = carregar_hidden_ids() or []
-                    for v in vendas_estornadas:
-                        for it in getattr(v, "itens", []) or []:
-                            try:
-                                nome = (
-                                    it.produto.nome
-                                    if getattr(it, "produto", None)
-                                    else "Produto"
-                                )
-                                qtd = int(getattr(it, "quantidade", 0) or 0)
-                                preco = float(getattr(it, "preco_unitario", 0.0) or 0.0)
-                                item_id = getattr(it, "id", None) or 0
-                                # pular itens marcados como escondidos
-                                try:
-                                    if int(item_id) in hidden_ids:
-                                        continue
-                                except Exception:
-                                    pass
-
-                                devol_from_db.append(
-                                    {
-                                        # id opcional (pode não existir em ItemVenda)
-                                        "id": item_id,
-                                        "produto_id": getattr(it, "produto_id", None),
-                                        "produto_nome": nome,
-                                        "quantidade": qtd,
-                                        "valor_total": preco * qtd,
-                                        "motivo": f"Estorno da venda #{v.id}",
-                                        "data": (
-                                            v.data_venda.isoformat()
-                                            if hasattr(v.data_venda, "isoformat")
-                                            else str(v.data_venda)
-                                        ),
-                                        "foi_trocado": False,
-                                    }
-                                )
-                            except Exception:
-                                pass
-
-                    # Usa os registros do banco diretamente para exibição
-                    devol_list = devol_from_db
-                except Exception as ex_db:
-                    print(f"[DEVOLUÇÕES] Fallback DB falhou: {ex_db}")
-
-            # Filtrar por data
-            devol_filtradas = []
-            for d in devol_list:
-                try:
-                    data_devol = datetime.fromisoformat(d.get("data", ""))
-                    if data_inicio <= data_devol <= data_fim:
-                        devol_filtradas.append(d)
-                except Exception:
-                    pass
 
-            # Ordenar por data (mais recentes primeiro)
-            devol_filtradas.sort(key=lambda x: x.get("data", ""), reverse=True)
-            # Atualiza cache para exportação
-            devol_filtradas_cache = list(devol_filtradas)
+                    if dev.get("foi_trocado"):
+                        print("[TROCA] Já foi trocado")
+                        show_snackbar(
+                            page,
+                            "Este produto já foi trocado.",
+                            COLORS["warning"],
+                        )
+                        return
 
-            # Limpar tabela
-            if tabela_ref.current:
-                tabela_ref.current.rows.clear()
+                    print("[TROCA] Chamando show_modal_troca...", flush=True)
+                    show_modal_troca(page, dev, pdv_core, carregar_tabela)
+                    print("[TROCA] show_modal_troca retornou", flush=True)
 
-                # Adicionar linhas
-                for d in devol_filtradas:
-                    data_formatada = datetime.fromisoformat(d.get("data", "")).strftime(
-                        "%d/%m/%Y %H:%M"
+                except Exception as ex:
+                    print(
+                        f"[TROCA] ✗✗✗ ERRO EM handle_click: {ex}",
+                        flush=True,
                     )
+                    import traceback
 
-                    def criar_botao_remover(dev_id):
-                        def remover(e):
-                            try:
-                                print(f"[DEVOLUCOES] remover called for id={dev_id}")
-                                remover_devolucao(dev_id)
-                                # verificar se ainda existe no JSON
-                                try:
-                                    remaining = [
-                                        d
-                                        for d in carregar_devol()
-                                        if int(d.get("id", -1)) == int(dev_id)
-                                    ]
-                                except Exception:
-                                    remaining = []
-
-                                if remaining:
-                                    # se ainda existe no JSON, tentou remover e falhou
-                                    print(
-                                        f"[DEVOLUCOES] remover: id {dev_id} still present in JSON, marking hidden"
-                                    )
-                                    try:
-                                        add_hidden_id(dev_id)
-                                    except Exception:
-                                        pass
-                                    show_snackbar(
-                                        page,
-                                        "Devolução removida da visualização.",
-                                        COLORS["warning"],
-                                    )
-                                else:
-                                    print(f"[DEVOLUCOES] removed id {dev_id}")
-                                    show_snackbar(
-                                        page,
-                                        "Devolução removida com sucesso.",
-                                        COLORS["danger"],
-                                    )
-                                carregar_tabela()
-                            except Exception as ex:
-                                print(f"[DEVOLUCOES] remover erro: {ex}")
-                                show_snackbar(
-                                    page, "Erro ao remover devolução.", COLORS["danger"]
-                                )
-
-                        return ft.IconButton(
-                            ft.Icons.DELETE,
-                            icon_color=COLORS["danger"],
-                            on_click=remover,
-                        )
+                    traceback.print_exc()
+                    show_snackbar(page, f"Erro: {str(ex)}", COLORS["danger"])
 
-                    def criar_botao_troca(devolucao_id, devolucao_data):
-                        """Cria botão de troca com melhor captura de variáveis"""
-                        print(f"[TROCA] Criando botão para devolução {devolucao_id}")
-
-                        def handle_click(e):
-                            print(
-                                f"[TROCA] ✓✓✓ CLIQUE DISPARADO! {devolucao_id}",
-                                flush=True,
-                            )
-                            try:
-                                dev = devolucao_data
-                                print(
-                                    f"[TROCA] Dados capturados: {dev.get('produto_nome')}",
-                                    flush=True,
-                                )
-
-                                if dev.get("foi_trocado"):
-                                    print("[TROCA] Já foi trocado")
-                                    show_snackbar(
-                                        page,
-                                        "Este produto já foi trocado.",
-                                        COLORS["warning"],
-                                    )
-                                    return
-
-                                print(
-                                    "[TROCA] Chamando show_modal_troca...", flush=True
-                                )
-                                show_modal_troca(page, dev, pdv_core, carregar_tabela)
-                                print("[TROCA] show_modal_troca retornou", flush=True)
-
-                            except Exception as ex:
-                                print(
-                                    f"[TROCA] ✗✗✗ ERRO EM handle_click: {ex}",
-                                    flush=True,
-                                )
-                                import traceback
-
-                                traceback.print_exc()
-                                show_snackbar(
-                                    page, f"Erro: {str(ex)}", COLORS["danger"]
-                                )
-
-                        foi_trocado = devolucao_data.get("foi_trocado", False)
-                        cor = (
-                            COLORS["warning"]
-                            if not foi_trocado
-                            else COLORS["text_secondary"]
-                        )
+            foi_trocado = devolucao_data.get("foi_trocado", False)
+            cor = COLORS["warning"] if not foi_trocado else COLORS["text_secondary"]
 
-                        btn = ft.IconButton(
-                            ft.Icons.SWAP_HORIZ,
-                            icon_color=cor,
-                            on_click=handle_click,
-                            tooltip="Trocar" if not foi_trocado else "Trocado",
-                        )
-                        print(f"[TROCA] Botão criado para {devolucao_id}")
-                        return btn
-
-                    row = ft.DataRow(
-                        cells=[
-                            ft.DataCell(
-                                ft.Text(
-                                    str(d.get("produto_id", "?")), **TYPOGRAPHY["body"]
-                                )
-                            ),
-                            ft.DataCell(
-                                ft.Text(
-                                    d.get("produto_nome", "?")[:30],
-                                    **TYPOGRAPHY["body"],
-                                )
-                            ),
-                            ft.DataCell(
-                                ft.Text(
-                                    str(d.get("quantidade", 0)),
-                                    **TYPOGRAPHY["body"],
-                                    text_align=ft.TextAlign.CENTER,
-                                )
-                            ),
-                            ft.DataCell(
-                                ft.Text(
-                                    format_brl(d.get("valor_total", 0)),
-                                    **TYPOGRAPHY["body"],
-                                )
-                            ),
-                            ft.DataCell(
-                                ft.Text(
-                                    d.get("motivo", "")[:25],
-                                    **TYPOGRAPHY["caption"],
-                                    color=COLORS["text_secondary"],
-                                )
-                            ),
-                            ft.DataCell(
-                                ft.Text(data_formatada, **TYPOGRAPHY["caption"])
-                            ),
-                            ft.DataCell(criar_botao_troca(d.get("id"), d)),
-                            ft.DataCell(criar_botao_remover(d.get("id"))),
-                        ]
+            btn = ft.IconButton(
+                ft.Icons.SWAP_HORIZ,
+                icon_color=cor,
+                on_click=handle_click,
+                tooltip="Trocar" if not foi_trocado else "Trocado",
+            )
+            print(f"[TROCA] Botão criado para {devolucao_id}")
+            return btn
+
+        row = ft.DataRow(
+            cells=[
+                ft.DataCell(
+                    ft.Text(str(d.get("produto_id", "?")), **TYPOGRAPHY["body"])
+                ),
+                ft.DataCell(
+                    ft.Text(
+                        d.get("produto_nome", "?")[:30],
+                        **TYPOGRAPHY["body"],
+                    )
+                ),
+                ft.DataCell(
+                    ft.Text(
+                        str(d.get("quantidade", 0)),
+                        **TYPOGRAPHY["body"],
+                        text_align=ft.TextAlign.CENTER,
                     )
-                    tabela_ref.current.rows.append(row)
+                ),
+                ft.DataCell(
+                    ft.Text(
+                        format_brl(d.get("valor_total", 0)),
+                        **TYPOGRAPHY["body"],
+                    )
+                ),
+                ft.DataCell(
+                    ft.Text(
+                        d.get("motivo", "")[:25],
+                        **TYPOGRAPHY["caption"],
+                        color=COLORS["text_secondary"],
+                    )
+                ),
+                ft.DataCell(ft.Text(data_formatada, **TYPOGRAPHY["caption"])),
+                ft.DataCell(criar_botao_troca(d.get("id"), d)),
+                ft.DataCell(criar_botao_remover(d.get("id"))),
+            ]
+        )
+        return row
 
-            # Atualizar estatísticas
-            atualizar_stats(devol_filtradas)
+    def carregar_tabela(pagina: int = 1):
+        """Carrega uma página de devoluções (página 1 recomeça a tabela)"""
+        try:
+            if loading_ref.current:
+                loading_ref.current.visible = True
+                loading_ref.current.update()
+        except Exception:
+            pass
+
+        try:
+            if pagina == 1:
+                # Obter período selecionado
+                periodo = "7"
+                if filtro_periodo_ref.current:
+                    periodo = filtro_periodo_ref.current.value or "7"
+
+                dias = int(periodo) if periodo != "todos" else None
+                periodo_filtro["inicio"] = (
+                    datetime.now() - timedelta(days=dias) if dias else None
+                )
+                periodo_filtro["fim"] = datetime.now()
+
+            resultado = listar_devolucoes(
+                pdv_core,
+                periodo_filtro["inicio"],
+                periodo_filtro["fim"],
+                pagina=pagina,
+                por_pagina=DEVOLUCOES_POR_PAGINA,
+            )
+            paginacao["pagina"] = resultado["pagina"]
+            paginacao["total"] = resultado["total"]
+
+            if tabela_ref.current:
+                if pagina == 1:
+                    tabela_ref.current.rows.clear()
+                for d in resultado["itens"]:
+                    tabela_ref.current.rows.append(criar_linha(d))
+
+            # Estatísticas do período inteiro: só mudam ao trocar o filtro
+            if pagina == 1:
+                atualizar_stats()
+
+            exibidas = len(tabela_ref.current.rows) if tabela_ref.current else 0
+            if carregar_mais_ref.current:
+                carregar_mais_ref.current.visible = exibidas < resultado["total"]
+                carregar_mais_ref.current.update()
 
             if tabela_ref.current:
                 tabela_ref.current.update()
 
             show_snackbar(
-                page, f"Carregadas {len(devol_filtradas)} devoluções", COLORS["info"]
+                page,
+                f"Carregadas {exibidas} de {resultado['total']} devoluções",
+                COLORS["info"],
             )
 
         except Exception as ex:
@@ -748,11 +615,20 @@ def create_devolucoes_view(page: ft.Page, pdv_core, handle_back):
             except Exception:
                 pass
 
+    def carregar_mais(e=None):
+        carregar_tabela(paginacao["pagina"] + 1)
+
     # Exportar PDF das devoluções/trocas filtradas
     def exportar_pdf_devolucoes(e=None):
         try:
             print("[DEVOLUÇÕES] Exportar PDF acionado")
-            if not devol_filtradas_cache:
+            devol_filtradas = listar_devolucoes(
+                pdv_core,
+                periodo_filtro["inicio"],
+                periodo_filtro["fim"],
+                por_pagina=None,
+            )["itens"]
+            if not devol_filtradas:
                 print("[DEVOLUÇÕES] Nenhuma devolução filtrada para exportar")
                 show_snackbar(
                     page, "Não há devoluções para exportar.", COLORS["warning"]
@@ -778,7 +654,7 @@ def create_devolucoes_view(page: ft.Page, pdv_core, handle_back):
                     return str(v)
 
             linhas = []
-            for d in devol_filtradas_cache:
+            for d in devol_filtradas:
                 troca_txt = "Não"
                 if d.get("foi_trocado"):
                     destino = d.get("troca_para_nome") or d.get("troca_para_id")
@@ -861,10 +737,10 @@ def create_devolucoes_view(page: ft.Page, pdv_core, handle_back):
                                         ft.Icons.ASSIGNMENT_RETURN,
                                     ),
                                     criar_card_stat(
-                                        "Taxa de Devolução",
-                                        "0%",
+                                        "Trocadas",
+                                        "0 de 0",
                                         COLORS["warning"],
-                                        ft.Icons.TRENDING_UP,
+                                        ft.Icons.SWAP_HORIZ,
                                     ),
                                     criar_card_stat(
                                         "Valor Total",
@@ -920,6 +796,16 @@ def create_devolucoes_view(page: ft.Page, pdv_core, handle_back):
                                                 ),
                                                 on_change=lambda _: carregar_tabela(),
                                             ),
+                                            ft.Divider(height=1),
+                                            ft.Text(
+                                                "Mais devolvidos",
+                                                **TYPOGRAPHY["h3"],
+                                                color=COLORS["text_primary"],
+                                            ),
+                                            ft.Column(
+                                                ref=mais_devolvidos_ref,
+                                                spacing=4,
+                                            ),
                                         ],
                                         spacing=12,
                                     ),
@@ -1042,6 +928,13 @@ def create_devolucoes_view(page: ft.Page, pdv_core, handle_back):
                                                     1, COLORS["border"]
                                                 ),
                                             ),
+                                            ft.TextButton(
+                                                "Carregar mais",
+                                                ref=carregar_mais_ref,
+                                                icon=ft.Icons.EXPAND_MORE,
+                                                visible=False,
+                                                on_click=carregar_mais,
+                                            ),
                                         ],
                                         spacing=12,
                                         expand=True,
@@ -0,0 +1,75 @@
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Set
+
+
+def normalizar_busca(texto) -> str:
+    """Remove acentos/diacríticos e normaliza para minúsculas."""
+    if not texto:
+        return ""
+    nf = unicodedata.normalize("NFD", str(texto))
+    return "".join(c for c in nf if unicodedata.category(c) != "Mn").lower().strip()
+
+
+class IndiceBusca:
+    """Índice em memória das chaves de busca dos produtos do Estoque.
+
+    As chaves normalizadas (nome e categoria) são calculadas uma vez por
+    produto e recalculadas apenas quando o produto é editado. Para busca por
+    prefixo usa uma lista ordenada de nomes (bisect); para "contém" percorre
+    apenas as chaves já normalizadas.
+    """
+
+    def __init__(self, produtos: Iterable[Dict[str, Any]] = ()):
+        self.chaves: Dict[Any, tuple] = {}
+        self._ordenado: List[tuple] = []
+        self.reconstruir(produtos)
+
+    def reconstruir(self, produtos: Iterable[Dict[str, Any]]) -> None:
+        self.chaves = {
+            p["id"]: (
+                normalizar_busca(p.get("nome")),
+                normalizar_busca(p.get("categoria")),
+            )
+            for p in produtos
+        }
+        self._ordenado = sorted((nome, pid) for pid, (nome, _) in self.chaves.items())
+
+    def atualizar(self, produto: Dict[str, Any]) -> None:
+        """Inclui ou recalcula as chaves de um produto (cadastro/edição)."""
+        pid = produto["id"]
+        self.remover(pid)
+        nome = normalizar_busca(produto.get("nome"))
+        self.chaves[pid] = (nome, normalizar_busca(produto.get("categoria")))
+        insort(self._ordenado, (nome, pid))
+
+    def remover(self, produto_id) -> None:
+        chave = self.chaves.pop(produto_id, None)
+        if chave is None:
+            return
+        i = bisect_left(self._ordenado, (chave[0], produto_id))
+        if i < len(self._ordenado) and self._ordenado[i] == (chave[0], produto_id):
+            del self._ordenado[i]
+
+    def prefixo(self, termo: str) -> Set[Any]:
+        """Ids dos produtos cujo nome começa com `termo`."""
+        termo = normalizar_busca(termo)
+        if not termo:
+            return set(self.chaves)
+        ids = set()
+        i = bisect_left(self._ordenado, (termo,))
+        while i < len(self._ordenado) and self._ordenado[i][0].startswith(termo):
+            ids.add(self._ordenado[i][1])
+            i += 1
+        return ids
+
+    def contem(self, termo: str) -> Set[Any]:
+        """Ids dos produtos cujo nome ou categoria contém `termo`."""
+        termo = normalizar_busca(termo)
+        if not termo:
+            return set(self.chaves)
+        return {
+            pid
+            for pid, (nome, categoria) in self.chaves.items()
+            if termo in nome or termo in categoria
+        }
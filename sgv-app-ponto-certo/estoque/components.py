@@ -65,7 +65,12 @@ def criar_linha_tabela(p: dict, on_editar, on_excluir):
                 )
             ),
             ft.DataCell(ft.Text(p.get("categoria", ""), size=14)),
-            ft.DataCell(ft.Text(p.get("validade").strftime("%d/%m/%Y"), size=14)),
+            ft.DataCell(
+                ft.Text(
+                    (p["validade"].strftime("%d/%m/%Y") if p.get("validade") else "-"),
+                    size=14,
+                )
+            ),
             ft.DataCell(
                 ft.Container(
                     content=ft.Text(p.get("lote", ""), size=14),
@@ -111,3 +116,116 @@ def criar_linha_tabela(p: dict, on_editar, on_excluir):
             ft.DataCell(ft.Row([btn_editar, btn_excluir], spacing=5)),
         ]
     )
+
+
+def _assinatura_linha(p: dict) -> tuple:
+    """Valores exibidos na linha; se não mudarem, a linha pode ser reaproveitada."""
+    return (
+        p.get("id"),
+        p.get("nome"),
+        p.get("categoria"),
+        p.get("validade"),
+        p.get("lote"),
+        p.get("quantidade"),
+        p.get("preco_custo"),
+        p.get("preco_venda", p.get("preco")),
+        p.get("codigo_barras"),
+    )
+
+
+class TabelaPaginada:
+    """Exibe uma lista grande de produtos em páginas de uma `ft.DataTable`.
+
+    Só os controles da página visível são criados. Linhas cujo conteúdo não
+    mudou são reaproveitadas entre atualizações, de modo que o Flet envia ao
+    cliente apenas as linhas alteradas.
+    """
+
+    def __init__(
+        self,
+        page,
+        data_table,
+        on_editar=None,
+        on_excluir=None,
+        itens_por_pagina: int = 100,
+        criar_linha=None,
+        assinatura=_assinatura_linha,
+    ):
+        """`criar_linha(item)` e `assinatura(item)` permitem reutilizar a
+        paginação para outras listas (padrão: linhas de produto)."""
+        self.page = page
+        self.data_table = data_table
+        self.on_editar = on_editar
+        self.on_excluir = on_excluir
+        self.itens_por_pagina = itens_por_pagina
+        self.criar_linha = criar_linha or (
+            lambda p: criar_linha_tabela(p, self.on_editar, self.on_excluir)
+        )
+        self.assinatura = assinatura
+        self.itens = []
+        self.pagina = 0
+        # cache das linhas da página atual: id -> (assinatura, DataRow)
+        self._linhas = {}
+
+        self.texto_intervalo = ft.Text("", size=13, color=ft.Colors.GREY_700)
+        self.btn_anterior = ft.IconButton(
+            icon=ft.Icons.CHEVRON_LEFT,
+            tooltip="Página anterior",
+            on_click=lambda e: self.ir_para(self.pagina - 1),
+        )
+        self.btn_proxima = ft.IconButton(
+            icon=ft.Icons.CHEVRON_RIGHT,
+            tooltip="Próxima página",
+            on_click=lambda e: self.ir_para(self.pagina + 1),
+        )
+        self.controle_paginacao = ft.Row(
+            [self.btn_anterior, self.texto_intervalo, self.btn_proxima],
+            alignment=ft.MainAxisAlignment.END,
+            spacing=4,
+        )
+
+    @property
+    def total_paginas(self) -> int:
+        return max(1, -(-len(self.itens) // self.itens_por_pagina))
+
+    def definir_itens(self, itens, voltar_ao_inicio: bool = False):
+        """Troca a lista exibida e redesenha a página (sem `page.update()`)."""
+        self.itens = itens
+        if voltar_ao_inicio:
+            self.pagina = 0
+        self.pagina = min(self.pagina, self.total_paginas - 1)
+        self._renderizar()
+
+    def ir_para(self, pagina: int):
+        pagina = max(0, min(pagina, self.total_paginas - 1))
+        if pagina == self.pagina:
+            return
+        self.pagina = pagina
+        self._renderizar()
+        self.page.update()
+
+    def _renderizar(self):
+        inicio = self.pagina * self.itens_por_pagina
+        visiveis = self.itens[inicio : inicio + self.itens_por_pagina]
+
+        linhas = {}
+        rows = []
+        for p in visiveis:
+            assinatura = self.assinatura(p)
+            cache = self._linhas.get(p.get("id"))
+            if cache is not None and cache[0] == assinatura:
+                row = cache[1]
+            else:
+                row = self.criar_linha(p)
+            linhas[p.get("id")] = (assinatura, row)
+            rows.append(row)
+        self._linhas = linhas
+        self.data_table.rows = rows
+
+        total = len(self.itens)
+        fim = inicio + len(visiveis)
+        self.texto_intervalo.value = (
+            f"{inicio + 1}–{fim} de {total}" if total else "0 de 0"
+        )
+        self.btn_anterior.disabled = self.pagina == 0
+        self.btn_proxima.disabled = self.pagina >= self.total_paginas - 1
@@ -0,0 +1,45 @@
+"""Histórico de custos (precos_fornecedor) das alterações manuais de custo.
+
+Toda gravação que muda `Produto.preco_custo` fora da entrada de NF-e (edição
+na tela de Estoque, importação de planilha, Relatório de Produtos) chama
+`registrar_custos_manuais` antes do commit: o novo custo entra no histórico
+com origem "manual" e o fornecedor do cadastro do produto.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from models.db_models import PrecoFornecedor
+
+# (produto_id, fornecedor_id, custo anterior (None = produto novo), custo novo)
+AlteracaoCusto = Tuple[int, Optional[int], Optional[float], Optional[float]]
+
+
+def registrar_custos_manuais(
+    session: Session, alteracoes: Iterable[AlteracaoCusto]
+) -> int:
+    """Grava no histórico os custos que mudaram (sem commit).
+
+    Custo zerado ou igual ao anterior não gera registro. Retorna a
+    quantidade de registros gravados.
+    """
+    hoje = date.today()
+    linhas = [
+        {
+            "produto_id": produto_id,
+            "fornecedor_id": fornecedor_id,
+            "custo": float(custo),
+            "data": hoje,
+            "origem": "manual",
+        }
+        for produto_id, fornecedor_id, anterior, custo in alteracoes
+        if float(custo or 0) > 0 and float(custo) != anterior
+    ]
+    if linhas:
+        session.execute(insert(PrecoFornecedor), linhas)
+    return len(linhas)
@@ -1,250 +1,364 @@
 """Utilitários de Devoluções e Trocas no estoque.
 
-Persistência simples em JSON para registros de devolução
+Registros de devolução na tabela `devolucoes` (antes em data/devolucoes.json)
 + operações de validação e ajuste de estoque via SQLAlchemy.
 """
 
 from __future__ import annotations
 
-import json
-import os
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
+from sqlalchemy import case, false, func, true
 from sqlalchemy.orm import Session
 
-from models.db_models import ItemVenda, Produto, Venda
-
-# Caminho do arquivo de persistência das devoluções
-DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
-DEVOLUCOES_FILE = os.path.join(DATA_DIR, "devolucoes.json")
-HIDDEN_FILE = os.path.join(DATA_DIR, "devolucoes_hidden.json")
-
-
-def _ensure_data_dir():
-    try:
-        os.makedirs(DATA_DIR, exist_ok=True)
-    except Exception:
-        pass
-
-
-def _load_json(path: str) -> List[Dict]:
-    if not os.path.exists(path):
-        return []
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return []
-
-
-def _save_json(path: str, data: List[Dict]) -> None:
-    _ensure_data_dir()
-    try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-    except Exception:
-        # Em caso de falha, não interromper o fluxo da aplicação
-        pass
+from models.db_models import Devolucao, ItemVenda, Produto, Venda
 
+from .lotes import conciliar_lotes
 
 # =========================
-# Devoluções (arquivo JSON)
+# Devoluções (tabela devolucoes)
 # =========================
 
 
-def carregar_devol() -> List[Dict]:
-    """Carrega a lista de devoluções do arquivo JSON."""
-    return _load_json(DEVOLUCOES_FILE)
-
-
-def carregar_hidden_ids() -> List[int]:
-    """Carrega lista de ids escondidos (inteiros) do arquivo JSON.
-
-    Retorna lista vazia se o arquivo não existir ou estiver malformado.
+def devolucao_para_dict(dev: Devolucao) -> Dict:
+    """Registro de devolução no formato de dicionário usado pelas telas."""
+    return {
+        "id": dev.id,
+        "venda_id": dev.venda_id,
+        "produto_id": dev.produto_id,
+        "produto_nome": dev.produto_nome or "Produto",
+        "quantidade": dev.quantidade or 0,
+        "valor_total": dev.valor_total or 0.0,
+        "motivo": dev.motivo or "",
+        "data": dev.data.isoformat() if dev.data else "",
+        "foi_trocado": bool(dev.foi_trocado),
+        "troca_para_id": dev.troca_para_id,
+        "troca_para_nome": dev.troca_para_nome,
+        "troca_data": dev.troca_data.isoformat() if dev.troca_data else None,
+    }
+
+
+def _visiveis(session: Session, data_inicio=None, data_fim=None):
+    """Devoluções exibidas na tela (não ocultas), opcionalmente por período."""
+    query = session.query(Devolucao).filter(Devolucao.oculta == false())
+    if data_inicio is not None:
+        query = query.filter(Devolucao.data >= data_inicio)
+    if data_fim is not None:
+        query = query.filter(Devolucao.data <= data_fim)
+    return query
+
+
+def listar_devolucoes(
+    pdv_core,
+    data_inicio: Optional[datetime] = None,
+    data_fim: Optional[datetime] = None,
+    pagina: int = 1,
+    por_pagina: Optional[int] = 50,
+) -> Dict:
+    """Página de devoluções visíveis no período, mais recentes primeiro.
+
+    `por_pagina=None` retorna todas (exportação). Retorna dict com `itens`
+    (dicionários), `total`, `valor_total`, `quantidade_total`, `pagina` e
+    `por_pagina`; os totais consideram o período inteiro, não só a página.
+    """
+    vazio = {
+        "itens": [],
+        "total": 0,
+        "valor_total": 0.0,
+        "quantidade_total": 0,
+        "pagina": 1,
+        "por_pagina": por_pagina,
+    }
+    session = _get_session_from_pdv(pdv_core)
+    if session is None:
+        return vazio
+    pagina = max(1, int(pagina or 1))
+    query = _visiveis(session, data_inicio, data_fim)
+    total, valor, quantidade = query.with_entities(
+        func.count(Devolucao.id),
+        func.coalesce(func.sum(Devolucao.valor_total), 0.0),
+        func.coalesce(func.sum(Devolucao.quantidade), 0),
+    ).one()
+    query = query.order_by(Devolucao.data.desc(), Devolucao.id.desc())
+    if por_pagina:
+        query = query.limit(por_pagina).offset((pagina - 1) * por_pagina)
+    return {
+        "itens": [devolucao_para_dict(d) for d in query.all()],
+        "total": int(total or 0),
+        "valor_total": float(valor or 0.0),
+        "quantidade_total": int(quantidade or 0),
+        "pagina": pagina,
+        "por_pagina": por_pagina,
+    }
+
+
+def estatisticas_devolucoes(
+    pdv_core,
+    data_inicio: Optional[datetime] = None,
+    data_fim: Optional[datetime] = None,
+    limite_produtos: int = 5,
+) -> Dict:
+    """Estatísticas das devoluções visíveis no período, agregadas no SQL.
+
+    Retorna totais (quantidade de registros, itens e valor), trocadas x não
+    trocadas, valor médio por item, os `limite_produtos` produtos com maior
+    valor devolvido (`por_produto`) e a série diária (`por_dia`).
+    """
+    stats = {
+        "total": 0,
+        "quantidade_total": 0,
+        "valor_total": 0.0,
+        "valor_medio": 0.0,
+        "trocadas": 0,
+        "nao_trocadas": 0,
+        "valor_trocado": 0.0,
+        "por_produto": [],
+        "por_dia": [],
+    }
+    session = _get_session_from_pdv(pdv_core)
+    if session is None:
+        return stats
+
+    base = _visiveis(session, data_inicio, data_fim)
+    trocada = Devolucao.foi_trocado == true()
+    valor = func.coalesce(func.sum(Devolucao.valor_total), 0.0)
+    quantidade = func.coalesce(func.sum(Devolucao.quantidade), 0)
+
+    total, qtd, soma, trocadas, valor_trocado = base.with_entities(
+        func.count(Devolucao.id),
+        quantidade,
+        valor,
+        func.coalesce(func.sum(case((trocada, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((trocada, Devolucao.valor_total), else_=0.0)), 0.0),
+    ).one()
+    stats.update(
+        total=int(total or 0),
+        quantidade_total=int(qtd or 0),
+        valor_total=float(soma or 0.0),
+        valor_medio=float(soma or 0.0) / qtd if qtd else 0.0,
+        trocadas=int(trocadas or 0),
+        nao_trocadas=int(total or 0) - int(trocadas or 0),
+        valor_trocado=float(valor_trocado or 0.0),
+    )
+    if not stats["total"]:
+        return stats
+
+    por_produto = (
+        base.with_entities(
+            Devolucao.produto_id,
+            func.max(Devolucao.produto_nome),
+            func.count(Devolucao.id),
+            quantidade,
+            valor,
+        )
+        .group_by(Devolucao.produto_id)
+        .order_by(valor.desc(), Devolucao.produto_id)
+        .limit(limite_produtos)
+    )
+    stats["por_produto"] = [
+        {
+            "produto_id": produto_id,
+            "produto_nome": nome or "Produto",
+            "devolucoes": int(n),
+            "quantidade": int(q or 0),
+            "valor_total": float(v or 0.0),
+        }
+        for produto_id, nome, n, q, v in por_produto
+    ]
+
+    dia = func.date(Devolucao.data)
+    por_dia = (
+        base.with_entities(dia, func.count(Devolucao.id), valor)
+        .group_by(dia)
+        .order_by(dia)
+    )
+    stats["por_dia"] = [
+        {"dia": d, "devolucoes": int(n), "valor_total": float(v or 0.0)}
+        for d, n, v in por_dia
+    ]
+    return stats
+
+
+def ocultar_devolucoes(
+    pdv_core,
+    ids: Optional[Iterable[int]] = None,
+    data_inicio: Optional[datetime] = None,
+    data_fim: Optional[datetime] = None,
+) -> int:
+    """Remove devoluções da tela (marca como ocultas) em um único UPDATE.
+
+    Oculta os `ids` informados ou, se `ids` for None, todas as visíveis do
+    período. Retorna a quantidade ocultada.
     """
-    arr = _load_json(HIDDEN_FILE)
+    session = _get_session_from_pdv(pdv_core)
+    if session is None:
+        return 0
     try:
-        return [int(x) for x in arr]
+        query = _visiveis(session, data_inicio, data_fim)
+        if ids is not None:
+            query = query.filter(Devolucao.id.in_([int(i) for i in ids]))
+        ocultadas = query.update({"oculta": True}, synchronize_session=False)
+        session.commit()
+        return ocultadas
     except Exception:
-        return []
-
+        session.rollback()
+        return 0
 
-def add_hidden_id(hid: int) -> None:
-    """Adiciona um id à lista de escondidos e salva no arquivo.
 
-    Não gera exceção em caso de falha; apenas tenta persistir.
-    """
+def remover_devolucao(pdv_core, dev_id: int) -> bool:
+    """Exclui definitivamente uma devolução pelo ID."""
+    session = _get_session_from_pdv(pdv_core)
+    if session is None:
+        return False
     try:
-        ids = carregar_hidden_ids() or []
-        try:
-            hid_int = int(hid)
-        except Exception:
-            return
-        if hid_int in ids:
-            return
-        ids.append(hid_int)
-        _save_json(HIDDEN_FILE, ids)
+        removidas = (
+            session.query(Devolucao)
+            .filter(Devolucao.id == int(dev_id))
+            .delete(synchronize_session=False)
+        )
+        session.commit()
+        return removidas > 0
     except Exception:
-        pass
+        session.rollback()
+        return False
 
 
-def remover_devolucao(dev_id: int) -> None:
-    """Remove uma devolução pelo ID e salva o arquivo."""
+def adicionar_troca(
+    pdv_core, devolucao_id: int, novo_produto_id: int, novo_produto_nome: str
+) -> bool:
+    """Marca a devolução como trocada e registra o produto de troca."""
+    session = _get_session_from_pdv(pdv_core)
+    if session is None:
+        return False
     try:
-        devs = carregar_devol()
-        devs = [d for d in devs if int(d.get("id", -1)) != int(dev_id)]
-        _save_json(DEVOLUCOES_FILE, devs)
+        dev = session.get(Devolucao, int(devolucao_id))
+        if not dev:
+            return False
+        dev.foi_trocado = True
+        dev.troca_para_id = int(novo_produto_id)
+        dev.troca_para_nome = novo_produto_nome
+        dev.troca_data = datetime.now()
+        session.commit()
+        return True
     except Exception:
-        pass
+        session.rollback()
+        return False
 
 
-def adicionar_troca(
-    devolucao_id: int, novo_produto_id: int, novo_produto_nome: str
-) -> None:
-    """Marca a devolução como trocada e registra o produto de troca."""
+def buscar_devolucao_para_troca(
+    pdv_core, produto_id: int, venda_id: Optional[int] = None
+) -> Optional[Dict]:
+    """Devolução ainda não trocada do produto (de preferência da venda informada)."""
+    session = _get_session_from_pdv(pdv_core)
+    if session is None:
+        return None
+    query = session.query(Devolucao).filter(
+        Devolucao.produto_id == int(produto_id), Devolucao.foi_trocado == false()
+    )
+    dev = None
+    if venda_id is not None:
+        dev = (
+            query.filter(Devolucao.venda_id == int(venda_id))
+            .order_by(Devolucao.id)
+            .first()
+        )
+    dev = dev or query.order_by(Devolucao.id).first()
+    return devolucao_para_dict(dev) if dev else None
+
+
+def _devolucao_do_item(it: ItemVenda, venda_id: int, motivo: str, agora: datetime):
+    nome = None
     try:
-        devs = carregar_devol()
-        for d in devs:
-            if int(d.get("id", -1)) == int(devolucao_id):
-                d["foi_trocado"] = True
-                d["troca_para_id"] = int(novo_produto_id)
-                d["troca_para_nome"] = novo_produto_nome
-                d["troca_data"] = datetime.now().isoformat()
-                break
-        _save_json(DEVOLUCOES_FILE, devs)
+        if getattr(it, "produto", None):
+            nome = it.produto.nome
     except Exception:
-        pass
+        nome = None
+    qtd = int(getattr(it, "quantidade", 0) or 0)
+    preco = float(getattr(it, "preco_unitario", 0.0) or 0.0)
+    return Devolucao(
+        venda_id=int(venda_id),
+        item_venda_id=getattr(it, "id", None),
+        produto_id=int(getattr(it, "produto_id", 0) or 0),
+        produto_nome=nome or "Produto",
+        quantidade=qtd,
+        valor_total=preco * qtd,
+        motivo=motivo,
+        data=agora,
+        foi_trocado=False,
+    )
 
 
 def registrar_devolucoes_por_venda(
     pdv_core, venda_id: int, motivo: str | None = None
 ) -> bool:
-    """Registra devoluções (estorno) no arquivo JSON a partir de uma venda.
-
-    Para cada item da venda, cria um registro com:
-    - id (sequencial)
-    - produto_id, produto_nome
-    - quantidade
-    - valor_total (preco_unitario * quantidade)
-    - motivo (ex.: "Estorno da venda #123")
-    - data (ISO agora)
-    - foi_trocado = False
+    """Registra devoluções (estorno) na tabela a partir de uma venda.
+
+    Cria um registro por item da venda (produto, quantidade, valor_total =
+    preco_unitario * quantidade, motivo e data), em uma única transação.
     """
+    session = _get_session_from_pdv(pdv_core)
+    if session is None:
+        return False
     try:
-        session = _get_session_from_pdv(pdv_core)
-        if session is None:
-            return False
-
         venda = session.query(Venda).filter_by(id=int(venda_id)).first()
         if not venda:
             return False
 
-        devs = carregar_devol() or []
-        base_id = max([int(d.get("id", 0)) for d in devs], default=0)
-
         registro_motivo = motivo.strip() if motivo else f"Estorno da venda #{venda.id}"
-        agora_iso = datetime.now().isoformat()
-
-        novos: List[Dict] = []
+        agora = datetime.now()
+        novos: List[Devolucao] = []
         for it in getattr(venda, "itens", []) or []:
             try:
-                pid = int(getattr(it, "produto_id", 0) or 0)
-                qtd = int(getattr(it, "quantidade", 0) or 0)
-                preco = float(getattr(it, "preco_unitario", 0.0) or 0.0)
-                nome = None
-                try:
-                    if getattr(it, "produto", None):
-                        nome = it.produto.nome
-                except Exception:
-                    nome = None
-                nome = nome or "Produto"
-
-                base_id += 1
-                novos.append(
-                    {
-                        "id": base_id,
-                        "produto_id": pid,
-                        "produto_nome": nome,
-                        "quantidade": qtd,
-                        "valor_total": preco * qtd,
-                        "motivo": registro_motivo,
-                        "data": agora_iso,
-                        "foi_trocado": False,
-                    }
-                )
+                novos.append(_devolucao_do_item(it, venda.id, registro_motivo, agora))
             except Exception:
                 # ignora item malformado, continua os demais
                 pass
 
         if novos:
-            devs.extend(novos)
-            _save_json(DEVOLUCOES_FILE, devs)
+            session.add_all(novos)
+            session.commit()
             return True
         return False
     except Exception:
+        session.rollback()
         return False
 
-    def registrar_devolucao_item(
-        pdv_core, venda_id: int, item_venda_id: int, motivo: str | None = None
-    ) -> bool:
-        """Registra uma devolução única (item da venda) no arquivo JSON.
 
-        - procura o ItemVenda pelo `item_venda_id` e `venda_id` e cria um registro único
-        - similar a `registrar_devolucoes_por_venda` mas apenas para um item
-        """
-        try:
-            session = _get_session_from_pdv(pdv_core)
-            if session is None:
-                return False
-
-            it = (
-                session.query(ItemVenda)
-                .filter_by(id=int(item_venda_id), venda_id=int(venda_id))
-                .first()
-            )
-            if not it:
-                return False
-
-            devs = carregar_devol() or []
-            base_id = max([int(d.get("id", 0)) for d in devs], default=0)
-
-            registro_motivo = (
-                motivo.strip() if motivo else f"Estorno da venda #{venda_id}"
-            )
-            agora_iso = datetime.now().isoformat()
+def registrar_devolucao_item(
+    pdv_core,
+    venda_id: int,
+    item_venda_id: int,
+    motivo: str | None = None,
+    commit: bool = True,
+) -> bool:
+    """Registra a devolução de um único item da venda (estorno parcial).
 
-            try:
-                pid = int(getattr(it, "produto_id", 0) or 0)
-                qtd = int(getattr(it, "quantidade", 0) or 0)
-                preco = float(getattr(it, "preco_unitario", 0.0) or 0.0)
-                nome = None
-                try:
-                    if getattr(it, "produto", None):
-                        nome = it.produto.nome
-                except Exception:
-                    nome = None
-                nome = nome or "Produto"
-
-                base_id += 1
-                registro = {
-                    "id": base_id,
-                    "produto_id": pid,
-                    "produto_nome": nome,
-                    "quantidade": qtd,
-                    "valor_total": preco * qtd,
-                    "motivo": registro_motivo,
-                    "data": agora_iso,
-                    "foi_trocado": False,
-                }
-                devs.append(registro)
-                _save_json(DEVOLUCOES_FILE, devs)
-                return True
-            except Exception:
-                return False
-        except Exception:
+    Com `commit=False` o registro só é adicionado à sessão, para entrar na
+    mesma transação do estorno (quem chama faz o commit).
+    """
+    session = _get_session_from_pdv(pdv_core)
+    if session is None:
+        return False
+    try:
+        it = (
+            session.query(ItemVenda)
+            .filter_by(id=int(item_venda_id), venda_id=int(venda_id))
+            .first()
+        )
+        if not it:
             return False
 
+        registro_motivo = motivo.strip() if motivo else f"Estorno da venda #{venda_id}"
+        session.add(_devolucao_do_item(it, venda_id, registro_motivo, datetime.now()))
+        if commit:
+            session.commit()
+        return True
+    except Exception:
+        if commit:
+            session.rollback()
+        return False
+
 
 # =========================
 # Estoque (via banco)
@@ -309,6 +423,7 @@ def atualizar_estoque_troca(
     """Atualiza estoque para uma troca:
     - Aumenta o estoque do produto original em `quantidade`.
     - Diminui o estoque do novo produto em `quantidade` (se suficiente).
+    - Notifica o PDVCore da alteração dos dois produtos.
     """
     session = _get_session_from_pdv(pdv_core)
     if session is None:
@@ -329,7 +444,10 @@ def atualizar_estoque_troca(
 
         original.estoque_atual = (original.estoque_atual or 0) + qtd
         novo.estoque_atual = (novo.estoque_atual or 0) - qtd
+        conciliar_lotes(session, [original.id, novo.id])
         session.commit()
+        # alertas de estoque (e o resumo em cache) dos dois produtos
+        pdv_core.notificar_estoque_alterado([original.id, novo.id])
         return True, "Estoque atualizado com sucesso"
     except Exception as e:
         try:
@@ -2,6 +2,8 @@ from typing import Callable
 
 import flet as ft
 
+from .components import TabelaPaginada
+
 
 def create_dialog_content(
     nome_field: ft.TextField,
@@ -144,3 +146,99 @@ def create_exclusao_overlay(exclusao_content: ft.Container) -> ft.Container:
         bgcolor="rgba(0, 0, 0, 0.5)",
         expand=True,
     )
+
+
+# Rótulo e cor de cada tipo de linha na pré-visualização da importação
+TIPOS_PREVIEW = {
+    "novo": ("Novo", ft.Colors.GREEN_700),
+    "alteracao": ("Alteração", ft.Colors.BLUE_700),
+    "conflito": ("Conflito", ft.Colors.ORANGE_800),
+    "erro": ("Erro", ft.Colors.RED_700),
+}
+
+
+def _linha_preview(entrada: dict) -> ft.DataRow:
+    rotulo, cor = TIPOS_PREVIEW.get(entrada["tipo"], (entrada["tipo"], None))
+    return ft.DataRow(
+        cells=[
+            ft.DataCell(ft.Text(str(entrada.get("linha", entrada["id"])), size=12)),
+            ft.DataCell(ft.Text(rotulo, size=12, color=cor, weight=ft.FontWeight.BOLD)),
+            ft.DataCell(ft.Text(entrada["nome"], size=12, width=200)),
+            ft.DataCell(ft.Text(entrada["codigo_barras"], size=12)),
+            ft.DataCell(ft.Text(entrada["detalhe"], size=12, width=360)),
+        ]
+    )
+
+
+def create_import_preview_dialog(
+    page: ft.Page,
+    simulacao: dict,
+    on_aplicar: Callable[[ft.ControlEvent], None],
+    on_cancelar: Callable[[ft.ControlEvent], None],
+) -> ft.AlertDialog:
+    """Cria o diálogo de pré-visualização (dry-run) da importação de produtos.
+
+    Mostra o resumo (novos, alterações, inalterados, conflitos, erros) e a
+    lista paginada das linhas; nada é gravado até o usuário clicar "Aplicar".
+    """
+    novos = len(simulacao["novos"])
+    alteracoes = len(simulacao["alteracoes"])
+    resumo = ft.Text(
+        f"Novos: {novos}  •  Alterações: {alteracoes}  •  "
+        f"Inalterados: {simulacao['inalterados']}  •  "
+        f"Conflitos: {simulacao['conflitos']}  •  Erros: {simulacao['erros']}",
+        size=13,
+        weight=ft.FontWeight.BOLD,
+    )
+    tabela = ft.DataTable(
+        columns=[
+            ft.DataColumn(ft.Text("Linha", size=12, weight=ft.FontWeight.BOLD)),
+            ft.DataColumn(ft.Text("Tipo", size=12, weight=ft.FontWeight.BOLD)),
+            ft.DataColumn(ft.Text("Produto", size=12, weight=ft.FontWeight.BOLD)),
+            ft.DataColumn(ft.Text("Código", size=12, weight=ft.FontWeight.BOLD)),
+            ft.DataColumn(ft.Text("Detalhe", size=12, weight=ft.FontWeight.BOLD)),
+        ],
+        rows=[],
+        column_spacing=16,
+        data_row_min_height=32,
+    )
+    paginada = TabelaPaginada(
+        page,
+        tabela,
+        itens_por_pagina=50,
+        criar_linha=_linha_preview,
+        assinatura=lambda entrada: entrada["id"],
+    )
+    paginada.definir_itens(simulacao["entradas"])
+
+    return ft.AlertDialog(
+        modal=True,
+        title=ft.Text("Pré-visualização da importação"),
+        content=ft.Container(
+            content=ft.Column(
+                [
+                    resumo,
+                    ft.Text(
+                        "Conflitos e linhas com erro não serão aplicados.",
+                        size=12,
+                        color=ft.Colors.GREY_700,
+                    ),
+                    ft.ListView(controls=[tabela], expand=True),
+                    paginada.controle_paginacao,
+                ],
+                spacing=8,
+            ),
+            width=900,
+            height=520,
+        ),
+        actions=[
+            ft.TextButton("Cancelar", on_click=on_cancelar),
+            ft.ElevatedButton(
+                f"Aplicar ({novos + alteracoes})",
+                bgcolor="#012a4a",
+                color=ft.Colors.WHITE,
+                disabled=(novos + alteracoes) == 0,
+                on_click=on_aplicar,
+            ),
+        ],
+    )
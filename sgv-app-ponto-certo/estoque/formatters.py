@@ -1,14 +1,16 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
 
 def converter_texto_para_data(texto) -> Optional[datetime]:
-    """Converte texto dd/mm/aaaa em datetime ou None."""
+    """Converte texto dd/mm/aaaa (ou `date` do banco) em datetime ou None."""
     if texto is None:
         return None
     try:
-        if hasattr(texto, "strftime"):
+        if isinstance(texto, datetime):
             return texto
+        if isinstance(texto, date):
+            return datetime(texto.year, texto.month, texto.day)
         return datetime.strptime(str(texto).strip(), "%d/%m/%Y")
     except Exception:
         return None
@@ -45,19 +47,35 @@ def converter_texto_para_preco(texto) -> float:
         return 0.0
 
 
-def validar_produto(nome, categoria, quantidade, validade_obj) -> int:
+# Mensagens de validação: (tela de cadastro, erro por linha da importação)
+_MENSAGENS_VALIDACAO = {
+    "campos": ("⚠️ Todos os campos são obrigatórios!", "Campos obrigatórios ausentes"),
+    "data": ("⚠️ Data inválida! Use o formato DD/MM/AAAA.", "Data inválida"),
+    "quantidade": (
+        "Quantidade deve ser um número inteiro positivo",
+        "Quantidade inválida",
+    ),
+}
+
+
+def validar_produto(nome, categoria, quantidade, validade_obj, curta=False) -> int:
     """Valida campos básicos do produto e retorna quantidade como int.
 
-    Versão usada pela UI (mensagens amigáveis).
+    Mensagens amigáveis para a UI; com `curta=True`, as mensagens curtas
+    usadas nos erros por linha da importação de planilhas.
     """
+
+    def _erro(chave):
+        return ValueError(_MENSAGENS_VALIDACAO[chave][1 if curta else 0])
+
     if not (nome and categoria and quantidade):
-        raise ValueError("⚠️ Todos os campos são obrigatórios!")
+        raise _erro("campos")
     if validade_obj is None:
-        raise ValueError("⚠️ Data inválida! Use o formato DD/MM/AAAA.")
+        raise _erro("data")
     try:
         qtd = int(quantidade)
         if qtd < 0:
             raise ValueError()
         return qtd
     except Exception:
-        raise ValueError("Quantidade deve ser um número inteiro positivo")
+        raise _erro("quantidade")
@@ -1,15 +1,18 @@
 """Helpers para processar importação de arquivos (CSV / Excel).
 
-Funções: parse_file_to_records, process_import
+Funções: iter_records, parse_file_to_records, process_import,
+simular_importacao / simular_importacao_arquivos (dry-run com diff contra o
+catálogo; vários arquivos são lidos em paralelo) e aplicar_importacao
 
-Este módulo é intencionalmente livre de efeitos colaterais sobre `produtos`.
-Ele apenas lê/normaliza/valida e retorna listas de itens a serem inseridos
-e a lista de nomes/códigos duplicados detectados.
+A leitura é feita em fluxo (linha a linha) e a deduplicação usa sets, então
+o custo é linear no número de linhas. Este módulo não altera `produtos`;
+apenas `aplicar_importacao` grava no banco
+(via estoque.repository).
 """
 
 import csv
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 
 def _norm(s: str) -> str:
@@ -30,83 +33,175 @@ def _norm_cb(v) -> str:
     return s
 
 
+def _valor_celula(v) -> Any:
+    """Normaliza o valor de uma célula: datas viram dd/mm/aaaa, números são mantidos."""
+    if v is None:
+        return ""
+    if isinstance(v, float) and v != v:  # NaN
+        return ""
+    if hasattr(v, "strftime"):
+        try:
+            return v.strftime("%d/%m/%Y")
+        except Exception:
+            return str(v)
+    if isinstance(v, (int, float)):
+        return v
+    return str(v)
+
+
+def _iter_xlsx(file_path: str) -> Iterator[Dict[str, Any]]:
+    import openpyxl
+
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        linhas = wb.active.iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        if cabecalho is None:
+            return
+        headers = [str(h).strip() if h is not None else "" for h in cabecalho]
+        for row in linhas:
+            if row is None or all(v is None for v in row):
+                continue
+            yield {
+                (headers[i] if i < len(headers) else f"col{i}"): _valor_celula(val)
+                for i, val in enumerate(row)
+            }
+    finally:
+        wb.close()
+
+
+def _iter_planilha_pandas(file_path: str) -> Iterator[Dict[str, Any]]:
+    # .xls (formato antigo) não é lido pelo openpyxl: usa pandas (lazy import)
+    import pandas as pd
+
+    df = pd.read_excel(file_path)
+    for row in df.to_dict(orient="records"):
+        yield {str(k).strip(): _valor_celula(v) for k, v in row.items()}
+
+
+def _iter_csv(file_path: str) -> Iterator[Dict[str, Any]]:
+    with open(file_path, encoding="utf-8-sig", newline="") as f:
+        yield from csv.DictReader(f)
+
+
+def iter_records(file_path: str) -> Iterator[Dict[str, Any]]:
+    """Lê o arquivo linha a linha (sem carregar a planilha inteira na memória).
+
+    `.xlsx` usa openpyxl em modo read-only, CSV usa `csv.DictReader` e `.xls`
+    recorre ao pandas. Lança exceção se o arquivo não puder ser lido.
+    """
+    ext = Path(file_path).suffix.lower()
+    if ext == ".xlsx":
+        return _iter_xlsx(file_path)
+    if ext == ".xls":
+        return _iter_planilha_pandas(file_path)
+    return _iter_csv(file_path)
+
+
 def parse_file_to_records(
     file_path: str,
 ) -> Tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
-    p = Path(file_path)
-    ext = p.suffix.lower()
-    if ext in (".xls", ".xlsx"):
-        # tenta usar pandas (lazy import) e fallback para leitura manual/openpyxl
-        try:
-            import pandas as pd
-
-            df = pd.read_excel(file_path, engine="openpyxl")
-        except Exception as ex_openpyxl:
-            try:
-                import openpyxl
-
-                wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
-                ws = wb.active
-                headers = [
-                    str(cell.value).strip() if cell.value is not None else ""
-                    for cell in next(ws.iter_rows(max_row=1))
-                ]
-                rows = []
-                for row in ws.iter_rows(min_row=2, values_only=True):
-                    d = {}
-                    for i, val in enumerate(row):
-                        key = headers[i] if i < len(headers) else f"col{i}"
-                        d[key] = val
-                    rows.append(d)
-                try:
-                    import pandas as pd
-
-                    df = pd.DataFrame(rows)
-                except Exception:
-                    # criar records manualmente
-                    records = []
-                    for r in rows:
-                        rec = {k: ("" if v is None else v) for k, v in r.items()}
-                        records.append(rec)
-                    return records, None
-            except Exception:
-                try:
-                    import pandas as pd
-
-                    df = pd.read_excel(file_path, engine="calamine")
-                except Exception as ex_calamine:
-                    return None, (
-                        f"Falha ao ler Excel: openpyxl({ex_openpyxl}), calamine({ex_calamine})."
-                    )
-
-        # normaliza DataFrame para lista de dicionários mantendo números
-        records: List[Dict[str, Any]] = []
-        import pandas as _pd
-
-        for row in df.to_dict(orient="records"):
-            rec: Dict[str, Any] = {}
-            for k, v in row.items():
-                key = str(k).strip()
-                if v is None or (isinstance(v, float) and _pd.isna(v)):
-                    rec[key] = ""
-                elif hasattr(v, "strftime"):
-                    try:
-                        rec[key] = v.strftime("%d/%m/%Y")
-                    except Exception:
-                        rec[key] = str(v)
-                elif isinstance(v, (int, float)):
-                    rec[key] = v
-                else:
-                    rec[key] = str(v)
-            records.append(rec)
-        return records, None
-    else:
+    try:
+        return list(iter_records(file_path)), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _registro_para_item(
+    row: Dict[str, Any], converter_texto_para_data, converter_texto_para_preco, validar
+) -> Dict[str, Any]:
+    """Converte uma linha do arquivo no dict de produto (lança ValueError se inválida)."""
+    nome = row.get("Nome") or row.get("nome")
+    categoria = row.get("Categoria") or row.get("categoria")
+    validade = row.get("Validade") or row.get("validade")
+    quantidade = row.get("Quantidade") or row.get("quantidade")
+    codigo_barras = (
+        row.get("Código de Barras")
+        or row.get("codigo_barras")
+        or row.get("Codigo de Barras")
+    )
+    validade_obj = converter_texto_para_data(validade)
+    qtd = validar(nome, categoria, quantidade, validade_obj)
+    preco_venda_bruto = (
+        row.get("Preço")
+        or row.get("Preco")
+        or row.get("preco_venda")
+        or row.get("preco")
+        or row.get("Preço de Venda")
+    )
+    preco_custo_bruto = (
+        row.get("Preço de Custo")
+        or row.get("Preco de Custo")
+        or row.get("Custo")
+        or row.get("custo")
+        or row.get("preco_custo")
+    )
+    # Preço ausente no arquivo fica None (não informado) em vez de 0,00
+    preco_venda = (
+        converter_texto_para_preco(preco_venda_bruto)
+        if preco_venda_bruto not in (None, "")
+        else None
+    )
+    preco_custo = (
+        converter_texto_para_preco(preco_custo_bruto)
+        if preco_custo_bruto not in (None, "")
+        else None
+    )
+    return {
+        "nome": nome,
+        "categoria": categoria,
+        "validade": validade_obj,
+        "quantidade": qtd,
+        "preco_venda": preco_venda,
+        "preco_custo": preco_custo,
+        "codigo_barras": _norm_cb(codigo_barras),
+    }
+
+
+def classificar_registros(
+    records: Iterable[Dict[str, Any]],
+    produtos: List[Dict[str, Any]],
+    converter_texto_para_data,
+    converter_texto_para_preco,
+    validar_produto,
+) -> Iterator[Tuple[str, int, Any]]:
+    """Valida e deduplica as linhas em uma única passada.
+
+    Gera tuplas `(tipo, numero_linha, valor)` onde `tipo` é "ok" (valor = item),
+    "duplicado" (valor = nome/código) ou "erro" (valor = mensagem).
+    Duplicidade é checada contra `produtos` e contra as linhas já aceitas,
+    por código de barras e por (nome, categoria) normalizados, usando sets.
+    """
+    vistos_cod = {
+        _norm_cb(p.get("codigo_barras")) for p in produtos if p.get("codigo_barras")
+    }
+    vistos_nome_cat = {
+        (_norm(p.get("nome")), _norm(p.get("categoria"))) for p in produtos
+    }
+
+    # linha 1 é o cabeçalho do arquivo
+    for numero, row in enumerate(records, start=2):
         try:
-            with open(file_path, encoding="utf-8-sig") as f:
-                reader = csv.DictReader(f)
-                return list(reader), None
+            item = _registro_para_item(
+                row,
+                converter_texto_para_data,
+                converter_texto_para_preco,
+                validar_produto,
+            )
         except Exception as e:
-            return None, str(e)
+            yield "erro", numero, str(e)
+            continue
+
+        cb = item["codigo_barras"]
+        key_nome_cat = (_norm(item["nome"]), _norm(item["categoria"]))
+        if (cb and cb in vistos_cod) or key_nome_cat in vistos_nome_cat:
+            yield "duplicado", numero, item["nome"] or cb or "(sem nome)"
+            continue
+
+        if cb:
+            vistos_cod.add(cb)
+        vistos_nome_cat.add(key_nome_cat)
+        yield "ok", numero, item
 
 
 def process_import(
@@ -117,87 +212,299 @@ def process_import(
     validar_produto,
 ) -> Tuple[List[Dict[str, Any]], List[str], Optional[str]]:
     """Processa arquivo de importação e retorna (itens_para_inserir, duplicados, erro)."""
-    records, err = parse_file_to_records(file_path)
-    if err:
-        return [], [], f"Erro ao ler arquivo: {err}"
-    if records is None:
-        return [], [], "Arquivo vazio ou inválido"
+    importados: List[Dict[str, Any]] = []
+    duplicados: List[str] = []
+    try:
+        for tipo, _numero, valor in classificar_registros(
+            iter_records(file_path),
+            produtos,
+            converter_texto_para_data,
+            converter_texto_para_preco,
+            validar_produto,
+        ):
+            if tipo == "ok":
+                importados.append(valor)
+            elif tipo == "duplicado":
+                duplicados.append(valor)
+            # linhas inválidas são ignoradas
+    except Exception as e:
+        return [], [], f"Erro ao ler arquivo: {e}"
+    return importados, duplicados, None
 
-    existentes_cod = {
-        _norm_cb(p.get("codigo_barras")) for p in produtos if p.get("codigo_barras")
-    }
-    existentes_nome_cat = {
-        (_norm(p.get("nome")), _norm(p.get("categoria"))) for p in produtos
-    }
 
-    importados_dedup: List[Dict[str, Any]] = []
-    duplicados: List[str] = []
+# Campos comparados na simulação: (campo no item, coluna do banco, rótulo)
+_CAMPOS_DIFF = (
+    ("preco_venda", "preco_venda", "Preço"),
+    ("preco_custo", "preco_custo", "Custo"),
+    ("quantidade", "estoque_atual", "Estoque"),
+    ("nome", "nome", "Nome"),
+    ("categoria", "categoria", "Categoria"),
+    ("validade", "validade", "Validade"),
+)
 
-    for row in records:
-        try:
-            nome = row.get("Nome") or row.get("nome")
-            categoria = row.get("Categoria") or row.get("categoria")
-            validade = row.get("Validade") or row.get("validade")
-            quantidade = row.get("Quantidade") or row.get("quantidade")
-            codigo_barras = (
-                row.get("Código de Barras")
-                or row.get("codigo_barras")
-                or row.get("Codigo de Barras")
+
+def _fmt_diff(campo: str, valor) -> str:
+    if valor is None or valor == "":
+        return "-"
+    if campo in ("preco_venda", "preco_custo"):
+        return f"R$ {float(valor):.2f}".replace(".", ",")
+    if hasattr(valor, "strftime"):
+        return valor.strftime("%d/%m/%Y")
+    return str(valor)
+
+
+def _mudancas(atual, item: Dict[str, Any]) -> List[str]:
+    """Lista legível das diferenças entre o produto do banco e a linha do arquivo."""
+    mudancas = []
+    for campo, coluna, rotulo in _CAMPOS_DIFF:
+        antes = getattr(atual, coluna)
+        depois = item.get(campo)
+        if campo in ("preco_venda", "preco_custo"):
+            igual = round(float(antes or 0.0), 2) == round(float(depois or 0.0), 2)
+        elif campo == "validade":
+            igual = antes == (depois.date() if depois else None)
+        elif campo == "quantidade":
+            igual = int(antes or 0) == int(depois or 0)
+        else:
+            igual = (antes or "") == (depois or "")
+        if not igual:
+            mudancas.append(
+                f"{rotulo}: {_fmt_diff(campo, antes)} → {_fmt_diff(campo, depois)}"
             )
-            validade_obj = converter_texto_para_data(validade)
-            qtd = validar_produto(nome, categoria, quantidade, validade_obj)
-            preco_venda = converter_texto_para_preco(
-                row.get("Preço")
-                or row.get("Preco")
-                or row.get("preco_venda")
-                or row.get("preco")
-                or row.get("Preço de Venda")
+    if not atual.ativo:
+        mudancas.append("Reativado")
+    return mudancas
+
+
+def _linhas_do_arquivo(
+    file_path: str, converter_texto_para_data, converter_texto_para_preco, validar
+) -> Iterator[Tuple[str, Optional[Dict[str, Any]], str]]:
+    """Gera `(rótulo_da_linha, item ou None, mensagem_de_erro)` lendo em fluxo."""
+    for numero, row in enumerate(iter_records(file_path), start=2):
+        try:
+            item = _registro_para_item(
+                row, converter_texto_para_data, converter_texto_para_preco, validar
             )
-            preco_custo = converter_texto_para_preco(
-                row.get("Preço de Custo")
-                or row.get("Preco de Custo")
-                or row.get("Custo")
-                or row.get("custo")
-                or row.get("preco_custo")
+            yield str(numero), item, ""
+        except Exception as e:
+            yield str(numero), {"nome": row.get("Nome") or row.get("nome")}, str(e)
+
+
+def _comparar_com_catalogo(
+    session,
+    linhas: Iterable[Tuple[str, Optional[Dict[str, Any]], str]],
+    on_progresso: Optional[Callable[[int], None]] = None,
+    intervalo_progresso: int = 1000,
+) -> Dict[str, Any]:
+    from sqlalchemy import select
+
+    from models.db_models import Produto
+
+    resultado: Dict[str, Any] = {
+        "novos": [],
+        "alteracoes": [],
+        "inalterados": 0,
+        "conflitos": 0,
+        "erros": 0,
+        "entradas": [],
+        "erro": None,
+    }
+
+    def _entrada(tipo, rotulo, nome, codigo, detalhe):
+        resultado["entradas"].append(
+            {
+                "id": len(resultado["entradas"]) + 1,
+                "linha": rotulo,
+                "tipo": tipo,
+                "nome": nome or "",
+                "codigo_barras": codigo or "",
+                "detalhe": detalhe,
+            }
+        )
+
+    por_codigo = {}
+    por_nome_cat = {}
+    for prod in session.execute(select(Produto)).scalars():
+        por_codigo[prod.codigo_barras] = prod
+        if prod.ativo:
+            por_nome_cat[(_norm(prod.nome), _norm(prod.categoria))] = prod
+
+    vistos_cod: Dict[str, str] = {}
+    vistos_nome_cat: Dict[tuple, str] = {}
+    lidas = 0
+    for rotulo, item, erro in linhas:
+        lidas += 1
+        if on_progresso and lidas % intervalo_progresso == 0:
+            on_progresso(lidas)
+        if erro:
+            resultado["erros"] += 1
+            _entrada("erro", rotulo, item.get("nome"), "", erro)
+            continue
+
+        cb = item["codigo_barras"]
+        chave = (_norm(item["nome"]), _norm(item["categoria"]))
+        repetida = vistos_cod.get(cb) if cb else vistos_nome_cat.get(chave)
+        if repetida:
+            resultado["conflitos"] += 1
+            _entrada(
+                "conflito",
+                rotulo,
+                item["nome"],
+                cb,
+                f"Repetido na importação (linha {repetida})",
             )
-            cb = _norm_cb(codigo_barras)
-            key_nome_cat = (_norm(nome), _norm(categoria))
-
-            if (
-                (cb and cb in existentes_cod)
-                or (key_nome_cat in existentes_nome_cat)
-                or (
-                    (
-                        cb
-                        and any(
-                            str(n.get("codigo_barras")) == cb for n in importados_dedup
-                        )
-                    )
-                    or (
-                        key_nome_cat
-                        in {
-                            (_norm(n.get("nome")), _norm(n.get("categoria")))
-                            for n in importados_dedup
-                        }
-                    )
+            continue
+        if cb:
+            vistos_cod[cb] = rotulo
+        vistos_nome_cat.setdefault(chave, rotulo)
+
+        atual = por_codigo.get(cb) if cb else None
+        if atual is None:
+            outro = por_nome_cat.get(chave)
+            if outro is not None:
+                resultado["conflitos"] += 1
+                _entrada(
+                    "conflito",
+                    rotulo,
+                    item["nome"],
+                    cb,
+                    f"Mesmo nome/categoria do produto {outro.codigo_barras}",
                 )
-            ):
-                duplicados.append(nome or cb or "(sem nome)")
                 continue
+            resultado["novos"].append(item)
+            _entrada("novo", rotulo, item["nome"], cb, "Novo produto")
+            continue
 
-            importados_dedup.append(
-                {
-                    "nome": nome,
-                    "categoria": categoria,
-                    "validade": validade_obj,
-                    "quantidade": qtd,
-                    "preco_venda": preco_venda,
-                    "preco_custo": preco_custo,
-                    "codigo_barras": cb,
-                }
-            )
-        except Exception:
-            # ignora linha inválida
+        # preço não informado no arquivo mantém o valor do catálogo
+        for campo in ("preco_venda", "preco_custo"):
+            if item[campo] is None:
+                item[campo] = getattr(atual, campo)
+        mudancas = _mudancas(atual, item)
+        if not mudancas:
+            resultado["inalterados"] += 1
             continue
+        resultado["alteracoes"].append(item)
+        _entrada("alteracao", rotulo, item["nome"], cb, "; ".join(mudancas))
+
+    if on_progresso:
+        on_progresso(lidas)
+    return resultado
+
+
+def simular_importacao(
+    file_path: str,
+    session,
+    converter_texto_para_data,
+    converter_texto_para_preco,
+    validar_produto,
+    on_progresso: Optional[Callable[[int], None]] = None,
+    intervalo_progresso: int = 1000,
+) -> Dict[str, Any]:
+    """Dry-run: compara o arquivo com o catálogo do banco sem gravar nada.
+
+    O catálogo é lido uma vez (um SELECT) e indexado em dicts por código de
+    barras e por (nome, categoria) normalizados; o arquivo é lido em fluxo.
+    Retorna dict com:
+    - `novos` / `alteracoes`: itens que `aplicar_importacao` vai gravar;
+    - `inalterados`, `conflitos`, `erros`: contagens;
+    - `entradas`: linhas para a pré-visualização (tipo, linha, nome, código, detalhe);
+    - `erro`: falha geral de leitura ou None.
+    """
+    try:
+        return _comparar_com_catalogo(
+            session,
+            _linhas_do_arquivo(
+                file_path,
+                converter_texto_para_data,
+                converter_texto_para_preco,
+                validar_produto,
+            ),
+            on_progresso,
+            intervalo_progresso,
+        )
+    except Exception as e:
+        return {
+            "novos": [],
+            "alteracoes": [],
+            "inalterados": 0,
+            "conflitos": 0,
+            "erros": 0,
+            "entradas": [],
+            "erro": f"Erro ao ler arquivo: {e}",
+        }
+
+
+def ler_arquivo_produtos(file_path: str) -> Dict[str, Any]:
+    """Lê e valida um arquivo inteiro de produtos.
+
+    Não depende de Flet nem do banco, para poder rodar em outro processo
+    (ver `simular_importacao_arquivos`). Retorna dict com `arquivo`,
+    `linhas` (lista de (rótulo, item, erro)) e `erro` (falha de leitura).
+    """
+    from functools import partial
+
+    from .formatters import (
+        converter_texto_para_data,
+        converter_texto_para_preco,
+        validar_produto,
+    )
+
+    nome = Path(file_path).name
+    linhas = []
+    try:
+        for numero, item, erro in _linhas_do_arquivo(
+            file_path,
+            converter_texto_para_data,
+            converter_texto_para_preco,
+            partial(validar_produto, curta=True),
+        ):
+            linhas.append((f"{nome}:{numero}", item, erro))
+        return {"arquivo": file_path, "linhas": linhas, "erro": None}
+    except Exception as e:
+        return {"arquivo": file_path, "linhas": linhas, "erro": f"{nome}: {e}"}
+
+
+def simular_importacao_arquivos(
+    arquivos: List[str],
+    session,
+    on_progresso: Optional[Callable[[int], None]] = None,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Dry-run de vários arquivos: leitura em paralelo, comparação única.
+
+    Cada arquivo é lido/validado em um processo do pool; as linhas são então
+    mescladas (na ordem dos arquivos) e comparadas com o catálogo como em
+    `simular_importacao`. O resultado é aplicado com `aplicar_importacao`
+    em uma única transação.
+    """
+    from utils.processamento_paralelo import mapear_em_processos
+
+    lidos = mapear_em_processos(ler_arquivo_produtos, arquivos, max_workers)
+    falhas = [r["erro"] for r in lidos if r["erro"]]
+    if falhas:
+        return {
+            "novos": [],
+            "alteracoes": [],
+            "inalterados": 0,
+            "conflitos": 0,
+            "erros": 0,
+            "entradas": [],
+            "erro": "Erro ao ler arquivo: " + "; ".join(falhas),
+        }
+    return _comparar_com_catalogo(
+        session,
+        (linha for r in lidos for linha in r["linhas"]),
+        on_progresso,
+    )
+
+
+def aplicar_importacao(session, simulacao: Dict[str, Any]) -> int:
+    """Grava novos e alterados da simulação em uma única transação.
+
+    Conflitos e linhas com erro não são aplicados. Retorna a quantidade gravada.
+    """
+    from .repository import adicionar_produtos
 
-    return importados_dedup, duplicados, None
+    return adicionar_produtos(
+        session, list(simulacao["novos"]) + list(simulacao["alteracoes"])
+    )
@@ -0,0 +1,206 @@
+"""Conciliação dos lotes (lotes_produto) com o estoque dos produtos.
+
+O estoque do produto (`Produto.estoque_atual`) continua sendo o saldo
+oficial; os lotes detalham esse saldo por validade (controle FEFO). Toda
+movimentação de estoque chama `conciliar_lotes` antes do commit:
+
+- entrada (saldo do produto maior que a soma dos lotes): a diferença vai para
+  o lote com a validade/lote gravados no produto (quem registra a entrada
+  grava ali os dados do lote recebido) ou para um lote novo;
+- saída (saldo menor que a soma dos lotes): a diferença é baixada dos lotes
+  em ordem FEFO — primeiro os não vencidos, do mais próximo ao mais distante
+  (sem validade por último), depois os vencidos.
+
+Assim a soma dos lotes sempre fecha com o estoque do produto, inclusive para
+estoque anterior ao controle de lotes.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+from models.db_models import LoteProduto, Produto
+
+# Ids por consulta IN (abaixo do limite de parâmetros do SQLite)
+_LOTE_IDS = 500
+
+
+def _ordem_fefo(lote: dict, hoje: date):
+    """Chave de baixa: não vencidos (sem validade por último), depois vencidos."""
+    validade = lote["validade"]
+    vencido = validade is not None and validade < hoje
+    return (vencido, validade is None, validade or date.max, lote["id"])
+
+
+def selecionar_fefo(
+    lotes: Iterable[dict], quantidade: int, hoje: date
+) -> List[Tuple[dict, int]]:
+    """Regra única de baixa FEFO (vendas, conciliação e consulta de lotes).
+
+    `lotes` são dicts com id, validade e quantidade. Percorre os lotes com
+    saldo na ordem de `_ordem_fefo` até atender `quantidade`; retorna
+    [(lote, quantidade_retirada)], com soma menor que `quantidade` quando o
+    saldo não cobre o pedido.
+    """
+    restante = int(quantidade or 0)
+    selecionados = []
+    for lote in sorted(
+        (l for l in lotes if l["quantidade"] > 0), key=lambda l: _ordem_fefo(l, hoje)
+    ):
+        if restante <= 0:
+            break
+        retirar = min(restante, lote["quantidade"])
+        selecionados.append((lote, retirar))
+        restante -= retirar
+    return selecionados
+
+
+def _ordem_exibicao(lote: dict):
+    """Lote exibido no produto: o mais próximo de vencer (inclusive vencido)."""
+    return (lote["validade"] is None, lote["validade"] or date.max, lote["id"])
+
+
+def _somar_ao_lote(lotes, novos, alterados, produto_id, chave, quantidade):
+    """Soma `quantidade` ao lote (validade, lote) do produto ou cria um novo."""
+    destino = next(
+        (l for l in lotes if (l["validade"], l["lote"] or None) == chave), None
+    )
+    if destino is None:
+        destino = {
+            "id": None,
+            "produto_id": produto_id,
+            "validade": chave[0],
+            "lote": chave[1],
+            "quantidade": 0,
+        }
+        lotes.append(destino)
+        novos.append(destino)
+    elif destino["id"] is not None:
+        alterados[destino["id"]] = destino
+    destino["quantidade"] += quantidade
+
+
+def conciliar_lotes(
+    session: Session,
+    produto_ids: Optional[Iterable[int]] = None,
+    hoje: Optional[date] = None,
+    recebidos: Optional[Dict[int, list]] = None,
+) -> Dict[int, int]:
+    """Ajusta os lotes dos produtos para que somem o estoque atual (sem commit).
+
+    `produto_ids=None` confere todos os produtos. Uma entrada vai primeiro
+    para os lotes informados em `recebidos` ({produto_id: [(validade, lote,
+    quantidade), ...]}, ex.: rastro da NF-e) e o restante para o lote com a
+    validade/lote gravados no produto; depois do ajuste, o produto passa a
+    exibir a validade/lote do próximo lote com saldo. Retorna
+    {produto_id: diferença conciliada} (positiva = entrada sem lote,
+    negativa = saída baixada dos lotes).
+    """
+    hoje = hoje or date.today()
+    session.flush()
+
+    soma_lotes = (
+        select(
+            LoteProduto.produto_id,
+            func.sum(LoteProduto.quantidade).label("quantidade"),
+        )
+        .group_by(LoteProduto.produto_id)
+        .subquery()
+    )
+    em_lotes = func.coalesce(soma_lotes.c.quantidade, 0)
+    divergentes = (
+        select(
+            Produto.id, Produto.estoque_atual, Produto.validade, Produto.lote, em_lotes
+        )
+        .outerjoin(soma_lotes, soma_lotes.c.produto_id == Produto.id)
+        .where(func.coalesce(Produto.estoque_atual, 0) != em_lotes)
+    )
+    if produto_ids is not None:
+        ids = sorted({int(i) for i in produto_ids if i is not None})
+        if not ids:
+            return {}
+        linhas = []
+        for inicio in range(0, len(ids), _LOTE_IDS):
+            linhas += session.execute(
+                divergentes.where(Produto.id.in_(ids[inicio : inicio + _LOTE_IDS]))
+            ).all()
+    else:
+        linhas = session.execute(divergentes).all()
+    if not linhas:
+        return {}
+
+    lotes_por_produto: Dict[int, list] = {linha[0]: [] for linha in linhas}
+    ids_divergentes = list(lotes_por_produto)
+    for inicio in range(0, len(ids_divergentes), _LOTE_IDS):
+        for row in session.execute(
+            select(
+                LoteProduto.id,
+                LoteProduto.produto_id,
+                LoteProduto.validade,
+                LoteProduto.lote,
+                LoteProduto.quantidade,
+            ).where(
+                LoteProduto.produto_id.in_(ids_divergentes[inicio : inicio + _LOTE_IDS])
+            )
+        ):
+            lotes_por_produto[row.produto_id].append(row._asdict())
+
+    novos, alterados, exibicao, diferencas = [], {}, [], {}
+    for produto_id, estoque, validade_prod, lote_prod, quantidade_lotes in linhas:
+        lotes = lotes_por_produto[produto_id]
+        diferenca = int(estoque or 0) - int(quantidade_lotes or 0)
+        diferencas[produto_id] = diferenca
+        if diferenca > 0:
+            restante = diferenca
+            for validade, lote, quantidade in (recebidos or {}).get(produto_id, ()):
+                parte = min(restante, int(quantidade or 0))
+                if parte > 0:
+                    _somar_ao_lote(
+                        lotes, novos, alterados, produto_id, (validade, lote), parte
+                    )
+                    restante -= parte
+            if restante > 0:
+                _somar_ao_lote(
+                    lotes,
+                    novos,
+                    alterados,
+                    produto_id,
+                    (validade_prod, lote_prod or None),
+                    restante,
+                )
+        else:
+            for l, retirar in selecionar_fefo(lotes, -diferenca, hoje):
+                l["quantidade"] -= retirar
+                alterados[l["id"]] = l
+
+        com_saldo = [l for l in lotes if l["quantidade"] > 0]
+        if com_saldo:
+            proximo = min(com_saldo, key=_ordem_exibicao)
+            if (proximo["validade"], proximo["lote"]) != (validade_prod, lote_prod):
+                exibicao.append(
+                    {
+                        "id": produto_id,
+                        "validade": proximo["validade"],
+                        "lote": proximo["lote"],
+                    }
+                )
+
+    if novos:
+        session.execute(
+            insert(LoteProduto),
+            [{k: v for k, v in l.items() if k != "id"} for l in novos],
+        )
+    if alterados:
+        session.execute(
+            update(LoteProduto),
+            [{"id": i, "quantidade": l["quantidade"]} for i, l in alterados.items()],
+        )
+    if exibicao:
+        session.execute(update(Produto), exibicao)
+    # as gravações acima não passam pelos objetos já carregados
+    session.expire_all()
+    return diferencas
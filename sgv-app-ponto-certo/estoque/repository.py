@@ -1,60 +1,254 @@
 import csv
 import json
 import os
-from datetime import datetime
+import uuid
 from pathlib import Path
 from typing import Any, Dict, List
 
 # Caminho base do projeto (um nível acima da pasta "estoque")
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+# produtos.json agora é apenas exportação (o catálogo vive no banco)
 ARQUIVO_DADOS = os.path.join(BASE_DIR, "data", "produtos.json")
 
 # Nota: a importação de pandas pode ser pesada ou travar em alguns ambientes.
 # Fazemos a importação de forma lazy dentro da função que necessita de Excel
 # para evitar bloquear o startup do aplicativo quando pandas não for usado.
 
+from sqlalchemy import insert, select, update
+
+from models.db_models import ItemVenda, Produto, validade_para_date
+
 from .formatters import converter_texto_para_data as _conv_data
+from .custos import registrar_custos_manuais
 from .formatters import converter_texto_para_preco as _conv_preco
+from .lotes import conciliar_lotes
+
+
+def produto_para_dict(prod: Any) -> Dict[str, Any]:
+    """Converte um `Produto` do banco no dict usado pela tela de Estoque."""
+    return {
+        "id": prod.id,
+        "nome": prod.nome,
+        "categoria": prod.categoria or "",
+        "validade": _conv_data(prod.validade) if prod.validade else None,
+        "lote": prod.lote or "",
+        "quantidade": int(prod.estoque_atual or 0),
+        "preco_venda": float(prod.preco_venda or 0.0),
+        "preco_custo": float(prod.preco_custo or 0.0),
+        "codigo_barras": prod.codigo_barras or "",
+        "estoque_minimo": prod.estoque_minimo,
+    }
+
+
+def _aplicar_dados(prod: Any, dados: Dict[str, Any]) -> None:
+    prod.nome = dados.get("nome") or prod.nome
+    prod.categoria = dados.get("categoria") or None
+    prod.validade = validade_para_date(dados.get("validade"))
+    prod.lote = dados.get("lote") or None
+    prod.estoque_atual = int(dados.get("quantidade", 0) or 0)
+    prod.preco_venda = float(dados.get("preco_venda", dados.get("preco", 0.0)) or 0.0)
+    prod.preco_custo = float(dados.get("preco_custo", 0.0) or 0.0)
+
+
+def carregar_produtos(session) -> List[Dict[str, Any]]:
+    """Carrega os produtos ativos do banco (fonte de verdade do Estoque).
+
+    Retorna dicts no formato usado pela tela (validade como datetime).
+    """
+    rows = session.query(Produto).filter(Produto.ativo.is_(True)).order_by(Produto.id)
+    return [produto_para_dict(p) for p in rows]
+
+
+def salvar_produto(session, dados: Dict[str, Any]) -> Dict[str, Any]:
+    """Cadastra (sem `id`) ou atualiza (com `id`) um único produto no banco.
+
+    Se o código de barras pertencer a um produto inativo (excluído da tela),
+    o registro é reaproveitado. Produtos sem código recebem um código interno.
+    Uma quantidade maior que a anterior entra como lote com a validade/lote
+    informados; uma menor é baixada dos lotes (FEFO). Um custo novo entra no
+    histórico de custos. Retorna o dict atualizado do produto.
+    """
+    codigo = str(dados.get("codigo_barras") or "").strip()
+    try:
+        prod = None
+        custo_anterior = None
+        if dados.get("id"):
+            prod = session.get(Produto, dados["id"])
+        if prod is None and codigo:
+            prod = session.query(Produto).filter_by(codigo_barras=codigo).first()
+            if prod is not None and prod.ativo and not dados.get("id"):
+                raise ValueError(f"Código de barras {codigo} já cadastrado.")
+        if prod is None:
+            prod = Produto(codigo_barras=codigo or f"tmp-{uuid.uuid4().hex}")
+            session.add(prod)
+        else:
+            custo_anterior = prod.preco_custo
+            # estoque anterior aos lotes fica com a validade que já exibia
+            conciliar_lotes(session, [prod.id])
+
+        _aplicar_dados(prod, dados)
+        prod.ativo = True
+        if codigo:
+            prod.codigo_barras = codigo
+        elif not prod.codigo_barras or prod.codigo_barras.startswith("tmp-"):
+            session.flush()
+            prod.codigo_barras = f"INT{prod.id:06d}"
+        session.flush()
+        conciliar_lotes(session, [prod.id])
+        registrar_custos_manuais(
+            session,
+            [(prod.id, prod.fornecedor_id, custo_anterior, prod.preco_custo)],
+        )
+        session.commit()
+        return produto_para_dict(prod)
+    except Exception:
+        session.rollback()
+        raise
+
+
+def _colunas_produto(dados: Dict[str, Any]) -> Dict[str, Any]:
+    """Valores de coluna de `Produto` para gravação em lote."""
+    return {
+        "codigo_barras": str(dados.get("codigo_barras") or "").strip(),
+        "nome": dados.get("nome") or "Produto",
+        "categoria": dados.get("categoria") or None,
+        "validade": validade_para_date(dados.get("validade")),
+        "lote": dados.get("lote") or None,
+        "estoque_atual": int(dados.get("quantidade", 0) or 0),
+        "preco_venda": float(dados.get("preco_venda", dados.get("preco", 0.0)) or 0.0),
+        "preco_custo": float(dados.get("preco_custo", 0.0) or 0.0),
+        "ativo": True,
+    }
+
+
+def adicionar_produtos(session, registros: List[Dict[str, Any]]) -> int:
+    """Grava vários produtos (ex.: importação) em uma única transação.
+
+    Faz um SELECT dos códigos já cadastrados e grava com INSERT/UPDATE em lote
+    (executemany). Códigos existentes atualizam (e reativam) o produto; se o
+    mesmo código aparecer mais de uma vez, prevalece a última ocorrência.
+    Os lotes são conciliados com as quantidades gravadas e os custos novos
+    entram no histórico de custos, na mesma transação. Retorna a quantidade de produtos gravados.
+    """
+    try:
+        por_codigo: Dict[str, Dict[str, Any]] = {}
+        sem_codigo: List[Dict[str, Any]] = []
+        for dados in registros:
+            linha = _colunas_produto(dados)
+            if linha["codigo_barras"]:
+                por_codigo[linha["codigo_barras"]] = linha
+            else:
+                linha["codigo_barras"] = f"tmp-{uuid.uuid4().hex}"
+                sem_codigo.append(linha)
+
+        existentes = {}
+        if por_codigo:
+            existentes = {
+                codigo: (pid, custo, fornecedor_id)
+                for codigo, pid, custo, fornecedor_id in session.execute(
+                    select(
+                        Produto.codigo_barras,
+                        Produto.id,
+                        Produto.preco_custo,
+                        Produto.fornecedor_id,
+                    ).where(Produto.codigo_barras.in_(list(por_codigo)))
+                )
+            }
+        inserir = [linha for c, linha in por_codigo.items() if c not in existentes]
+        atualizar = [
+            {"id": existentes[c][0], **linha}
+            for c, linha in por_codigo.items()
+            if c in existentes
+        ]
+        # (produto_id, fornecedor_id, custo anterior, custo novo)
+        custos = [
+            (pid, fornecedor_id, custo, por_codigo[c]["preco_custo"])
+            for c, (pid, custo, fornecedor_id) in existentes.items()
+        ]
+
+        gravados = [linha["id"] for linha in atualizar]
+        if atualizar:
+            session.execute(update(Produto), atualizar)
+        novos = inserir + sem_codigo
+        if novos:
+            ids = session.scalars(
+                insert(Produto).returning(Produto.id, sort_by_parameter_order=True),
+                novos,
+            ).all()
+            gravados += ids
+            custos += [
+                (i, None, None, linha["preco_custo"]) for i, linha in zip(ids, novos)
+            ]
+            if sem_codigo:
+                # produtos sem código recebem um código interno derivado do id
+                session.execute(
+                    update(Produto),
+                    [
+                        {"id": i, "codigo_barras": f"INT{i:06d}"}
+                        for i in ids[len(inserir) :]
+                    ],
+                )
+        conciliar_lotes(session, gravados)
+        registrar_custos_manuais(session, custos)
+        session.commit()
+        return len(gravados)
+    except Exception:
+        session.rollback()
+        raise
+
+
+def excluir_produto(session, produto_id: int) -> bool:
+    """Remove o produto do catálogo do Estoque.
+
+    Produtos com vendas registradas não são apagados (o histórico continua
+    apontando para eles): ficam inativos e com estoque zerado.
+    """
+    try:
+        prod = session.get(Produto, produto_id)
+        if prod is None:
+            return False
+        tem_vendas = (
+            session.query(ItemVenda.id).filter_by(produto_id=produto_id).first()
+            is not None
+        )
+        if tem_vendas:
+            prod.estoque_atual = 0
+            prod.ativo = False
+            conciliar_lotes(session, [produto_id])
+        else:
+            session.delete(prod)
+        session.commit()
+        return True
+    except Exception:
+        session.rollback()
+        raise
 
 
-def carregar_produtos() -> List[Dict[str, Any]]:
-    """Carrega produtos do arquivo JSON e converte campos.
+def exportar_produtos_json(session, caminho: str = ARQUIVO_DADOS) -> str:
+    """Exporta o catálogo do banco no formato legado do produtos.json.
 
-    - Converte a string de validade para datetime.
-    - Garante que preco_venda seja float.
+    O JSON é apenas exportação; o banco é a fonte de verdade.
     """
-    if os.path.exists(ARQUIVO_DADOS):
-        with open(ARQUIVO_DADOS, "r", encoding="utf-8") as f:
-            dados = json.load(f)
-            for p in dados:
-                p["validade"] = datetime.strptime(p["validade"], "%d/%m/%Y")
-                p["preco_venda"] = float(p.get("preco_venda", p.get("preco", 0.0)))
-                p["preco_custo"] = float(p.get("preco_custo", 0.0))
-                # Garantir compatibilidade com campo lote (pode não existir em arquivos antigos)
-                p["lote"] = p.get("lote", "")
-            return dados
-    return []
-
-
-def salvar_produtos(produtos: List[Dict[str, Any]]) -> None:
-    """Persiste a lista de produtos no arquivo JSON padronizando campos."""
     dados: List[Dict[str, Any]] = []
-    for p in produtos:
+    for p in carregar_produtos(session):
         dados.append(
             {
                 "id": p["id"],
                 "nome": p["nome"],
                 "categoria": p["categoria"],
-                "validade": p["validade"].strftime("%d/%m/%Y"),
-                "lote": p.get("lote", ""),
+                "validade": (
+                    p["validade"].strftime("%d/%m/%Y") if p["validade"] else ""
+                ),
+                "lote": p["lote"],
                 "quantidade": p["quantidade"],
-                "preco_venda": float(p.get("preco_venda", p.get("preco", 0.0))),
-                "preco_custo": float(p.get("preco_custo", 0.0)),
-                "codigo_barras": p.get("codigo_barras", ""),
+                "preco_venda": p["preco_venda"],
+                "preco_custo": p["preco_custo"],
+                "codigo_barras": p["codigo_barras"],
             }
         )
-    with open(ARQUIVO_DADOS, "w", encoding="utf-8") as f:
+    with open(caminho, "w", encoding="utf-8") as f:
         json.dump(dados, f, ensure_ascii=False, indent=2)
+    return caminho
 
 
 def read_products_from_file(
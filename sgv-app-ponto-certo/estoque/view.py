@@ -1,22 +1,23 @@
 # View de Estoque: tela responsável por cadastro, edição,
 # importação e visualização de produtos de estoque.
 
-import unicodedata
-from datetime import datetime
+from datetime import datetime, timedelta
+from functools import partial
 from pathlib import Path
 
 import flet as ft
 
 from estoque import alerts as est_alerts
+from estoque.busca import IndiceBusca
 from estoque import dialogs as dialogs
 from estoque import handlers as est_handlers
 from estoque import imports as import_utils
 from estoque import repository as repo
-from estoque.components import criar_linha_tabela as criar_linha_tabela_ext
+from estoque.components import TabelaPaginada
+from models.db_models import ESTOQUE_MINIMO_PADRAO, Produto
 
 # (removido import não utilizado) from alertas.alertas_init import atualizar_badge_alertas_no_gerente
-from models.db_models import Produto
-from utils.export_utils import generate_csv_file, generate_pdf_file
+from utils.export_utils import format_currency, generate_csv_file, generate_pdf_file
 
 try:
     from utils.barcode_reader import BarcodeReader
@@ -26,6 +27,7 @@ import os
 
 from estoque.formatters import converter_texto_para_data as fmt_converter_data
 from estoque.formatters import converter_texto_para_preco as fmt_converter_preco
+from estoque.formatters import validar_produto as fmt_validar_produto
 
 # Paleta de cores usada na tela de estoque (cores da logo Mercadinho Ponto Certo)
 COLORS = {
@@ -38,6 +40,8 @@ COLORS = {
 # Cores customizadas para botões na tela de Estoque
 NAVY = "#012a4a"  # azul marinho
 BTN_TEXT_GRAY = ft.Colors.WHITE  # agora texto em branco para melhor contraste
+# Janela (em dias) do card "Vencimentos Próximos"
+DIAS_ALERTA_VALIDADE = 30
 CATEGORIAS = [
     "Hortifrúti",
     "Carnes (açougue)",
@@ -52,7 +56,7 @@ CATEGORIAS = [
 
 # Caminho base do projeto (um nível acima da pasta "estoque")
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
-# Arquivo JSON onde os produtos de estoque são salvos/carregados
+# Exportação JSON do catálogo (a fonte de verdade é o banco de dados)
 ARQUIVO_DADOS = os.path.join(BASE_DIR, "data", "produtos.json")
 
 
@@ -67,18 +71,8 @@ def _converter_texto_para_preco(texto):
     return fmt_converter_preco(texto)
 
 
-def _validar_produto_fields(nome, categoria, quantidade, validade_obj):
-    if not (nome and categoria and quantidade):
-        raise ValueError("Campos obrigatórios ausentes")
-    if validade_obj is None:
-        raise ValueError("Data inválida")
-    try:
-        qtd = int(quantidade)
-        if qtd < 0:
-            raise ValueError("Quantidade negativa")
-        return qtd
-    except Exception:
-        raise ValueError("Quantidade inválida")
+# Validação de campos compartilhada com a importação (estoque.formatters)
+_validar_produto_fields = partial(fmt_validar_produto, curta=True)
 
 
 # Reexportar funções de I/O do módulo `repository` para compatibilidade
@@ -89,7 +83,7 @@ read_products_from_file = repo.read_products_from_file
 carregar_produtos = repo.carregar_produtos
 
 
-salvar_produtos = repo.salvar_produtos
+salvar_produto = repo.salvar_produto
 
 
 def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
@@ -226,20 +220,32 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
         )
     )
 
-    # Lista em memória com todos os produtos exibidos/editados na tela
-    produtos = repo.carregar_produtos()
+    # Sessão do banco: fonte de verdade do catálogo do Estoque
+    pdv_core_estoque = page.app_data.get("pdv_core")
+    db_session = getattr(pdv_core_estoque, "session", None) or page.app_data.get(
+        "db_session"
+    )
+
+    # Lista em memória com os produtos exibidos na tela (espelho do banco;
+    # toda alteração é gravada no banco e refletida aqui)
+    produtos = repo.carregar_produtos(db_session) if db_session is not None else []
+    # Chaves de busca normalizadas, calculadas uma vez por produto
+    indice_busca = IndiceBusca(produtos)
 
     # Placeholder para o dialog - será definido posteriormente
     dialog = None
 
-    # Função helper para atualizar o badge de alertas (sincroniza + badges)
-    def atualizar_badge_alertas():
+    # Função helper para atualizar o badge de alertas (gerente + local).
+    # `alterados` são os ids gravados nesta ação (reavaliados de forma
+    # incremental); None indica alteração em massa (ex.: importação)
+    def atualizar_badge_alertas(alterados=()):
         pdv_core_local = page.app_data.get("pdv_core")
         if not pdv_core_local:
             print("[ESTOQUE] ❌ PDVCore não encontrado")
             return
-        # sincroniza estoque com banco e atualiza badges (gerente + local)
-        est_alerts.sincronizar_estoque(page, pdv_core_local, produtos, Produto)
+        if alterados is None or alterados:
+            pdv_core_local.notificar_estoque_alterado(alterados)
+        # o catálogo já está no banco: basta recalcular os badges
         est_alerts.atualizar_badge_gerente(page, pdv_core_local)
         try:
             # Usa refs definidas mais abaixo na view
@@ -249,10 +255,26 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
         except Exception as ex:
             print(f"[ESTOQUE] ⚠️  Falha ao atualizar badge local: {ex}")
 
-    # Calcula contadores dos cards (baixo estoque, total e vencidos)
+    # Calcula contadores dos cards (baixo estoque pelo mínimo de cada produto,
+    # total e vencimentos: vencidos + a vencer em DIAS_ALERTA_VALIDADE,
+    # contados no banco por faixa)
     def atualizar_estatisticas():
-        baixo = sum(1 for p in produtos if p["quantidade"] < 10)
-        venc = sum(1 for p in produtos if p["validade"] < datetime.now())
+        baixo = sum(
+            1
+            for p in produtos
+            if p["quantidade"]
+            < (
+                ESTOQUE_MINIMO_PADRAO
+                if p.get("estoque_minimo") is None
+                else p["estoque_minimo"]
+            )
+        )
+        if pdv_core_estoque is not None:
+            contagem = pdv_core_estoque.contar_validade(DIAS_ALERTA_VALIDADE)
+            venc = contagem["vencidos"] + contagem["vencendo"]
+        else:
+            limite = datetime.now() + timedelta(days=DIAS_ALERTA_VALIDADE)
+            venc = sum(1 for p in produtos if p["validade"] and p["validade"] <= limite)
         return baixo, len(produtos), venc
 
     # Converte texto dd/mm/aaaa em datetime ou None (utilitário centralizado)
@@ -264,18 +286,7 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
         return fmt_converter_preco(texto)
 
     # Valida campos básicos do produto e retorna quantidade como int
-    def validar_produto(nome, categoria, quantidade, validade_obj):
-        if not (nome and categoria and quantidade):
-            raise ValueError("⚠️ Todos os campos são obrigatórios!")
-        if validade_obj is None:
-            raise ValueError("⚠️ Data inválida! Use o formato DD/MM/AAAA.")
-        try:
-            qtd = int(quantidade)
-            if qtd < 0:
-                raise ValueError()
-            return qtd
-        except Exception:
-            raise ValueError("Quantidade deve ser um número inteiro positivo")
+    validar_produto = fmt_validar_produto
 
     # Atualiza os cards de resumo e recarrega as linhas da tabela
     # Se for passada uma lista filtrada, usa-a apenas para popular a tabela;
@@ -285,12 +296,12 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
         texto_baixo_estoque.value = str(baixo)
         texto_total_produtos.value = str(total)
         texto_vencidos.value = str(venc)
-        data_table.rows.clear()
+        # Resultado de filtro volta para a 1ª página; demais atualizações
+        # mantêm a página atual e só recriam as linhas alteradas
         fonte = lista_filtrada if lista_filtrada is not None else produtos
-        for p in fonte:
-            data_table.rows.append(
-                criar_linha_tabela_ext(p, editar_produto, excluir_produto)
-            )
+        tabela_paginada.definir_itens(
+            fonte, voltar_ao_inicio=lista_filtrada is not None
+        )
         page.update()
 
     # Fecha o diálogo de cadastro/edição de produto
@@ -377,8 +388,9 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
             quantidade_field.value = str(produto["quantidade"])
             codigo_barras_field.value = produto.get("codigo_barras", "")
             codigo_barras_leitor_field.value = produto.get("codigo_barras", "")
-            validade_picker.value = produto["validade"]
-            data_validade_field.value = produto["validade"].strftime("%d/%m/%Y")
+            validade_atual = produto["validade"] or datetime.now()
+            validade_picker.value = validade_atual
+            data_validade_field.value = validade_atual.strftime("%d/%m/%Y")
             preco_field.value = f"{produto.get('preco_venda', 0.0):.2f}".replace(
                 ".", ","
             )
@@ -397,23 +409,25 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
                         quantidade_field.value,
                         nova_validade,
                     )
-                    produto["nome"] = nome_field.value
-                    produto["categoria"] = categoria_field.value
-                    produto["validade"] = nova_validade
-                    produto["quantidade"] = qtd
-                    produto["codigo_barras"] = codigo_barras_field.value
-                    produto["preco_venda"] = converter_texto_para_preco(
-                        preco_field.value
-                    )
-                    produto["preco_custo"] = converter_texto_para_preco(
-                        preco_custo_field.value
-                    )
-                    produto["lote"] = lote_field.value
-                    repo.salvar_produtos(produtos)
+                    dados = {
+                        "id": produto["id"],
+                        "nome": nome_field.value,
+                        "categoria": categoria_field.value,
+                        "validade": nova_validade,
+                        "quantidade": qtd,
+                        "codigo_barras": codigo_barras_field.value,
+                        "preco_venda": converter_texto_para_preco(preco_field.value),
+                        "preco_custo": converter_texto_para_preco(
+                            preco_custo_field.value
+                        ),
+                        "lote": lote_field.value,
+                    }
+                    produto.update(repo.salvar_produto(db_session, dados))
+                    indice_busca.atualizar(produto)
                     atualizar_tabela()
                     fechar_dialog()
                     limpar_campos()
-                    atualizar_badge_alertas()
+                    atualizar_badge_alertas([produto["id"]])
                     page.snack_bar = ft.SnackBar(
                         ft.Text("Produto editado com sucesso!", color="white"),
                         bgcolor=ft.Colors.GREEN_600,
@@ -421,7 +435,7 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
                     page.snack_bar.open = True
                     page.update()
                     print("[OK] Produto editado com sucesso")
-                except ValueError as err:
+                except Exception as err:
                     print(f"[ERROR] Erro ao salvar: {err}")
                     page.snack_bar = ft.SnackBar(
                         ft.Text(str(err), color="white"), bgcolor=ft.Colors.RED_600
@@ -488,31 +502,18 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
     def confirmar_exclusao(e):
         nonlocal produto_id_para_excluir, produto_em_exclusao
         if produto_id_para_excluir is not None:
-            # Tenta zerar o estoque no banco para não aparecer em relatórios
+            # Remove do banco (ou inativa e zera, se já houver vendas do produto)
             try:
-                pdv_core_local = page.app_data.get("pdv_core")
-                if pdv_core_local and produto_em_exclusao:
-                    cod = (produto_em_exclusao or {}).get("codigo_barras") or ""
-                    if cod:
-                        prod_db = (
-                            pdv_core_local.session.query(Produto)
-                            .filter_by(codigo_barras=cod)
-                            .first()
-                        )
-                        if prod_db:
-                            prod_db.estoque_atual = 0
-                            pdv_core_local.session.commit()
-                            print(f"[ESTOQUE] DB atualizado: estoque zerado para {cod}")
-                    # Sem código de barras, não altera DB para evitar afetar item errado
+                repo.excluir_produto(db_session, produto_id_para_excluir)
             except Exception as sx:
-                print(f"[ESTOQUE] Aviso ao zerar estoque no DB: {sx}")
+                print(f"[ESTOQUE] Aviso ao excluir produto no DB: {sx}")
 
             produtos[:] = [p for p in produtos if p["id"] != produto_id_para_excluir]
-            repo.salvar_produtos(produtos)
+            indice_busca.remover(produto_id_para_excluir)
             atualizar_tabela()
             # Atualiza badges/contadores gerais
             try:
-                atualizar_badge_alertas()
+                atualizar_badge_alertas([produto_id_para_excluir])
             except Exception:
                 pass
             page.snack_bar = ft.SnackBar(
@@ -549,7 +550,6 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
             preco_val = converter_texto_para_preco(preco_field.value)
             preco_custo_val = converter_texto_para_preco(preco_custo_field.value)
             novo = {
-                "id": max([p["id"] for p in produtos], default=0) + 1,
                 "nome": nome_field.value,
                 "categoria": categoria_field.value,
                 "validade": data_val,
@@ -559,12 +559,13 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
                 "preco_custo": preco_custo_val,
                 "codigo_barras": codigo_barras_field.value,
             }
+            novo = repo.salvar_produto(db_session, novo)
             produtos.append(novo)
-            repo.salvar_produtos(produtos)
+            indice_busca.atualizar(novo)
             atualizar_tabela()
             fechar_dialog()
             limpar_campos()
-            atualizar_badge_alertas()
+            atualizar_badge_alertas([novo["id"]])
             page.snack_bar = ft.SnackBar(
                 ft.Text("✅ Produto adicionado!", color="white"),
                 bgcolor=ft.Colors.GREEN_600,
@@ -596,7 +597,7 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
                     p["id"],
                     p["nome"],
                     p["categoria"],
-                    p["validade"].strftime("%d/%m/%Y"),
+                    p["validade"].strftime("%d/%m/%Y") if p["validade"] else "",
                     p.get("lote", ""),
                     p["quantidade"],
                     f"{float(p.get('preco_custo', 0.0)):.2f}".replace(".", ","),
@@ -639,7 +640,7 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
                     p["id"],
                     p["nome"],
                     p["categoria"],
-                    p["validade"].strftime("%d/%m/%Y"),
+                    p["validade"].strftime("%d/%m/%Y") if p["validade"] else "",
                     p.get("lote", ""),
                     p["quantidade"],
                     f"{float(p.get('preco_custo', 0.0)):.2f}".replace(".", ","),
@@ -672,139 +673,109 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
             page.snack_bar.open = True
             page.update()
 
-    # Handler chamado após o usuário escolher um arquivo CSV
+    # Handler chamado após o usuário escolher um arquivo CSV/Excel:
+    # simula a importação (dry-run) e abre a pré-visualização antes de gravar
     def on_file_selected(ev):
-        file_path = (
-            file_picker.result.files[0].path if file_picker.result.files else None
-        )
-        if not file_path:
+        arquivos = [f.path for f in (file_picker.result.files or []) if f.path]
+        if not arquivos:
             return
 
-        importados, duplicados, err = import_utils.process_import(
-            file_path,
-            produtos,
-            converter_texto_para_data,
-            converter_texto_para_preco,
-            validar_produto,
+        # Aviso de progresso, atualizado enquanto o arquivo é comparado
+        progresso_texto = ft.Text("Analisando arquivo...", color="white")
+        page.snack_bar = ft.SnackBar(
+            progresso_texto, bgcolor=ft.Colors.BLUE_600, duration=60000
         )
+        page.snack_bar.open = True
+        page.update()
+
+        def _on_progresso(linhas_lidas):
+            progresso_texto.value = (
+                f"Analisando arquivo... {linhas_lidas} linha(s) processada(s)"
+            )
+            try:
+                page.update()
+            except Exception:
+                pass
 
-        if err:
+        if len(arquivos) == 1:
+            simulacao = import_utils.simular_importacao(
+                arquivos[0],
+                db_session,
+                converter_texto_para_data,
+                converter_texto_para_preco,
+                validar_produto,
+                on_progresso=_on_progresso,
+            )
+        else:
+            # várias planilhas: leitura em paralelo (pool de processos)
+            progresso_texto.value = f"Lendo {len(arquivos)} arquivos em paralelo..."
+            page.update()
+            simulacao = import_utils.simular_importacao_arquivos(
+                arquivos, db_session, on_progresso=_on_progresso
+            )
+        page.snack_bar.open = False
+
+        if simulacao["erro"]:
             page.snack_bar = ft.SnackBar(
-                ft.Text(f"Erro ao importar arquivo: {err}", color="white"),
+                ft.Text(
+                    f"Erro ao importar arquivo: {simulacao['erro']}", color="white"
+                ),
                 bgcolor=ft.Colors.RED_600,
             )
             page.snack_bar.open = True
             page.update()
             return
 
-        if importados:
-            base_id = max([p["id"] for p in produtos], default=0)
-            for idx, obj in enumerate(importados, start=1):
-                obj["id"] = base_id + idx
-            produtos.extend(importados)
-            salvar_produtos(produtos)
-            atualizar_tabela()
+        if not simulacao["entradas"]:
+            mensagem = (
+                f"Nenhuma alteração: {simulacao['inalterados']} produto(s) já estão iguais ao catálogo."
+                if simulacao["inalterados"]
+                else "Nenhum produto válido encontrado no arquivo."
+            )
             page.snack_bar = ft.SnackBar(
-                ft.Text(
-                    f"✅ {len(importados)} produto(s) importado(s)!", color="white"
-                ),
-                bgcolor=ft.Colors.GREEN_600,
+                ft.Text(mensagem, color="white"), bgcolor=ft.Colors.ORANGE_700
             )
             page.snack_bar.open = True
+            page.update()
+            return
 
-            if duplicados:
-                try:
-                    names_preview = ", ".join((duplicados[:3]))
-                    extra = "" if len(duplicados) <= 3 else f" +{len(duplicados) - 3}"
-                    show_appbar_alert(
-                        f"Produtos já existentes ignorados: {len(duplicados)} (ex.: {names_preview}{extra})",
-                        duration_ms=3500,
-                    )
-                except Exception:
-                    pass
-                try:
-                    show_bottom_corner_message(
-                        f"Produtos já foram adicionados: {len(duplicados)} ignorado(s)",
-                        bgcolor=ft.Colors.ORANGE_600,
-                        duration_ms=3500,
-                    )
-                except Exception:
-                    pass
-                try:
-                    page.snack_bar = ft.SnackBar(
-                        ft.Text(
-                            f"Produtos já existentes ignorados: {len(duplicados)}",
-                            color=ft.Colors.WHITE,
-                        ),
-                        bgcolor=ft.Colors.ORANGE_700,
-                    )
-                    page.snack_bar.open = True
-                    page.update()
-                except Exception:
-                    pass
-            else:
-                page.update()
-        else:
-            # Nenhum novo produto - provavelmente apenas duplicados
-            if duplicados:
-                try:
-                    names_preview = ", ".join((duplicados[:3]))
-                    extra = "" if len(duplicados) <= 3 else f" +{len(duplicados) - 3}"
-                    show_appbar_alert(
-                        f"Produtos já existentes ignorados: {len(duplicados)} (ex.: {names_preview}{extra})",
-                        duration_ms=3500,
-                    )
-                except Exception:
-                    pass
-                try:
-                    show_bottom_corner_message(
-                        f"Produtos já foram adicionados: {len(duplicados)} ignorado(s)",
-                        bgcolor=ft.Colors.ORANGE_600,
-                        duration_ms=3500,
-                    )
-                except Exception:
-                    pass
-                try:
-                    preview = ", ".join(duplicados[:10])
-                    detalhe = preview + (" ..." if len(duplicados) > 10 else "")
-                    dialog_local = ft.AlertDialog(
-                        title=ft.Text("Importação — Produtos Ignorados"),
-                        content=ft.Column(
-                            [
-                                ft.Text(
-                                    f"O arquivo não contém produtos novos. {len(duplicados)} produto(s) foram ignorados por já existirem."
-                                ),
-                                ft.Text(f"Exemplos: {detalhe}", size=12),
-                            ],
-                            tight=True,
-                        ),
-                        actions=[
-                            ft.ElevatedButton(
-                                "OK",
-                                on_click=lambda e: (
-                                    setattr(dialog_local, "open", False),
-                                    page.update(),
-                                ),
-                                bgcolor=NAVY,
-                                color=BTN_TEXT_GRAY,
-                            )
-                        ],
-                        modal=True,
-                    )
-                    page.dialog = dialog_local
-                    dialog_local.open = True
-                    page.update()
-                except Exception:
-                    pass
-            else:
+        def _cancelar(e):
+            page.close(preview_dialog)
+
+        def _aplicar(e):
+            page.close(preview_dialog)
+            try:
+                gravados = import_utils.aplicar_importacao(db_session, simulacao)
+            except Exception as ex:
                 page.snack_bar = ft.SnackBar(
-                    ft.Text(
-                        "Nenhum produto válido encontrado no arquivo.", color="white"
-                    ),
+                    ft.Text(f"Erro ao gravar produtos importados: {ex}", color="white"),
                     bgcolor=ft.Colors.RED_600,
                 )
                 page.snack_bar.open = True
                 page.update()
+                return
+            produtos[:] = repo.carregar_produtos(db_session)
+            indice_busca.reconstruir(produtos)
+            atualizar_tabela()
+            try:
+                atualizar_badge_alertas(None)
+            except Exception:
+                pass
+            page.snack_bar = ft.SnackBar(
+                ft.Text(
+                    f"✅ Importação aplicada: {len(simulacao['novos'])} novo(s), "
+                    f"{len(simulacao['alteracoes'])} alterado(s) ({gravados} gravado(s))",
+                    color="white",
+                ),
+                bgcolor=ft.Colors.GREEN_600,
+            )
+            page.snack_bar.open = True
+            page.update()
+
+        preview_dialog = dialogs.create_import_preview_dialog(
+            page, simulacao, on_aplicar=_aplicar, on_cancelar=_cancelar
+        )
+        page.open(preview_dialog)
 
     # FilePicker para importar produtos de um arquivo CSV/Excel
     file_picker = ft.FilePicker(on_result=on_file_selected)
@@ -814,7 +785,7 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
     def importar_csv(e):
         # permite CSV e planilhas Excel
         file_picker.pick_files(
-            allow_multiple=False, allowed_extensions=["csv", "xls", "xlsx"]
+            allow_multiple=True, allowed_extensions=["csv", "xls", "xlsx"]
         )
 
     # DatePicker usado especificamente para o campo de validade do produto
@@ -868,34 +839,63 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
         hint_text="Buscar produto...",
         width=320,
         dense=True,
-        on_change=lambda e: aplicar_filtros(),
+        on_change=lambda e: agendar_filtros(),
         on_submit=lambda e: aplicar_filtros(),
     )
 
     # Estado dos filtros simples
     filtro_categoria = None
     filtro_max_qtd = None
+    # Produtos com lote (com saldo) vencido ou a vencer em até N dias
+    filtro_vence_em = None
 
-    def _normalize(texto: str) -> str:
-        """Remove acentos/diacríticos e normaliza para minúsculas."""
-        if not texto:
-            return ""
-        nf = unicodedata.normalize("NFD", str(texto))
-        return "".join(c for c in nf if unicodedata.category(c) != "Mn").lower()
+    # Debounce da digitação: só filtra após uma pausa curta
+    DEBOUNCE_FILTRO_S = 0.25
+    geracao_filtro = 0
+
+    def agendar_filtros():
+        nonlocal geracao_filtro
+        geracao_filtro += 1
+        minha_geracao = geracao_filtro
+
+        async def _filtrar_apos_pausa():
+            import asyncio
+
+            await asyncio.sleep(DEBOUNCE_FILTRO_S)
+            # outra tecla chegou durante a espera: deixa a mais recente filtrar
+            if minha_geracao == geracao_filtro:
+                aplicar_filtros()
+
+        try:
+            page.run_task(_filtrar_apos_pausa)
+        except Exception:
+            # fallback: filtrar imediatamente
+            aplicar_filtros()
 
     def aplicar_filtros():
         # Aplica busca + filtros sobre a lista `produtos` e atualiza a tabela
-        termo_raw = (search_field.value or "").strip()
-        termo = _normalize(termo_raw)
+        termo = (search_field.value or "").strip()
+        # Nome ou categoria que CONTÉM o termo (chaves já normalizadas no
+        # índice); nomes que COMEÇAM com o termo vêm primeiro
+        ids_busca = indice_busca.contem(termo) if termo else None
+        ids_prefixo = indice_busca.prefixo(termo) if termo else set()
+        ids_vencendo = None
+        if filtro_vence_em is not None and pdv_core_estoque is not None:
+            ids_vencendo = {
+                lote.produto_id
+                for lote in pdv_core_estoque.lotes_vencendo(
+                    filtro_vence_em, incluir_vencidos=True
+                )
+            }
         resultado = []
         for p in produtos:
-            nome = _normalize(p.get("nome") or "")
+            if ids_busca is not None and p["id"] not in ids_busca:
+                continue
+            if ids_vencendo is not None and p["id"] not in ids_vencendo:
+                continue
             categoria = p.get("categoria") or ""
             qtd = int(p.get("quantidade") or 0)
 
-            # Buscar apenas por produtos cujo nome COMEÇA com o termo
-            if termo and not nome.startswith(termo):
-                continue
             if filtro_categoria and filtro_categoria != "Todas":
                 if categoria != filtro_categoria:
                     continue
@@ -908,6 +908,8 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
 
             resultado.append(p)
 
+        if ids_prefixo:
+            resultado.sort(key=lambda p: p["id"] not in ids_prefixo)
         atualizar_tabela(resultado)
 
     # Diálogo simples de filtros
@@ -919,6 +921,7 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
         dense=True,
     )
     max_qtd_field = ft.TextField(label="Máx. Quantidade", dense=True)
+    vence_em_field = ft.TextField(label="Lotes vencendo em até (dias)", dense=True)
 
     def abrir_filtros(e):
         # Preenche campos do diálogo com estado atual e abre o AlertDialog.
@@ -937,6 +940,9 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
             max_qtd_field.value = (
                 str(filtro_max_qtd) if filtro_max_qtd is not None else ""
             )
+            vence_em_field.value = (
+                str(filtro_vence_em) if filtro_vence_em is not None else ""
+            )
 
             # Fechar qualquer dialogo atual para evitar sobreposição
             try:
@@ -972,7 +978,7 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
                 pass
 
     def aplicar_filtros_dialog(e):
-        nonlocal filtro_categoria, filtro_max_qtd
+        nonlocal filtro_categoria, filtro_max_qtd, filtro_vence_em
         filtro_categoria = (
             categoria_dropdown.value if categoria_dropdown.value != "Todas" else None
         )
@@ -982,16 +988,26 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
             )
         except Exception:
             filtro_max_qtd = None
+        try:
+            filtro_vence_em = (
+                int(vence_em_field.value)
+                if vence_em_field.value.strip() != ""
+                else None
+            )
+        except Exception:
+            filtro_vence_em = None
         filtros_dialog.open = False
         page.update()
         aplicar_filtros()
 
     def limpar_filtros(e):
-        nonlocal filtro_categoria, filtro_max_qtd
+        nonlocal filtro_categoria, filtro_max_qtd, filtro_vence_em
         filtro_categoria = None
         filtro_max_qtd = None
+        filtro_vence_em = None
         categoria_dropdown.value = "Todas"
         max_qtd_field.value = ""
+        vence_em_field.value = ""
         filtros_dialog.open = False
         page.update()
         aplicar_filtros()
@@ -1001,7 +1017,9 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
     filtros_dialog = ft.AlertDialog(
         modal=True,
         title=ft.Text("Filtros"),
-        content=ft.Column([categoria_dropdown, max_qtd_field], tight=True),
+        content=ft.Column(
+            [categoria_dropdown, max_qtd_field, vence_em_field], tight=True
+        ),
         actions=[
             ft.ElevatedButton(
                 "Limpar",
@@ -1028,6 +1046,117 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
         actions_alignment=ft.MainAxisAlignment.END,
     )
 
+    # Entrada de lote: soma a quantidade ao estoque com validade/lote próprios
+    # (PDVCore.registrar_lote); o produto passa a exibir o lote mais próximo
+    produto_entrada_id = None
+    lote_qtd_field = ft.TextField(
+        label="Quantidade", dense=True, keyboard_type=ft.KeyboardType.NUMBER
+    )
+    lote_validade_field = ft.TextField(label="Validade (dd/mm/aaaa)", dense=True)
+    lote_codigo_field = ft.TextField(label="Lote", dense=True)
+
+    def abrir_entrada_lote(e, produto_id):
+        nonlocal produto_entrada_id
+        produto = next((p for p in produtos if p["id"] == produto_id), None)
+        if produto is None or pdv_core_estoque is None:
+            return
+        produto_entrada_id = produto_id
+        entrada_lote_dialog.title = ft.Text(f"Entrada de lote: {produto['nome']}")
+        lote_qtd_field.value = ""
+        lote_validade_field.value = ""
+        lote_codigo_field.value = ""
+        page.open(entrada_lote_dialog)
+
+    def confirmar_entrada_lote(e):
+        texto_validade = (lote_validade_field.value or "").strip()
+        validade = converter_texto_para_data(texto_validade) if texto_validade else None
+        if texto_validade and validade is None:
+            ok, msg = False, "Validade inválida. Use dd/mm/aaaa."
+        else:
+            ok, msg = pdv_core_estoque.registrar_lote(
+                produto_entrada_id,
+                lote_qtd_field.value,
+                validade,
+                (lote_codigo_field.value or "").strip() or None,
+            )
+        if ok:
+            page.close(entrada_lote_dialog)
+            produto = next(p for p in produtos if p["id"] == produto_entrada_id)
+            produto.update(
+                repo.produto_para_dict(db_session.get(Produto, produto_entrada_id))
+            )
+            atualizar_tabela()
+            # registrar_lote já notificou a alteração: só recalcula os badges
+            atualizar_badge_alertas()
+        page.snack_bar = ft.SnackBar(
+            ft.Text(msg, color="white"),
+            bgcolor=ft.Colors.GREEN_600 if ok else ft.Colors.RED_600,
+        )
+        page.snack_bar.open = True
+        page.update()
+
+    entrada_lote_dialog = ft.AlertDialog(
+        modal=True,
+        title=ft.Text("Entrada de lote"),
+        content=ft.Column(
+            [lote_qtd_field, lote_validade_field, lote_codigo_field], tight=True
+        ),
+        actions=[
+            ft.ElevatedButton(
+                "Cancelar",
+                on_click=lambda e: page.close(entrada_lote_dialog),
+                bgcolor=NAVY,
+                color=ft.Colors.WHITE,
+            ),
+            ft.ElevatedButton(
+                "Registrar",
+                on_click=confirmar_entrada_lote,
+                bgcolor=NAVY,
+                color=ft.Colors.WHITE,
+            ),
+        ],
+        actions_alignment=ft.MainAxisAlignment.END,
+    )
+
+    # Histórico de custos do produto (edições manuais, importações e NF-e),
+    # com o fornecedor de cada custo (PDVCore.historico_custos_produto)
+    historico_custos_lista = ft.Column(tight=True, scroll=ft.ScrollMode.AUTO)
+    historico_custos_dialog = ft.AlertDialog(
+        modal=True,
+        title=ft.Text("Histórico de custos"),
+        content=ft.Container(historico_custos_lista, width=460, height=320),
+        actions=[
+            ft.ElevatedButton(
+                "Fechar",
+                on_click=lambda e: page.close(historico_custos_dialog),
+                bgcolor=NAVY,
+                color=ft.Colors.WHITE,
+            ),
+        ],
+        actions_alignment=ft.MainAxisAlignment.END,
+    )
+
+    def abrir_historico_custos(e, produto_id):
+        produto = next((p for p in produtos if p["id"] == produto_id), None)
+        if produto is None or pdv_core_estoque is None:
+            return
+        historico = pdv_core_estoque.historico_custos_produto(produto_id)
+        historico_custos_dialog.title = ft.Text(f"Custos: {produto['nome']}")
+        origens = {"nfe": "NF-e", "manual": "Manual"}
+        historico_custos_lista.controls = [
+            ft.ListTile(
+                dense=True,
+                title=ft.Text(format_currency(h["custo"]), weight=ft.FontWeight.BOLD),
+                subtitle=ft.Text(
+                    f"{h['data'].strftime('%d/%m/%Y')} · "
+                    f"{origens.get(h['origem'], h['origem'])} · "
+                    f"{h['fornecedor_nome'] or 'Sem fornecedor'}"
+                ),
+            )
+            for h in historico
+        ] or [ft.Text("Nenhum custo registrado.", color=ft.Colors.GREY_700)]
+        page.open(historico_custos_dialog)
+
     # Novo card profissional: ícone em círculo, tipografia grande, fundo colorido,
     # bordas arredondadas e sombra sutil.
     def criar_card_profissional(
@@ -1303,6 +1432,11 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
         border_radius=5,
     )
 
+    # Apenas a página visível da tabela é montada (lista grande de produtos)
+    tabela_paginada = TabelaPaginada(
+        page, data_table, editar_produto, excluir_produto, itens_por_pagina=100
+    )
+
     tabela_container = ft.Container(
         content=ft.ListView(
             controls=[data_table],
@@ -1740,6 +1874,7 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
                         ft.Divider(height=1, thickness=1, color=ft.Colors.GREY_300),
                         botoes_acao,
                         tabela_container,
+                        tabela_paginada.controle_paginacao,
                     ],
                     expand=True,
                     spacing=20,
@@ -1773,6 +1908,18 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
                 editar_produto(e, p["id"]),
             ),
         )
+        btn_lote = ft.IconButton(
+            icon=ft.Icons.ADD_BOX_OUTLINED,
+            tooltip="Entrada de lote",
+            icon_color=ft.Colors.GREEN_600,
+            on_click=lambda e: abrir_entrada_lote(e, p["id"]),
+        )
+        btn_custos = ft.IconButton(
+            icon=ft.Icons.HISTORY,
+            tooltip="Histórico de custos",
+            icon_color=ft.Colors.BLUE_GREY_600,
+            on_click=lambda e: abrir_historico_custos(e, p["id"]),
+        )
         btn_excluir = ft.IconButton(
             icon=ft.Icons.DELETE_OUTLINE,
             tooltip="Excluir",
@@ -1796,7 +1943,12 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
                     )
                 ),
                 ft.DataCell(ft.Text(p["categoria"], size=14)),
-                ft.DataCell(ft.Text(p["validade"].strftime("%d/%m/%Y"), size=14)),
+                ft.DataCell(
+                    ft.Text(
+                        (p["validade"].strftime("%d/%m/%Y") if p["validade"] else "-"),
+                        size=14,
+                    )
+                ),
                 ft.DataCell(
                     ft.Text(
                         str(p["quantidade"]),
@@ -1822,7 +1974,9 @@ def create_estoque_view(page: ft.Page, voltar_callback, handle_logout=None):
                         color=ft.Colors.GREY_700,
                     )
                 ),
-                ft.DataCell(ft.Row([btn_editar, btn_excluir], spacing=5)),
+                ft.DataCell(
+                    ft.Row([btn_editar, btn_lote, btn_custos, btn_excluir], spacing=5)
+                ),
             ]
         )
 
@@ -1856,7 +2010,7 @@ __all__ = [
     "CATEGORIAS",
     "ARQUIVO_DADOS",
     "carregar_produtos",
-    "salvar_produtos",
+    "salvar_produto",
     "create_estoque_view",
     "read_products_from_file",
 ]
@@ -2,7 +2,7 @@ from datetime import datetime
 
 import flet as ft
 
-from .financeiro_utils import format_currency
+from .financeiro_utils import format_currency, format_date
 
 
 def create_kpi_card(title, value, icon, color):
@@ -125,12 +125,8 @@ def create_finance_table(page: ft.Page, data, is_receber=False, pdv_core=None):
         # Verificar se está atrasado
         is_atrasado = False
         try:
-            if isinstance(vencimento, str):
-                venc_date = datetime.strptime(vencimento, "%d/%m/%Y").date()
-            else:
-                venc_date = vencimento if hasattr(vencimento, "date") else vencimento
-
-            is_atrasado = venc_date < datetime.now().date() and status in [
+            # `vencimento` é DATE no banco; comparação direta, sem conversão
+            is_atrasado = vencimento < datetime.now().date() and status in [
                 "Pendente",
                 "Pago",
                 "Recebido",
@@ -295,7 +291,7 @@ def create_finance_table(page: ft.Page, data, is_receber=False, pdv_core=None):
         row = ft.Container(
             ft.Row(
                 [
-                    ft.Text(str(vencimento), size=12, width=80),
+                    ft.Text(format_date(vencimento), size=12, width=80),
                     ft.Text(
                         str(descricao),
                         size=13,
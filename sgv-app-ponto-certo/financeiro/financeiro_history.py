@@ -267,7 +267,7 @@ def create_caixa_history_table(page: ft.Page, pdv_core):
                             )
                         )
                         for despesa in despesas:
-                            # `Expense` possui `data_cadastro` (timestamp) e `vencimento` (string)
+                            # `Expense` possui `data_cadastro` (timestamp) e `vencimento` (data)
                             desp_data = (
                                 despesa.data_cadastro.strftime("%Y-%m-%d %H:%M:%S")
                                 if getattr(despesa, "data_cadastro", None)
@@ -294,7 +294,7 @@ def create_caixa_history_table(page: ft.Page, pdv_core):
                             )
                         )
                         for receita in receitas:
-                            # `Receivable` usa `vencimento` (string) e `data_cadastro`
+                            # `Receivable` usa `vencimento` (data) e `data_cadastro`
                             venc = getattr(receita, "vencimento", None) or getattr(
                                 receita, "data_cadastro", ""
                             )
@@ -352,6 +352,52 @@ def create_caixa_history_table(page: ft.Page, pdv_core):
                             )
                             print(f"[ERRO] deletar_sessao: {ex}")
 
+                    def estornar_vendas_da_sessao(e=None):
+                        """Estorna de uma vez as vendas do operador nesta sessão"""
+
+                        def confirmar(e):
+                            page.close(confirmacao)
+                            usuario = pdv_core.get_user_by_id(
+                                page.session.get("user_id") or 1
+                            )
+                            ok, resultado = pdv_core.estornar_sessao_caixa(
+                                session_id, getattr(usuario, "username", None)
+                            )
+                            if ok:
+                                fechar_modal()
+                                show_snack_inner(
+                                    page,
+                                    f"✅ {len(resultado['estornadas'])} venda(s) estornada(s)!",
+                                    color=ft.Colors.GREEN,
+                                )
+                                atualizar_tabela()
+                            else:
+                                show_snack_inner(
+                                    page, f"❌ {resultado}", color=ft.Colors.RED
+                                )
+
+                        confirmacao = ft.AlertDialog(
+                            modal=True,
+                            title=ft.Text(f"Estornar vendas da sessão #{session_id}?"),
+                            content=ft.Text(
+                                "As vendas do operador nesta sessão serão estornadas "
+                                "e o estoque reposto."
+                            ),
+                            actions=[
+                                ft.TextButton(
+                                    "Cancelar",
+                                    on_click=lambda e: page.close(confirmacao),
+                                ),
+                                ft.ElevatedButton(
+                                    "Estornar",
+                                    on_click=confirmar,
+                                    bgcolor=ft.Colors.ORANGE,
+                                    color=ft.Colors.WHITE,
+                                ),
+                            ],
+                        )
+                        page.open(confirmacao)
+
                     # Conteúdo do overlay
                     content = ft.Column(
                         spacing=12,
@@ -373,6 +419,16 @@ def create_caixa_history_table(page: ft.Page, pdv_core):
                                     ft.TextButton(
                                         "Fechar", on_click=lambda e: fechar_modal()
                                     ),
+                                    ft.ElevatedButton(
+                                        "Estornar vendas",
+                                        icon=ft.Icons.UNDO,
+                                        on_click=estornar_vendas_da_sessao,
+                                        bgcolor=ft.Colors.ORANGE,
+                                        color=ft.Colors.WHITE,
+                                        disabled=not any(
+                                            v.status != "ESTORNADA" for v in vendas
+                                        ),
+                                    ),
                                     ft.ElevatedButton(
                                         "Deletar",
                                         icon=ft.Icons.DELETE,
@@ -622,8 +678,7 @@ def create_caixa_history_table(page: ft.Page, pdv_core):
                                                 icon=ft.Icons.DETAILS,
                                                 icon_size=22,
                                                 tooltip="Ver detalhes",
-                                                on_click=lambda e,
-                                                sid=session.id: abrir_detalhes_sessao(
+                                                on_click=lambda e, sid=session.id: abrir_detalhes_sessao(
                                                     sid
                                                 ),
                                             ),
@@ -631,8 +686,7 @@ def create_caixa_history_table(page: ft.Page, pdv_core):
                                                 icon=ft.Icons.PICTURE_AS_PDF,
                                                 icon_size=22,
                                                 tooltip="Exportar sessão para PDF",
-                                                on_click=lambda e,
-                                                sid=session.id: exportar_sessao_pdf(
+                                                on_click=lambda e, sid=session.id: exportar_sessao_pdf(
                                                     sid
                                                 ),
                                             ),
@@ -640,8 +694,7 @@ def create_caixa_history_table(page: ft.Page, pdv_core):
                                                 icon=ft.Icons.DELETE,
                                                 icon_size=22,
                                                 tooltip="Deletar sessão",
-                                                on_click=lambda e,
-                                                sid=session.id: deletar_sessao_direto(
+                                                on_click=lambda e, sid=session.id: deletar_sessao_direto(
                                                     sid
                                                 ),
                                             ),
@@ -22,6 +22,13 @@ def format_currency(value):
         return str(value)
 
 
+def format_date(value):
+    """Formata uma data (vencimento) como dd/mm/aaaa."""
+    if hasattr(value, "strftime"):
+        return value.strftime("%d/%m/%Y")
+    return str(value) if value else "-"
+
+
 def _close_dialog(page: ft.Page):
     try:
         if hasattr(page, "close_dialog"):
@@ -364,7 +371,7 @@ def export_finance_csv(page: ft.Page, pdv_core, is_receber: bool, e=None):
             headers = ["Vencimento", "Descrição", "Origem", "Valor", "Status", "ID"]
             rows = [
                 [
-                    str(getattr(it, "vencimento", "-")),
+                    format_date(getattr(it, "vencimento", None)),
                     str(getattr(it, "descricao", "")),
                     str(getattr(it, "origem", getattr(it, "categoria", ""))),
                     float(getattr(it, "valor", 0.0)),
@@ -382,7 +389,7 @@ def export_finance_csv(page: ft.Page, pdv_core, is_receber: bool, e=None):
             headers = ["Vencimento", "Descrição", "Categoria", "Valor", "Status", "ID"]
             rows = [
                 [
-                    str(getattr(it, "vencimento", "-")),
+                    format_date(getattr(it, "vencimento", None)),
                     str(getattr(it, "descricao", "")),
                     str(getattr(it, "categoria", "")),
                     float(getattr(it, "valor", 0.0)),
@@ -421,7 +428,7 @@ def export_finance_pdf(page: ft.Page, pdv_core, is_receber: bool, e=None):
             headers = ["Vencimento", "Descrição", "Origem", "Valor", "Status", "ID"]
             rows = [
                 [
-                    str(getattr(it, "vencimento", "-")),
+                    format_date(getattr(it, "vencimento", None)),
                     str(getattr(it, "descricao", "")),
                     str(getattr(it, "origem", getattr(it, "categoria", ""))),
                     f"R$ {float(getattr(it, 'valor', 0.0)):.2f}",
@@ -444,7 +451,7 @@ def export_finance_pdf(page: ft.Page, pdv_core, is_receber: bool, e=None):
             headers = ["Vencimento", "Descrição", "Categoria", "Valor", "Status", "ID"]
             rows = [
                 [
-                    str(getattr(it, "vencimento", "-")),
+                    format_date(getattr(it, "vencimento", None)),
                     str(getattr(it, "descricao", "")),
                     str(getattr(it, "categoria", "")),
                     f"R$ {float(getattr(it, 'valor', 0.0)):.2f}",
@@ -0,0 +1,84 @@
+"""Ingestão de NF-e em lote (pasta ou seleção múltipla).
+
+Os XMLs são lidos em processos (`mapear_em_processos`), deduplicados pela
+chave de acesso — dentro do lote e contra as notas já registradas — e
+entregues prontos para `PDVCore.importar_lote_nfe`, que grava fornecedores
+e contas a pagar em uma única transação. Não depende da interface (Flet).
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from fornecedores.nfe_parser import parse_nfe
+from utils.processamento_paralelo import mapear_em_processos
+
+
+def listar_xmls_da_pasta(pasta) -> List[str]:
+    """Caminhos dos arquivos .xml da pasta (sem subpastas), em ordem de nome."""
+    return sorted(
+        str(p)
+        for p in Path(pasta).iterdir()
+        if p.is_file() and p.suffix.lower() == ".xml"
+    )
+
+
+def ler_nfe_arquivo(caminho: str) -> Dict[str, Any]:
+    """Lê uma NF-e do disco (executada no pool; precisa ser picklable)."""
+    try:
+        return {"path": caminho, "nota": parse_nfe(caminho), "erro": None}
+    except Exception as e:
+        return {"path": caminho, "nota": None, "erro": str(e)}
+
+
+def preparar_lote_nfe(
+    caminhos: Iterable[str],
+    chaves_registradas: Iterable[str] = (),
+    max_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Lê os XMLs em paralelo e separa notas novas, duplicadas e com erro.
+
+    Uma nota é duplicada quando sua chave já aparece antes no lote ou em
+    `chaves_registradas`. Notas sem chave não são deduplicadas. Cada nota
+    devolvida recebe o campo `path` com o arquivo de origem.
+    Retorna {"notas": [...], "duplicadas": [path, ...],
+    "erros": [{"path", "erro"}, ...]}.
+    """
+    vistas = {c for c in chaves_registradas if c}
+    resultado: Dict[str, Any] = {"notas": [], "duplicadas": [], "erros": []}
+    for lido in mapear_em_processos(ler_nfe_arquivo, caminhos, max_workers):
+        if lido["erro"]:
+            resultado["erros"].append({"path": lido["path"], "erro": lido["erro"]})
+            continue
+        nota = lido["nota"]
+        chave = nota["chave"]
+        if chave and chave in vistas:
+            resultado["duplicadas"].append(lido["path"])
+            continue
+        if chave:
+            vistas.add(chave)
+        nota["path"] = lido["path"]
+        resultado["notas"].append(nota)
+    return resultado
+
+
+def registro_xml(nota: Dict[str, Any], fornecedor_id=None) -> Dict[str, Any]:
+    """Registro de XML importado (formato do repositório de NF-e da tela)."""
+    emitente = nota["emitente"]
+    registro = {
+        "nf": nota["numero"],
+        "chave": nota["chave"],
+        "data": nota["data_emissao"],
+        "fornecedor": emitente["nome"],
+        "cnpj": emitente["cnpj"] or emitente["cpf"],
+        "total": f"{nota['total']:.2f}",
+        "itens": [
+            dict(it, q=f"{it['quantidade']:g}", v=f"{it['valor_total']:.2f}")
+            for it in nota["itens"]
+        ],
+        "path": nota.get("path"),
+    }
+    if fornecedor_id:
+        registro["fornecedor_id"] = fornecedor_id
+    return registro
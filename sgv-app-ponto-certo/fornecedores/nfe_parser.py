@@ -0,0 +1,163 @@
+"""Leitura de NF-e (XML) em uma única passada.
+
+Extrai cabeçalho (número, série, chave, emissão), emitente, totais e todos
+os itens com `ElementTree.iterparse`, casando as tags pelo namespace da
+NF-e (ou sem namespace) e liberando cada elemento logo após lido. Não
+depende da interface (Flet).
+"""
+
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, Optional
+
+NFE_NS = "http://www.portalfiscal.inf.br/nfe"
+
+# campos simples lidos de cada bloco: {bloco: {tag: chave no resultado}}
+_CAMPOS_IDE = {"nNF": "numero", "serie": "serie", "dhEmi": "data_emissao"}
+_CAMPOS_EMIT = {
+    "CNPJ": "cnpj",
+    "CPF": "cpf",
+    "xNome": "nome",
+    "xFant": "fantasia",
+    "IE": "ie",
+}
+_CAMPOS_PROD = {
+    "cProd": "codigo",
+    "cEAN": "ean",
+    "xProd": "nome",
+    "NCM": "ncm",
+    "CFOP": "cfop",
+    "uCom": "unidade",
+}
+_NUMEROS_PROD = {
+    "qCom": "quantidade",
+    "vUnCom": "valor_unitario",
+    "vProd": "valor_total",
+}
+# rastreabilidade do item (prod/rastro): lote, quantidade e validade
+_CAMPOS_RASTRO = {"nLote": "lote", "dVal": "validade"}
+
+
+def _nome_nfe(tag: str) -> Optional[str]:
+    """Nome local da tag se for da NF-e (ou sem namespace); senão None."""
+    if tag.startswith("{"):
+        ns, _, local = tag[1:].partition("}")
+        return local if ns == NFE_NS else None
+    return tag
+
+
+def _numero(texto: str) -> float:
+    try:
+        return float(texto.replace(",", "."))
+    except (AttributeError, ValueError):
+        return 0.0
+
+
+def _novo_item(n_item: Optional[str]) -> Dict[str, Any]:
+    return {
+        "numero": int(n_item) if n_item and n_item.isdigit() else None,
+        "codigo": "",
+        "ean": "",
+        "nome": "",
+        "ncm": "",
+        "cfop": "",
+        "unidade": "",
+        "quantidade": 0.0,
+        "valor_unitario": 0.0,
+        "valor_total": 0.0,
+        "rastros": [],
+    }
+
+
+def parse_nfe(origem) -> Dict[str, Any]:
+    """Lê uma NF-e (caminho ou arquivo binário) e retorna seus dados.
+
+    Estrutura do retorno:
+    {
+        "numero": str, "serie": str, "chave": str, "data_emissao": str,
+        "emitente": {"cnpj", "cpf", "nome", "fantasia", "ie"},
+        "total": float (vNF), "total_produtos": float (vProd do ICMSTot),
+        "itens": [{"numero", "codigo", "ean", "nome", "ncm", "cfop",
+                   "unidade", "quantidade", "valor_unitario", "valor_total",
+                   "rastros": [{"lote", "quantidade", "validade"}]}]
+    }
+
+    A chave vem do protocolo (chNFe) ou, sem ele, do Id de infNFe. Levanta
+    ValueError se o XML for inválido ou não contiver uma NF-e.
+    """
+    nota: Dict[str, Any] = {
+        "numero": "",
+        "serie": "",
+        "chave": "",
+        "data_emissao": "",
+        "emitente": dict.fromkeys(_CAMPOS_EMIT.values(), ""),
+        "total": 0.0,
+        "total_produtos": 0.0,
+        "itens": [],
+    }
+    encontrou_nfe = False
+    chave_protocolo = ""
+    item: Optional[Dict[str, Any]] = None
+    pilha = []
+
+    try:
+        for evento, elem in ET.iterparse(origem, events=("start", "end")):
+            nome = _nome_nfe(elem.tag)
+            if evento == "start":
+                pilha.append(nome)
+                if nome == "det":
+                    item = _novo_item(elem.get("nItem"))
+                elif nome == "rastro" and item is not None:
+                    item["rastros"].append(
+                        {"lote": "", "quantidade": 0.0, "validade": ""}
+                    )
+                elif nome == "infNFe":
+                    encontrou_nfe = True
+                    if not nota["chave"]:
+                        nota["chave"] = (elem.get("Id") or "").removeprefix("NFe")
+                continue
+
+            pilha.pop()
+            pai = pilha[-1] if pilha else None
+            texto = (elem.text or "").strip()
+            if pai == "prod" and item is not None:
+                if nome in _CAMPOS_PROD:
+                    item[_CAMPOS_PROD[nome]] = texto
+                elif nome in _NUMEROS_PROD:
+                    item[_NUMEROS_PROD[nome]] = _numero(texto)
+            elif pai == "rastro" and item is not None and item["rastros"]:
+                if nome in _CAMPOS_RASTRO:
+                    item["rastros"][-1][_CAMPOS_RASTRO[nome]] = texto
+                elif nome == "qLote":
+                    item["rastros"][-1]["quantidade"] = _numero(texto)
+            elif nome == "det" and item is not None:
+                if item["ean"].upper() == "SEM GTIN":
+                    item["ean"] = ""
+                nota["itens"].append(item)
+                item = None
+            elif pai == "ide":
+                if nome in _CAMPOS_IDE:
+                    nota[_CAMPOS_IDE[nome]] = texto
+                elif nome == "dEmi" and not nota["data_emissao"]:
+                    nota["data_emissao"] = texto
+            elif pai == "emit" and nome in _CAMPOS_EMIT:
+                nota["emitente"][_CAMPOS_EMIT[nome]] = texto
+            elif pai == "ICMSTot":
+                if nome == "vNF":
+                    nota["total"] = _numero(texto)
+                elif nome == "vProd":
+                    nota["total_produtos"] = _numero(texto)
+            elif pai == "infProt" and nome == "chNFe":
+                chave_protocolo = texto
+            # o que já foi lido não precisa ficar em memória
+            elem.clear()
+    except ET.ParseError as e:
+        raise ValueError(f"XML inválido: {e}") from e
+
+    if not encontrou_nfe:
+        raise ValueError("O arquivo não contém uma NF-e (infNFe).")
+    nota["chave"] = chave_protocolo or nota["chave"]
+    if not nota["total"]:
+        nota["total"] = nota["total_produtos"]
+    return nota
@@ -1,6 +1,9 @@
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+from estoque.busca import normalizar_busca
+from models.db_models import Fornecedor
+
 MEIOS_PAGAMENTO = ["Débito", "Dinheiro", "Crédito", "Pix", "Boleto"]
 CATEGORIA_OPCOES = [
     ("alimentos", "Alimentos"),
@@ -124,23 +127,121 @@ def clean_digits(s: str) -> str:
 
 
 def find_fornecedor_by_doc_ou_nome(pdv_core, cnpj_cpf: str, nome: str):
+    """Fornecedor pelo CNPJ/CPF (como digitado ou só dígitos) ou, na falta,
+    pelo nome exato sem diferenciar maiúsculas nem acentos; ambas as buscas
+    usam índice."""
     try:
+        session = pdv_core.session
         if cnpj_cpf:
+            documentos = {cnpj_cpf.strip(), clean_digits(cnpj_cpf)} - {""}
             f = (
-                pdv_core.session.query(pdv_core.models.Fornecedor)
-                .filter_by(cnpj_cpf=cnpj_cpf)
+                session.query(Fornecedor)
+                .filter(Fornecedor.cnpj_cpf.in_(documentos))
                 .first()
             )
             if f:
                 return f
-        if nome:
-            candidatos = pdv_core.get_all_fornecedores()
-            target = (nome or "").strip().lower()
-            for f in candidatos:
-                if (
-                    getattr(f, "nome_razao_social", "") or getattr(f, "nome", "")
-                ).strip().lower() == target:
-                    return f
+        target = normalizar_busca(nome)
+        if target:
+            return (
+                session.query(Fornecedor)
+                .filter(Fornecedor.nome_busca == target)
+                .order_by(Fornecedor.id)
+                .first()
+            )
     except Exception:
         return None
     return None
+
+
+def registro_para_fornecedor(row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Normaliza uma linha de planilha/CSV nos dados de fornecedor.
+
+    Retorna None quando a linha não tem nome/razão social.
+    """
+    nome = get_any(
+        row,
+        [
+            "nome",
+            "razao social",
+            "razão social",
+            "nome razao social",
+            "nome / razao social",
+            "nome / razão social",
+        ],
+    )
+    if not (nome and nome.strip()):
+        return None
+    doc = clean_digits(get_any(row, ["cnpj", "cpf", "cnpj cpf", "cnpj/cpf"]) or "")
+    contato_tel = get_any(row, ["contato", "telefone", "celular"]) or ""
+    contato_email = get_any(row, ["email", "e-mail"]) or ""
+    meios = get_any(
+        row, ["condicao pagamento", "condição pagamento", "meios", "meios aceitos"]
+    )
+    prazo = get_any(
+        row, ["prazo", "prazo entrega", "prazo medio entrega", "prazo médio entrega"]
+    )
+    return {
+        "nome_razao_social": nome.strip(),
+        "cnpj_cpf": doc or None,
+        "contato": ", ".join([p for p in [contato_tel, contato_email] if p]) or None,
+        "condicao_pagamento": parse_meios(meios) or None,
+        "prazo_entrega_medio": prazo or None,
+        "categoria": map_categoria(get_any(row, ["categoria"])),
+        "status": map_status(get_any(row, ["status"])),
+    }
+
+
+def ler_arquivo_fornecedores(file_path: str) -> Dict[str, Any]:
+    """Lê um CSV/XLS/XLSX de fornecedores (pode rodar em outro processo).
+
+    Retorna dict com `arquivo`, `registros` (dados normalizados),
+    `ignorados` (linhas sem nome) e `erro` (falha de leitura ou None).
+    """
+    from estoque.imports import iter_records
+
+    registros: List[Dict[str, Any]] = []
+    ignorados = 0
+    try:
+        for row in iter_records(file_path):
+            dados = registro_para_fornecedor(row)
+            if dados is None:
+                ignorados += 1
+            else:
+                registros.append(dados)
+        erro = None
+    except Exception as e:
+        erro = f"{Path(file_path).name}: {e}"
+    return {
+        "arquivo": file_path,
+        "registros": registros,
+        "ignorados": ignorados,
+        "erro": erro,
+    }
+
+
+def chave_fornecedor(dados: Dict[str, Any]) -> str:
+    """Chave de identidade: CNPJ/CPF (só dígitos) ou o nome normalizado como
+    `Fornecedor.nome_busca` (sem acentos e sem diferenciar maiúsculas)."""
+    doc = dados.get("cnpj_cpf")
+    if doc:
+        return f"doc:{doc}"
+    return "nome:" + normalizar_busca(dados.get("nome_razao_social"))
+
+
+def mesclar_registros_fornecedores(
+    listas: List[List[Dict[str, Any]]],
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Mescla registros de vários arquivos; a última ocorrência prevalece.
+
+    Retorna (registros_unicos, quantidade_de_repetidos).
+    """
+    unicos: Dict[str, Dict[str, Any]] = {}
+    repetidos = 0
+    for registros in listas:
+        for dados in registros:
+            chave = chave_fornecedor(dados)
+            if chave in unicos:
+                repetidos += 1
+            unicos[chave] = dados
+    return list(unicos.values()), repetidos
@@ -17,6 +17,7 @@ import flet as ft
 
 from models.db_models import Fornecedor
 from utils.export_utils import generate_csv_file, generate_pdf_file
+from utils.processamento_paralelo import mapear_em_processos
 
 try:
     import pandas as pd  # opcional para .xls/.xlsx
@@ -44,6 +45,11 @@ COLORS = {
     "card": "#FFFFFF",
 }
 
+# Notas exibidas no repositório de NF-e (as mais recentes)
+XMLS_POR_PAGINA = 100
+# Fornecedores por página na lista (o restante vem em "Carregar mais")
+FORNECEDORES_POR_PAGINA = 50
+
 MEIOS_PAGAMENTO = ["Débito", "Dinheiro", "Crédito", "Pix", "Boleto"]
 STATUS_OPCOES = [("ativo", "Ativo"), ("inativo", "Inativo")]
 CATEGORIA_OPCOES = [
@@ -134,7 +140,9 @@ def create_fornecedores_view(
     refresh_pr_ref = ft.Ref[ft.ProgressRing]()
     detalhes_container_ref = ft.Ref[ft.Container]()
     obs_text_ref = ft.Ref[ft.TextField]()
-    highlight_id_ref = ft.Ref()
+    # lista paginada: termo/página atuais e cards exibidos (por id)
+    paginacao_fornecedores: Dict[str, Any] = {"termo": "", "pagina": 1}
+    cards_fornecedores: Dict[Any, ft.Container] = {}
     bottom_bar_ref = ft.Ref[ft.Container]()
     bottom_bar_text_ref = ft.Ref[ft.Text]()
     bottom_panel_ref = ft.Ref[ft.Container]()
@@ -168,8 +176,10 @@ def create_fornecedores_view(
         clean_digits,
         find_fornecedor_by_doc_ou_nome,
         get_any,
+        ler_arquivo_fornecedores,
         map_categoria,
         map_status,
+        mesclar_registros_fornecedores,
         parse_meios,
     )
 
@@ -271,205 +281,51 @@ def create_fornecedores_view(
             show_snackbar(page, "Nenhum arquivo selecionado.", COLORS["orange"])
             return
 
-        path = e.files[0].path
-        if not path:
+        paths = [f.path for f in e.files if f.path]
+        if not paths:
             show_snackbar(page, "Caminho inválido.", COLORS["red"])
             return
 
-        # continuar com importação CSV/XLS
-
-        ext = Path(path).suffix.lower()
-        criados = 0
-        atualizados = 0
-        ignorados = 0
-        duplicados = 0
         try:
-            # Carregar registros de CSV ou Excel
-            if ext in (".xls", ".xlsx"):
-                if pd is None:
-                    show_snackbar(
-                        page,
-                        "Para importar Excel, instale pandas e openpyxl.",
-                        COLORS["orange"],
-                    )
-                    return
-                # Engine openpyxl para .xlsx; .xls pode usar fallback
-                kwargs = {"engine": "openpyxl"} if ext == ".xlsx" else {}
-                df = pd.read_excel(path, **kwargs)
-                records = df.to_dict(orient="records")
-            else:
-                with open(path, encoding="utf-8-sig", newline="") as f:
-                    records = list(csv.DictReader(f))
-
-            for row in records:
-                nome = get_any(
-                    row,
-                    [
-                        "nome",
-                        "razao social",
-                        "razão social",
-                        "nome razao social",
-                        "nome / razao social",
-                        "nome / razão social",
-                    ],
-                )
-                if not (nome and nome.strip()):
-                    ignorados += 1
-                    continue
-                doc = get_any(row, ["cnpj", "cpf", "cnpj cpf", "cnpj/cpf"]) or ""
-                doc = clean_digits(doc)
-                contato_tel = get_any(row, ["contato", "telefone", "celular"]) or ""
-                contato_email = get_any(row, ["email", "e-mail"]) or ""
-                contato = (
-                    ", ".join([p for p in [contato_tel, contato_email] if p]) or None
-                )
-                meios = (
-                    parse_meios(
-                        get_any(
-                            row,
-                            [
-                                "condicao pagamento",
-                                "condição pagamento",
-                                "meios",
-                                "meios aceitos",
-                            ],
-                        )
-                    )
-                    or None
-                )
-                prazo = (
-                    get_any(
-                        row,
-                        [
-                            "prazo",
-                            "prazo entrega",
-                            "prazo medio entrega",
-                            "prazo médio entrega",
-                        ],
-                    )
-                    or None
+            # Leitura/normalização das planilhas em paralelo (um processo por
+            # arquivo); a gravação no banco acontece em uma única transação.
+            leituras = mapear_em_processos(ler_arquivo_fornecedores, paths)
+            falhas = [r for r in leituras if r["erro"]]
+            for falha in falhas:
+                logger.warning(f"Falha ao ler {falha['arquivo']}: {falha['erro']}")
+            if len(falhas) == len(leituras):
+                show_snackbar(
+                    page, f"Erro ao importar: {falhas[0]['erro']}", COLORS["red"]
                 )
-                categoria = map_categoria(get_any(row, ["categoria"]))
-                status = map_status(get_any(row, ["status"]))
-
-                dados: FornecedorData = {
-                    "nome_razao_social": nome.strip(),
-                    "cnpj_cpf": doc or None,
-                    "contato": contato,
-                    "condicao_pagamento": meios,
-                    "prazo_entrega_medio": prazo,
-                    "categoria": categoria,
-                    "status": status,
-                }
+                return
 
-                existente = find_fornecedor_by_doc_ou_nome(pdv_core, doc, nome)
-                if existente:
-                    ok, msg = pdv_core.cadastrar_ou_atualizar_fornecedor(
-                        dados, fornecedor_id=getattr(existente, "id", None)
-                    )
-                    if ok:
-                        atualizados += 1
-                    else:
-                        logger.warning(f"Ignorado (update falhou): {msg}")
-                        m = (msg or "").lower()
-                        if any(
-                            k in m
-                            for k in (
-                                "cnpj",
-                                "cpf",
-                                "já está cadastrado",
-                                "ja está cadastrado",
-                                "já esta cadastrado",
-                                "already exists",
-                            )
-                        ):
-                            duplicados += 1
-                        else:
-                            ignorados += 1
-                else:
-                    ok, msg = pdv_core.cadastrar_ou_atualizar_fornecedor(dados, None)
-                    if ok:
-                        criados += 1
-                        try:
-                            # tentar localizar o registro recém-criado pelo CNPJ ou nome
-                            all_now = pdv_core.get_all_fornecedores()
-                            found = None
-                            for ff in reversed(all_now):
-                                if (
-                                    getattr(ff, "cnpj_cpf", None)
-                                    and getattr(ff, "cnpj_cpf") == (doc or None)
-                                ) or (
-                                    (
-                                        getattr(ff, "nome_razao_social", "")
-                                        or getattr(ff, "nome", "")
-                                    ).strip()
-                                    == nome.strip()
-                                ):
-                                    found = ff
-                                    break
-                            if found:
-                                logger.info(
-                                    f"Fornecedor importado detectado: id={getattr(found,'id', None)} nome={getattr(found,'nome_razao_social', getattr(found,'nome',''))}"
-                                )
-                            else:
-                                logger.warning(
-                                    f"Fornecedor '{nome}' aparentemente criado mas NÃO encontrado por get_all_fornecedores()"
-                                )
-                        except Exception:
-                            logger.exception(
-                                "Erro ao verificar criação do fornecedor após cadastrar_ou_atualizar_fornecedor"
-                            )
-                    else:
-                        logger.warning(f"Ignorado (create falhou): {msg}")
-                        m = (msg or "").lower()
-                        if any(
-                            k in m
-                            for k in (
-                                "cnpj",
-                                "cpf",
-                                "já está cadastrado",
-                                "ja está cadastrado",
-                                "já esta cadastrado",
-                                "already exists",
-                            )
-                        ):
-                            duplicados += 1
-                        else:
-                            ignorados += 1
+            ignorados = sum(r["ignorados"] for r in leituras)
+            registros, repetidos = mesclar_registros_fornecedores(
+                [r["registros"] for r in leituras if not r["erro"]]
+            )
+            resumo = pdv_core.importar_fornecedores(registros)
+            if resumo["erro"]:
+                show_snackbar(page, resumo["erro"], COLORS["red"])
+                return
 
             load_fornecedores_table("")
             try:
-                # Debug: listar fornecedores atuais após import
-                try:
-                    allf = pdv_core.get_all_fornecedores()
-                    logger.info(
-                        f"Após importação, pdv_core.get_all_fornecedores retornou {len(allf)} fornecedores"
-                    )
-                    # log nomes dos últimos 10
-                    nomes = [
-                        getattr(x, "nome_razao_social", getattr(x, "nome", ""))
-                        for x in allf[-10:]
-                    ]
-                    logger.info(f"Fornecedores (últimos 10): {nomes}")
-                except Exception:
-                    logger.exception(
-                        "Falha ao obter lista de fornecedores para debug após import"
-                    )
-                try:
-                    if fornecedores_list_ref.current:
-                        fornecedores_list_ref.current.update()
-                except Exception:
-                    pass
-                try:
-                    page.update()
-                except Exception:
-                    pass
+                if fornecedores_list_ref.current:
+                    fornecedores_list_ref.current.update()
+                page.update()
             except Exception:
                 pass
-            summary = f"Importação concluída: {criados} criado(s), {atualizados} atualizado(s), {ignorados} ignorado(s)"
+
+            summary = (
+                f"Importação concluída: {resumo['criados']} criado(s), "
+                f"{resumo['atualizados']} atualizado(s), {ignorados} ignorado(s)"
+            )
+            if falhas:
+                summary += f", {len(falhas)} arquivo(s) com erro"
+            duplicados = resumo["duplicados"] + repetidos
             # informar duplicados via barra inferior local para garantir visibilidade
             if duplicados:
-                dup_msg = f"{duplicados} fornecedor(es) já existente(s) ignorado(s)."
+                dup_msg = f"{duplicados} fornecedor(es) duplicado(s) ignorado(s)."
                 # Preferir mostrar no AppBar (top), senão barra inferior local, senão snackbar
                 try:
                     try:
@@ -728,28 +584,25 @@ def create_fornecedores_view(
         # Ler o XML internamente e processar — não abrir no navegador
         # (anteriormente o código abria o arquivo externamente e retornava)
 
-        # Parse NF-e XML de forma resiliente (procura por tags pelo localname)
-        import xml.etree.ElementTree as ET
+        # Parse NF-e XML em uma única passada (fornecedores/nfe_parser.py)
+        from fornecedores.nfe_parser import parse_nfe
 
         try:
-            tree = ET.parse(path)
-            root = tree.getroot()
-
-            def find_text(name, ctx=root, default=""):
-                for el in ctx.iter():
-                    if el.tag.split("}")[-1] == name:
-                        return (el.text or "").strip()
-                return default
+            nota = parse_nfe(path)
 
             # Dados básicos
-            nro = find_text("nNF")
-            chave = find_text("chNFe") or find_text("NFe")
-            data_emissao = find_text("dhEmi") or find_text("dEmi")
-            fornecedor_nome = find_text("xNome", ctx=root) or find_text(
-                "xNome", ctx=root
-            )
-            fornecedor_doc = find_text("CNPJ") or find_text("CPF")
-            total_valor = find_text("vNF") or find_text("vProd")
+            nro = nota["numero"]
+            chave = nota["chave"]
+            data_emissao = nota["data_emissao"]
+            fornecedor_nome = nota["emitente"]["nome"]
+            fornecedor_doc = nota["emitente"]["cnpj"] or nota["emitente"]["cpf"]
+            total_valor = f"{nota['total']:.2f}"
+            if chave and pdv_core.chaves_xml_registradas([chave]):
+                show_snackbar(
+                    page,
+                    f"NF-e {nro or chave} já importada; o registro será atualizado.",
+                    COLORS["orange"],
+                )
 
             # Se a importação foi iniciada a partir do card de um fornecedor,
             # o id alvo é armazenado em page.app_data['fornecedores_xml_target_id']
@@ -786,21 +639,11 @@ def create_fornecedores_view(
                 except Exception:
                     pass
 
-            # Itens
-            itens = []
-            for det in root.iter():
-                if det.tag.split("}")[-1] == "det":
-                    prod = None
-                    for c in det.iter():
-                        if c.tag.split("}")[-1] == "prod":
-                            prod = c
-                            break
-                    if prod is None:
-                        continue
-                    nome = find_text("xProd", ctx=prod)
-                    qt = find_text("qCom", ctx=prod)
-                    vprod = find_text("vProd", ctx=prod)
-                    itens.append({"nome": nome, "q": qt, "v": vprod})
+            # Itens (q/v são os textos exibidos nas listas de XMLs importados)
+            itens = [
+                dict(it, q=f"{it['quantidade']:g}", v=f"{it['valor_total']:.2f}")
+                for it in nota["itens"]
+            ]
 
             summary = f"NF-e: {nro or '-'} | Fornecedor: {fornecedor_nome or '-'} | Total: R$ {total_valor or '0.00'} | Itens: {len(itens)}"
             logger.info(
@@ -949,6 +792,11 @@ def create_fornecedores_view(
             xml_vencimento_field = ft.TextField(label="Vencimento", value="")
             xml_footer_row = ft.Row(
                 [
+                    ft.OutlinedButton(
+                        "Entrada no estoque",
+                        icon=ft.Icons.INVENTORY,
+                        on_click=lambda ev: abrir_entrada_estoque_nfe(nota),
+                    ),
                     ft.Container(expand=True),
                     ft.ElevatedButton(
                         "Confirmar",
@@ -1075,8 +923,7 @@ def create_fornecedores_view(
                 try:
                     if pdv_core_ref and hasattr(pdv_core_ref, "save_imported_xml"):
                         try:
-                            pdv_core_ref.save_imported_xml(xml_record)
-                            saved = True
+                            saved, _msg = pdv_core_ref.save_imported_xml(xml_record)
                         except Exception:
                             saved = False
                 except Exception:
@@ -1253,6 +1100,147 @@ def create_fornecedores_view(
         except Exception:
             pass
 
+    def abrir_entrada_estoque_nfe(nota: Dict[str, Any]):
+        """Diálogo de entrada de mercadoria: confere o produto de cada item da
+        NF-e (sugerido pelos vínculos cProd/cEAN) e lança tudo de uma vez."""
+        if not nota.get("itens"):
+            show_snackbar(page, "A NF-e não possui itens.", COLORS["orange"])
+            return
+        try:
+            casados = pdv_core.casar_itens_nfe(nota)
+        except Exception as ex:
+            logger.exception("Erro ao casar itens da NF-e")
+            show_snackbar(page, f"Erro ao buscar produtos: {ex}", COLORS["red"])
+            return
+        selecao: List[Optional[int]] = [it["produto_id"] for it in casados]
+        incluir: List[ft.Checkbox] = []
+
+        def _trocar_produto(ev: ft.ControlEvent, indice: int, rotulo: ft.Text):
+            codigo = (ev.control.value or "").strip()
+            if not codigo:
+                return
+            produto = pdv_core.buscar_produto(codigo)
+            if produto is None:
+                show_snackbar(
+                    page, f"Produto com código {codigo} não encontrado.", COLORS["red"]
+                )
+                return
+            selecao[indice] = produto.id
+            rotulo.value = produto.nome
+            rotulo.color = COLORS["text"]
+            incluir[indice].value = True
+            incluir[indice].disabled = False
+            rotulo.update()
+            incluir[indice].update()
+
+        linhas = []
+        for i, item in enumerate(casados):
+            rotulo = ft.Text(
+                item["produto_nome"] or "Sem produto vinculado",
+                size=12,
+                color=COLORS["text"] if item["produto_id"] else COLORS["orange"],
+            )
+            incluir.append(
+                ft.Checkbox(
+                    value=bool(item["produto_id"]),
+                    disabled=not item["produto_id"],
+                    tooltip="Lançar este item",
+                )
+            )
+            linhas.append(
+                ft.Row(
+                    [
+                        incluir[i],
+                        ft.Column(
+                            [
+                                ft.Text(
+                                    f"{i + 1}. {item['nome']}",
+                                    weight=ft.FontWeight.W_500,
+                                ),
+                                ft.Text(
+                                    f"cód. {item['codigo'] or '-'}  "
+                                    f"qt={item['quantidade']:g}  "
+                                    f"v=R$ {item['valor_total']:.2f}",
+                                    size=12,
+                                    color=COLORS["text_muted"],
+                                ),
+                                rotulo,
+                            ],
+                            spacing=2,
+                            expand=True,
+                        ),
+                        ft.TextField(
+                            label="Cód. barras do produto",
+                            width=200,
+                            dense=True,
+                            on_submit=lambda ev, i=i, r=rotulo: _trocar_produto(
+                                ev, i, r
+                            ),
+                            on_blur=lambda ev, i=i, r=rotulo: _trocar_produto(ev, i, r),
+                        ),
+                    ],
+                    vertical_alignment=ft.CrossAxisAlignment.CENTER,
+                )
+            )
+        atualizar_custo = ft.Checkbox(
+            label="Atualizar custo dos produtos pelo valor da nota", value=True
+        )
+
+        def _lancar(ev):
+            produto_ids = [
+                pid if marcado.value else None for pid, marcado in zip(selecao, incluir)
+            ]
+            ok, resultado = pdv_core.lancar_entrada_nfe(
+                nota, produto_ids, atualizar_custo=bool(atualizar_custo.value)
+            )
+            if not ok:
+                show_snackbar(page, resultado, COLORS["red"])
+                return
+            page.close(dialogo)
+            mensagem = (
+                f"✅ Entrada lançada: {resultado['produtos']} produto(s), "
+                f"{resultado['quantidade']} unidade(s)"
+            )
+            if resultado["ignorados"]:
+                mensagem += f", {resultado['ignorados']} item(ns) sem produto"
+            if resultado["fracionados"]:
+                # o estoque é em unidades inteiras: esses itens ficam de fora
+                mensagem += (
+                    f". Quantidade fracionada, não lançado(s): "
+                    f"{', '.join(resultado['fracionados'])}"
+                )
+                show_snackbar(page, mensagem, COLORS["orange"])
+                return
+            show_snackbar(page, mensagem, COLORS["green"])
+
+        dialogo = ft.AlertDialog(
+            modal=True,
+            title=ft.Text(f"Entrada no estoque — NF-e {nota.get('numero') or '-'}"),
+            content=ft.Container(
+                content=ft.Column(
+                    [
+                        ft.Text(
+                            "Confira o produto de cada item; informe o código de "
+                            "barras para trocar. Itens desmarcados não entram.",
+                            size=12,
+                            color=COLORS["text_muted"],
+                        ),
+                        ft.Column(linhas, spacing=10, scroll=ft.ScrollMode.AUTO),
+                        atualizar_custo,
+                    ],
+                    spacing=10,
+                    tight=True,
+                ),
+                width=700,
+                height=420,
+            ),
+            actions=[
+                ft.TextButton("Cancelar", on_click=lambda ev: page.close(dialogo)),
+                ft.ElevatedButton("Lançar entrada", on_click=_lancar),
+            ],
+        )
+        page.open(dialogo)
+
     def confirmar_import_xml(
         e: ft.ControlEvent,
         nro,
@@ -1483,7 +1471,7 @@ def create_fornecedores_view(
     def importar_fornecedores_csv(e: ft.ControlEvent):
         try:
             fornecedores_file_picker.pick_files(
-                allow_multiple=False, allowed_extensions=["csv", "xls", "xlsx"]
+                allow_multiple=True, allowed_extensions=["csv", "xls", "xlsx"]
             )
         except Exception as ex:
             show_snackbar(page, f"Falha ao abrir seletor: {ex}", COLORS["red"])
@@ -1497,56 +1485,99 @@ def create_fornecedores_view(
         except Exception as ex:
             show_snackbar(page, f"Falha ao abrir seletor: {ex}", COLORS["red"])
 
-    def _load_all_imported_xmls():
-        """Retorna lista de registros de XML importados do pdv_core (se disponível) ou do session/file fallback."""
+    # =============================
+    # Importação NF-e em lote (vários XMLs ou pasta)
+    # =============================
+    def importar_lote_xmls(paths: List[str]):
+        from fornecedores.nfe_lote import preparar_lote_nfe
+
+        if not paths:
+            show_snackbar(page, "Nenhum XML encontrado.", COLORS["orange"])
+            return
         try:
-            pdv_core_ref = page.app_data.get("pdv_core")
-            if pdv_core_ref and hasattr(pdv_core_ref, "get_all_imported_xmls"):
+            # Leitura em paralelo (um processo por XML) e deduplicação pela
+            # chave de acesso; notas, fornecedores e contas são gravados em
+            # uma transação (chaves já registradas são ignoradas pelo banco).
+            lote = preparar_lote_nfe(paths)
+            for falha in lote["erros"]:
+                logger.warning(f"Falha ao ler {falha['path']}: {falha['erro']}")
+
+            resumo = pdv_core.importar_lote_nfe(lote["notas"])
+            if resumo["erro"]:
+                show_snackbar(page, resumo["erro"], COLORS["red"])
+                return
+            if resumo["notas"]:
+                load_fornecedores_table("")
                 try:
-                    return pdv_core_ref.get_all_imported_xmls() or []
+                    if hasattr(page, "atualizar_finance_tables") and callable(
+                        page.atualizar_finance_tables
+                    ):
+                        page.atualizar_finance_tables(False)
                 except Exception:
                     pass
-        except Exception:
-            pass
 
-        # fallback para session/data file
+            summary = (
+                f"NF-e em lote: {resumo['notas']} importada(s) "
+                f"(R$ {resumo['valor_total']:.2f}), "
+                f"{len(lote['duplicadas']) + resumo['duplicadas']} duplicada(s), "
+                f"{len(lote['erros'])} com erro, "
+                f"{resumo['fornecedores_criados']} fornecedor(es) novo(s), "
+                f"{resumo['contas_criadas']} conta(s) a pagar"
+            )
+            cor = COLORS["green"] if resumo["notas"] else COLORS["orange"]
+            show_snackbar(page, summary, cor)
+            try:
+                show_local_bottom_bar(summary, color=cor)
+            except Exception:
+                pass
+        except Exception as ex:
+            logger.exception("Erro ao importar lote de NF-e")
+            show_snackbar(page, f"Erro ao importar NF-e: {ex}", COLORS["red"])
+
+    def on_fornecedores_xml_lote_selected(e: ft.FilePickerResultEvent):
+        if not e.files:
+            show_snackbar(page, "Nenhum arquivo selecionado.", COLORS["orange"])
+            return
+        importar_lote_xmls([f.path for f in e.files if f.path])
+
+    def on_fornecedores_xml_pasta_selected(e: ft.FilePickerResultEvent):
+        if not e.path:
+            show_snackbar(page, "Nenhuma pasta selecionada.", COLORS["orange"])
+            return
+        from fornecedores.nfe_lote import listar_xmls_da_pasta
+
         try:
-            xmls = page.session.get("xml_data")
-            if not xmls:
-                import json
+            paths = listar_xmls_da_pasta(e.path)
+        except OSError as ex:
+            show_snackbar(page, f"Falha ao ler a pasta: {ex}", COLORS["red"])
+            return
+        importar_lote_xmls(paths)
 
-                candidates = []
-                try:
-                    if getattr(page, "app_dir", None):
-                        candidates.append(
-                            Path(page.app_dir) / "data" / "imported_xmls.json"
-                        )
-                except Exception:
-                    pass
-                try:
-                    root_candidate = Path(__file__).resolve().parent.parent
-                    candidates.append(root_candidate / "data" / "imported_xmls.json")
-                except Exception:
-                    pass
-                file_data = None
-                for data_file in candidates:
-                    try:
-                        if data_file and data_file.exists():
-                            with open(data_file, "r", encoding="utf-8") as fh:
-                                file_data = json.load(fh) or []
-                            break
-                    except Exception:
-                        continue
-                if file_data is not None:
-                    xmls = file_data
-            if not xmls:
-                return []
-            # garantir que seja lista
-            if not isinstance(xmls, list):
-                return list(xmls)
-            return xmls
-        except Exception:
-            return []
+    fornecedores_xml_lote_picker = ft.FilePicker(
+        on_result=on_fornecedores_xml_lote_selected
+    )
+    fornecedores_xml_pasta_picker = ft.FilePicker(
+        on_result=on_fornecedores_xml_pasta_selected
+    )
+    for _picker in (fornecedores_xml_lote_picker, fornecedores_xml_pasta_picker):
+        if _picker not in page.overlay:
+            page.overlay.append(_picker)
+
+    def importar_xmls_em_lote(e: ft.ControlEvent):
+        try:
+            fornecedores_xml_lote_picker.pick_files(
+                allow_multiple=True, allowed_extensions=["xml"]
+            )
+        except Exception as ex:
+            show_snackbar(page, f"Falha ao abrir seletor: {ex}", COLORS["red"])
+
+    def importar_pasta_de_xmls(e: ft.ControlEvent):
+        try:
+            fornecedores_xml_pasta_picker.get_directory_path(
+                dialog_title="Pasta com XMLs de NF-e"
+            )
+        except Exception as ex:
+            show_snackbar(page, f"Falha ao abrir seletor: {ex}", COLORS["red"])
 
     def abrir_xml_no_navegador(path_or_record):
         """Tenta abrir o XML no navegador. path_or_record pode ser o caminho (str) ou um registro dict com 'path'."""
@@ -1578,9 +1609,10 @@ def create_fornecedores_view(
             show_snackbar(page, f"Erro ao abrir XML: {ex}", COLORS["red"])
 
     def abrir_repositorio_global_xmls(e: ft.ControlEvent):
-        """Exibe um repositório geral com todas as notas (somente VISUALIZAÇÃO)."""
+        """Exibe um repositório geral com as notas mais recentes (somente VISUALIZAÇÃO)."""
         try:
-            xmls = _load_all_imported_xmls()
+            pagina = pdv_core.listar_imported_xmls(por_pagina=XMLS_POR_PAGINA)
+            xmls = pagina["itens"]
             if not xmls:
                 show_snackbar(
                     page, "Nenhum XML registrado no sistema.", COLORS["orange"]
@@ -1628,9 +1660,24 @@ def create_fornecedores_view(
             repo_panel = ft.Container(
                 content=ft.Column(
                     [
-                        ft.Text("Repositório de NF-e (XML)", weight=ft.FontWeight.BOLD),
+                        ft.Row(
+                            [
+                                ft.Text(
+                                    "Repositório de NF-e (XML)",
+                                    weight=ft.FontWeight.BOLD,
+                                ),
+                                ft.Text(
+                                    f"{len(xmls)} de {pagina['total']} nota(s)",
+                                    size=12,
+                                    color=ft.Colors.BLACK45,
+                                ),
+                            ],
+                            alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                        ),
                         ft.Divider(),
-                        ft.Column(rows, spacing=6),
+                        ft.Column(
+                            rows, spacing=6, scroll=ft.ScrollMode.AUTO, expand=True
+                        ),
                         ft.Divider(),
                         ft.Row(
                             [
@@ -1722,270 +1769,311 @@ def create_fornecedores_view(
 
         return []
 
-    def load_fornecedores_table(search_term: str = ""):
-        logger.info(f"Carregando lista de fornecedores (busca: '{search_term}')")
-
-        if not fornecedores_list_ref.current:
-            logger.warning("Lista ainda não montada, ignorando recarregamento")
-            return
-
-        try:
-            loading_ref.current.visible = True
-            page.update()
-
-            fornecedores = pdv_core.get_all_fornecedores()
-            if search_term:
-                fornecedores = [
-                    f
-                    for f in fornecedores
-                    if search_term.lower()
-                    in (
-                        (getattr(f, "nome_razao_social", "") or "").lower()
-                        + (getattr(f, "nome", "") or "").lower()
-                    )
-                ]
-
-            items: List[ft.Control] = []
-            for f in fornecedores:
-                produtos_fornecedor = get_produtos_fornecedor(f.id)
-                produto_principal = "-"
-                if produtos_fornecedor:
-                    produto_principal = getattr(produtos_fornecedor[0], "nome", "-")
-                    if len(produtos_fornecedor) > 1:
-                        produto_principal += f" (+{len(produtos_fornecedor) - 1})"
-
-                nome = getattr(f, "nome_razao_social", getattr(f, "nome", "N/A"))
-                contato = getattr(f, "contato", "-")
-                status_val = getattr(f, "status", "ativo")
-                condicao_pagamento = getattr(f, "condicao_pagamento", "-")
-                prazo_entrega = getattr(f, "prazo_entrega_medio", "-")
-                cnpj_cpf = getattr(f, "cnpj_cpf", "-")
-                categoria = getattr(f, "categoria", "-")
-
-                # Encontrar o label da categoria
-                categoria_label = "-"
-                for cat_value, cat_label in CATEGORIA_OPCOES:
-                    if cat_value == categoria:
-                        categoria_label = cat_label
-                        break
+    def _criar_card_fornecedor(f: Any) -> ft.Container:
+        """Card compacto da lista; produtos, compras e XMLs do fornecedor só
+        são consultados ao abrir os detalhes (clique no card)."""
+        nome = getattr(f, "nome_razao_social", getattr(f, "nome", "N/A"))
+        contato = getattr(f, "contato", "-")
+        status_val = getattr(f, "status", "ativo")
+        condicao_pagamento = getattr(f, "condicao_pagamento", "-")
+        prazo_entrega = getattr(f, "prazo_entrega_medio", "-")
+        cnpj_cpf = getattr(f, "cnpj_cpf", "-")
+        categoria = getattr(f, "categoria", "-")
+
+        # Encontrar o label da categoria
+        categoria_label = "-"
+        for cat_value, cat_label in CATEGORIA_OPCOES:
+            if cat_value == categoria:
+                categoria_label = cat_label
+                break
+
+        # Normalizar para evitar diferenças de capitalização vindas do DB/import
+        status_color = (
+            COLORS["green"]
+            if str(status_val).strip().lower() == "ativo"
+            else COLORS["red"]
+        )
 
-                # Normalizar para evitar diferenças de capitalização vindas do DB/import
-                status_color = (
-                    COLORS["green"]
-                    if str(status_val).strip().lower() == "ativo"
-                    else COLORS["red"]
-                )
+        actions = ft.Row(
+            [
+                ft.IconButton(
+                    icon=ft.Icons.EDIT,
+                    tooltip="Editar",
+                    data=getattr(f, "id", None),
+                    on_click=preencher_formulario_edicao,
+                    icon_color=COLORS["primary"],
+                ),
+                ft.IconButton(
+                    icon=ft.Icons.DESCRIPTION,
+                    tooltip="Importar XML (NF-e)",
+                    data=getattr(f, "id", None),
+                    on_click=lambda e, v=getattr(
+                        f, "id", None
+                    ): importar_xml_para_fornecedor(e),
+                    icon_color=COLORS["primary"],
+                ),
+                ft.IconButton(
+                    icon=ft.Icons.DELETE,
+                    tooltip="Excluir",
+                    data=getattr(f, "id", None),
+                    on_click=excluir_fornecedor,
+                    icon_color=COLORS["red"],
+                ),
+            ],
+            spacing=0,
+        )
 
-                actions = ft.Row(
+        card = ft.Card(
+            elevation=1,
+            content=ft.Container(
+                content=ft.Column(
                     [
-                        ft.IconButton(
-                            icon=ft.Icons.EDIT,
-                            tooltip="Editar",
-                            data=getattr(f, "id", None),
-                            on_click=preencher_formulario_edicao,
-                            icon_color=COLORS["primary"],
-                        ),
-                        ft.IconButton(
-                            icon=ft.Icons.DESCRIPTION,
-                            tooltip="Importar XML (NF-e)",
-                            data=getattr(f, "id", None),
-                            on_click=lambda e, v=getattr(
-                                f, "id", None
-                            ): importar_xml_para_fornecedor(e),
-                            icon_color=COLORS["primary"],
-                        ),
-                        ft.IconButton(
-                            icon=ft.Icons.DELETE,
-                            tooltip="Excluir",
-                            data=getattr(f, "id", None),
-                            on_click=excluir_fornecedor,
-                            icon_color=COLORS["red"],
+                        ft.Row(
+                            [
+                                ft.Column(
+                                    [
+                                        ft.Text(
+                                            nome,
+                                            weight=ft.FontWeight.BOLD,
+                                            size=14,
+                                            color=COLORS["text"],
+                                        ),
+                                        ft.Text(
+                                            f"CNPJ/CPF: {cnpj_cpf}",
+                                            size=11,
+                                            color=COLORS["text_muted"],
+                                        ),
+                                        ft.Text(
+                                            f"Contato: {contato}",
+                                            size=14,
+                                            color=COLORS["text_muted"],
+                                        ),
+                                    ],
+                                    expand=True,
+                                ),
+                                ft.Column(
+                                    [
+                                        ft.Text(
+                                            str(status_val).title(),
+                                            size=11,
+                                            weight="bold",
+                                            color=status_color,
+                                        ),
+                                    ],
+                                    horizontal_alignment=ft.CrossAxisAlignment.END,
+                                ),
+                                actions,
+                            ],
+                            alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                            vertical_alignment=ft.CrossAxisAlignment.CENTER,
                         ),
-                    ],
-                    spacing=0,
-                )
-
-                card = ft.Card(
-                    elevation=1,
-                    content=ft.Container(
-                        content=ft.Column(
+                        ft.Divider(height=8, thickness=0.5),
+                        ft.Row(
                             [
-                                ft.Row(
+                                ft.Column(
                                     [
-                                        ft.Column(
-                                            [
-                                                ft.Text(
-                                                    nome,
-                                                    weight=ft.FontWeight.BOLD,
-                                                    size=14,
-                                                    color=COLORS["text"],
-                                                ),
-                                                ft.Text(
-                                                    f"CNPJ/CPF: {cnpj_cpf}",
-                                                    size=11,
-                                                    color=COLORS["text_muted"],
-                                                ),
-                                                ft.Text(
-                                                    f"Contato: {contato}",
-                                                    size=14,
-                                                    color=COLORS["text_muted"],
-                                                ),
-                                            ],
-                                            expand=True,
+                                        ft.Text(
+                                            "Pagamento:",
+                                            size=10,
+                                            weight="bold",
+                                            color=COLORS["text_muted"],
                                         ),
-                                        ft.Column(
-                                            [
-                                                ft.Text(
-                                                    str(status_val).title(),
-                                                    size=11,
-                                                    weight="bold",
-                                                    color=status_color,
-                                                ),
-                                            ],
-                                            horizontal_alignment=ft.CrossAxisAlignment.END,
+                                        ft.Text(
+                                            str(condicao_pagamento),
+                                            size=11,
+                                            color=COLORS["text"],
                                         ),
-                                        actions,
                                     ],
-                                    alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
-                                    vertical_alignment=ft.CrossAxisAlignment.CENTER,
+                                    width=150,
                                 ),
-                                ft.Divider(height=8, thickness=0.5),
-                                ft.Row(
+                                ft.Column(
                                     [
-                                        ft.Column(
-                                            [
-                                                ft.Text(
-                                                    "Pagamento:",
-                                                    size=10,
-                                                    weight="bold",
-                                                    color=COLORS["text_muted"],
-                                                ),
-                                                ft.Text(
-                                                    str(condicao_pagamento),
-                                                    size=11,
-                                                    color=COLORS["text"],
-                                                ),
-                                            ],
-                                            width=150,
+                                        ft.Text(
+                                            "Categoria:",
+                                            size=10,
+                                            weight="bold",
+                                            color=COLORS["text_muted"],
                                         ),
-                                        ft.Column(
-                                            [
-                                                ft.Text(
-                                                    "Categoria:",
-                                                    size=10,
-                                                    weight="bold",
-                                                    color=COLORS["text_muted"],
-                                                ),
-                                                ft.Text(
-                                                    str(categoria_label),
-                                                    size=11,
-                                                    color=COLORS["text"],
-                                                ),
-                                            ],
-                                            width=120,
+                                        ft.Text(
+                                            str(categoria_label),
+                                            size=11,
+                                            color=COLORS["text"],
                                         ),
-                                        ft.Column(
-                                            [
-                                                ft.Text(
-                                                    "Prazo Entrega:",
-                                                    size=10,
-                                                    weight="bold",
-                                                    color=COLORS["text_muted"],
-                                                ),
-                                                ft.Text(
-                                                    str(prazo_entrega),
-                                                    size=11,
-                                                    color=COLORS["text"],
-                                                ),
-                                            ],
-                                            expand=True,
+                                    ],
+                                    width=120,
+                                ),
+                                ft.Column(
+                                    [
+                                        ft.Text(
+                                            "Prazo Entrega:",
+                                            size=10,
+                                            weight="bold",
+                                            color=COLORS["text_muted"],
+                                        ),
+                                        ft.Text(
+                                            str(prazo_entrega),
+                                            size=11,
+                                            color=COLORS["text"],
                                         ),
                                     ],
-                                    spacing=10,
+                                    expand=True,
                                 ),
                             ],
-                            spacing=5,
+                            spacing=10,
                         ),
-                        padding=12,
-                    ),
-                )
+                    ],
+                    spacing=5,
+                ),
+                padding=12,
+            ),
+        )
 
-                fid = getattr(f, "id", None)
+        fid = getattr(f, "id", None)
 
-                # cores/estilos para hover/seleção
-                HOVER_BG = "#E8F4FF"
-                SELECTED_BG = "#D6EBFF"
-                LEFT_HIGHLIGHT = ft.border.only(
-                    left=ft.BorderSide(4, ft.Colors.BLUE_300)
+        # cores/estilos para hover/seleção
+        HOVER_BG = "#E8F4FF"
+        SELECTED_BG = "#D6EBFF"
+        LEFT_HIGHLIGHT = ft.border.only(left=ft.BorderSide(4, ft.Colors.BLUE_300))
+
+        # determinar se este item está selecionado atualmente
+        sel_id = page.app_data.get("fornecedores_selected_id")
+        is_selected = sel_id == fid
+
+        # criar o card interno e envolver em GestureDetector para clique
+        def _on_tap_local(e, _fid=fid):
+            try:
+                # marcar seleção visual (só os dois cards envolvidos) e
+                # mostrar detalhes no painel direito
+                anterior = cards_fornecedores.get(
+                    page.app_data.get("fornecedores_selected_id")
                 )
+                page.app_data["fornecedores_selected_id"] = _fid
+                if anterior is not None and anterior is not wrapper:
+                    anterior.bgcolor = COLORS.get("card", "white")
+                    anterior.border = None
+                    anterior.update()
+                wrapper.bgcolor = SELECTED_BG
+                wrapper.border = LEFT_HIGHLIGHT
+                wrapper.update()
+                # carregar objeto fornecedor e exibir detalhes (sem entrar em edição)
+                try:
+                    fornecedor_obj = pdv_core.get_fornecedor_by_id(_fid)
+                    if fornecedor_obj and detalhes_container_ref.current:
+                        detalhes_container_ref.current.content = (
+                            create_detalhes_fornecedor(fornecedor_obj)
+                        )
+                        detalhes_container_ref.current.update()
+                except Exception:
+                    pass
+            except Exception:
+                pass
 
-                # determinar se este item está selecionado atualmente
-                sel_id = page.app_data.get("fornecedores_selected_id")
-                is_selected = sel_id == fid
+        inner_gd = ft.GestureDetector(
+            content=card,
+            on_tap=_on_tap_local,
+            mouse_cursor=ft.MouseCursor.CLICK,
+        )
 
-                # criar o card interno e envolver em GestureDetector para clique
-                def _on_tap_local(e, _fid=fid):
-                    try:
-                        # marcar seleção visual e mostrar detalhes no painel direito
-                        page.app_data["fornecedores_selected_id"] = _fid
-                        # atualizar lista para refletir seleção visual
-                        load_fornecedores_table("")
-                        # carregar objeto fornecedor e exibir detalhes (sem entrar em edição)
-                        try:
-                            fornecedor_obj = pdv_core.get_fornecedor_by_id(_fid)
-                            if fornecedor_obj and detalhes_container_ref.current:
-                                detalhes_container_ref.current.content = (
-                                    create_detalhes_fornecedor(fornecedor_obj)
-                                )
-                                detalhes_container_ref.current.update()
-                        except Exception:
-                            pass
-                    except Exception:
-                        pass
+        # container que responde ao hover e adiciona transição suave
+        wrapper = ft.Container(
+            content=inner_gd,
+            padding=2,
+            bgcolor=SELECTED_BG if is_selected else COLORS.get("card", "white"),
+            border=LEFT_HIGHLIGHT if is_selected else None,
+            animate=ft.Animation(200, ft.AnimationCurve.EASE_OUT),
+        )
 
-                inner_gd = ft.GestureDetector(
-                    content=card,
-                    on_tap=_on_tap_local,
-                    mouse_cursor=ft.MouseCursor.CLICK,
-                )
+        # on_hover handler para aplicar efeito visual ao pairar
+        def _on_hover(ev, _wrapper=wrapper, _fid=fid):
+            try:
+                is_hover = getattr(ev, "data", False)
+                if is_hover:
+                    _wrapper.bgcolor = HOVER_BG
+                    _wrapper.border = LEFT_HIGHLIGHT
+                else:
+                    if page.app_data.get("fornecedores_selected_id") == _fid:
+                        _wrapper.bgcolor = SELECTED_BG
+                        _wrapper.border = LEFT_HIGHLIGHT
+                    else:
+                        _wrapper.bgcolor = COLORS.get("card", "white")
+                        _wrapper.border = None
+                _wrapper.update()
+            except Exception:
+                pass
 
-                # container que responde ao hover e adiciona transição suave
-                wrapper = ft.Container(
-                    content=inner_gd,
-                    padding=2,
-                    bgcolor=SELECTED_BG if is_selected else COLORS.get("card", "white"),
-                    border=LEFT_HIGHLIGHT if is_selected else None,
-                    animate=ft.Animation(200, ft.AnimationCurve.EASE_OUT),
-                )
+        wrapper.on_hover = _on_hover
+        cards_fornecedores[fid] = wrapper
+        return wrapper
 
-                # on_hover handler para aplicar efeito visual ao pairar
-                def _on_hover(ev, _wrapper=wrapper, _fid=fid):
-                    try:
-                        is_hover = getattr(ev, "data", False)
-                        if is_hover:
-                            _wrapper.bgcolor = HOVER_BG
-                            _wrapper.border = LEFT_HIGHLIGHT
-                        else:
-                            if page.app_data.get("fornecedores_selected_id") == _fid:
-                                _wrapper.bgcolor = SELECTED_BG
-                                _wrapper.border = LEFT_HIGHLIGHT
-                            else:
-                                _wrapper.bgcolor = COLORS.get("card", "white")
-                                _wrapper.border = None
-                        _wrapper.update()
-                    except Exception:
-                        pass
+    def _botao_carregar_mais(restantes: int) -> ft.Control:
+        return ft.Container(
+            content=ft.TextButton(
+                f"Carregar mais ({restantes} restante(s))",
+                icon=ft.Icons.EXPAND_MORE,
+                on_click=lambda e: load_fornecedores_table(
+                    paginacao_fornecedores["termo"], proxima_pagina=True
+                ),
+            ),
+            alignment=ft.alignment.center,
+        )
+
+    def load_fornecedores_table(search_term: str = "", proxima_pagina: bool = False):
+        """Carrega a primeira página da lista (ou acrescenta a próxima).
+
+        A busca é pelo início do nome ou do CNPJ/CPF, feita no banco
+        (`PDVCore.listar_fornecedores`), uma página por vez.
+        """
+        logger.info(f"Carregando lista de fornecedores (busca: '{search_term}')")
+
+        if not fornecedores_list_ref.current:
+            logger.warning("Lista ainda não montada, ignorando recarregamento")
+            return
 
-                wrapper.on_hover = _on_hover
-                items.append(wrapper)
+        try:
+            loading_ref.current.visible = True
+            page.update()
+
+            if proxima_pagina:
+                paginacao_fornecedores["pagina"] += 1
+            else:
+                paginacao_fornecedores["termo"] = (search_term or "").strip()
+                paginacao_fornecedores["pagina"] = 1
+                cards_fornecedores.clear()
+            resultado = pdv_core.listar_fornecedores(
+                paginacao_fornecedores["termo"],
+                paginacao_fornecedores["pagina"],
+                FORNECEDORES_POR_PAGINA,
+            )
+
+            items: List[ft.Control] = []
+            if proxima_pagina:
+                # mantém os cards já exibidos, sem o botão "Carregar mais"
+                items = [
+                    c
+                    for c in fornecedores_list_ref.current.controls
+                    if c in cards_fornecedores.values()
+                ]
+            items.extend(_criar_card_fornecedor(f) for f in resultado["itens"])
+            restantes = resultado["total"] - len(cards_fornecedores)
+            if restantes > 0:
+                items.append(_botao_carregar_mais(restantes))
 
             fornecedores_list_ref.current.controls = items
             fornecedores_list_ref.current.update()
 
-            if not fornecedores:
-                show_snackbar(page, "Nenhum fornecedor cadastrado.", COLORS["orange"])
+            if not resultado["total"]:
+                if paginacao_fornecedores["termo"]:
+                    show_snackbar(
+                        page, "Nenhum fornecedor encontrado.", COLORS["orange"]
+                    )
+                else:
+                    show_snackbar(
+                        page, "Nenhum fornecedor cadastrado.", COLORS["orange"]
+                    )
 
-            logger.info(f"{len(fornecedores)} fornecedores carregados")
+            logger.info(
+                f"{len(cards_fornecedores)} de {resultado['total']} fornecedores carregados"
+            )
 
         except Exception as e:
             logger.exception("Erro ao carregar fornecedores")
@@ -1994,13 +2082,6 @@ def create_fornecedores_view(
             loading_ref.current.visible = False
             page.update()
 
-    def clear_highlight():
-        try:
-            highlight_id_ref.current = None
-            load_fornecedores_table()
-        except Exception:
-            pass
-
     def excluir_fornecedor(e: ft.ControlEvent):
         fornecedor_id = e.control.data
         logger.info(f"excluir_fornecedor chamado com data: {fornecedor_id}")
@@ -2258,49 +2339,6 @@ def create_fornecedores_view(
 
                 load_fornecedores_table()
                 page.update()
-                try:
-                    fornecedores_all = pdv_core.get_all_fornecedores()
-                    candidato = None
-                    for fo in sorted(
-                        fornecedores_all,
-                        key=lambda x: getattr(x, "id", 0),
-                        reverse=True,
-                    ):
-                        if getattr(
-                            fo, "nome_razao_social", getattr(fo, "nome", "")
-                        ) == dados.get("nome_razao_social"):
-                            candidato = fo
-                            break
-                    if candidato:
-                        highlight_id_ref.current = getattr(candidato, "id", None)
-                        load_fornecedores_table()
-                        page.update()
-                        try:
-
-                            async def _clear_highlight_delay():
-                                try:
-                                    import asyncio
-
-                                    await asyncio.sleep(0.05)
-                                except Exception:
-                                    pass
-                                try:
-                                    clear_highlight()
-                                except Exception:
-                                    pass
-
-                            try:
-                                page.run_task(_clear_highlight_delay())
-                            except Exception:
-                                # fallback síncrono sem bloquear demasiado
-                                try:
-                                    clear_highlight()
-                                except Exception:
-                                    pass
-                        except Exception:
-                            pass
-                except Exception:
-                    pass
             else:
                 logger.error(f"Erro ao salvar fornecedor: {msg}")
                 show_snackbar(page, f"Erro: {msg}", COLORS["red"])
@@ -3411,6 +3449,23 @@ def create_fornecedores_view(
                     on_click=abrir_repositorio_global_xmls,
                     icon_color=COLORS["primary"],
                 ),
+                ft.PopupMenuButton(
+                    icon=ft.Icons.DRIVE_FOLDER_UPLOAD,
+                    tooltip="Importar NF-e em lote",
+                    icon_color=COLORS["primary"],
+                    items=[
+                        ft.PopupMenuItem(
+                            text="Selecionar vários XMLs",
+                            icon=ft.Icons.LIBRARY_ADD,
+                            on_click=importar_xmls_em_lote,
+                        ),
+                        ft.PopupMenuItem(
+                            text="Importar pasta de XMLs",
+                            icon=ft.Icons.FOLDER_OPEN,
+                            on_click=importar_pasta_de_xmls,
+                        ),
+                    ],
+                ),
                 ft.IconButton(
                     icon=ft.Icons.DOWNLOAD,
                     tooltip="Exportar CSV",
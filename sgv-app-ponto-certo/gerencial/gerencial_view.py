@@ -357,26 +357,6 @@ def create_gerente_view(user_display_name: str, page: ft.Page, handle_logout):
                 print(
                     f"[NOTIFICACOES-POPUP] Contas próximas: {len(resumo.get('detalhes_proximas', []))}"
                 )
-                # Salvaguarda: se por algum motivo os detalhes de contas não vierem no resumo,
-                # busca diretamente o resumo de contas.
-                if not resumo.get("detalhes_vencidas") and not resumo.get(
-                    "detalhes_proximas"
-                ):
-                    print(
-                        "[NOTIFICACOES-POPUP] Detalhes de contas ausentes no resumo; consultando obter_resumo_contas()..."
-                    )
-                    contas_fallback = alertas_manager.obter_resumo_contas(
-                        pdv_core_local
-                    )
-                    resumo["detalhes_vencidas"] = contas_fallback.get(
-                        "detalhes_vencidas", []
-                    )
-                    resumo["detalhes_proximas"] = contas_fallback.get(
-                        "detalhes_proximas", []
-                    )
-                    print(
-                        f"[NOTIFICACOES-POPUP] Fallback - Vencidas: {len(resumo['detalhes_vencidas'])}, Próximas: {len(resumo['detalhes_proximas'])}"
-                    )
                 # Construir seções separadas: Estoque e Financeiro
                 estoque_items = []
                 for a in resumo.get("produtos_criticos", []):
@@ -9,16 +9,30 @@ from dotenv import load_dotenv
 from sqlalchemy import (
     Boolean,
     Column,
+    Date,
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
     create_engine,
+    func,
+    inspect,
+    literal_column,
     text,
+    true,
 )
-from sqlalchemy.orm import Session, declarative_base, relationship, sessionmaker
+from sqlalchemy.orm import (
+    Session,
+    declarative_base,
+    relationship,
+    sessionmaker,
+    validates,
+)
+
+from estoque.busca import normalizar_busca
 
 from utils.path_resolver import get_database_url
 
@@ -73,6 +87,9 @@ class Fornecedor(Base):
     __tablename__ = "fornecedores"
     id = Column(Integer, primary_key=True)
     nome_razao_social = Column(String(200), nullable=False, index=True)
+    # Nome sem acentos e em minúsculas (normalizado em Python: o lower() do
+    # SQLite só trata ASCII); usado na busca por prefixo e no nome exato
+    nome_busca = Column(String(200), nullable=True, index=True)
     cnpj_cpf = Column(String(20), unique=True, nullable=True, index=True)
     contato = Column(String(100), nullable=True)
     condicao_pagamento = Column(
@@ -91,6 +108,11 @@ class Fornecedor(Base):
         "Produto", back_populates="fornecedor", cascade="all, delete-orphan"
     )
 
+    @validates("nome_razao_social")
+    def _atualizar_nome_busca(self, _campo, nome):
+        self.nome_busca = normalizar_busca(nome)
+        return nome
+
 
 class Produto(Base):
     __tablename__ = "produtos"
@@ -103,7 +125,12 @@ class Produto(Base):
     estoque_minimo = Column(
         Integer, default=10, nullable=True
     )  # Para controle de estoque mínimo
-    validade = Column(String(20), nullable=True)
+    # Data de validade (do lote mais próximo de vencer, quando há lotes)
+    validade = Column(Date, nullable=True, index=True)
+    categoria = Column(String(50), nullable=True, index=True)
+    lote = Column(String(50), nullable=True)
+    # Produtos excluídos na tela de Estoque que já possuem vendas ficam inativos
+    ativo = Column(Boolean, default=True, nullable=False, index=True)
 
     # Chave estrangeira e relação bidirecional
     fornecedor_id = Column(
@@ -122,6 +149,82 @@ class Produto(Base):
         """Alias para compatibilidade com código legado"""
         self.estoque_atual = value
 
+    # Alias usado pelo cache do caixa (antes alimentado pelo produtos.json)
+    @property
+    def quantidade(self):
+        """Alias para compatibilidade com código legado"""
+        return self.estoque_atual
+
+    @quantidade.setter
+    def quantidade(self, value):
+        """Alias para compatibilidade com código legado"""
+        self.estoque_atual = value
+
+    lotes = relationship(
+        "LoteProduto", back_populates="produto", cascade="all, delete-orphan"
+    )
+
+
+class LoteProduto(Base):
+    """Lote de um produto com validade própria (controle FEFO)."""
+
+    __tablename__ = "lotes_produto"
+    id = Column(Integer, primary_key=True)
+    produto_id = Column(Integer, ForeignKey("produtos.id"), nullable=False)
+    lote = Column(String(50), nullable=True)
+    validade = Column(Date, nullable=True, index=True)
+    quantidade = Column(Integer, default=0, nullable=False)
+    data_entrada = Column(DateTime, default=datetime.now, nullable=False)
+
+    produto = relationship("Produto", back_populates="lotes")
+
+    # Seleção FEFO: varredura por produto em ordem de validade
+    __table_args__ = (
+        Index("ix_lotes_produto_produto_validade", "produto_id", "validade"),
+    )
+
+
+# Estoque mínimo usado quando o produto não define o seu
+ESTOQUE_MINIMO_PADRAO = 10
+
+# Déficit de estoque (mínimo efetivo - atual). O padrão entra como literal
+# (e não parâmetro) para que as consultas casem com o índice de expressão
+# parcial abaixo, usado pelos alertas de estoque baixo.
+DEFICIT_ESTOQUE = (
+    func.coalesce(
+        Produto.__table__.c.estoque_minimo,
+        literal_column(str(ESTOQUE_MINIMO_PADRAO)),
+    )
+    - Produto.__table__.c.estoque_atual
+)
+Index(
+    "ix_produtos_deficit_estoque",
+    DEFICIT_ESTOQUE,
+    sqlite_where=Produto.__table__.c.ativo == true(),
+)
+
+
+def validade_para_date(valor):
+    """Converte uma data (date/datetime, dd/mm/aaaa ou aaaa-mm-dd) em `date`.
+
+    Usada para validade de produtos e vencimento de contas.
+
+    Retorna None para valores vazios ou inválidos.
+    """
+    if valor is None or valor == "":
+        return None
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    texto = str(valor).strip()
+    for formato in ("%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(texto[:10], formato).date()
+        except ValueError:
+            continue
+    return None
+
 
 class Venda(Base):
     __tablename__ = "vendas"
@@ -151,6 +254,8 @@ class ItemVenda(Base):
     produto_id = Column(Integer, ForeignKey("produtos.id"), nullable=False, index=True)
     quantidade = Column(Integer, nullable=False)
     preco_unitario = Column(Float, nullable=False)
+    # Snapshot de Produto.preco_custo no momento da venda (lucro real)
+    custo_unitario = Column(Float, nullable=True)
 
     # Relações bidirecionais
     venda = relationship("Venda", back_populates="itens")
@@ -213,7 +318,7 @@ class Expense(Base):
     id = Column(Integer, primary_key=True)
     descricao = Column(String(200), nullable=False)
     valor = Column(Float, nullable=False)
-    vencimento = Column(String(10), nullable=False)  # formato dd/mm/aaaa
+    vencimento = Column(Date, nullable=False, index=True)
     categoria = Column(String(50), nullable=True)
     status = Column(
         String(20), default="Pendente", nullable=False, index=True
@@ -221,6 +326,9 @@ class Expense(Base):
     data_cadastro = Column(DateTime, default=datetime.now, nullable=False)
     data_pagamento = Column(DateTime, nullable=True)
 
+    # Vencidas / a vencer: faixa de vencimento dentro das contas pendentes
+    __table_args__ = (Index("ix_expenses_status_vencimento", "status", "vencimento"),)
+
 
 class Receivable(Base):
     """Tabela de Contas a Receber / Receitas"""
@@ -229,7 +337,7 @@ class Receivable(Base):
     id = Column(Integer, primary_key=True)
     descricao = Column(String(200), nullable=False)
     valor = Column(Float, nullable=False)
-    vencimento = Column(String(10), nullable=False)  # formato dd/mm/aaaa
+    vencimento = Column(Date, nullable=False, index=True)
     origem = Column(String(50), nullable=True)
     status = Column(
         String(20), default="Pendente", nullable=False, index=True
@@ -237,6 +345,10 @@ class Receivable(Base):
     data_cadastro = Column(DateTime, default=datetime.now, nullable=False)
     data_recebimento = Column(DateTime, nullable=True)
 
+    __table_args__ = (
+        Index("ix_receivables_status_vencimento", "status", "vencimento"),
+    )
+
 
 class CaixaSchedule(Base):
     """Tabela de Agendamento de Fechamento/Reabertura Automática do Caixa"""
@@ -284,12 +396,198 @@ class PaymentSettings(Base):
     # (sem campos de taxa por enquanto - restauração ao estado anterior)
 
 
+class AlertaEstado(Base):
+    """Alerta tratado pelo usuário (resolvido ou não aplicável).
+
+    Alertas ativos não são gravados: existem enquanto a condição (ex.: estoque
+    abaixo do mínimo) existir. Só o tratamento do usuário fica registrado aqui.
+    """
+
+    __tablename__ = "alertas_estado"
+    id = Column(Integer, primary_key=True)
+    alerta_id = Column(String(60), nullable=False, unique=True)  # ex.: produto_12
+    # Produto do alerta de estoque (None para outros tipos de alerta)
+    produto_id = Column(Integer, nullable=True, index=True)
+    status = Column(String(20), nullable=False)  # resolvido, nao_aplicavel
+    data_resolucao = Column(DateTime, nullable=False, default=datetime.now)
+    # Retrato do alerta no momento do tratamento (JSON)
+    dados = Column(Text, nullable=True)
+
+    # Limpeza dos tratados antigos: faixa de data dentro do status
+    __table_args__ = (
+        Index("ix_alertas_estado_status_data", "status", "data_resolucao"),
+    )
+
+
+class Devolucao(Base):
+    """Devolução (estorno) de um item de venda, exibida na tela de Devoluções.
+
+    Sem chaves estrangeiras: o histórico sobrevive à exclusão de produtos.
+    """
+
+    __tablename__ = "devolucoes"
+    id = Column(Integer, primary_key=True)
+    venda_id = Column(Integer, nullable=True, index=True)
+    item_venda_id = Column(Integer, nullable=True)
+    produto_id = Column(Integer, nullable=True, index=True)
+    produto_nome = Column(String(200), nullable=True)
+    quantidade = Column(Integer, nullable=False, default=0)
+    valor_total = Column(Float, nullable=False, default=0.0)
+    motivo = Column(String(200), nullable=True)
+    data = Column(DateTime, default=datetime.now, nullable=False, index=True)
+    foi_trocado = Column(Boolean, default=False, nullable=False)
+    troca_para_id = Column(Integer, nullable=True)
+    troca_para_nome = Column(String(200), nullable=True)
+    troca_data = Column(DateTime, nullable=True)
+    # Removida da tela de Devoluções (o registro é mantido)
+    oculta = Column(Boolean, default=False, nullable=False)
+
+    # Tela de Devoluções: visíveis por período, mais recentes primeiro
+    __table_args__ = (Index("ix_devolucoes_oculta_data", "oculta", "data"),)
+
+
+class ImportedXml(Base):
+    """NF-e (XML) importada na tela de Fornecedores, única pela chave de acesso.
+
+    Sem chave estrangeira: o registro da nota sobrevive à exclusão do fornecedor.
+    """
+
+    __tablename__ = "imported_xmls"
+    id = Column(Integer, primary_key=True)
+    chave = Column(String(44), unique=True, nullable=True, index=True)
+    numero = Column(String(20), nullable=True)
+    data_emissao = Column(Date, nullable=True, index=True)
+    fornecedor_id = Column(Integer, nullable=True)
+    fornecedor_nome = Column(String(200), nullable=True)
+    # CNPJ/CPF do emitente (só dígitos): casa notas sem fornecedor_id
+    cnpj = Column(String(20), nullable=True, index=True)
+    total = Column(Float, nullable=False, default=0.0, index=True)
+    itens = Column(Text, nullable=True)  # JSON: [{"nome", "q", "v", ...}]
+    path = Column(String(500), nullable=True)
+    data_importacao = Column(DateTime, default=datetime.now, nullable=False)
+    # Entrada da nota no estoque (None enquanto não lançada)
+    estoque_lancado_em = Column(DateTime, nullable=True)
+
+    # Últimas notas de um fornecedor (card/detalhes do fornecedor)
+    __table_args__ = (
+        Index("ix_imported_xmls_fornecedor_data", "fornecedor_id", "data_emissao"),
+    )
+
+    def preencher(self, registro: dict):
+        """Copia um registro da tela ({"nf", "chave", "data", "fornecedor",
+        "cnpj", "total", "itens", "path", "fornecedor_id"}) para a linha."""
+        import json
+
+        try:
+            total = float(str(registro.get("total") or 0).replace(",", "."))
+        except ValueError:
+            total = 0.0
+        documento = "".join(filter(str.isdigit, str(registro.get("cnpj") or "")))
+        self.chave = registro.get("chave") or None
+        self.numero = registro.get("nf") or registro.get("numero")
+        self.data_emissao = validade_para_date(registro.get("data"))
+        self.fornecedor_id = registro.get("fornecedor_id") or self.fornecedor_id
+        self.fornecedor_nome = registro.get("fornecedor")
+        self.cnpj = documento or None
+        self.total = total
+        self.itens = json.dumps(registro.get("itens") or [], ensure_ascii=False)
+        self.path = registro.get("path")
+        return self
+
+    def para_registro(self) -> dict:
+        """Registro no formato usado pela tela (o do antigo imported_xmls.json)."""
+        import json
+
+        return {
+            "id": self.id,
+            "nf": self.numero or "",
+            "chave": self.chave or "",
+            "data": self.data_emissao.isoformat() if self.data_emissao else "",
+            "fornecedor": self.fornecedor_nome or "",
+            "cnpj": self.cnpj or "",
+            "total": f"{self.total or 0.0:.2f}",
+            "itens": json.loads(self.itens or "[]"),
+            "path": self.path,
+            "fornecedor_id": self.fornecedor_id,
+            "estoque_lancado": self.estoque_lancado_em is not None,
+        }
+
+
+class CodigoProdutoFornecedor(Base):
+    """Código de um item na NF-e do fornecedor (cProd/cEAN) -> produto do estoque.
+
+    Aprendido ao lançar a entrada de uma nota; casa os itens das próximas
+    notas do mesmo emitente. Sem chave estrangeira: vínculos de produtos
+    excluídos são ignorados na busca.
+    """
+
+    __tablename__ = "codigos_produto_fornecedor"
+    id = Column(Integer, primary_key=True)
+    cnpj = Column(String(20), nullable=False)  # emitente (só dígitos)
+    codigo = Column(String(60), nullable=False)  # cProd
+    ean = Column(String(14), nullable=True, index=True)  # cEAN
+    produto_id = Column(Integer, nullable=False, index=True)
+    atualizado_em = Column(DateTime, default=datetime.now, nullable=False)
+
+    __table_args__ = (
+        Index(
+            "ix_codigos_produto_fornecedor_cnpj_codigo", "cnpj", "codigo", unique=True
+        ),
+    )
+
+
+class PrecoFornecedor(Base):
+    """Histórico de custo de compra de um produto, por fornecedor.
+
+    Gravado na entrada de NF-e e nas edições manuais do custo; `preco_custo`
+    do produto continua sendo só o custo vigente. Sem chave estrangeira: o
+    histórico sobrevive à exclusão do produto ou do fornecedor.
+    """
+
+    __tablename__ = "precos_fornecedor"
+    id = Column(Integer, primary_key=True)
+    produto_id = Column(Integer, nullable=False)
+    fornecedor_id = Column(Integer, nullable=True)  # None = fornecedor desconhecido
+    custo = Column(Float, nullable=False)  # custo unitário
+    data = Column(Date, nullable=False)  # emissão da nota ou dia da edição
+    origem = Column(String(10), nullable=False, default="manual")  # nfe, manual
+    chave_nfe = Column(String(44), nullable=True)
+    registrado_em = Column(DateTime, default=datetime.now, nullable=False)
+
+    # Último custo de cada fornecedor por produto (melhor custo recente)
+    __table_args__ = (
+        Index(
+            "ix_precos_fornecedor_produto_fornecedor_data",
+            "produto_id",
+            "fornecedor_id",
+            "data",
+        ),
+    )
+
+
+class MigracaoAplicada(Base):
+    """Migração única de dados já aplicada neste banco (ex.: JSON -> tabela).
+
+    Fica no próprio banco: um banco novo sempre recebe as migrações, mesmo
+    que o data/app_config.json venha de outra instalação.
+    """
+
+    __tablename__ = "migracoes_aplicadas"
+    chave = Column(String(60), primary_key=True)
+    aplicada_em = Column(DateTime, default=datetime.now, nullable=False)
+
+
 # ====================================================================
 # Funções de inicialização
 # ====================================================================
 def init_db():
     """Cria o engine e as tabelas se não existirem. Também cria usuários padrão e carrega produtos."""
     engine = create_engine(DATABASE_URL, echo=False)
+    # Banco anterior às migrações registradas no próprio banco
+    inspetor = inspect(engine)
+    sem_registro_de_migracoes = inspetor.has_table(
+        "produtos"
+    ) and not inspetor.has_table("migracoes_aplicadas")
     Base.metadata.create_all(engine)
 
     # Verificar se colunas opcionais existem e, se não, tentar adicioná-las (SQLite fallback)
@@ -326,6 +624,230 @@ def init_db():
         # se não for possível executar migração automática, continuar silenciosamente
         pass
 
+    # Catálogo do Estoque no banco: colunas categoria/lote/ativo
+    try:
+        with engine.begin() as conn:
+            res = conn.execute(text("PRAGMA table_info(produtos);"))
+            cols = [r[1] for r in res.fetchall()]
+            if cols and "categoria" not in cols:
+                conn.execute(
+                    text("ALTER TABLE produtos ADD COLUMN categoria VARCHAR(50);")
+                )
+                conn.execute(
+                    text(
+                        "CREATE INDEX IF NOT EXISTS ix_produtos_categoria "
+                        "ON produtos (categoria);"
+                    )
+                )
+            if cols and "lote" not in cols:
+                conn.execute(text("ALTER TABLE produtos ADD COLUMN lote VARCHAR(50);"))
+            if cols and "ativo" not in cols:
+                conn.execute(
+                    text(
+                        "ALTER TABLE produtos ADD COLUMN ativo BOOLEAN NOT NULL DEFAULT 1;"
+                    )
+                )
+                conn.execute(
+                    text(
+                        "CREATE INDEX IF NOT EXISTS ix_produtos_ativo ON produtos (ativo);"
+                    )
+                )
+    except Exception:
+        pass
+
+    # Entrada de NF-e no estoque: marca de lançamento das notas importadas
+    try:
+        with engine.begin() as conn:
+            res = conn.execute(text("PRAGMA table_info(imported_xmls);"))
+            cols = [r[1] for r in res.fetchall()]
+            if cols and "estoque_lancado_em" not in cols:
+                conn.execute(
+                    text(
+                        "ALTER TABLE imported_xmls ADD COLUMN estoque_lancado_em DATETIME;"
+                    )
+                )
+    except Exception:
+        pass
+
+    # Validade como DATE: converte textos legados dd/mm/aaaa para ISO
+    # (formato de DATE no SQLite); valores inválidos viram NULL
+    try:
+        with engine.begin() as conn:
+            legados = conn.execute(
+                text(
+                    "SELECT id, validade FROM produtos WHERE validade IS NOT NULL "
+                    "AND validade NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]';"
+                )
+            ).fetchall()
+            if legados:
+                convertidos = []
+                for pid, valor in legados:
+                    d = validade_para_date(valor)
+                    convertidos.append(
+                        {"id": pid, "validade": d.isoformat() if d else None}
+                    )
+                conn.execute(
+                    text("UPDATE produtos SET validade = :validade WHERE id = :id;"),
+                    convertidos,
+                )
+                safe_print(
+                    f"[OK] {len(legados)} validade(s) de produtos convertida(s) para data"
+                )
+            conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_produtos_validade "
+                    "ON produtos (validade);"
+                )
+            )
+    except Exception:
+        pass
+
+    # Vencimento de contas como DATE: os textos legados (dd/mm/aaaa ou ISO com
+    # hora) viram aaaa-mm-dd; inválidos assumem a data de cadastro
+    for tabela in ("expenses", "receivables"):
+        try:
+            with engine.begin() as conn:
+                legados = conn.execute(
+                    text(
+                        f"SELECT id, vencimento, data_cadastro FROM {tabela} "
+                        "WHERE vencimento NOT GLOB "
+                        "'[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]';"
+                    )
+                ).fetchall()
+                if legados:
+                    convertidos = []
+                    for conta_id, valor, cadastro in legados:
+                        d = (
+                            validade_para_date(valor)
+                            or validade_para_date(cadastro)
+                            or date.today()
+                        )
+                        convertidos.append(
+                            {"id": conta_id, "vencimento": d.isoformat()}
+                        )
+                    conn.execute(
+                        text(
+                            f"UPDATE {tabela} SET vencimento = :vencimento "
+                            "WHERE id = :id;"
+                        ),
+                        convertidos,
+                    )
+                    safe_print(
+                        f"[OK] {len(legados)} vencimento(s) de {tabela} "
+                        "convertido(s) para data"
+                    )
+                conn.execute(
+                    text(
+                        f"CREATE INDEX IF NOT EXISTS ix_{tabela}_vencimento "
+                        f"ON {tabela} (vencimento);"
+                    )
+                )
+                conn.execute(
+                    text(
+                        f"CREATE INDEX IF NOT EXISTS ix_{tabela}_status_vencimento "
+                        f"ON {tabela} (status, vencimento);"
+                    )
+                )
+        except Exception:
+            pass
+
+    # Lista de fornecedores paginada/busca por prefixo do nome: coluna com o
+    # nome normalizado (preenche os cadastros antigos) no lugar do índice
+    # antigo sobre lower(nome_razao_social), que não tratava acentos
+    try:
+        with engine.begin() as conn:
+            res = conn.execute(text("PRAGMA table_info(fornecedores);"))
+            cols = [r[1] for r in res.fetchall()]
+            if cols and "nome_busca" not in cols:
+                conn.execute(
+                    text("ALTER TABLE fornecedores ADD COLUMN nome_busca VARCHAR(200);")
+                )
+            pendentes = conn.execute(
+                text(
+                    "SELECT id, nome_razao_social FROM fornecedores "
+                    "WHERE nome_busca IS NULL;"
+                )
+            ).fetchall()
+            if pendentes:
+                conn.execute(
+                    text("UPDATE fornecedores SET nome_busca = :chave WHERE id = :id;"),
+                    [
+                        {"id": fid, "chave": normalizar_busca(nome)}
+                        for fid, nome in pendentes
+                    ],
+                )
+                safe_print(
+                    f"[OK] Chave de busca preenchida em {len(pendentes)} fornecedor(es)"
+                )
+            indice = conn.execute(
+                text(
+                    "SELECT sql FROM sqlite_master WHERE type = 'index' "
+                    "AND name = 'ix_fornecedores_nome_busca';"
+                )
+            ).scalar()
+            if indice and "lower(" in indice.lower():
+                conn.execute(text("DROP INDEX ix_fornecedores_nome_busca;"))
+            conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_fornecedores_nome_busca "
+                    "ON fornecedores (nome_busca);"
+                )
+            )
+    except Exception:
+        pass
+
+    # Índice parcial do déficit de estoque (alertas de estoque baixo). Sem
+    # estatísticas (ANALYZE) o planejador do SQLite prefere o índice de
+    # `ativo` e ordena em memória; por isso analisa enquanto não houver
+    try:
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_produtos_deficit_estoque ON produtos "
+                    f"(coalesce(estoque_minimo, {ESTOQUE_MINIMO_PADRAO}) - estoque_atual) "
+                    "WHERE ativo = 1;"
+                )
+            )
+            tem_estatisticas = (
+                conn.execute(
+                    text(
+                        "SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                        "AND name = 'sqlite_stat1';"
+                    )
+                ).first()
+                and conn.execute(
+                    text(
+                        "SELECT 1 FROM sqlite_stat1 "
+                        "WHERE idx = 'ix_produtos_deficit_estoque';"
+                    )
+                ).first()
+            )
+            if not tem_estatisticas:
+                conn.execute(text("ANALYZE produtos;"))
+    except Exception:
+        pass
+
+    # Snapshot de custo nos itens de venda: adiciona a coluna e preenche os
+    # itens antigos com o custo atual do produto (somente na primeira vez)
+    try:
+        with engine.begin() as conn:
+            res = conn.execute(text("PRAGMA table_info(itens_venda);"))
+            cols = [r[1] for r in res.fetchall()]
+            if cols and "custo_unitario" not in cols:
+                conn.execute(
+                    text("ALTER TABLE itens_venda ADD COLUMN custo_unitario FLOAT;")
+                )
+                conn.execute(
+                    text(
+                        "UPDATE itens_venda SET custo_unitario = ("
+                        "SELECT p.preco_custo FROM produtos p "
+                        "WHERE p.id = itens_venda.produto_id"
+                        ") WHERE custo_unitario IS NULL;"
+                    )
+                )
+    except Exception:
+        pass
+
     # Criar usuários padrão se o banco estiver vazio
     Session = sessionmaker(bind=engine)
     session = Session()
@@ -391,11 +913,45 @@ def init_db():
                 "[OK] Usuarios padrao criados automaticamente (senhas armazenadas como hash quando possível)!"
             )
 
+        if sem_registro_de_migracoes:
+            _adotar_migracoes_do_config(session)
+
         # Verificar se há produtos e carregar do JSON se necessário
         produto_count = session.query(Produto).count()
         if produto_count == 0:
             safe_print("[INFO] Nenhum produto no banco. Carregando de produtos.json...")
             _importar_produtos_do_json(session)
+            _registrar_migracao(session, "catalogo_migrado_para_banco")
+        elif not _migracao_registrada(session, "catalogo_migrado_para_banco"):
+            # Migração única: o produtos.json era a fonte do Estoque; a partir
+            # daqui o banco passa a ser a fonte de verdade (JSON só exportação)
+            safe_print("[INFO] Migrando catalogo de produtos.json para o banco...")
+            _importar_produtos_do_json(session, atualizar_existentes=True)
+            _registrar_migracao(session, "catalogo_migrado_para_banco")
+
+        # Migração única das devoluções (devolucoes.json) para a tabela
+        if not _migracao_registrada(session, "devolucoes_migradas_para_banco"):
+            if _importar_devolucoes_do_json(session):
+                _registrar_migracao(session, "devolucoes_migradas_para_banco")
+
+        # Migração única dos XMLs importados (imported_xmls.json) para a tabela
+        if not _migracao_registrada(session, "xmls_importados_migrados_para_banco"):
+            if _importar_xmls_do_json(session):
+                _registrar_migracao(session, "xmls_importados_migrados_para_banco")
+
+        # Migração única: estoque anterior ao controle de lotes vira um lote
+        # com a validade/lote do produto (a partir daqui toda movimentação
+        # concilia os lotes)
+        if not _migracao_registrada(session, "lotes_conciliados"):
+            from estoque.lotes import conciliar_lotes
+
+            try:
+                conciliar_lotes(session)
+                session.commit()
+                _registrar_migracao(session, "lotes_conciliados")
+            except Exception as e:
+                session.rollback()
+                safe_print(f"[WARN] Nao foi possivel conciliar os lotes: {e}")
 
         # Criar uma configuração padrão de Pix se não existir
         try:
@@ -432,8 +988,13 @@ def init_db():
     return engine
 
 
-def _importar_produtos_do_json(session):
-    """Importa produtos do arquivo JSON para o banco de dados"""
+def _importar_produtos_do_json(session, atualizar_existentes=False):
+    """Importa produtos do arquivo JSON para o banco de dados.
+
+    Com `atualizar_existentes=True` (migração única do catálogo do Estoque),
+    produtos já cadastrados recebem quantidade, preços, validade, categoria e
+    lote do JSON, que era a fonte de verdade da tela de Estoque.
+    """
     import json
     from pathlib import Path
 
@@ -449,7 +1010,11 @@ def _importar_produtos_do_json(session):
         with open(json_path, "r", encoding="utf-8") as f:
             produtos_json = json.load(f)
 
+        # Uma única consulta para os produtos existentes (indexados por código)
+        existentes = {p.codigo_barras: p for p in session.query(Produto).all()}
+
         count_inserted = 0
+        count_updated = 0
         for prod in produtos_json:
             codigo_barras = str(
                 prod.get("codigo_barras") or prod.get("codigo") or ""
@@ -457,18 +1022,26 @@ def _importar_produtos_do_json(session):
             if not codigo_barras:
                 continue
 
-            # Verificar se já existe
-            produto_existente = (
-                session.query(Produto).filter_by(codigo_barras=codigo_barras).first()
-            )
-            if produto_existente:
-                continue
-
             nome = prod.get("nome") or prod.get("descricao") or "Produto"
             preco_custo = float(prod.get("preco_custo", 0.0))
             preco_venda = float(prod.get("preco_venda", prod.get("preco", 0.0)))
             estoque_atual = int(prod.get("quantidade", prod.get("estoque", 0)))
-            validade = prod.get("validade")
+            validade = validade_para_date(prod.get("validade"))
+            categoria = prod.get("categoria") or None
+            lote = prod.get("lote") or None
+
+            produto_existente = existentes.get(codigo_barras)
+            if produto_existente:
+                if atualizar_existentes:
+                    produto_existente.nome = nome
+                    produto_existente.preco_custo = preco_custo
+                    produto_existente.preco_venda = preco_venda
+                    produto_existente.estoque_atual = estoque_atual
+                    produto_existente.validade = validade
+                    produto_existente.categoria = categoria
+                    produto_existente.lote = lote
+                    count_updated += 1
+                continue
 
             novo_prod = Produto(
                 codigo_barras=codigo_barras,
@@ -477,13 +1050,18 @@ def _importar_produtos_do_json(session):
                 preco_venda=preco_venda,
                 estoque_atual=estoque_atual,
                 validade=validade,
+                categoria=categoria,
+                lote=lote,
             )
             session.add(novo_prod)
+            existentes[codigo_barras] = novo_prod
             count_inserted += 1
 
-        if count_inserted > 0:
+        if count_inserted > 0 or count_updated > 0:
             session.commit()
-            safe_print(f"[OK] {count_inserted} produtos carregados do JSON!")
+            safe_print(
+                f"[OK] {count_inserted} produtos carregados e {count_updated} atualizados do JSON!"
+            )
         else:
             safe_print("[INFO] Nenhum novo produto para carregar do JSON")
 
@@ -492,6 +1070,177 @@ def _importar_produtos_do_json(session):
         session.rollback()
 
 
+def _importar_devolucoes_do_json(session) -> bool:
+    """Importa data/devolucoes.json (e devolucoes_hidden.json) para a tabela.
+
+    Preserva o que a tela exibia: com registros no JSON, eles são importados
+    com os mesmos ids. Sem registros, a tela mostrava os itens das vendas
+    estornadas, omitindo os ids de item em devolucoes_hidden.json; esses
+    itens viram devoluções (as omitidas ficam ocultas). Retorna True se a
+    migração terminou (inclusive quando não havia o que importar).
+    """
+    import json
+    import re
+
+    data_dir = _app_config_path().parent
+
+    def _ler(nome):
+        try:
+            with open(data_dir / nome, "r", encoding="utf-8") as f:
+                return json.load(f) or []
+        except FileNotFoundError:
+            return []
+
+    def _data(valor):
+        try:
+            return datetime.fromisoformat(str(valor))
+        except Exception:
+            return None
+
+    try:
+        if session.query(Devolucao.id).first():
+            return True
+        registros = _ler("devolucoes.json")
+        ocultos = {int(x) for x in _ler("devolucoes_hidden.json")}
+        novos = []
+        for d in registros:
+            venda = re.search(r"#(\d+)", str(d.get("motivo") or ""))
+            novos.append(
+                Devolucao(
+                    id=int(d["id"]),
+                    venda_id=int(venda.group(1)) if venda else None,
+                    produto_id=d.get("produto_id"),
+                    produto_nome=d.get("produto_nome"),
+                    quantidade=int(d.get("quantidade") or 0),
+                    valor_total=float(d.get("valor_total") or 0.0),
+                    motivo=d.get("motivo"),
+                    data=_data(d.get("data")) or datetime.now(),
+                    foi_trocado=bool(d.get("foi_trocado")),
+                    troca_para_id=d.get("troca_para_id"),
+                    troca_para_nome=d.get("troca_para_nome"),
+                    troca_data=_data(d.get("troca_data")),
+                )
+            )
+        if not registros:
+            estornadas = session.query(Venda).filter(Venda.status == "ESTORNADA")
+            for venda in estornadas:
+                for it in venda.itens:
+                    novos.append(
+                        Devolucao(
+                            venda_id=venda.id,
+                            item_venda_id=it.id,
+                            produto_id=it.produto_id,
+                            produto_nome=it.produto.nome if it.produto else "Produto",
+                            quantidade=int(it.quantidade or 0),
+                            valor_total=float(it.preco_unitario or 0.0)
+                            * int(it.quantidade or 0),
+                            motivo=f"Estorno da venda #{venda.id}",
+                            data=venda.data_venda or datetime.now(),
+                            oculta=it.id in ocultos,
+                        )
+                    )
+        session.add_all(novos)
+        session.commit()
+        if novos:
+            safe_print(f"[OK] {len(novos)} devolucao(oes) migrada(s) para o banco")
+        return True
+    except Exception as e:
+        session.rollback()
+        safe_print(f"[WARN] Falha ao migrar devolucoes.json: {e}")
+        return False
+
+
+def _importar_xmls_do_json(session) -> bool:
+    """Importa data/imported_xmls.json para a tabela imported_xmls.
+
+    Registros repetidos (mesma chave) são ignorados e o fornecedor é
+    vinculado pelo CNPJ/CPF quando já cadastrado. Retorna True se a migração
+    terminou (inclusive quando não havia o que importar).
+    """
+    import json
+
+    try:
+        caminho = _app_config_path().parent / "imported_xmls.json"
+        with open(caminho, "r", encoding="utf-8") as f:
+            registros = json.load(f) or []
+    except FileNotFoundError:
+        return True
+    except Exception as e:
+        safe_print(f"[WARN] Falha ao ler imported_xmls.json: {e}")
+        return False
+
+    try:
+        chaves = {c for (c,) in session.query(ImportedXml.chave) if c}
+        fornecedores = {
+            "".join(filter(str.isdigit, doc)): fid
+            for fid, doc in session.query(Fornecedor.id, Fornecedor.cnpj_cpf)
+            if doc
+        }
+        novos = []
+        for registro in registros:
+            xml = ImportedXml().preencher(registro)
+            if xml.chave and xml.chave in chaves:
+                continue
+            if xml.chave:
+                chaves.add(xml.chave)
+            if xml.fornecedor_id is None and xml.cnpj:
+                xml.fornecedor_id = fornecedores.get(xml.cnpj)
+            novos.append(xml)
+        session.add_all(novos)
+        session.commit()
+        if novos:
+            safe_print(f"[OK] {len(novos)} XML(s) importado(s) migrado(s) para o banco")
+        return True
+    except Exception as e:
+        session.rollback()
+        safe_print(f"[WARN] Falha ao migrar imported_xmls.json: {e}")
+        return False
+
+
+def _app_config_path():
+    from pathlib import Path
+
+    return Path(__file__).parent.parent / "data" / "app_config.json"
+
+
+MIGRACOES_UNICAS = (
+    "catalogo_migrado_para_banco",
+    "devolucoes_migradas_para_banco",
+    "xmls_importados_migrados_para_banco",
+)
+
+
+def _migracao_registrada(session, chave: str) -> bool:
+    """Indica se a migração única `chave` (ex.: catálogo do produtos.json) já ocorreu."""
+    return session.get(MigracaoAplicada, chave) is not None
+
+
+def _registrar_migracao(session, chave: str):
+    """Registra na tabela migracoes_aplicadas que a migração única `chave` ocorreu."""
+    try:
+        session.merge(MigracaoAplicada(chave=chave, aplicada_em=datetime.now()))
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        safe_print(f"[WARN] Nao foi possivel registrar migracao ({chave}): {e}")
+
+
+def _adotar_migracoes_do_config(session):
+    """Traz para o banco as migrações que versões anteriores marcavam no
+    data/app_config.json (só para um banco que já existia antes da tabela)."""
+    import json
+
+    try:
+        with open(_app_config_path(), "r", encoding="utf-8") as f:
+            cfg = json.load(f) or {}
+    except Exception:
+        return
+    for chave in MIGRACOES_UNICAS:
+        if cfg.get(chave):
+            session.merge(MigracaoAplicada(chave=chave, aplicada_em=datetime.now()))
+    session.commit()
+
+
 def get_session(engine):
     """Retorna uma nova sessão do banco de dados"""
     Session = sessionmaker(bind=engine)
@@ -260,12 +260,36 @@ def create_relatorio_produtos_view(page: ft.Page, pdv_core, handle_back):
             print(f"[EDIT] Abrindo modal para produto: {produto['nome']}")
             show_snackbar(page, f"Editando: {produto['nome']}", COLORS["info"])
 
+            # Melhor custo recente entre os fornecedores (histórico de custos)
+            melhor = {}
+            pdv_core_local = page.app_data.get("pdv_core")
+            if pdv_core_local and produto.get("id"):
+                try:
+                    melhor = (
+                        pdv_core_local.melhores_custos([produto["id"]]).get(
+                            produto["id"]
+                        )
+                        or {}
+                    )
+                except Exception as ex:
+                    print(f"[EDIT] Erro ao buscar melhor custo: {ex}")
+
             custo_input = ft.TextField(
                 label="Custo Unitário (R$)",
                 value=f"{produto['custo']:.2f}",
                 keyboard_type=ft.KeyboardType.NUMBER,
                 prefix="R$ ",
                 width=300,
+                helper_text=(
+                    f"Melhor custo recente: {format_brl(melhor['custo'])}"
+                    + (
+                        f" ({melhor['fornecedor_nome']})"
+                        if melhor.get("fornecedor_nome")
+                        else ""
+                    )
+                    if melhor
+                    else None
+                ),
             )
 
             venda_input = ft.TextField(
@@ -475,7 +499,7 @@ def create_relatorio_produtos_view(page: ft.Page, pdv_core, handle_back):
 
             produtos = []
             try:
-                estoque_local = carregar_estoque_local() or []
+                estoque_local = carregar_estoque_local(pdv_core.session) or []
                 # Índices auxiliares
                 db_por_barcode = {
                     str(p.get("codigo_barras") or "").strip(): p for p in todos_produtos
@@ -807,7 +831,7 @@ def create_relatorio_produtos_view(page: ft.Page, pdv_core, handle_back):
 
             produtos = []
             try:
-                estoque_local = carregar_estoque_local() or []
+                estoque_local = carregar_estoque_local(pdv_core.session) or []
                 db_por_barcode = {
                     str(p.get("codigo_barras") or "").strip(): p for p in todos_produtos
                 }
@@ -0,0 +1,94 @@
+"""Benchmark do estorno em lote de vendas.
+
+Cria N vendas (padrão 10.000) com 3 itens cada em um banco SQLite temporário
+e mede `PDVCore.estornar_vendas` contra o estorno venda a venda.
+
+Uso: python scripts/benchmark_estorno_vendas.py [vendas]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE))
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from core.sgv import PDVCore  # noqa: E402
+from models.db_models import Base, ItemVenda, Produto, Venda  # noqa: E402
+
+
+def preparar_banco(caminho: Path, vendas: int):
+    engine = create_engine(f"sqlite:///{caminho}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.execute(
+        insert(Produto),
+        [
+            {
+                "codigo_barras": f"789{i:010d}",
+                "nome": f"Produto {i}",
+                "preco_custo": 1.0,
+                "preco_venda": 2.0,
+                "estoque_atual": 0,
+            }
+            for i in range(1, 501)
+        ],
+    )
+    session.execute(
+        insert(Venda),
+        [
+            {"id": n, "total": 6.0, "usuario_responsavel": "caixa"}
+            for n in range(1, vendas + 1)
+        ],
+    )
+    session.execute(
+        insert(ItemVenda),
+        [
+            {
+                "venda_id": n,
+                "produto_id": (n * 3 + k) % 500 + 1,
+                "quantidade": 1,
+                "preco_unitario": 2.0,
+            }
+            for n in range(1, vendas + 1)
+            for k in range(3)
+        ],
+    )
+    session.commit()
+    return engine, session
+
+
+def main():
+    vendas = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, session = preparar_banco(Path(tmp) / "lote.db", vendas)
+        inicio = time.perf_counter()
+        ok, resultado = PDVCore(session).estornar_vendas(range(1, vendas + 1))
+        em_lote = time.perf_counter() - inicio
+        session.close()
+        engine.dispose()
+
+        # referência: uma venda por vez (amostra de até 1.000 vendas)
+        amostra = min(vendas, 1_000)
+        engine, session = preparar_banco(Path(tmp) / "unitario.db", amostra)
+        core = PDVCore(session)
+        inicio = time.perf_counter()
+        for venda_id in range(1, amostra + 1):
+            core.estornar_venda(venda_id)
+        unitario = time.perf_counter() - inicio
+        session.close()
+        engine.dispose()
+
+    print(f"Em lote: {vendas} vendas / {resultado['itens']} itens em {em_lote:.2f}s")
+    print(
+        f"Venda a venda: {amostra} vendas em {unitario:.2f}s "
+        f"(~{unitario / amostra * vendas:.1f}s estimados para {vendas})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark da importação de planilhas do Estoque.
+
+Gera planilhas .xlsx somando N linhas (padrão 100.000) e mede o mesmo
+caminho da tela de Estoque em um banco SQLite temporário: a pré-visualização
+(`simular_importacao` para um arquivo, `simular_importacao_arquivos` com
+leitura paralela para vários) e a gravação com `aplicar_importacao`.
+
+Uso: python scripts/benchmark_import_estoque.py [linhas] [arquivos]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE))
+
+import openpyxl  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from estoque import imports  # noqa: E402
+from estoque.formatters import (  # noqa: E402
+    converter_texto_para_data,
+    converter_texto_para_preco,
+    validar_produto,
+)
+from models.db_models import Base  # noqa: E402
+
+
+def gerar_planilha(caminho: Path, inicio: int, linhas: int):
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(
+        ["Nome", "Categoria", "Validade", "Quantidade", "Preço", "Código de Barras"]
+    )
+    for i in range(inicio, inicio + linhas):
+        ws.append(
+            [f"Produto {i}", "Mercearia", "31/12/2027", 10, "9,90", f"789{i:010d}"]
+        )
+    wb.save(caminho)
+
+
+def main():
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    arquivos = max(1, int(sys.argv[2])) if len(sys.argv) > 2 else 1
+    with tempfile.TemporaryDirectory() as tmp:
+        inicio = time.perf_counter()
+        caminhos = []
+        por_arquivo = -(-linhas // arquivos)
+        for n in range(arquivos):
+            caminho = Path(tmp) / f"benchmark_{n}.xlsx"
+            gerar_planilha(
+                caminho, n * por_arquivo, min(por_arquivo, linhas - n * por_arquivo)
+            )
+            caminhos.append(str(caminho))
+        print(
+            f"{arquivos} planilha(s) com {linhas} linhas geradas em "
+            f"{time.perf_counter() - inicio:.1f}s"
+        )
+
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'benchmark.db'}")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+
+        inicio = time.perf_counter()
+        if len(caminhos) == 1:
+            simulacao = imports.simular_importacao(
+                caminhos[0],
+                session,
+                converter_texto_para_data,
+                converter_texto_para_preco,
+                validar_produto,
+            )
+        else:
+            simulacao = imports.simular_importacao_arquivos(caminhos, session)
+        simulado = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        gravados = imports.aplicar_importacao(session, simulacao)
+        aplicado = time.perf_counter() - inicio
+        session.close()
+        engine.dispose()
+
+    print(
+        f"Novos: {len(simulacao['novos'])} | conflitos: {simulacao['conflitos']} "
+        f"| erros: {simulacao['erros']} | gravados: {gravados}"
+    )
+    total = simulado + aplicado
+    print(
+        f"Pré-visualização: {simulado:.1f}s | gravação: {aplicado:.1f}s | "
+        f"total: {total:.1f}s ({linhas / total:,.0f} linhas/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
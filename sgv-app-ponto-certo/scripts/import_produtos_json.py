@@ -12,7 +12,7 @@ Uso:
 import json
 import os
 
-from models.db_models import Produto, get_session, init_db
+from models.db_models import Produto, get_session, init_db, validade_para_date
 
 # Caminho do JSON de produtos
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
@@ -40,7 +40,7 @@ for prod in produtos_json:
     preco_custo = float(prod.get("preco_custo", prod.get("preco", 0.0)))
     preco_venda = float(prod.get("preco_venda", prod.get("preco", 0.0)))
     estoque_atual = int(prod.get("quantidade", prod.get("estoque", 0)))
-    validade = prod.get("validade")
+    validade = validade_para_date(prod.get("validade"))
 
     # Tenta encontrar produto existente
     produto_db = session.query(Produto).filter_by(codigo_barras=codigo_barras).first()
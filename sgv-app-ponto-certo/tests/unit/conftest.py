@@ -0,0 +1,28 @@
+"""Fixtures compartilhadas dos testes unitários (banco SQLite em memória).
+
+Cada teste recebe um banco novo com todas as tabelas criadas; os arquivos
+de teste sobrescrevem `pdv_core`/`session` apenas para gravar os dados
+iniciais de que precisam.
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core.sgv import PDVCore
+from models.db_models import Base
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    sess = sessionmaker(bind=engine)()
+    yield sess
+    sess.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def pdv_core(session):
+    return PDVCore(session)
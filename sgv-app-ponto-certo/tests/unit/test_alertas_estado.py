@@ -0,0 +1,115 @@
+"""Testes dos alertas tratados gravados no banco (tabela alertas_estado)"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from alertas.alertas_manager import AlertasManager
+from models.db_models import AlertaEstado, Produto
+
+
+@pytest.fixture
+def pdv_core(pdv_core):
+    session = pdv_core.session
+    for i in range(300):
+        session.add(
+            Produto(
+                codigo_barras=str(i),
+                nome=f"Produto {i}",
+                preco_custo=1.0,
+                preco_venda=2.0,
+                estoque_atual=i % 5,
+            )
+        )
+    session.commit()
+    return pdv_core
+
+
+@pytest.fixture
+def manager(tmp_path, pdv_core):
+    am = AlertasManager(alertas_dir=tmp_path)
+    am.conectar(pdv_core)
+    return am
+
+
+def test_resolver_em_massa_em_uma_transacao(pdv_core, manager):
+    ativos = manager.obter_alertas_ativos()
+    assert len(ativos) == 300
+
+    commits = []
+    event.listen(pdv_core.session, "after_commit", lambda s: commits.append(1))
+    gravados = manager.resolver_alertas([a["alerta_id"] for a in ativos])
+
+    assert gravados == 300
+    assert commits == [1]
+    assert manager.obter_alertas_ativos() == []
+    historico = manager.obter_historico_alerta(ativos[0]["alerta_id"])
+    assert historico["status"] == "resolvido"
+    assert historico["falta"] == ativos[0]["falta"]
+
+
+def test_alertas_tratados_saem_das_contagens_e_do_resumo(pdv_core, manager):
+    resumo = manager.obter_resumo_alertas(pdv_core)
+    assert resumo["total"] == 300
+    assert manager.contar_alertas_estoque(pdv_core)["total"] == 300
+
+    produtos = pdv_core.session.query(Produto).filter(
+        Produto.codigo_barras.in_(["0", "1"])
+    )
+    ids = [f"produto_{p.id}" for p in produtos]
+    assert manager.resolver_alertas(ids[:1]) == 1
+    assert manager.marcar_como_nao_aplicavel(ids[1])
+
+    # o resumo em cache é descartado ao gravar o tratamento
+    resumo = manager.obter_resumo_alertas(pdv_core)
+    assert resumo["total"] == 298
+    assert resumo["estoque_critico"] + resumo["estoque_moderado"] == 298
+    contagem = manager.contar_alertas_estoque(pdv_core)
+    assert contagem["total"] == 298
+    assert contagem["total"] == manager.listar_alertas_estoque(pdv_core)["total"]
+
+
+def test_reposicao_reabre_alerta_tratado(pdv_core, manager):
+    produto = pdv_core.session.query(Produto).filter_by(codigo_barras="1").one()
+    assert manager.marcar_como_nao_aplicavel(f"produto_{produto.id}")
+    pagina = manager.listar_alertas_estoque(pdv_core, 1, 500)
+    assert pagina["total"] == 299
+
+    produto.estoque_atual = 50
+    pdv_core.session.commit()
+    pdv_core.notificar_estoque_alterado([produto.id])
+    produto.estoque_atual = 0
+    pdv_core.session.commit()
+    pdv_core.notificar_estoque_alterado([produto.id])
+
+    assert manager.listar_alertas_estoque(pdv_core, 1, 500)["total"] == 300
+    assert pdv_core.session.query(AlertaEstado).count() == 0
+
+
+def test_limpeza_e_importacao_do_json_legado(tmp_path, pdv_core):
+    antigo = (datetime.now() - timedelta(days=40)).isoformat()
+    (tmp_path / "alertas_estoque.json").write_text(
+        json.dumps(
+            {
+                "produto_1": {"status": "resolvido", "data_resolucao": antigo},
+                "produto_2": {"status": "nao_aplicavel", "data_na": antigo},
+                "produto_3": {"status": "ativo"},
+            }
+        ),
+        encoding="utf-8",
+    )
+    manager = AlertasManager(alertas_dir=tmp_path)
+    manager.conectar(pdv_core)
+
+    estados = {e.alerta_id: e.status for e in pdv_core.session.query(AlertaEstado)}
+    assert estados == {"produto_1": "resolvido", "produto_2": "nao_aplicavel"}
+    assert json.loads((tmp_path / "alertas_estoque.json").read_text()) == {}
+
+    pdv_core.session.query(AlertaEstado).filter_by(alerta_id="produto_1").update(
+        {"data_resolucao": datetime.now() - timedelta(days=40)}
+    )
+    pdv_core.session.commit()
+    assert manager.limpar_alertas_resolvidos(dias_retencao=30) == 1
+    assert pdv_core.session.query(AlertaEstado).count() == 1
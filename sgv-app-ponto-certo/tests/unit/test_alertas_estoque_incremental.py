@@ -0,0 +1,90 @@
+"""Testes dos alertas de estoque mantidos por eventos do PDVCore"""
+
+import pytest
+from sqlalchemy import event
+
+from alertas.alertas_manager import AlertasManager
+from models.db_models import Produto
+
+
+@pytest.fixture
+def pdv_core(pdv_core):
+    session = pdv_core.session
+    for codigo, estoque in (("1", 50), ("2", 8), ("3", 0), ("4", 12)):
+        session.add(
+            Produto(
+                codigo_barras=codigo,
+                nome=f"Produto {codigo}",
+                preco_custo=1.0,
+                preco_venda=2.0,
+                estoque_atual=estoque,
+            )
+        )
+    session.commit()
+    return pdv_core
+
+
+@pytest.fixture
+def manager(tmp_path, pdv_core):
+    am = AlertasManager(alertas_dir=tmp_path)
+    pdv_core.registrar_ouvinte_estoque(am.atualizar_alertas_estoque)
+    return am
+
+
+def _consultas_produtos(pdv_core):
+    """Conta SELECTs em `produtos` executados pela sessão."""
+    consultas = []
+
+    def _registrar(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("SELECT") and "produtos" in statement:
+            consultas.append(statement)
+
+    event.listen(pdv_core.session.get_bind(), "before_cursor_execute", _registrar)
+    return consultas
+
+
+def test_carga_inicial_ordena_por_deficit(pdv_core, manager):
+    alertas = manager.verificar_estoque_baixo(pdv_core)
+    assert [a["codigo"] for a in alertas] == ["3", "2"]
+    assert manager.contar_alertas_estoque(pdv_core) == {
+        "total": 2,
+        "critico": 1,
+        "moderado": 1,
+    }
+
+
+def test_venda_reavalia_somente_produtos_vendidos(pdv_core, manager):
+    manager.verificar_estoque_baixo(pdv_core)
+    consultas = _consultas_produtos(pdv_core)
+
+    # leituras repetidas (badge) não consultam o banco
+    manager.verificar_estoque_baixo(pdv_core)
+    manager.contar_alertas_estoque(pdv_core)
+    assert consultas == []
+
+    carrinho = [{"cod": "4", "nome": "Produto 4", "qtd": 5, "preco": 2.0}]
+    ok, _, _ = pdv_core.finalizar_venda(carrinho, "Dinheiro", 10.0, None)
+    assert ok
+
+    alertas = {a["codigo"]: a for a in manager.verificar_estoque_baixo(pdv_core)}
+    assert set(alertas) == {"2", "3", "4"}
+    assert alertas["4"]["falta"] == 3
+    # a reavaliação filtrou pelos ids vendidos, sem varrer o catálogo
+    assert any("IN" in c.upper() for c in consultas)
+
+
+def test_reposicao_remove_alerta_e_preserva_data_deteccao(pdv_core, manager):
+    antes = {a["codigo"]: a for a in manager.verificar_estoque_baixo(pdv_core)}
+    produto_2 = pdv_core.session.query(Produto).filter_by(codigo_barras="2").one()
+    produto_3 = pdv_core.session.query(Produto).filter_by(codigo_barras="3").one()
+
+    produto_3.estoque_atual = 40
+    produto_2.estoque_atual = 9
+    pdv_core.session.commit()
+    pdv_core.notificar_estoque_alterado([produto_2.id, produto_3.id])
+
+    depois = {a["codigo"]: a for a in manager.verificar_estoque_baixo(pdv_core)}
+    assert set(depois) == {"2"}
+    assert depois["2"]["falta"] == 1
+    assert depois["2"]["data_deteccao"] == antes["2"]["data_deteccao"]
+    assert manager.contar_alertas_estoque(pdv_core)["critico"] == 0
@@ -0,0 +1,86 @@
+"""Testes do vencimento de contas como data (consultas por faixa)"""
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from alertas.alertas_manager import AlertasManager
+from models.db_models import Expense
+
+HOJE = date.today()
+
+
+@pytest.fixture
+def pdv_core(pdv_core):
+    for descricao, dias, valor in (
+        ("Aluguel", -40, 100.0),
+        ("Luz", -1, 50.0),
+        ("Água", 0, 30.0),
+        ("Internet", 3, 20.0),
+        ("Seguro", 4, 10.0),
+    ):
+        ok, _ = pdv_core.create_expense(
+            descricao, valor, HOJE + timedelta(days=dias), "Operacional"
+        )
+        assert ok
+    return pdv_core
+
+
+def test_create_expense_aceita_texto_dd_mm_aaaa(pdv_core):
+    ok, _ = pdv_core.create_expense("Boleto", 5.0, "02/01/2030", "Fornecedores")
+    assert ok
+    boleto = pdv_core.session.query(Expense).filter_by(descricao="Boleto").one()
+    assert boleto.vencimento == date(2030, 1, 2)
+
+    ok, _ = pdv_core.create_expense("Inválida", 5.0, "31/02/2030", "Outros")
+    assert not ok
+
+
+def test_ordenacao_e_faixas_por_data(pdv_core):
+    # 02/01/2030 vem antes de 10/12/2029 em ordem de texto, não de data
+    pdv_core.create_expense("Futura", 1.0, "10/12/2029", "Outros")
+    pdv_core.create_expense("Mais futura", 1.0, "02/01/2030", "Outros")
+    todas = [e.descricao for e in pdv_core.get_expenses_by_status("Todos")]
+    assert todas[0] == "Aluguel"
+    assert todas[-2:] == ["Futura", "Mais futura"]
+
+    assert [e.descricao for e in pdv_core.get_overdue_expenses(hoje=HOJE)] == [
+        "Aluguel",
+        "Luz",
+    ]
+    assert [e.descricao for e in pdv_core.get_expenses_due_within(3, hoje=HOJE)] == [
+        "Água",
+        "Internet",
+    ]
+
+    pago = pdv_core.session.query(Expense).filter_by(descricao="Luz").one()
+    pdv_core.mark_expense_as_paid(pago.id)
+    assert [e.descricao for e in pdv_core.get_expenses_by_status("Atrasado")] == [
+        "Aluguel"
+    ]
+
+
+def test_faixa_de_vencimento_usa_indice(pdv_core):
+    plano = pdv_core.session.execute(
+        text(
+            "EXPLAIN QUERY PLAN SELECT id FROM expenses WHERE status = 'Pendente' "
+            "AND vencimento >= '2026-01-01' AND vencimento < '2026-02-01' "
+            "ORDER BY vencimento, id"
+        )
+    ).fetchall()
+    assert any("ix_expenses_status_vencimento" in str(linha) for linha in plano)
+
+
+def test_alertas_de_contas_sem_conversao(tmp_path, pdv_core):
+    resumo = AlertasManager(alertas_dir=tmp_path).obter_resumo_contas(pdv_core)
+    assert resumo["contas_vencidas"] == 2
+    assert resumo["total_vencido"] == 150.0
+    assert resumo["contas_proximas_vencimento"] == 2
+    dias = {d["descricao"]: d for d in resumo["detalhes_proximas"]}
+    assert dias["Internet"]["dias_para_vencer"] == 3
+    # vencimento no formato da tela (dd/mm/aaaa), não ISO
+    assert dias["Internet"]["vencimento"] == (HOJE + timedelta(days=3)).strftime(
+        "%d/%m/%Y"
+    )
+    assert resumo["detalhes_vencidas"][0]["dias_atraso"] == 40
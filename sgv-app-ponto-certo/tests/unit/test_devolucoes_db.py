@@ -0,0 +1,218 @@
+"""Testes das devoluções persistidas na tabela `devolucoes`"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import models.db_models as db_models
+from estoque.devolucoes import (
+    adicionar_troca,
+    atualizar_estoque_troca,
+    buscar_devolucao_para_troca,
+    estatisticas_devolucoes,
+    listar_devolucoes,
+    ocultar_devolucoes,
+)
+from models.db_models import Devolucao, Produto
+
+
+@pytest.fixture
+def pdv_core(pdv_core):
+    session = pdv_core.session
+    for codigo in ("1", "2"):
+        session.add(
+            Produto(
+                codigo_barras=codigo,
+                nome=f"Produto {codigo}",
+                preco_custo=1.0,
+                preco_venda=2.5,
+                estoque_atual=20,
+            )
+        )
+    session.commit()
+    return pdv_core
+
+
+def _vender(pdv_core, *itens):
+    carrinho = [
+        {"cod": cod, "nome": f"Produto {cod}", "qtd": qtd, "preco": 2.5}
+        for cod, qtd in itens
+    ]
+    ok, _, _ = pdv_core.finalizar_venda(carrinho, "Dinheiro", 100.0, None)
+    assert ok
+    return (
+        pdv_core.session.query(db_models.Venda.id)
+        .order_by(db_models.Venda.id.desc())
+        .limit(1)
+        .scalar()
+    )
+
+
+def test_estornos_registram_devolucoes(pdv_core):
+    venda_total = _vender(pdv_core, ("1", 2), ("2", 1))
+    venda_parcial = _vender(pdv_core, ("1", 1), ("2", 3))
+
+    assert pdv_core.estornar_venda(venda_total)[0]
+    item = next(
+        i
+        for i in pdv_core.session.get(db_models.Venda, venda_parcial).itens
+        if i.quantidade == 3
+    )
+    assert pdv_core.estornar_item(venda_parcial, item.id)[0]
+
+    resultado = listar_devolucoes(pdv_core)
+    assert resultado["total"] == 3
+    assert resultado["quantidade_total"] == 6
+    assert resultado["valor_total"] == pytest.approx(15.0)
+    por_venda = {}
+    for d in resultado["itens"]:
+        por_venda.setdefault(d["venda_id"], []).append(d["quantidade"])
+    assert sorted(por_venda[venda_total]) == [1, 2]
+    assert por_venda[venda_parcial] == [3]
+
+
+def test_paginacao_ocultacao_e_troca(pdv_core):
+    session = pdv_core.session
+    agora = datetime.now()
+    for i in range(5):
+        session.add(
+            Devolucao(
+                venda_id=10 + i,
+                produto_id=1,
+                produto_nome="Produto 1",
+                quantidade=1,
+                valor_total=2.5,
+                data=agora - timedelta(days=i * 10),
+            )
+        )
+    session.commit()
+
+    pagina = listar_devolucoes(pdv_core, pagina=2, por_pagina=2)
+    assert pagina["total"] == 5 and len(pagina["itens"]) == 2
+    assert [d["venda_id"] for d in pagina["itens"]] == [12, 13]
+    assert len(listar_devolucoes(pdv_core, por_pagina=None)["itens"]) == 5
+
+    # remoção em massa do período oculta só as devoluções dos últimos 15 dias
+    recentes = agora - timedelta(days=15)
+    assert ocultar_devolucoes(pdv_core, data_inicio=recentes) == 2
+    assert listar_devolucoes(pdv_core)["total"] == 3
+    assert ocultar_devolucoes(pdv_core, [session.query(Devolucao).all()[-1].id]) == 1
+    assert [d["venda_id"] for d in listar_devolucoes(pdv_core)["itens"]] == [12, 13]
+
+    alvo = buscar_devolucao_para_troca(pdv_core, 1, venda_id=13)
+    assert alvo["venda_id"] == 13
+    assert adicionar_troca(pdv_core, alvo["id"], 2, "Produto 2")
+    assert buscar_devolucao_para_troca(pdv_core, 1, venda_id=13)["venda_id"] != 13
+    trocada = session.get(Devolucao, alvo["id"])
+    assert trocada.foi_trocado and trocada.troca_para_nome == "Produto 2"
+
+
+def test_troca_atualiza_estoque_e_notifica(pdv_core):
+    notificados = []
+    pdv_core.registrar_ouvinte_estoque(lambda core, ids: notificados.append(ids))
+    original, novo = pdv_core.session.query(Produto).order_by(Produto.id)
+
+    ok, _ = atualizar_estoque_troca(pdv_core, original.id, novo.id, 3)
+
+    assert ok
+    assert (original.estoque_atual, novo.estoque_atual) == (23, 17)
+    assert [set(ids) for ids in notificados] == [{original.id, novo.id}]
+
+
+def test_estatisticas_agregadas_por_produto_e_dia(pdv_core):
+    session = pdv_core.session
+    hoje = datetime(2026, 10, 19, 12, 0)
+    # (produto, quantidade, valor, dias atrás, trocada, oculta)
+    for produto, qtd, valor, dias, trocada, oculta in (
+        (1, 2, 5.0, 0, True, False),
+        (1, 1, 2.5, 1, False, False),
+        (2, 4, 12.0, 1, False, False),
+        (2, 1, 3.0, 40, False, False),
+        (1, 9, 99.0, 0, False, True),
+    ):
+        session.add(
+            Devolucao(
+                produto_id=produto,
+                produto_nome=f"Produto {produto}",
+                quantidade=qtd,
+                valor_total=valor,
+                data=hoje - timedelta(days=dias),
+                foi_trocado=trocada,
+                oculta=oculta,
+            )
+        )
+    session.commit()
+
+    stats = estatisticas_devolucoes(
+        pdv_core, hoje - timedelta(days=7), hoje, limite_produtos=1
+    )
+    assert (stats["total"], stats["trocadas"], stats["nao_trocadas"]) == (3, 1, 2)
+    assert stats["quantidade_total"] == 7
+    assert stats["valor_total"] == pytest.approx(19.5)
+    assert stats["valor_trocado"] == pytest.approx(5.0)
+    assert stats["valor_medio"] == pytest.approx(19.5 / 7)
+    assert stats["por_produto"] == [
+        {
+            "produto_id": 2,
+            "produto_nome": "Produto 2",
+            "devolucoes": 1,
+            "quantidade": 4,
+            "valor_total": 12.0,
+        }
+    ]
+    assert [(d["dia"], d["devolucoes"]) for d in stats["por_dia"]] == [
+        ("2026-10-18", 2),
+        ("2026-10-19", 1),
+    ]
+    assert estatisticas_devolucoes(pdv_core)["total"] == 4
+
+
+def test_migracao_do_json(tmp_path, monkeypatch, pdv_core):
+    monkeypatch.setattr(
+        db_models, "_app_config_path", lambda: tmp_path / "app_config.json"
+    )
+    (tmp_path / "devolucoes.json").write_text(
+        json.dumps(
+            [
+                {
+                    "id": 7,
+                    "produto_id": 1,
+                    "produto_nome": "Produto 1",
+                    "quantidade": 2,
+                    "valor_total": 5.0,
+                    "motivo": "Estorno da venda #25",
+                    "data": "2026-10-01T10:00:00",
+                    "foi_trocado": True,
+                    "troca_para_id": 2,
+                    "troca_para_nome": "Produto 2",
+                    "troca_data": "2026-10-02T09:00:00",
+                }
+            ]
+        ),
+        encoding="utf-8",
+    )
+    session = pdv_core.session
+    assert db_models._importar_devolucoes_do_json(session)
+    dev = session.get(Devolucao, 7)
+    assert dev.venda_id == 25 and dev.foi_trocado and not dev.oculta
+    # tabela já populada: não importa de novo
+    assert db_models._importar_devolucoes_do_json(session)
+    assert session.query(Devolucao).count() == 1
+
+
+def test_migracao_sem_json_usa_vendas_estornadas(tmp_path, monkeypatch, pdv_core):
+    monkeypatch.setattr(
+        db_models, "_app_config_path", lambda: tmp_path / "app_config.json"
+    )
+    venda_id = _vender(pdv_core, ("1", 1), ("2", 2))
+    venda = pdv_core.session.get(db_models.Venda, venda_id)
+    venda.status = "ESTORNADA"
+    pdv_core.session.commit()
+    oculto = venda.itens[0].id
+    (tmp_path / "devolucoes_hidden.json").write_text(json.dumps([oculto]))
+
+    assert db_models._importar_devolucoes_do_json(pdv_core.session)
+    resultado = listar_devolucoes(pdv_core)
+    assert resultado["total"] == 1
+    assert resultado["itens"][0]["venda_id"] == venda_id
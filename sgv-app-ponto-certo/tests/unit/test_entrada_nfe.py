@@ -0,0 +1,187 @@
+"""Testes da entrada de mercadoria pela NF-e (vínculos cProd/cEAN -> produto)"""
+
+from datetime import date
+
+import pytest
+
+from models.db_models import CodigoProdutoFornecedor, LoteProduto, Produto
+
+
+def _item(codigo, ean, nome, quantidade, valor_total):
+    return {
+        "codigo": codigo,
+        "ean": ean,
+        "nome": nome,
+        "quantidade": quantidade,
+        "valor_total": valor_total,
+    }
+
+
+def _nota(chave, cnpj, itens):
+    return {
+        "numero": "10",
+        "chave": chave,
+        "emitente": {"cnpj": cnpj, "cpf": "", "nome": "Alfa"},
+        "itens": itens,
+    }
+
+
+@pytest.fixture
+def pdv_core(pdv_core):
+    session = pdv_core.session
+    for codigo, nome, estoque in (
+        ("7891000100103", "Arroz 5kg", 5),
+        ("7892000200206", "Feijão 1kg", 0),
+        ("INTERNO-1", "Açúcar 1kg", 2),
+    ):
+        session.add(
+            Produto(
+                codigo_barras=codigo,
+                nome=nome,
+                preco_custo=1.0,
+                preco_venda=2.0,
+                estoque_atual=estoque,
+            )
+        )
+    session.commit()
+    pdv_core.save_imported_xml({"nf": "10", "chave": "K1", "cnpj": "11", "total": "0"})
+    return pdv_core
+
+
+def _ids(pdv_core):
+    return {p.nome: p.id for p in pdv_core.session.query(Produto)}
+
+
+def test_lancamento_aprende_vinculos_e_casa_a_proxima_nota(pdv_core):
+    ids = _ids(pdv_core)
+    nota = _nota(
+        "K1",
+        "11.111.111/0001-11",
+        [
+            _item("A1", "7891000100103", "ARROZ T1 5KG", 10, 150.0),
+            _item("B2", "", "FEIJAO CARIOCA", 4, 32.0),
+            _item("C3", "", "ACUCAR", 6, 24.0),
+            _item("A1", "7891000100103", "ARROZ T1 5KG", 2, 36.0),
+            _item("Z9", "", "BRINDE", 1, 0.0),
+        ],
+    )
+    casados = pdv_core.casar_itens_nfe(nota)
+    assert [(c["produto_id"], c["origem"]) for c in casados] == [
+        (ids["Arroz 5kg"], "barras"),
+        (None, None),
+        (None, None),
+        (ids["Arroz 5kg"], "barras"),
+        (None, None),
+    ]
+
+    escolhidos = [c["produto_id"] for c in casados]
+    escolhidos[1] = ids["Feijão 1kg"]
+    escolhidos[2] = ids["Açúcar 1kg"]
+    ok, resumo = pdv_core.lancar_entrada_nfe(nota, escolhidos)
+    assert ok, resumo
+    assert resumo == {
+        "produtos": 3,
+        "quantidade": 22,
+        "ignorados": 1,
+        "fracionados": [],
+        "vinculos": 3,
+    }
+
+    produtos = {p.nome: p for p in pdv_core.session.query(Produto)}
+    assert produtos["Arroz 5kg"].estoque_atual == 17
+    # média ponderada: 5 un. a 1,00 + 12 un. a 15,50 (186 / 12)
+    assert produtos["Arroz 5kg"].preco_custo == pytest.approx(191 / 17, abs=1e-4)
+    # sem estoque anterior, vale o custo da nota
+    assert produtos["Feijão 1kg"].preco_custo == pytest.approx(8.0)
+    assert pdv_core.session.query(CodigoProdutoFornecedor).count() == 3
+
+    # a nota já foi lançada
+    ok, msg = pdv_core.lancar_entrada_nfe(nota, escolhidos)
+    assert not ok and "já foi lançada" in msg
+    assert pdv_core.get_all_imported_xmls()[0]["estoque_lancado"]
+
+    # próxima nota do mesmo emitente: códigos aprendidos; outro emitente só pelo EAN
+    seguinte = _nota(
+        "K2",
+        "11111111000111",
+        [
+            _item("B2", "", "FEIJAO", 1, 8.0),
+            _item("X", "7891000100103", "ARROZ", 1, 15.0),
+        ],
+    )
+    assert [
+        (c["produto_id"], c["origem"]) for c in pdv_core.casar_itens_nfe(seguinte)
+    ] == [(ids["Feijão 1kg"], "codigo"), (ids["Arroz 5kg"], "ean")]
+    outro = _nota("K3", "22222222000122", [_item("B2", "", "FEIJAO", 1, 8.0)])
+    assert pdv_core.casar_itens_nfe(outro)[0]["produto_id"] is None
+
+
+def test_lancamento_sem_atualizar_custo_e_revinculo(pdv_core):
+    ids = _ids(pdv_core)
+    nota = _nota("K9", "33", [_item("P", "", "PRODUTO", 3, 30.0)])
+    ok, _ = pdv_core.lancar_entrada_nfe(
+        nota, [ids["Açúcar 1kg"]], atualizar_custo=False
+    )
+    assert ok
+    acucar = pdv_core.session.get(Produto, ids["Açúcar 1kg"])
+    assert (acucar.estoque_atual, acucar.preco_custo) == (5, 1.0)
+
+    # a nota K9 não tinha XML salvo: o lançamento a registra e não repete
+    ok, msg = pdv_core.lancar_entrada_nfe(nota, [ids["Feijão 1kg"]])
+    assert not ok and "já foi lançada" in msg
+    registro = pdv_core.get_all_imported_xmls()[0]
+    assert (registro["chave"], registro["estoque_lancado"]) == ("K9", True)
+    assert pdv_core.session.get(Produto, ids["Açúcar 1kg"]).estoque_atual == 5
+
+    # outra nota do mesmo emitente com o mesmo código muda o vínculo
+    nota = _nota("K10", "33", [_item("P", "", "PRODUTO", 3, 30.0)])
+    ok, _ = pdv_core.lancar_entrada_nfe(nota, [ids["Feijão 1kg"]])
+    assert ok
+    vinculo = pdv_core.session.query(CodigoProdutoFornecedor).one()
+    assert vinculo.produto_id == ids["Feijão 1kg"]
+
+    ok, msg = pdv_core.lancar_entrada_nfe(_nota("K11", "33", []), [])
+    assert not ok and "Nenhum item" in msg
+
+
+def test_quantidade_fracionada_nao_entra_e_rastro_vira_lote(pdv_core):
+    ids = _ids(pdv_core)
+    arroz = dict(_item("A1", "", "ARROZ", 10, 100.0))
+    arroz["rastros"] = [
+        {"lote": "L1", "quantidade": 6.0, "validade": "2027-03-01"},
+        {"lote": "L2", "quantidade": 3.0, "validade": "2027-01-01"},
+    ]
+    nota = _nota(
+        "K7",
+        "44",
+        [arroz, _item("F", "", "FEIJAO A GRANEL KG", 2.5, 20.0)],
+    )
+
+    ok, resumo = pdv_core.lancar_entrada_nfe(
+        nota, [ids["Arroz 5kg"], ids["Feijão 1kg"]]
+    )
+
+    assert ok, resumo
+    assert resumo["fracionados"] == ["FEIJAO A GRANEL KG"]
+    produtos = {p.nome: p for p in pdv_core.session.query(Produto)}
+    assert produtos["Feijão 1kg"].estoque_atual == 0
+    assert produtos["Arroz 5kg"].estoque_atual == 15
+    # 5 un. anteriores (sem lote) + 6 em L1 + 3 em L2 + 1 sem rastro
+    lotes = {
+        (lote.lote, lote.validade): lote.quantidade
+        for lote in pdv_core.session.query(LoteProduto).filter_by(
+            produto_id=ids["Arroz 5kg"]
+        )
+    }
+    assert lotes == {
+        (None, None): 6,
+        ("L1", date(2027, 3, 1)): 6,
+        ("L2", date(2027, 1, 1)): 3,
+    }
+    assert sum(lotes.values()) == produtos["Arroz 5kg"].estoque_atual
+    # o produto exibe o lote mais próximo de vencer
+    assert produtos["Arroz 5kg"].lote == "L2"
+
+    so_fracionado = _nota("K8", "44", [_item("F", "", "FEIJAO KG", 0.4, 4.0)])
+    ok, msg = pdv_core.lancar_entrada_nfe(so_fracionado, [ids["Feijão 1kg"]])
+    assert not ok and "fracionada" in msg
@@ -0,0 +1,36 @@
+"""Testes do índice de busca do Estoque"""
+
+from estoque.busca import IndiceBusca, normalizar_busca
+
+
+def _produtos():
+    return [
+        {"id": 1, "nome": "Açúcar Cristal", "categoria": "Mercearia"},
+        {"id": 2, "nome": "Acerola Polpa", "categoria": "Congelados"},
+        {"id": 3, "nome": "Café Moído", "categoria": "Matinais"},
+    ]
+
+
+def test_normalizar_busca_remove_acentos():
+    assert normalizar_busca("  Açúcar ") == "acucar"
+    assert normalizar_busca(None) == ""
+
+
+def test_prefixo_e_contem():
+    indice = IndiceBusca(_produtos())
+    assert indice.prefixo("AC") == {1, 2}
+    assert indice.prefixo("acu") == {1}
+    assert indice.prefixo("") == {1, 2, 3}
+    assert indice.contem("moido") == {3}
+    assert indice.contem("congel") == {2}
+
+
+def test_atualizar_e_remover():
+    indice = IndiceBusca(_produtos())
+    indice.atualizar({"id": 2, "nome": "Banana Prata", "categoria": "Hortifruti"})
+    assert indice.prefixo("ac") == {1}
+    assert indice.prefixo("ban") == {2}
+    indice.remover(1)
+    assert indice.prefixo("a") == set()
+    indice.atualizar({"id": 4, "nome": "Arroz", "categoria": ""})
+    assert indice.prefixo("a") == {4}
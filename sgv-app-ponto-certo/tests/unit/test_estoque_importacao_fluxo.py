@@ -0,0 +1,89 @@
+"""Testes da importação do Estoque com pré-visualização (CSV/Excel)"""
+
+import csv
+from datetime import date
+
+from estoque import imports
+from estoque.formatters import converter_texto_para_data, converter_texto_para_preco
+from estoque.view import _validar_produto_fields
+from models.db_models import Produto
+
+CABECALHO = ["Nome", "Categoria", "Validade", "Quantidade", "Preço", "Código de Barras"]
+
+
+def _linhas():
+    return [
+        ["Arroz", "Mercearia", "01/01/2027", 10, "5,90", "111"],
+        ["Feijão", "Mercearia", "01/01/2027", 8, "7,50", "222"],
+        ["Arroz Repetido", "Mercearia", "01/01/2027", 3, "5,90", "111"],
+        ["Sem Quantidade", "Mercearia", "01/01/2027", "", "1,00", "333"],
+        ["Leite", "Laticínios", "data ruim", 4, "4,20", "444"],
+        ["Café", "Mercearia", "01/01/2027", 6, "12,00", "555"],
+    ]
+
+
+def test_simular_e_aplicar_importacao(tmp_path, session):
+    session.add_all(
+        [
+            Produto(
+                codigo_barras="111",
+                nome="Arroz",
+                categoria="Mercearia",
+                validade=date(2027, 1, 1),
+                estoque_atual=10,
+                preco_venda=5.0,
+                preco_custo=3.0,
+            ),
+            Produto(
+                codigo_barras="222",
+                nome="Feijão",
+                categoria="Mercearia",
+                validade=date(2027, 1, 1),
+                estoque_atual=8,
+                preco_venda=7.5,
+                preco_custo=0.0,
+            ),
+            Produto(
+                codigo_barras="777",
+                nome="Café",
+                categoria="Mercearia",
+                estoque_atual=1,
+                preco_venda=10.0,
+                preco_custo=8.0,
+            ),
+        ]
+    )
+    session.commit()
+
+    caminho = tmp_path / "precos.csv"
+    with open(caminho, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(CABECALHO)
+        w.writerows(_linhas())
+
+    simulacao = imports.simular_importacao(
+        str(caminho),
+        session,
+        converter_texto_para_data,
+        converter_texto_para_preco,
+        _validar_produto_fields,
+    )
+
+    assert simulacao["erro"] is None
+    assert simulacao["inalterados"] == 1  # Feijão
+    assert [i["codigo_barras"] for i in simulacao["alteracoes"]] == ["111"]
+    assert simulacao["novos"] == []
+    assert simulacao["conflitos"] == 2  # 111 repetido, Café com outro código
+    assert simulacao["erros"] == 2
+    alteracao = next(e for e in simulacao["entradas"] if e["tipo"] == "alteracao")
+    assert alteracao["detalhe"] == "Preço: R$ 5,00 → R$ 5,90"
+
+    # o dry-run não grava nada
+    assert (
+        session.query(Produto).filter_by(codigo_barras="111").one().preco_venda == 5.0
+    )
+
+    assert imports.aplicar_importacao(session, simulacao) == 1
+    assert (
+        session.query(Produto).filter_by(codigo_barras="111").one().preco_venda == 5.9
+    )
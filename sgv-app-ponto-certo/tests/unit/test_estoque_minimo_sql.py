@@ -0,0 +1,86 @@
+"""Testes do estoque baixo pelo mínimo de cada produto (consulta paginada)"""
+
+import pytest
+from sqlalchemy import insert, select, text, true
+
+from alertas.alertas_manager import AlertasManager
+from models.db_models import DEFICIT_ESTOQUE, Produto
+
+
+@pytest.fixture
+def pdv_core(pdv_core):
+    session = pdv_core.session
+    # (código, estoque atual, estoque mínimo, ativo)
+    for codigo, atual, minimo, ativo in (
+        ("a", 3, 5, True),  # falta 2
+        ("b", 15, 20, True),  # falta 5: mínimo próprio acima do padrão
+        ("c", 8, None, True),  # falta 2 pelo mínimo padrão (10)
+        ("d", 8, 5, True),  # ok: mínimo próprio abaixo do padrão
+        ("e", 0, 0, True),  # ok: produto sem mínimo
+        ("f", 0, 30, False),  # inativo
+        ("g", 0, 4, True),  # falta 4
+    ):
+        session.add(
+            Produto(
+                codigo_barras=codigo,
+                nome=f"Produto {codigo}",
+                preco_custo=1.0,
+                preco_venda=2.0,
+                estoque_atual=atual,
+                estoque_minimo=minimo,
+                ativo=ativo,
+            )
+        )
+    session.commit()
+    return pdv_core
+
+
+def test_listar_estoque_baixo_usa_minimo_do_produto_e_pagina(pdv_core):
+    primeira = pdv_core.listar_estoque_baixo(pagina=1, por_pagina=2)
+    assert primeira["total"] == 4
+    assert [(i["codigo"], i["falta"]) for i in primeira["itens"]] == [
+        ("b", 5),
+        ("g", 4),
+    ]
+    segunda = pdv_core.listar_estoque_baixo(pagina=2, por_pagina=2)
+    assert sorted(i["codigo"] for i in segunda["itens"]) == ["a", "c"]
+    assert {i["codigo"]: i["estoque_minimo"] for i in segunda["itens"]}["c"] == 10
+
+
+def test_consulta_percorre_indice_de_deficit(pdv_core):
+    session = pdv_core.session
+    session.execute(
+        insert(Produto),
+        [
+            {
+                "codigo_barras": f"x{i}",
+                "nome": "Extra",
+                "preco_custo": 1.0,
+                "preco_venda": 2.0,
+                "estoque_atual": 50 + i,
+                "estoque_minimo": 10,
+            }
+            for i in range(2000)
+        ],
+    )
+    session.execute(text("ANALYZE produtos"))
+    consulta = (
+        select(Produto.id)
+        .where(Produto.ativo == true(), DEFICIT_ESTOQUE > 0)
+        .order_by(DEFICIT_ESTOQUE.desc(), Produto.id.desc())
+        .compile(session.get_bind(), compile_kwargs={"literal_binds": True})
+    )
+    plano = session.execute(text(f"EXPLAIN QUERY PLAN {consulta}")).fetchall()
+    assert any("ix_produtos_deficit_estoque" in str(linha) for linha in plano)
+    assert not any("TEMP B-TREE" in str(linha) for linha in plano)
+
+
+def test_alertas_manager_segue_minimo_do_produto(tmp_path, pdv_core):
+    am = AlertasManager(alertas_dir=tmp_path)
+    alertas = {a["codigo"]: a for a in am.verificar_estoque_baixo(pdv_core)}
+    assert set(alertas) == {"a", "b", "c", "g"}
+    assert alertas["b"]["estoque_minimo"] == 20
+
+    pagina = am.listar_alertas_estoque(pdv_core, 1, 10)
+    assert [i["codigo"] for i in pagina["itens"]][:2] == ["b", "g"]
+    assert pagina["itens"][0]["alerta_id"] == f"produto_{pagina['itens'][0]['id']}"
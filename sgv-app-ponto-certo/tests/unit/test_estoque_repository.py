@@ -0,0 +1,132 @@
+"""Testes do catálogo do Estoque persistido no banco"""
+
+from datetime import datetime
+
+import pytest
+
+from estoque import repository as repo
+from models.db_models import ItemVenda, LoteProduto, PrecoFornecedor, Produto, Venda
+
+
+def _dados(**extra):
+    dados = {
+        "nome": "Feijão 1kg",
+        "categoria": "Mercearia",
+        "validade": datetime(2027, 3, 1),
+        "lote": "L01",
+        "quantidade": 12,
+        "preco_venda": 8.9,
+        "preco_custo": 6.0,
+        "codigo_barras": "7891",
+    }
+    dados.update(extra)
+    return dados
+
+
+def test_salvar_e_carregar_produto(session):
+    novo = repo.salvar_produto(session, _dados())
+    assert novo["id"] and novo["categoria"] == "Mercearia" and novo["lote"] == "L01"
+
+    repo.salvar_produto(session, _dados(id=novo["id"], quantidade=5))
+    produtos = repo.carregar_produtos(session)
+    assert len(produtos) == 1
+    assert produtos[0]["quantidade"] == 5
+    assert produtos[0]["validade"] == datetime(2027, 3, 1)
+
+    with pytest.raises(ValueError):
+        repo.salvar_produto(session, _dados(nome="Outro"))
+
+
+def test_produto_sem_codigo_recebe_codigo_interno(session):
+    novo = repo.salvar_produto(session, _dados(codigo_barras=""))
+    assert novo["codigo_barras"] == f"INT{novo['id']:06d}"
+
+
+def test_adicionar_produtos_atualiza_codigos_existentes(session):
+    repo.salvar_produto(session, _dados())
+    gravados = repo.adicionar_produtos(
+        session,
+        [
+            _dados(quantidade=30),
+            _dados(codigo_barras="7892", nome="Arroz"),
+            _dados(codigo_barras="", nome="Granel"),
+        ],
+    )
+    assert gravados == 3
+    produtos = {p["nome"]: p for p in repo.carregar_produtos(session)}
+    assert produtos["Feijão 1kg"]["quantidade"] == 30
+    assert produtos["Arroz"]["codigo_barras"] == "7892"
+    granel = produtos["Granel"]
+    assert granel["codigo_barras"] == f"INT{granel['id']:06d}"
+
+
+def test_excluir_produto_com_vendas_apenas_inativa(session):
+    vendido = repo.salvar_produto(session, _dados())
+    sem_venda = repo.salvar_produto(session, _dados(codigo_barras="7892"))
+    venda = Venda(total=8.9, usuario_responsavel="caixa")
+    session.add(venda)
+    session.flush()
+    session.add(
+        ItemVenda(
+            venda_id=venda.id,
+            produto_id=vendido["id"],
+            quantidade=1,
+            preco_unitario=8.9,
+        )
+    )
+    session.commit()
+
+    assert repo.excluir_produto(session, vendido["id"])
+    assert repo.excluir_produto(session, sem_venda["id"])
+    assert repo.carregar_produtos(session) == []
+
+    inativo = session.get(Produto, vendido["id"])
+    assert inativo is not None and not inativo.ativo and inativo.estoque_atual == 0
+    assert session.get(Produto, sem_venda["id"]) is None
+
+    # recadastrar o mesmo código reaproveita o registro inativo
+    reativado = repo.salvar_produto(session, _dados())
+    assert reativado["id"] == vendido["id"]
+
+
+def test_edicao_e_importacao_gravam_historico_de_custos(session):
+    def _custos(produto_id):
+        return [
+            (p.custo, p.origem)
+            for p in session.query(PrecoFornecedor)
+            .filter_by(produto_id=produto_id)
+            .order_by(PrecoFornecedor.id)
+        ]
+
+    novo = repo.salvar_produto(session, _dados())
+    # mesmo custo não gera registro; custo novo sim
+    repo.salvar_produto(session, _dados(id=novo["id"], quantidade=5))
+    repo.salvar_produto(session, _dados(id=novo["id"], preco_custo=6.5))
+    assert _custos(novo["id"]) == [(6.0, "manual"), (6.5, "manual")]
+
+    repo.adicionar_produtos(
+        session,
+        [
+            _dados(preco_custo=7.0),
+            _dados(codigo_barras="7892", nome="Arroz", preco_custo=4.0),
+            _dados(codigo_barras="", nome="Granel", preco_custo=2.0),
+        ],
+    )
+    assert _custos(novo["id"])[-1] == (7.0, "manual")
+    produtos = {p["nome"]: p["id"] for p in repo.carregar_produtos(session)}
+    assert _custos(produtos["Arroz"]) == [(4.0, "manual")]
+    assert _custos(produtos["Granel"]) == [(2.0, "manual")]
+
+
+def test_adicionar_produtos_concilia_apenas_os_gravados(session):
+    # estoque gravado fora do repositório (sem lotes) não é tocado pela importação
+    outro = Produto(codigo_barras="999", nome="Outro", preco_custo=1.0, preco_venda=2.0)
+    outro.estoque_atual = 4
+    session.add(outro)
+    session.commit()
+
+    repo.adicionar_produtos(session, [_dados(codigo_barras="7892", nome="Arroz")])
+    assert session.query(LoteProduto).filter_by(produto_id=outro.id).count() == 0
+    arroz = session.query(Produto).filter_by(codigo_barras="7892").one()
+    lotes = session.query(LoteProduto).filter_by(produto_id=arroz.id).all()
+    assert [(l.lote, l.quantidade) for l in lotes] == [("L01", 12)]
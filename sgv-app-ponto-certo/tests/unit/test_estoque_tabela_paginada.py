@@ -0,0 +1,57 @@
+"""Testes da tabela paginada de produtos do Estoque"""
+
+from types import SimpleNamespace
+
+import flet as ft
+
+from estoque.components import TabelaPaginada
+
+
+def _produtos(n):
+    return [
+        {
+            "id": i,
+            "nome": f"Produto {i}",
+            "categoria": "Mercearia",
+            "validade": None,
+            "lote": "",
+            "quantidade": 20,
+            "preco_custo": 1.0,
+            "preco_venda": 2.0,
+            "codigo_barras": str(1000 + i),
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+def _tabela():
+    data_table = ft.DataTable(columns=[ft.DataColumn(ft.Text("ID"))], rows=[])
+    page = SimpleNamespace(update=lambda: None)
+    return TabelaPaginada(page, data_table, None, None, itens_por_pagina=100)
+
+
+def test_monta_apenas_a_pagina_visivel():
+    tabela = _tabela()
+    tabela.definir_itens(_produtos(250))
+    assert len(tabela.data_table.rows) == 100
+    assert tabela.texto_intervalo.value == "1–100 de 250"
+    assert tabela.btn_anterior.disabled
+
+    tabela.ir_para(5)
+    assert tabela.pagina == 2
+    assert len(tabela.data_table.rows) == 50
+    assert tabela.btn_proxima.disabled
+
+
+def test_reaproveita_linhas_inalteradas():
+    tabela = _tabela()
+    produtos = _produtos(10)
+    tabela.definir_itens(produtos)
+    antes = list(tabela.data_table.rows)
+
+    produtos[3]["quantidade"] = 2
+    tabela.definir_itens(produtos)
+    depois = tabela.data_table.rows
+
+    assert depois[3] is not antes[3]
+    assert all(depois[i] is antes[i] for i in range(10) if i != 3)
@@ -0,0 +1,146 @@
+"""Testes do estorno em lote de vendas (PDVCore.estornar_vendas)"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, insert
+
+from models.db_models import CaixaSession, Devolucao, ItemVenda, Produto, User, Venda
+
+
+@pytest.fixture
+def pdv_core(pdv_core):
+    session = pdv_core.session
+    for i in range(3):
+        session.add(
+            Produto(
+                codigo_barras=str(i),
+                nome=f"Produto {i}",
+                preco_custo=1.0,
+                preco_venda=2.0,
+                estoque_atual=100,
+            )
+        )
+    session.add(User(username="caixa1", password="x", role="caixa"))
+    session.commit()
+    return pdv_core
+
+
+def _criar_vendas(session, quantidade, inicio=datetime(2026, 10, 19, 8, 0)):
+    """Cria `quantidade` vendas com 3 itens (1 un. de cada produto)."""
+    produtos = [p.id for p in session.query(Produto).order_by(Produto.id)]
+    primeira = (
+        session.query(Venda.id).order_by(Venda.id.desc()).limit(1).scalar()
+    ) or 0
+    session.execute(
+        insert(Venda),
+        [
+            {
+                "id": primeira + n + 1,
+                "data_venda": inicio + timedelta(minutes=n),
+                "total": 6.0,
+                "usuario_responsavel": "caixa1",
+            }
+            for n in range(quantidade)
+        ],
+    )
+    session.execute(
+        insert(ItemVenda),
+        [
+            {
+                "venda_id": primeira + n + 1,
+                "produto_id": pid,
+                "quantidade": 1,
+                "preco_unitario": 2.0,
+            }
+            for n in range(quantidade)
+            for pid in produtos
+        ],
+    )
+    session.commit()
+    return list(range(primeira + 1, primeira + quantidade + 1))
+
+
+def test_estorno_em_lote_repoe_estoque_e_registra_devolucoes(pdv_core):
+    session = pdv_core.session
+    ids = _criar_vendas(session, 4)
+    assert pdv_core.estornar_venda(ids[0])[0]
+
+    consultas = []
+    event.listen(
+        session.get_bind(),
+        "before_cursor_execute",
+        lambda *args: consultas.append(args[2]),
+    )
+    ok, resultado = pdv_core.estornar_vendas(ids + [999])
+    assert ok
+    assert resultado["estornadas"] == ids[1:]
+    assert resultado["ignoradas"] == {
+        ids[0]: "Venda já estornada.",
+        999: "Venda não encontrada.",
+    }
+    assert resultado["itens"] == 9
+    # status, produtos, 2 UPDATEs, o INSERT ... SELECT e a conciliação dos
+    # lotes (divergentes, lotes e UPDATE em lote dos saldos)
+    assert len(consultas) == 8
+
+    assert {p.estoque_atual for p in session.query(Produto)} == {104}
+    assert {v.status for v in session.query(Venda)} == {"ESTORNADA"}
+    devolucoes = session.query(Devolucao).filter(Devolucao.venda_id == ids[1]).all()
+    assert len(devolucoes) == 3
+    assert devolucoes[0].motivo == f"Estorno da venda #{ids[1]}"
+    assert devolucoes[0].valor_total == 2.0
+
+
+def test_estornar_item_registra_na_mesma_transacao(pdv_core):
+    session = pdv_core.session
+    (venda_id,) = _criar_vendas(session, 1)
+    item = session.query(ItemVenda).filter_by(venda_id=venda_id).first()
+
+    assert pdv_core.estornar_item(venda_id, item.id)[0]
+    assert session.get(Produto, item.produto_id).estoque_atual == 101
+    assert session.get(Venda, venda_id).total == 4.0
+    assert session.query(Devolucao).one().item_venda_id == item.id
+
+
+def test_estornar_sessao_de_caixa(pdv_core):
+    session = pdv_core.session
+    usuario = session.query(User).one()
+    abertura = datetime(2026, 10, 19, 8, 0)
+    sessao = CaixaSession(
+        user_id=usuario.id,
+        opening_time=abertura,
+        opening_balance=0.0,
+        closing_time=abertura + timedelta(minutes=30),
+        status="Closed",
+    )
+    session.add(sessao)
+    session.commit()
+    dentro = _criar_vendas(session, 3, abertura + timedelta(minutes=1))
+    fora = _criar_vendas(session, 2, abertura + timedelta(hours=2))
+
+    ok, resultado = pdv_core.estornar_sessao_caixa(sessao.id, "gerente")
+    assert ok and resultado["estornadas"] == dentro
+    assert session.get(Venda, fora[0]).status == "CONCLUIDA"
+    assert {d.motivo for d in session.query(Devolucao)} == {
+        f"Estorno da sessão de caixa #{sessao.id}"
+    }
+
+
+def test_estorno_de_muitas_vendas_nao_cresce_em_consultas(pdv_core):
+    session = pdv_core.session
+    ids = _criar_vendas(session, 2000)
+    consultas = []
+    event.listen(
+        session.get_bind(),
+        "before_cursor_execute",
+        lambda *args: consultas.append(args[2]),
+    )
+
+    ok, resultado = pdv_core.estornar_vendas(ids)
+
+    assert ok and resultado["itens"] == 6000
+    # os mesmos comandos de um estorno pequeno: status, produtos, 2 UPDATEs,
+    # INSERT ... SELECT e a conciliação (divergentes, lotes, INSERT dos lotes)
+    assert len(consultas) == 8
+    assert session.query(Produto).first().estoque_atual == 2100
@@ -0,0 +1,88 @@
+"""Testes da importação de fornecedores em lote (upsert com gravações agrupadas)"""
+
+import pytest
+from sqlalchemy import event
+
+from fornecedores.utils_fornecedores import mesclar_registros_fornecedores
+from models.db_models import Fornecedor
+
+
+@pytest.fixture
+def pdv_core(pdv_core):
+    session = pdv_core.session
+    session.add_all(
+        [
+            Fornecedor(nome_razao_social="Alfa", cnpj_cpf="11.111.111/0001-11"),
+            Fornecedor(nome_razao_social="Beta", cnpj_cpf=None),
+            Fornecedor(nome_razao_social="Gama", cnpj_cpf="33333333000133"),
+        ]
+    )
+    session.commit()
+    return pdv_core
+
+
+def _dados(nome, doc=None, **extra):
+    return {"nome_razao_social": nome, "cnpj_cpf": doc, **extra}
+
+
+def test_documento_normalizado_nome_e_duplicados(pdv_core):
+    resumo = pdv_core.importar_fornecedores(
+        [
+            _dados("Alfa Distribuidora", "11111111000111", contato="1111"),
+            _dados("beta", "22.222.222/0001-22"),
+            _dados("Gama", "44444444000144"),  # mesmo nome, outro documento
+            _dados("Delta"),
+            _dados("Delta Novo Nome", None),
+            _dados("DELTA", None, status="inativo"),  # repete a Delta do lote
+        ]
+    )
+    assert resumo == {"criados": 3, "atualizados": 2, "duplicados": 1, "erro": None}
+
+    session = pdv_core.session
+    alfa = session.query(Fornecedor).filter_by(contato="1111").one()
+    # o documento cadastrado (com máscara) é mantido
+    assert (alfa.nome_razao_social, alfa.cnpj_cpf) == (
+        "Alfa Distribuidora",
+        "11.111.111/0001-11",
+    )
+    beta = session.query(Fornecedor).filter_by(nome_razao_social="beta").one()
+    assert beta.cnpj_cpf == "22222222000122"
+    assert session.query(Fornecedor).filter_by(nome_razao_social="Gama").count() == 2
+    delta = session.query(Fornecedor).filter_by(nome_razao_social="DELTA").one()
+    assert delta.status == "inativo"
+    assert session.query(Fornecedor).count() == 6
+
+
+def test_grava_em_lote_com_numero_fixo_de_comandos(pdv_core):
+    comandos = []
+    event.listen(
+        pdv_core.session.get_bind(),
+        "before_cursor_execute",
+        lambda *args: comandos.append(args[2].split()[0]),
+    )
+    registros = [_dados(f"Novo {i}", f"{i:014d}") for i in range(1, 301)]
+    registros += [_dados("Alfa", "11111111000111"), _dados("Beta")]
+    resumo = pdv_core.importar_fornecedores(registros)
+    assert (resumo["criados"], resumo["atualizados"]) == (300, 2)
+    assert comandos.count("SELECT") == 1
+    assert comandos.count("INSERT") <= 2
+    assert comandos.count("UPDATE") == 1
+    assert pdv_core.session.query(Fornecedor).count() == 303
+
+
+def test_importacao_grava_chave_de_busca_sem_acentos(pdv_core):
+    resumo = pdv_core.importar_fornecedores(
+        [_dados("Água Pura Ltda"), _dados("AGUA PURA LTDA", contato="9999")]
+    )
+    assert resumo == {"criados": 1, "atualizados": 0, "duplicados": 1, "erro": None}
+    agua = pdv_core.session.query(Fornecedor).filter_by(contato="9999").one()
+    assert agua.nome_busca == "agua pura ltda"
+    assert pdv_core.listar_fornecedores("águ")["itens"] == [agua]
+
+
+def test_mesclar_arquivos_usa_a_mesma_chave_de_nome_da_busca():
+    registros, repetidos = mesclar_registros_fornecedores(
+        [[_dados("Açúcar Ltda", contato="1")], [_dados(" acucar ltda ", contato="2")]]
+    )
+    assert repetidos == 1
+    assert [r["contato"] for r in registros] == ["2"]
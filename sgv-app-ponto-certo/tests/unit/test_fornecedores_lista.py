@@ -0,0 +1,107 @@
+"""Testes da lista paginada de fornecedores (busca por prefixo com índice)"""
+
+import pytest
+from sqlalchemy import text
+
+from fornecedores.utils_fornecedores import find_fornecedor_by_doc_ou_nome
+from models.db_models import Fornecedor
+
+
+@pytest.fixture
+def pdv_core(pdv_core):
+    session = pdv_core.session
+    session.add_all(
+        [
+            Fornecedor(nome_razao_social="beta Bebidas", cnpj_cpf="22.222.222/0001-22"),
+            Fornecedor(nome_razao_social="Alfa Alimentos", cnpj_cpf="11111111000111"),
+            Fornecedor(nome_razao_social="Atacado Central", cnpj_cpf=None),
+        ]
+        + [Fornecedor(nome_razao_social=f"Zeta {i:03d}") for i in range(120)]
+    )
+    session.commit()
+    return pdv_core
+
+
+def _nomes(resultado):
+    return [f.nome_razao_social for f in resultado["itens"]]
+
+
+def test_paginas_em_ordem_alfabetica(pdv_core):
+    primeira = pdv_core.listar_fornecedores(por_pagina=50)
+    assert primeira["total"] == 123
+    assert _nomes(primeira)[:4] == [
+        "Alfa Alimentos",
+        "Atacado Central",
+        "beta Bebidas",
+        "Zeta 000",
+    ]
+    ultima = pdv_core.listar_fornecedores(pagina=3, por_pagina=50)
+    assert _nomes(ultima) == [f"Zeta {i:03d}" for i in range(97, 120)]
+
+
+def test_busca_por_prefixo_do_nome_e_do_documento(pdv_core):
+    assert _nomes(pdv_core.listar_fornecedores("a")) == [
+        "Alfa Alimentos",
+        "Atacado Central",
+    ]
+    assert _nomes(pdv_core.listar_fornecedores("BETA")) == ["beta Bebidas"]
+    # "Alimentos" não é início do nome
+    assert pdv_core.listar_fornecedores("alim")["total"] == 0
+    # documento cadastrado com ou sem máscara
+    assert _nomes(pdv_core.listar_fornecedores("11.111")) == ["Alfa Alimentos"]
+    assert _nomes(pdv_core.listar_fornecedores("22.222.222")) == ["beta Bebidas"]
+    assert pdv_core.listar_fornecedores("zeta 0", por_pagina=5)["total"] == 100
+
+
+def test_busca_usa_indice_do_nome(pdv_core):
+    plano = pdv_core.session.execute(
+        text(
+            "EXPLAIN QUERY PLAN SELECT id FROM fornecedores "
+            "WHERE nome_busca >= 'be' "
+            "AND nome_busca < 'be' || char(1114111) "
+            "ORDER BY nome_busca"
+        )
+    ).all()
+    assert any("ix_fornecedores_nome_busca" in linha[-1] for linha in plano)
+
+
+def test_find_fornecedor_por_documento_ou_nome(pdv_core):
+    beta = find_fornecedor_by_doc_ou_nome(pdv_core, "22.222.222/0001-22", "")
+    assert beta.nome_razao_social == "beta Bebidas"
+    alfa = find_fornecedor_by_doc_ou_nome(pdv_core, "11.111.111/0001-11", "")
+    assert alfa.nome_razao_social == "Alfa Alimentos"
+    assert find_fornecedor_by_doc_ou_nome(pdv_core, "", "  ALFA alimentos ") is alfa
+    assert find_fornecedor_by_doc_ou_nome(pdv_core, "999", "alfa alimentos") is alfa
+    assert find_fornecedor_by_doc_ou_nome(pdv_core, "", "Alfa") is None
+
+
+def test_nomes_acentuados_sem_diferenciar_acentos(pdv_core):
+    pdv_core.session.add_all(
+        [
+            Fornecedor(nome_razao_social="Água Pura Ltda"),
+            Fornecedor(nome_razao_social="Óleos Norte"),
+        ]
+    )
+    pdv_core.session.commit()
+    assert _nomes(pdv_core.listar_fornecedores("água")) == ["Água Pura Ltda"]
+    assert _nomes(pdv_core.listar_fornecedores("AGUA")) == ["Água Pura Ltda"]
+    assert _nomes(pdv_core.listar_fornecedores("ÓLEOS")) == ["Óleos Norte"]
+    # acentuados entram na ordem alfabética, não depois dos nomes ASCII
+    assert _nomes(pdv_core.listar_fornecedores(por_pagina=5)) == [
+        "Água Pura Ltda",
+        "Alfa Alimentos",
+        "Atacado Central",
+        "beta Bebidas",
+        "Óleos Norte",
+    ]
+    agua = find_fornecedor_by_doc_ou_nome(pdv_core, "", "Água Pura Ltda")
+    assert agua is not None and agua.nome_razao_social == "Água Pura Ltda"
+    assert find_fornecedor_by_doc_ou_nome(pdv_core, "", "ÁGUA PURA LTDA") is agua
+
+
+def test_renomear_atualiza_chave_de_busca(pdv_core):
+    beta = find_fornecedor_by_doc_ou_nome(pdv_core, "22.222.222/0001-22", "")
+    beta.nome_razao_social = "Érica Distribuidora"
+    pdv_core.session.commit()
+    assert _nomes(pdv_core.listar_fornecedores("eri")) == ["Érica Distribuidora"]
+    assert pdv_core.listar_fornecedores("beta")["total"] == 0
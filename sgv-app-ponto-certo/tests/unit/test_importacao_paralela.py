@@ -0,0 +1,130 @@
+"""Testes da importação de vários arquivos com pool de processos"""
+
+import csv
+
+from core.sgv import PDVCore
+from estoque import imports
+from fornecedores.utils_fornecedores import (
+    ler_arquivo_fornecedores,
+    mesclar_registros_fornecedores,
+)
+from models.db_models import Fornecedor, Produto
+from utils.processamento_paralelo import mapear_em_processos
+
+CABECALHO = ["Nome", "Categoria", "Validade", "Quantidade", "Preço", "Código de Barras"]
+
+
+def _csv(caminho, cabecalho, linhas):
+    with open(caminho, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(cabecalho)
+        w.writerows(linhas)
+    return str(caminho)
+
+
+def _dobro(x):
+    return x * 2
+
+
+def test_mapear_em_processos_preserva_ordem():
+    assert mapear_em_processos(_dobro, range(8), max_workers=2) == [
+        0,
+        2,
+        4,
+        6,
+        8,
+        10,
+        12,
+        14,
+    ]
+    assert mapear_em_processos(_dobro, [3]) == [6]
+    assert mapear_em_processos(_dobro, []) == []
+
+
+def test_simular_varios_arquivos_rotula_linhas_e_conflitos(tmp_path, session):
+    session.add(
+        Produto(
+            codigo_barras="111",
+            nome="Arroz",
+            preco_custo=0.0,
+            preco_venda=5.9,
+            estoque_atual=1,
+        )
+    )
+    session.commit()
+    a = _csv(
+        tmp_path / "a.csv",
+        CABECALHO,
+        [
+            ["Arroz", "Mercearia", "01/01/2027", 10, "5,90", "111"],
+            ["Feijão", "Mercearia", "01/01/2027", 8, "7,50", "222"],
+        ],
+    )
+    b = _csv(
+        tmp_path / "b.csv",
+        CABECALHO,
+        [
+            ["Feijão Outro", "Mercearia", "01/01/2027", 2, "7,50", "222"],
+            ["Café", "Mercearia", "01/01/2027", 6, "12,00", "555"],
+        ],
+    )
+
+    resultado = imports.simular_importacao_arquivos([a, b], session, max_workers=2)
+
+    assert resultado["erro"] is None
+    assert [i["nome"] for i in resultado["novos"]] == ["Feijão", "Café"]
+    assert len(resultado["alteracoes"]) == 1
+    assert resultado["conflitos"] == 1
+    conflito = next(e for e in resultado["entradas"] if e["tipo"] == "conflito")
+    assert conflito["linha"] == "b.csv:2"
+    assert "a.csv:3" in conflito["detalhe"]
+
+
+def test_simular_varios_arquivos_informa_falha_de_leitura(tmp_path, session):
+    a = _csv(tmp_path / "a.csv", CABECALHO, [["Arroz", "M", "", 1, "1,00", "1"]])
+    resultado = imports.simular_importacao_arquivos(
+        [a, str(tmp_path / "nao_existe.csv")], session
+    )
+    assert "nao_existe.csv" in resultado["erro"]
+    assert resultado["entradas"] == []
+
+
+def test_importar_fornecedores_de_varios_arquivos(tmp_path, session):
+    session.add(Fornecedor(nome_razao_social="Distribuidora Sul", cnpj_cpf="111"))
+    session.add(Fornecedor(nome_razao_social="Atacado Norte", cnpj_cpf="999"))
+    session.commit()
+    cabecalho = ["Nome", "CNPJ", "Telefone", "Status"]
+    a = _csv(
+        tmp_path / "a.csv",
+        cabecalho,
+        [
+            ["Distribuidora Sul Ltda", "11.1", "1111", "ativo"],
+            ["Laticínios Serra", "222", "2222", "ativo"],
+            ["", "333", "", ""],
+        ],
+    )
+    b = _csv(
+        tmp_path / "b.csv",
+        cabecalho,
+        [
+            ["Laticínios Serra", "222", "3333", "inativo"],
+            ["Atacado Norte", "444", "", "ativo"],
+        ],
+    )
+
+    leituras = mapear_em_processos(ler_arquivo_fornecedores, [a, b])
+    assert [r["erro"] for r in leituras] == [None, None]
+    assert sum(r["ignorados"] for r in leituras) == 1
+    registros, repetidos = mesclar_registros_fornecedores(
+        [r["registros"] for r in leituras]
+    )
+    assert repetidos == 1
+
+    resumo = PDVCore(session).importar_fornecedores(registros)
+
+    assert resumo == {"criados": 2, "atualizados": 1, "duplicados": 0, "erro": None}
+    sul = session.query(Fornecedor).filter_by(cnpj_cpf="111").one()
+    assert sul.nome_razao_social == "Distribuidora Sul Ltda"
+    serra = session.query(Fornecedor).filter_by(cnpj_cpf="222").one()
+    assert serra.status == "inativo"
+    assert session.query(Fornecedor).count() == 4
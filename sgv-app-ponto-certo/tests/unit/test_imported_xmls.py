@@ -0,0 +1,93 @@
+"""Testes do registro de XMLs importados em tabela indexada (imported_xmls)"""
+
+import json
+
+import pytest
+from sqlalchemy import select, text
+
+import models.db_models as db_models
+from models.db_models import Fornecedor, ImportedXml
+
+
+def _registro(nf, chave, data, cnpj="11.111.111/0001-11", total="10.00"):
+    return {
+        "nf": nf,
+        "chave": chave,
+        "data": data,
+        "fornecedor": "Alfa LTDA",
+        "cnpj": cnpj,
+        "total": total,
+        "itens": [{"nome": "Arroz", "q": "2", "v": total}],
+        "path": f"/tmp/{nf}.xml",
+    }
+
+
+@pytest.fixture
+def pdv_core(pdv_core):
+    session = pdv_core.session
+    session.add(Fornecedor(nome_razao_social="Alfa LTDA", cnpj_cpf="11111111000111"))
+    session.commit()
+    return pdv_core
+
+
+def test_save_imported_xml_vincula_fornecedor_e_atualiza_pela_chave(pdv_core):
+    assert pdv_core.save_imported_xml(_registro("1", "A" * 44, "2026-10-01"))[0]
+    assert pdv_core.save_imported_xml(_registro("2", "B" * 44, "18/10/2026"))[0]
+    ok, _ = pdv_core.save_imported_xml(
+        _registro("1", "A" * 44, "2026-10-01", total="12,50")
+    )
+    assert ok
+    assert pdv_core.session.query(ImportedXml).count() == 2
+
+    alfa = pdv_core.session.query(Fornecedor).one()
+    ultimos = pdv_core.get_imported_xmls_for_fornecedor(alfa.id, limit=5)
+    assert [(x["nf"], x["data"], x["total"]) for x in ultimos] == [
+        ("2", "2026-10-18", "10.00"),
+        ("1", "2026-10-01", "12.50"),
+    ]
+    assert ultimos[0]["fornecedor_id"] == alfa.id
+    assert ultimos[0]["itens"] == [{"nome": "Arroz", "q": "2", "v": "10.00"}]
+    assert pdv_core.chaves_xml_registradas(["A" * 44, "C" * 44, ""]) == {"A" * 44}
+
+
+def test_listar_imported_xmls_pagina_e_filtra(pdv_core):
+    for i in range(1, 8):
+        pdv_core.save_imported_xml(
+            _registro(str(i), f"{i:044d}", f"2026-10-{i:02d}", cnpj="999")
+        )
+    primeira = pdv_core.listar_imported_xmls(pagina=1, por_pagina=3)
+    assert primeira["total"] == 7
+    assert [x["nf"] for x in primeira["itens"]] == ["7", "6", "5"]
+    terceira = pdv_core.listar_imported_xmls(pagina=3, por_pagina=3)
+    assert [x["nf"] for x in terceira["itens"]] == ["1"]
+    assert pdv_core.listar_imported_xmls(termo="4")["total"] == 1
+    assert pdv_core.listar_imported_xmls(termo="alfa")["total"] == 7
+
+
+def test_consulta_de_duplicadas_usa_indice_da_chave(pdv_core):
+    session = pdv_core.session
+    consulta = (
+        select(ImportedXml.chave)
+        .where(ImportedXml.chave.in_(["x", "y"]))
+        .compile(session.get_bind(), compile_kwargs={"literal_binds": True})
+    )
+    plano = session.execute(text(f"EXPLAIN QUERY PLAN {consulta}")).fetchall()
+    assert any("ix_imported_xmls_chave" in str(linha) for linha in plano)
+
+
+def test_migracao_do_json_ignora_chaves_repetidas(tmp_path, monkeypatch, pdv_core):
+    registros = [
+        _registro("1", "A" * 44, "2026-01-10"),
+        _registro("1", "A" * 44, "2026-01-10"),
+        _registro("2", "", "2026-01-12", cnpj="22222222000122"),
+    ]
+    (tmp_path / "imported_xmls.json").write_text(json.dumps(registros))
+    monkeypatch.setattr(
+        db_models, "_app_config_path", lambda: tmp_path / "app_config.json"
+    )
+    assert db_models._importar_xmls_do_json(pdv_core.session)
+    xmls = pdv_core.get_all_imported_xmls()
+    assert [(x["nf"], x["chave"]) for x in xmls] == [("2", ""), ("1", "A" * 44)]
+    alfa = pdv_core.session.query(Fornecedor).one()
+    assert xmls[1]["fornecedor_id"] == alfa.id
+    assert xmls[0]["fornecedor_id"] is None
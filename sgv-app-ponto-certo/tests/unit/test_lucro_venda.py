@@ -0,0 +1,39 @@
+"""Testes do lucro real calculado a partir do custo gravado em ItemVenda"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.db_models import ItemVenda, Produto
+
+
+def test_finalizar_venda_grava_custo_e_soma_lucro(pdv_core):
+    produto = Produto(
+        codigo_barras="789",
+        nome="Arroz 1kg",
+        preco_custo=4.0,
+        preco_venda=6.5,
+        estoque_atual=10,
+    )
+    pdv_core.session.add(produto)
+    pdv_core.session.commit()
+
+    carrinho = [{"cod": "789", "nome": "Arroz 1kg", "qtd": 2, "preco": 6.5}]
+    ok, total, _ = pdv_core.finalizar_venda(carrinho, "Dinheiro", 20.0, None)
+    assert ok and total == 13.0
+    assert produto.estoque_atual == 8
+
+    # alterar o custo depois da venda não muda o lucro já registrado
+    produto.preco_custo = 6.0
+    pdv_core.session.commit()
+
+    item = pdv_core.session.query(ItemVenda).one()
+    assert item.custo_unitario == 4.0
+
+    inicio = datetime.now() - timedelta(hours=1)
+    fim = datetime.now() + timedelta(hours=1)
+    assert pdv_core.calcular_lucro_bruto_periodo(inicio, fim) == pytest.approx(5.0)
+    assert pdv_core.calcular_lucro_bruto_periodo(inicio, fim, "PIX") == 0.0
+
+    vendas = pdv_core.buscar_vendas_por_intervalo(inicio, fim)
+    assert vendas[0]["lucro"] == pytest.approx(5.0)
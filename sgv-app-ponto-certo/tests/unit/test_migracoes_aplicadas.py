@@ -0,0 +1,66 @@
+"""Testes do registro das migrações únicas no próprio banco"""
+
+import json
+
+import pytest
+from sqlalchemy import create_engine, text
+
+import models.db_models as db_models
+from models.db_models import MigracaoAplicada, get_session
+
+
+@pytest.fixture
+def ambiente(tmp_path, monkeypatch):
+    config = tmp_path / "app_config.json"
+    config.write_text(
+        json.dumps({"catalogo_migrado_para_banco": True}), encoding="utf-8"
+    )
+    monkeypatch.setattr(db_models, "_app_config_path", lambda: config)
+    monkeypatch.setattr(db_models, "DATABASE_URL", f"sqlite:///{tmp_path / 'teste.db'}")
+    return tmp_path, config
+
+
+def _chaves(engine):
+    session = get_session(engine)
+    try:
+        return {m.chave for m in session.query(MigracaoAplicada)}
+    finally:
+        session.close()
+
+
+def test_banco_novo_registra_migracoes_no_banco_e_nao_no_config(ambiente):
+    _, config = ambiente
+    antes = config.read_text(encoding="utf-8")
+    engine = db_models.init_db()
+    # banco novo: a flag do config (de outra instalação) não vale
+    assert "catalogo_migrado_para_banco" in _chaves(engine)
+    assert config.read_text(encoding="utf-8") == antes
+    engine.dispose()
+
+
+def test_banco_antigo_adota_flags_do_config(ambiente, monkeypatch):
+    pasta, _ = ambiente
+    # banco de uma versão anterior: tabelas existem, registro de migrações não
+    engine = create_engine(f"sqlite:///{pasta / 'teste.db'}")
+    db_models.Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE migracoes_aplicadas"))
+        conn.execute(
+            text(
+                "INSERT INTO produtos (codigo_barras, nome, preco_custo, "
+                "preco_venda, estoque_atual, ativo) VALUES ('1', 'A', 1, 2, 0, 1)"
+            )
+        )
+    engine.dispose()
+    chamadas = []
+    monkeypatch.setattr(
+        db_models,
+        "_importar_produtos_do_json",
+        lambda *args, **kwargs: chamadas.append(kwargs),
+    )
+
+    engine = db_models.init_db()
+    assert "catalogo_migrado_para_banco" in _chaves(engine)
+    # o catálogo já tinha sido migrado: não relê o produtos.json
+    assert chamadas == []
+    engine.dispose()
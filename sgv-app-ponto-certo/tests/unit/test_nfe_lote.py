@@ -0,0 +1,122 @@
+"""Testes da ingestão de NF-e em lote (leitura paralela + gravação única)"""
+
+import pytest
+
+from fornecedores.nfe_lote import listar_xmls_da_pasta, preparar_lote_nfe, registro_xml
+from models.db_models import Expense, Fornecedor, ImportedXml
+
+NFE = """<?xml version="1.0" encoding="UTF-8"?>
+<nfeProc xmlns="http://www.portalfiscal.inf.br/nfe">
+  <NFe><infNFe Id="NFe{chave}">
+    <ide><serie>1</serie><nNF>{numero}</nNF><dhEmi>2026-10-18</dhEmi></ide>
+    <emit><CNPJ>{cnpj}</CNPJ><xNome>{nome}</xNome></emit>
+    <det nItem="1"><prod><cProd>A1</cProd><cEAN>7891</cEAN><xProd>Arroz</xProd>
+      <qCom>2</qCom><vUnCom>5.00</vUnCom><vProd>10.00</vProd></prod></det>
+    <total><ICMSTot><vProd>10.00</vProd><vNF>{total}</vNF></ICMSTot></total>
+  </infNFe></NFe>
+</nfeProc>
+"""
+
+
+@pytest.fixture
+def pdv_core(pdv_core):
+    session = pdv_core.session
+    session.add(Fornecedor(nome_razao_social="Alfa LTDA", cnpj_cpf="11111111000111"))
+    session.commit()
+    return pdv_core
+
+
+@pytest.fixture
+def pasta(tmp_path):
+    notas = [
+        ("a.xml", "1" * 44, "1", "11111111000111", "Alfa LTDA", "10.00"),
+        ("b.xml", "2" * 44, "2", "22222222000122", "Beta SA", "30.50"),
+        ("c.xml", "1" * 44, "1", "11111111000111", "Alfa LTDA", "10.00"),
+        ("d.xml", "3" * 44, "3", "22222222000122", "Beta SA", "5.00"),
+        ("e.xml", "4" * 44, "4", "33333333000133", "Gama", "7.00"),
+    ]
+    for arquivo, chave, numero, cnpj, nome, total in notas:
+        (tmp_path / arquivo).write_text(
+            NFE.format(chave=chave, numero=numero, cnpj=cnpj, nome=nome, total=total),
+            encoding="utf-8",
+        )
+    (tmp_path / "quebrado.xml").write_text("<nfeProc>", encoding="utf-8")
+    (tmp_path / "leia-me.txt").write_text("ignorar", encoding="utf-8")
+    return tmp_path
+
+
+def test_preparar_lote_deduplica_por_chave_e_separa_erros(pasta):
+    caminhos = listar_xmls_da_pasta(pasta)
+    assert [p.rsplit("/", 1)[-1] for p in caminhos] == [
+        "a.xml",
+        "b.xml",
+        "c.xml",
+        "d.xml",
+        "e.xml",
+        "quebrado.xml",
+    ]
+    lote = preparar_lote_nfe(caminhos, chaves_registradas={"4" * 44}, max_workers=2)
+    assert [n["numero"] for n in lote["notas"]] == ["1", "2", "3"]
+    assert [p.rsplit("/", 1)[-1] for p in lote["duplicadas"]] == ["c.xml", "e.xml"]
+    assert [e["path"].rsplit("/", 1)[-1] for e in lote["erros"]] == ["quebrado.xml"]
+    assert lote["notas"][0]["path"].endswith("a.xml")
+
+
+def test_importar_lote_cria_fornecedores_e_contas_em_uma_transacao(pasta, pdv_core):
+    lote = preparar_lote_nfe(listar_xmls_da_pasta(pasta), max_workers=1)
+    resumo = pdv_core.importar_lote_nfe(lote["notas"], vencimento="25/10/2026")
+    assert resumo["erro"] is None
+    assert resumo["notas"] == 4
+    assert resumo["fornecedores_criados"] == 2  # Beta (uma vez) e Gama
+    assert resumo["contas_criadas"] == 4
+    assert resumo["valor_total"] == pytest.approx(52.5)
+
+    session = pdv_core.session
+    alfa = session.query(Fornecedor).filter_by(cnpj_cpf="11111111000111").one()
+    beta = session.query(Fornecedor).filter_by(cnpj_cpf="22222222000122").one()
+    assert resumo["fornecedor_ids"][:3] == [alfa.id, beta.id, beta.id]
+    contas = session.query(Expense).order_by(Expense.id).all()
+    assert [c.descricao for c in contas][:2] == [
+        "Boleto NF-e 1 - Alfa LTDA",
+        "Boleto NF-e 2 - Beta SA",
+    ]
+    assert {str(c.vencimento) for c in contas} == {"2026-10-25"}
+
+    xmls = session.query(ImportedXml).order_by(ImportedXml.id).all()
+    assert [(x.numero, x.fornecedor_id) for x in xmls][:2] == [
+        ("1", alfa.id),
+        ("2", beta.id),
+    ]
+
+    # reimportar a pasta: todas as chaves já estão registradas no banco
+    de_novo = pdv_core.importar_lote_nfe(lote["notas"])
+    assert (de_novo["notas"], de_novo["duplicadas"]) == (0, 4)
+    assert session.query(Expense).count() == 4
+
+    registro = registro_xml(lote["notas"][1], resumo["fornecedor_ids"][1])
+    assert (registro["nf"], registro["total"], registro["fornecedor_id"]) == (
+        "2",
+        "30.50",
+        beta.id,
+    )
+    assert registro["itens"][0]["q"] == "2"
+
+
+def test_importar_lote_sem_boleto_nao_cria_contas(pasta, pdv_core):
+    lote = preparar_lote_nfe([str(pasta / "b.xml")])
+    resumo = pdv_core.importar_lote_nfe(lote["notas"], forma_pagamento="Pix")
+    assert (resumo["notas"], resumo["contas_criadas"]) == (1, 0)
+    assert pdv_core.session.query(Expense).count() == 0
+
+
+def test_importar_lote_casa_documento_com_mascara(pasta, pdv_core):
+    session = pdv_core.session
+    beta = Fornecedor(nome_razao_social="Beta", cnpj_cpf="22.222.222/0001-22")
+    session.add(beta)
+    session.commit()
+
+    lote = preparar_lote_nfe([str(pasta / "b.xml"), str(pasta / "d.xml")])
+    resumo = pdv_core.importar_lote_nfe(lote["notas"], forma_pagamento="Pix")
+    assert resumo["fornecedores_criados"] == 0
+    assert resumo["fornecedor_ids"] == [beta.id, beta.id]
+    assert session.query(Fornecedor).count() == 2
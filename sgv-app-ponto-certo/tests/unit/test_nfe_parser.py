@@ -0,0 +1,103 @@
+"""Testes do parser de NF-e em passada única"""
+
+import io
+from pathlib import Path
+
+import pytest
+
+from fornecedores.nfe_parser import parse_nfe
+
+AMOSTRA = Path(__file__).resolve().parents[2] / "data" / "samples" / "sample_nfe.xml"
+
+NFE_PROC = """<?xml version="1.0" encoding="UTF-8"?>
+<nfeProc xmlns="http://www.portalfiscal.inf.br/nfe" versao="4.00">
+  <NFe>
+    <infNFe Id="NFe35261012345678000199550010000012341000012345" versao="4.00">
+      <ide><cNF>00001234</cNF><serie>1</serie><nNF>1234</nNF>
+        <dhEmi>2026-10-18T09:30:00-03:00</dhEmi>
+        <NFref><refNFe>99999999999999999999999999999999999999999999</refNFe></NFref>
+      </ide>
+      <emit><CNPJ>12345678000199</CNPJ><xNome>Distribuidora Alfa LTDA</xNome>
+        <xFant>Alfa</xFant><enderEmit><xLgr>Rua A</xLgr><xMun>Recife</xMun></enderEmit>
+        <IE>123456</IE></emit>
+      <dest><CNPJ>98765432000100</CNPJ><xNome>Mercadinho Ponto Certo</xNome></dest>
+      <det nItem="1"><prod><cProd>A1</cProd><cEAN>7891000100103</cEAN>
+        <xProd>Arroz 5kg</xProd><NCM>10063021</NCM><CFOP>5102</CFOP><uCom>UN</uCom>
+        <qCom>10.0000</qCom><vUnCom>15.0000000000</vUnCom><vProd>150.00</vProd>
+        <rastro><nLote>L77</nLote><qLote>6.000</qLote><dFab>2026-09-01</dFab>
+          <dVal>2027-03-01</dVal></rastro>
+        <rastro><nLote>L78</nLote><qLote>4.000</qLote><dVal>2027-04-01</dVal></rastro>
+        </prod>
+        <imposto><ICMS><ICMS00><vBC>150.00</vBC></ICMS00></ICMS></imposto></det>
+      <det nItem="2"><prod><cProd>B2</cProd><cEAN>SEM GTIN</cEAN>
+        <xProd>Feijao 1kg</xProd><uCom>CX</uCom>
+        <qCom>2.5000</qCom><vUnCom>8.00</vUnCom><vProd>20.00</vProd></prod></det>
+      <total><ICMSTot><vProd>170.00</vProd><vNF>172.50</vNF></ICMSTot></total>
+    </infNFe>
+    <Signature xmlns="http://www.w3.org/2000/09/xmldsig#">
+      <SignedInfo><Reference><DigestValue>abc</DigestValue></Reference></SignedInfo>
+    </Signature>
+  </NFe>
+  <protNFe><infProt><chNFe>35261012345678000199550010000012341000012345</chNFe>
+    <nProt>135260000000001</nProt></infProt></protNFe>
+</nfeProc>
+"""
+
+
+def test_amostra_do_repositorio():
+    nota = parse_nfe(AMOSTRA)
+    assert nota["numero"] == "9876"
+    assert nota["chave"] == "123"
+    assert nota["emitente"]["cnpj"] == "12345678000199"
+    assert nota["emitente"]["nome"] == "Fornecedor Exemplo LTDA"
+    assert nota["total"] == 150.0
+    assert [(i["nome"], i["quantidade"], i["valor_total"]) for i in nota["itens"]] == [
+        ("Arroz 5kg", 10.0, 150.0)
+    ]
+
+
+def test_nfe_processada_com_destinatario_e_assinatura():
+    nota = parse_nfe(io.BytesIO(NFE_PROC.encode()))
+    assert nota["chave"] == "35261012345678000199550010000012341000012345"
+    assert (nota["numero"], nota["serie"]) == ("1234", "1")
+    assert nota["data_emissao"] == "2026-10-18T09:30:00-03:00"
+    # emitente, não o destinatário (que também tem CNPJ/xNome)
+    assert nota["emitente"] == {
+        "cnpj": "12345678000199",
+        "cpf": "",
+        "nome": "Distribuidora Alfa LTDA",
+        "fantasia": "Alfa",
+        "ie": "123456",
+    }
+    # vNF do ICMSTot, não o vProd do primeiro item
+    assert (nota["total"], nota["total_produtos"]) == (172.5, 170.0)
+    primeiro, segundo = nota["itens"]
+    assert primeiro == {
+        "numero": 1,
+        "codigo": "A1",
+        "ean": "7891000100103",
+        "nome": "Arroz 5kg",
+        "ncm": "10063021",
+        "cfop": "5102",
+        "unidade": "UN",
+        "quantidade": 10.0,
+        "valor_unitario": 15.0,
+        "valor_total": 150.0,
+        "rastros": [
+            {"lote": "L77", "quantidade": 6.0, "validade": "2027-03-01"},
+            {"lote": "L78", "quantidade": 4.0, "validade": "2027-04-01"},
+        ],
+    }
+    assert segundo["rastros"] == []
+    assert (segundo["ean"], segundo["quantidade"], segundo["unidade"]) == (
+        "",
+        2.5,
+        "CX",
+    )
+
+
+def test_xml_invalido_ou_sem_nfe():
+    with pytest.raises(ValueError):
+        parse_nfe(io.BytesIO(b"<nfeProc><NFe>"))
+    with pytest.raises(ValueError):
+        parse_nfe(io.BytesIO(b"<planilha><linha>1</linha></planilha>"))
@@ -0,0 +1,183 @@
+"""Testes do histórico de custos por fornecedor e do melhor custo recente"""
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from models.db_models import Fornecedor, PrecoFornecedor, Produto
+
+
+@pytest.fixture
+def pdv_core(pdv_core):
+    session = pdv_core.session
+    alfa = Fornecedor(nome_razao_social="Alfa", cnpj_cpf="11111111000111")
+    beta = Fornecedor(nome_razao_social="Beta", cnpj_cpf="22222222000122")
+    session.add_all([alfa, beta])
+    session.flush()
+    session.add_all(
+        [
+            Produto(
+                codigo_barras="789",
+                nome="Arroz",
+                preco_custo=10.0,
+                preco_venda=15.0,
+                estoque_atual=0,
+                fornecedor_id=beta.id,
+            ),
+            Produto(
+                codigo_barras="790",
+                nome="Feijão",
+                preco_custo=6.0,
+                preco_venda=9.0,
+                estoque_atual=20,
+            ),
+        ]
+    )
+    session.commit()
+    return pdv_core
+
+
+def _ids(pdv_core):
+    session = pdv_core.session
+    produtos = {p.nome: p.id for p in session.query(Produto)}
+    fornecedores = {f.nome_razao_social: f.id for f in session.query(Fornecedor)}
+    return produtos, fornecedores
+
+
+def _preco(produto_id, fornecedor_id, custo, dias_atras):
+    return PrecoFornecedor(
+        produto_id=produto_id,
+        fornecedor_id=fornecedor_id,
+        custo=custo,
+        data=date.today() - timedelta(days=dias_atras),
+        origem="nfe",
+    )
+
+
+def test_entrada_nfe_e_edicao_manual_gravam_historico(pdv_core):
+    produtos, fornecedores = _ids(pdv_core)
+    nota = {
+        "numero": "5",
+        "chave": "K5",
+        "data_emissao": "2026-10-10T08:00:00-03:00",
+        "emitente": {"cnpj": "11111111000111", "cpf": "", "nome": "Alfa"},
+        "itens": [
+            {
+                "codigo": "A",
+                "ean": "",
+                "nome": "ARROZ",
+                "quantidade": 4,
+                "valor_total": 36.0,
+            },
+        ],
+    }
+    ok, _ = pdv_core.lancar_entrada_nfe(
+        nota, [produtos["Arroz"]], atualizar_custo=False
+    )
+    assert ok
+
+    # custo igual ao atual não gera registro; custo novo vai com o fornecedor
+    # do cadastro do produto
+    pdv_core.atualizar_preco_produto(produtos["Arroz"], 10.0, 16.0)
+    pdv_core.atualizar_preco_produto(produtos["Arroz"], 9.5, 16.0)
+
+    historico = pdv_core.historico_custos_produto(produtos["Arroz"])
+    assert [(h["origem"], h["custo"], h["fornecedor_nome"]) for h in historico] == [
+        ("manual", 9.5, "Beta"),
+        ("nfe", 9.0, "Alfa"),
+    ]
+    assert historico[1]["data"] == date(2026, 10, 10)
+    assert historico[1]["chave_nfe"] == "K5"
+    assert historico[1]["fornecedor_id"] == fornecedores["Alfa"]
+
+    pdv_core.cadastrar_ou_atualizar_produto(
+        {
+            "codigo_barras": "791",
+            "nome": "Açúcar",
+            "preco_custo": 4.0,
+            "preco_venda": 6.0,
+            "quantidade": 1,
+            "validade": None,
+        }
+    )
+    acucar = pdv_core.session.query(Produto).filter_by(codigo_barras="791").one()
+    assert [h["custo"] for h in pdv_core.historico_custos_produto(acucar.id)] == [4.0]
+    # sem fornecedor o custo manual fica no histórico, mas não é melhor custo
+    assert pdv_core.melhores_custos([acucar.id]) == {}
+
+
+def test_entrada_nfe_casa_fornecedor_com_documento_mascarado(pdv_core):
+    produtos, fornecedores = _ids(pdv_core)
+    beta = pdv_core.session.get(Fornecedor, fornecedores["Beta"])
+    beta.cnpj_cpf = "22.222.222/0001-22"
+    pdv_core.session.commit()
+    nota = {
+        "numero": "6",
+        "chave": "K6",
+        "data_emissao": "2026-10-11",
+        "emitente": {"cnpj": "22222222000122", "cpf": "", "nome": "Beta"},
+        "itens": [
+            {
+                "codigo": "F",
+                "ean": "",
+                "nome": "FEIJAO",
+                "quantidade": 2,
+                "valor_total": 10.0,
+            }
+        ],
+    }
+    ok, _ = pdv_core.lancar_entrada_nfe(nota, [produtos["Feijão"]])
+    assert ok
+    historico = pdv_core.historico_custos_produto(produtos["Feijão"])
+    assert [(h["custo"], h["fornecedor_id"]) for h in historico] == [
+        (5.0, fornecedores["Beta"])
+    ]
+
+
+def test_melhor_custo_usa_ultimo_preco_de_cada_fornecedor(pdv_core):
+    produtos, fornecedores = _ids(pdv_core)
+    arroz, feijao = produtos["Arroz"], produtos["Feijão"]
+    alfa, beta = fornecedores["Alfa"], fornecedores["Beta"]
+    pdv_core.session.add_all(
+        [
+            _preco(arroz, alfa, 7.0, 30),  # substituído pelo preço mais novo
+            _preco(arroz, alfa, 9.0, 2),
+            _preco(arroz, beta, 8.5, 10),
+            _preco(feijao, alfa, 3.0, 400),  # fora do período
+            _preco(feijao, beta, 5.0, 1),
+            _preco(feijao, None, 0.6, 0),  # custo digitado sem fornecedor
+        ]
+    )
+    pdv_core.session.commit()
+
+    melhores = pdv_core.melhores_custos([arroz, feijao])
+    assert (melhores[arroz]["custo"], melhores[arroz]["fornecedor_nome"]) == (
+        8.5,
+        "Beta",
+    )
+    assert (melhores[feijao]["custo"], melhores[feijao]["fornecedor_id"]) == (
+        5.0,
+        beta,
+    )
+    assert pdv_core.melhores_custos([feijao], dias=500)[feijao]["custo"] == 3.0
+    assert pdv_core.melhores_custos([]) == {}
+
+    relatorio = {r["nome"]: r for r in pdv_core.gerar_relatorio_produtos()}
+    assert relatorio["Arroz"]["melhor_custo"] == 8.5
+    # sugestão de compra: produtos abaixo do mínimo trazem o melhor custo
+    baixo = pdv_core.listar_estoque_baixo()["itens"]
+    assert [(i["nome"], i["melhor_fornecedor"]) for i in baixo] == [("Arroz", "Beta")]
+
+
+def test_melhor_custo_percorre_indice(pdv_core):
+    plano = pdv_core.session.execute(
+        text(
+            "EXPLAIN QUERY PLAN SELECT produto_id, fornecedor_id, custo, "
+            "row_number() OVER (PARTITION BY produto_id, fornecedor_id "
+            "ORDER BY data DESC) FROM precos_fornecedor WHERE produto_id IN (1, 2)"
+        )
+    ).all()
+    assert any(
+        "ix_precos_fornecedor_produto_fornecedor_data" in linha[-1] for linha in plano
+    )
@@ -0,0 +1,74 @@
+"""Testes do resumo de alertas em cache (versões de estoque e contas)"""
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from alertas.alertas_manager import AlertasManager
+from models.db_models import Produto
+
+
+@pytest.fixture
+def pdv_core(pdv_core):
+    session = pdv_core.session
+    session.add(
+        Produto(
+            codigo_barras="1",
+            nome="Produto 1",
+            preco_custo=1.0,
+            preco_venda=2.0,
+            estoque_atual=12,
+        )
+    )
+    session.commit()
+    pdv_core.create_expense("Luz", 50.0, date.today() - timedelta(days=1), "Outros")
+    return pdv_core
+
+
+@pytest.fixture
+def manager(tmp_path, pdv_core):
+    am = AlertasManager(alertas_dir=tmp_path)
+    am.conectar(pdv_core)
+    return am
+
+
+def _consultas(pdv_core):
+    consultas = []
+    event.listen(
+        pdv_core.session.get_bind(),
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: consultas.append(statement),
+    )
+    return consultas
+
+
+def test_resumo_repetido_nao_consulta_o_banco(pdv_core, manager):
+    primeiro = manager.obter_resumo_alertas(pdv_core)
+    assert (primeiro["total"], primeiro["contas_vencidas"]) == (1, 1)
+
+    consultas = _consultas(pdv_core)
+    segundo = manager.obter_resumo_alertas(pdv_core)
+    assert consultas == []
+    assert segundo == primeiro
+    # cópia: quem altera o resumo não contamina o cache
+    segundo["total"] = 99
+    assert manager.obter_resumo_alertas(pdv_core)["total"] == 1
+
+
+def test_gravacoes_de_estoque_e_contas_invalidam_o_resumo(pdv_core, manager):
+    manager.obter_resumo_alertas(pdv_core)
+
+    carrinho = [{"cod": "1", "nome": "Produto 1", "qtd": 5, "preco": 2.0}]
+    ok, _, _ = pdv_core.finalizar_venda(carrinho, "Dinheiro", 10.0, None)
+    assert ok
+    resumo = manager.obter_resumo_alertas(pdv_core)
+    assert (resumo["total"], resumo["estoque_moderado"]) == (2, 1)
+
+    conta = resumo["detalhes_vencidas"][0]
+    assert pdv_core.mark_expense_as_paid(conta["id"])
+    resumo = manager.obter_resumo_alertas(pdv_core)
+    assert (resumo["total"], resumo["contas_vencidas"]) == (1, 0)
+
+    pdv_core.create_expense("Água", 30.0, date.today() + timedelta(days=2), "Outros")
+    assert manager.obter_resumo_alertas(pdv_core)["contas_proximas"] == 1
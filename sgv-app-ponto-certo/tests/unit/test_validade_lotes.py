@@ -0,0 +1,154 @@
+"""Testes da validade como data e da seleção de lotes FEFO"""
+
+from datetime import date, datetime, timedelta
+
+from models.db_models import ItemVenda, LoteProduto, Produto, validade_para_date
+
+HOJE = date(2026, 10, 19)
+
+
+def _produto(pdv_core, codigo, validade=None, ativo=True, estoque=0):
+    produto = Produto(
+        codigo_barras=codigo,
+        nome=f"Produto {codigo}",
+        preco_custo=1.0,
+        preco_venda=2.0,
+        estoque_atual=estoque,
+        validade=validade,
+        ativo=ativo,
+    )
+    pdv_core.session.add(produto)
+    pdv_core.session.commit()
+    return produto
+
+
+def test_validade_para_date_aceita_formatos_legados():
+    assert validade_para_date("26/11/2028") == date(2028, 11, 26)
+    assert validade_para_date("2028-11-26") == date(2028, 11, 26)
+    assert validade_para_date(datetime(2028, 11, 26, 15, 0)) == date(2028, 11, 26)
+    assert validade_para_date("") is None
+    assert validade_para_date("31/02/2028") is None
+
+
+def test_contar_produtos_vencendo(pdv_core):
+    _produto(pdv_core, "1", HOJE - timedelta(days=1))
+    _produto(pdv_core, "2", HOJE)
+    _produto(pdv_core, "3", HOJE + timedelta(days=30))
+    _produto(pdv_core, "4", HOJE + timedelta(days=31))
+    _produto(pdv_core, "5", None)
+    _produto(pdv_core, "6", HOJE - timedelta(days=5), ativo=False)
+
+    assert pdv_core.contar_validade(30, hoje=HOJE) == {"vencidos": 1, "vencendo": 2}
+
+
+def test_selecao_fefo_deixa_sem_validade_e_vencidos_por_ultimo(pdv_core):
+    produto = _produto(pdv_core, "789")
+    for lote, validade, qtd in (
+        ("C", None, 10),
+        ("B", HOJE + timedelta(days=20), 5),
+        ("A", HOJE + timedelta(days=3), 4),
+        ("X", HOJE - timedelta(days=1), 7),
+    ):
+        ok, _ = pdv_core.registrar_lote(produto.id, qtd, validade, lote)
+        assert ok
+
+    assert produto.estoque_atual == 26
+    # o produto exibe o lote mais próximo de vencer (inclusive o vencido)
+    assert (produto.lote, produto.validade) == ("X", HOJE - timedelta(days=1))
+
+    selecao = pdv_core.selecionar_lotes_fefo(produto.id, 12, hoje=HOJE)
+    assert [(lote.lote, qtd) for lote, qtd in selecao] == [
+        ("A", 4),
+        ("B", 5),
+        ("C", 3),
+    ]
+    # mesma regra da baixa das vendas: vencidos só depois de todos os outros
+    selecao = pdv_core.selecionar_lotes_fefo(produto.id, 30, hoje=HOJE)
+    assert [(lote.lote, qtd) for lote, qtd in selecao] == [
+        ("A", 4),
+        ("B", 5),
+        ("C", 10),
+        ("X", 7),
+    ]
+    vencendo = pdv_core.lotes_vencendo(7, hoje=HOJE)
+    assert [lote.lote for lote in vencendo] == ["A"]
+
+
+def test_finalizar_venda_baixa_lotes_em_ordem_fefo(pdv_core):
+    produto = _produto(pdv_core, "789")
+    hoje = date.today()
+    pdv_core.registrar_lote(produto.id, 3, hoje + timedelta(days=10), "L2")
+    pdv_core.registrar_lote(produto.id, 2, hoje + timedelta(days=2), "L1")
+
+    carrinho = [{"cod": "789", "nome": produto.nome, "qtd": 4, "preco": 2.0}]
+    ok, _, _ = pdv_core.finalizar_venda(carrinho, "Dinheiro", 10.0, None)
+
+    assert ok
+    saldos = {
+        lote.lote: lote.quantidade for lote in pdv_core.session.query(LoteProduto)
+    }
+    assert saldos == {"L1": 0, "L2": 1}
+    assert produto.estoque_atual == 1
+    assert (produto.lote, produto.validade) == ("L2", hoje + timedelta(days=10))
+
+
+def _saldos(pdv_core, produto):
+    """(lote, quantidade) dos lotes do produto; lote sem código como ""."""
+    lotes = pdv_core.session.query(LoteProduto).filter_by(produto_id=produto.id)
+    return sorted((lote.lote or "", lote.quantidade) for lote in lotes)
+
+
+def test_venda_sem_lote_suficiente_concilia_estoque_anterior(pdv_core):
+    # 5 un. anteriores ao controle de lotes + um lote de 2
+    produto = _produto(pdv_core, "789", HOJE + timedelta(days=60), estoque=5)
+    pdv_core.registrar_lote(produto.id, 2, date.today() + timedelta(days=5), "L1")
+    assert sum(q for _, q in _saldos(pdv_core, produto)) == 7
+
+    carrinho = [{"cod": "789", "nome": produto.nome, "qtd": 4, "preco": 2.0}]
+    ok, _, _ = pdv_core.finalizar_venda(carrinho, "Dinheiro", 10.0, None)
+
+    assert ok
+    assert produto.estoque_atual == 3
+    # o lote L1 (mais próximo) sai primeiro; o restante vem do estoque anterior
+    assert _saldos(pdv_core, produto) == [("", 3), ("L1", 0)]
+
+
+def test_estorno_e_cadastro_mantem_lotes_iguais_ao_estoque(pdv_core):
+    from estoque import repository as repo
+
+    dados = repo.salvar_produto(
+        pdv_core.session,
+        {
+            "nome": "Leite",
+            "codigo_barras": "123",
+            "quantidade": 10,
+            "validade": HOJE + timedelta(days=15),
+            "lote": "A1",
+        },
+    )
+    produto = pdv_core.session.get(Produto, dados["id"])
+    assert _saldos(pdv_core, produto) == [("A1", 10)]
+
+    # aumento pela edição entra como lote novo com a validade informada
+    repo.salvar_produto(
+        pdv_core.session,
+        {
+            **dados,
+            "quantidade": 14,
+            "validade": HOJE + timedelta(days=40),
+            "lote": "B2",
+        },
+    )
+    assert _saldos(pdv_core, produto) == [("A1", 10), ("B2", 4)]
+    # o produto volta a exibir o lote mais próximo de vencer
+    assert (produto.lote, produto.validade) == ("A1", HOJE + timedelta(days=15))
+
+    carrinho = [{"cod": "123", "nome": "Leite", "qtd": 12, "preco": 2.0}]
+    pdv_core.finalizar_venda(carrinho, "Dinheiro", 30.0, None)
+    assert _saldos(pdv_core, produto) == [("A1", 0), ("B2", 2)]
+
+    venda_id = pdv_core.session.query(ItemVenda.venda_id).scalar()
+    ok, _ = pdv_core.estornar_vendas([venda_id])
+    assert ok
+    assert produto.estoque_atual == 14
+    assert sum(q for _, q in _saldos(pdv_core, produto)) == 14
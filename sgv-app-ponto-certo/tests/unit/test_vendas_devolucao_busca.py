@@ -0,0 +1,97 @@
+"""Testes da busca de vendas para devolução/troca no caixa"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from models.db_models import ItemVenda, Produto, Venda
+from vendas.vendas_devolucoes_logic import (
+    buscar_vendas_do_caixa,
+    buscar_vendas_para_devolucao,
+)
+
+
+@pytest.fixture
+def pdv_core(pdv_core):
+    session = pdv_core.session
+    produtos = [
+        Produto(
+            codigo_barras=f"789{i}",
+            nome=f"Produto {i}",
+            preco_custo=1.0,
+            preco_venda=2.0,
+            estoque_atual=100,
+        )
+        for i in range(3)
+    ]
+    session.add_all(produtos)
+    session.flush()
+    inicio = datetime(2026, 10, 1, 9, 0)
+    for n in range(30):
+        venda = Venda(
+            data_venda=inicio + timedelta(hours=n),
+            total=4.0,
+            usuario_responsavel="caixa1" if n % 2 else "caixa2",
+            transaction_id=f"TX{n:03d}",
+            status="ESTORNADA" if n == 29 else "CONCLUIDA",
+        )
+        venda.itens = [
+            ItemVenda(produto_id=produtos[n % 3].id, quantidade=1, preco_unitario=2.0),
+            ItemVenda(produto_id=produtos[0].id, quantidade=1, preco_unitario=2.0),
+        ]
+        session.add(venda)
+    session.commit()
+    return pdv_core
+
+
+def _contar_consultas(pdv_core):
+    consultas = []
+    event.listen(
+        pdv_core.session.get_bind(),
+        "before_cursor_execute",
+        lambda *args: consultas.append(args[2]),
+    )
+    return consultas
+
+
+def test_busca_por_numero_transacao_e_codigo(pdv_core):
+    por_numero = buscar_vendas_para_devolucao(pdv_core, "#5")
+    assert [v["id"] for v in por_numero] == [5]
+    assert {i["nome"] for i in por_numero[0]["itens"]} == {"Produto 0", "Produto 1"}
+
+    por_transacao = buscar_vendas_para_devolucao(pdv_core, "TX010")
+    assert [v["transaction_id"] for v in por_transacao] == ["TX010"]
+
+    # código vendido: vendas n % 3 == 2 (exceto a estornada, n = 29)
+    por_codigo = buscar_vendas_para_devolucao(pdv_core, "7892", limite=0)
+    assert len(por_codigo) == 9
+    assert all(v["status"] == "CONCLUIDA" for v in por_codigo)
+
+
+def test_busca_por_periodo_e_usuario(pdv_core):
+    vendas = buscar_vendas_para_devolucao(
+        pdv_core,
+        usuario_responsavel="caixa1",
+        data_inicio=datetime(2026, 10, 1, 9, 0),
+        data_fim=datetime(2026, 10, 1, 15, 0),
+    )
+    assert [v["id"] for v in vendas] == [6, 4, 2]
+
+
+def test_itens_carregados_em_numero_constante_de_consultas(pdv_core):
+    pdv_core.session.expunge_all()
+    consultas = _contar_consultas(pdv_core)
+
+    vendas = buscar_vendas_para_devolucao(pdv_core, "7891", limite=0)
+    assert len(vendas) == 10
+    assert all(len(v["itens"]) == 2 for v in vendas)
+    assert len(consultas) == 2
+
+    consultas.clear()
+    recentes = buscar_vendas_do_caixa(pdv_core, "caixa1", limite=10)
+    assert len(recentes) == 10
+    assert len(consultas) == 2
+    # a venda mais recente do caixa1 (#30) foi estornada: não é oferecida
+    assert recentes[0]["id"] == 28
+    assert all(v["status"] == "CONCLUIDA" for v in recentes)
@@ -0,0 +1,35 @@
+"""Execução de tarefas pesadas de CPU (ex.: leitura de planilhas) em processos.
+
+As funções passadas ao pool precisam estar definidas no nível de módulo
+(picklable) e não devem depender de Flet nem da sessão do banco.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterable, List, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def mapear_em_processos(
+    funcao: Callable[[T], R], itens: Iterable[T], max_workers: Optional[int] = None
+) -> List[R]:
+    """Aplica `funcao` a cada item em um pool de processos, preservando a ordem.
+
+    Usa um processo por item até o número de núcleos da máquina. Com um único
+    item, ou se o pool não puder ser criado, executa no processo atual.
+    """
+    itens = list(itens)
+    if len(itens) <= 1:
+        return [funcao(item) for item in itens]
+    workers = min(len(itens), max_workers or os.cpu_count() or 1)
+    if workers <= 1:
+        return [funcao(item) for item in itens]
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(funcao, itens))
+    except (OSError, BrokenProcessPool, NotImplementedError) as e:
+        print(f"[PARALELO] Pool de processos indisponível ({e}); executando em série")
+        return [funcao(item) for item in itens]
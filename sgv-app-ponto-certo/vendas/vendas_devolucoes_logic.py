@@ -2,16 +2,24 @@
 Lógica de suporte para Devolver & Trocar no Caixa.
 
 Fornece funções utilizadas pela UI para listar vendas recentes
-por usuário e preparar itens da venda para operação de troca.
+por usuário e localizar uma venda (número, transação, código de barras
+vendido ou período) com os itens já carregados para a troca.
 """
 
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import exists, or_
+from sqlalchemy.orm import selectinload
 
 from models.db_models import ItemVenda, Produto, Venda
 
+# Itens e produtos carregados junto com as vendas: duas consultas no total,
+# independentemente de quantas vendas/itens forem listados
+_COM_ITENS = selectinload(Venda.itens).joinedload(ItemVenda.produto)
+
 
 def _format_datetime(dt: datetime) -> str:
     try:
@@ -20,100 +28,113 @@ def _format_datetime(dt: datetime) -> str:
         return str(dt)
 
 
+def _itens_da_venda(venda: Venda) -> List[Dict[str, Any]]:
+    """Itens da venda no formato do carrinho de troca."""
+    itens: List[Dict[str, Any]] = []
+    for it in venda.itens:
+        itens.append(
+            {
+                "item_id": it.id,
+                "produto_id": it.produto_id,
+                "nome": it.produto.nome if it.produto else "Produto",
+                "qtd": it.quantidade or 0,
+                "preco": float(it.preco_unitario or 0.0),
+            }
+        )
+    return itens
+
+
+def _resumo_venda(venda: Venda) -> Dict[str, Any]:
+    itens = _itens_da_venda(venda)
+    nomes = [f"{it['nome']} x {it['qtd']}" for it in itens]
+    return {
+        "id": venda.id,
+        "data": _format_datetime(venda.data_venda),
+        "total": float(venda.total or 0.0),
+        "pagamento": venda.forma_pagamento or "",
+        "status": venda.status,
+        "transaction_id": venda.transaction_id,
+        "resumo": ", ".join(nomes) if nomes else "Sem itens",
+        "itens": itens,
+    }
+
+
 def buscar_vendas_do_caixa(
     pdv_core, usuario_responsavel: Optional[str], limite: int = 20
 ) -> List[Dict[str, Any]]:
     """Retorna vendas recentes do usuário informado com resumo dos itens.
 
+    Vendas estornadas não entram (não podem ser devolvidas nem trocadas).
+
     Estrutura de retorno por venda:
     {
         "id": int,
         "data": "dd/mm/aaaa HH:MM",
         "total": float,
         "pagamento": str,
-        "resumo": "Produto x qtd, Produto y qtd, ..."
+        "status": str,
+        "transaction_id": str | None,
+        "resumo": "Produto x qtd, Produto y qtd, ...",
+        "itens": [{"item_id", "produto_id", "nome", "qtd", "preco"}, ...]
     }
     """
     try:
-        q = pdv_core.session.query(Venda)
+        q = (
+            pdv_core.session.query(Venda)
+            .options(_COM_ITENS)
+            .filter(Venda.status != "ESTORNADA")
+        )
         # Se um usuário específico foi informado, filtrar; caso contrário, listar todas
         if usuario_responsavel:
             q = q.filter(Venda.usuario_responsavel == usuario_responsavel)
         q = q.order_by(Venda.data_venda.desc())
         if limite and limite > 0:
             q = q.limit(limite)
-        vendas = q.all()
-
-        saida: List[Dict[str, Any]] = []
-        for v in vendas:
-            nomes = []
-            for it in getattr(v, "itens", []):
-                nome = None
-                try:
-                    if it.produto:
-                        nome = it.produto.nome
-                    else:
-                        nome = "(produto)"
-                except Exception:
-                    nome = "(produto)"
-                qtd = getattr(it, "quantidade", 0) or 0
-                nomes.append(f"{nome} x {qtd}")
-            resumo = ", ".join(nomes) if nomes else "Sem itens"
-            saida.append(
-                {
-                    "id": v.id,
-                    "data": _format_datetime(v.data_venda),
-                    "total": float(getattr(v, "total", 0.0) or 0.0),
-                    "pagamento": getattr(v, "forma_pagamento", ""),
-                    "resumo": resumo,
-                }
-            )
-        return saida
+        return [_resumo_venda(v) for v in q.all()]
     except Exception as ex:
         print(f"[DEVOLUCOES LOGIC] Erro ao buscar vendas: {ex}")
         return []
 
 
-def processar_devolucao_e_trocar(
-    pdv_core, venda_id: int, usuario_responsavel: str
-) -> Tuple[bool, str, List[Dict[str, Any]]]:
-    """Prepara itens da venda para operação de troca (não efetiva alterações).
+def buscar_vendas_para_devolucao(
+    pdv_core,
+    termo: Optional[str] = None,
+    usuario_responsavel: Optional[str] = None,
+    data_inicio: Optional[datetime] = None,
+    data_fim: Optional[datetime] = None,
+    limite: int = 20,
+) -> List[Dict[str, Any]]:
+    """Localiza vendas para devolução/troca, já com os itens (mesmo formato
+    de `buscar_vendas_do_caixa`).
 
-    Retorna: (sucesso, mensagem, carrinho)
-    onde carrinho = [{"produto_id": int, "nome": str, "qtd": int, "preco": float}, ...]
+    `termo` casa com o número da venda, o `transaction_id` ou o código de
+    barras de um produto vendido; o período e o usuário restringem a busca.
+    Vendas estornadas não entram. São sempre duas consultas: as vendas e os
+    seus itens com produtos.
     """
     try:
-        venda = pdv_core.session.query(Venda).filter_by(id=venda_id).first()
-        if not venda:
-            return False, "Venda não encontrada.", []
-
-        # Opcional: validar usuário responsável
-        # if venda.usuario_responsavel != usuario_responsavel:
-        #     return False, "Venda pertence a outro usuário.", []
-
-        carrinho: List[Dict[str, Any]] = []
-        for it in getattr(venda, "itens", []):
-            try:
-                produto_id = getattr(it, "produto_id", None)
-                produto_nome = (
-                    it.produto.nome if getattr(it, "produto", None) else "Produto"
-                )
-                qtd = getattr(it, "quantidade", 0) or 0
-                preco = float(getattr(it, "preco_unitario", 0.0) or 0.0)
-                carrinho.append(
-                    {
-                        "produto_id": produto_id,
-                        "nome": produto_nome,
-                        "qtd": qtd,
-                        "preco": preco,
-                    }
-                )
-            except Exception:
-                pass
-
-        if not carrinho:
-            return False, "Venda sem itens para trocar.", []
-        return True, "Itens carregados para troca.", carrinho
+        q = pdv_core.session.query(Venda).filter(Venda.status != "ESTORNADA")
+        termo = str(termo or "").strip()
+        if termo:
+            vendeu_codigo = exists().where(
+                ItemVenda.venda_id == Venda.id,
+                ItemVenda.produto_id == Produto.id,
+                Produto.codigo_barras == termo,
+            )
+            criterios = [Venda.transaction_id == termo, vendeu_codigo]
+            if termo.lstrip("#").isdigit():
+                criterios.append(Venda.id == int(termo.lstrip("#")))
+            q = q.filter(or_(*criterios))
+        if usuario_responsavel:
+            q = q.filter(Venda.usuario_responsavel == usuario_responsavel)
+        if data_inicio is not None:
+            q = q.filter(Venda.data_venda >= data_inicio)
+        if data_fim is not None:
+            q = q.filter(Venda.data_venda <= data_fim)
+        q = q.options(_COM_ITENS).order_by(Venda.data_venda.desc(), Venda.id.desc())
+        if limite and limite > 0:
+            q = q.limit(limite)
+        return [_resumo_venda(v) for v in q.all()]
     except Exception as ex:
-        print(f"[DEVOLUCOES LOGIC] Erro ao preparar troca: {ex}")
-        return False, "Erro ao preparar troca.", []
+        print(f"[DEVOLUCOES LOGIC] Erro ao localizar vendas: {ex}")
+        return []
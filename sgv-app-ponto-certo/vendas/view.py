@@ -620,17 +620,19 @@ def create_relatorio_vendas_view(page, pdv_core, handle_back):
 
             vendas = []
             if caixa_session:
-                start_s = caixa_session.opening_time
-                end_s = caixa_session.closing_time or datetime.now()
-                vendas = pdv_core.buscar_vendas_por_intervalo(start_s, end_s)
+                dt_ini = caixa_session.opening_time
+                dt_fim = caixa_session.closing_time or datetime.now()
             else:
                 dt_ini = datetime.combine(start_dt_obj, time(0, 0))
                 dt_fim = datetime.combine(end_dt_obj, time(23, 59, 59))
-                vendas = pdv_core.buscar_vendas_por_intervalo(dt_ini, dt_fim)
+            vendas = pdv_core.buscar_vendas_por_intervalo(dt_ini, dt_fim)
 
             filtered = []
             total_periodo = 0.0
-            lucro_periodo = 0.0
+            # Lucro real: custo gravado em cada item, somado direto no banco
+            lucro_periodo = pdv_core.calcular_lucro_bruto_periodo(
+                dt_ini, dt_fim, metodo_pagamento.value
+            )
 
             for v in vendas:
                 if v.get("status") == "ESTORNADA":
@@ -644,7 +646,6 @@ def create_relatorio_vendas_view(page, pdv_core, handle_back):
 
                 filtered.append(v)
                 total_periodo += v.get("total", 0.0)
-                lucro_periodo += v.get("total", 0.0) * 0.3
 
             vendas_filtradas = filtered
 
@@ -762,7 +763,7 @@ def create_relatorio_vendas_view(page, pdv_core, handle_back):
                             lucro_periodo = 0.0
                             for v in filtered:
                                 total_periodo += v.get("total", 0.0)
-                                lucro_periodo += v.get("total", 0.0) * 0.3
+                                lucro_periodo += v.get("lucro", 0.0)
                                 itens = v.get("itens", [])
                                 for item in itens:
                                     nome_prod = item.get("produto", "?")
@@ -1018,7 +1019,7 @@ def create_relatorio_vendas_view(page, pdv_core, handle_back):
 
             # recalcula métricas
             total_periodo = sum([v.get("total", 0.0) for v in vendas_filtradas])
-            lucro_periodo = total_periodo * 0.3
+            lucro_periodo = sum([v.get("lucro", 0.0) for v in vendas_filtradas])
             vendas_hoje_valor.value = f"R$ {total_periodo:.2f}"
             lucro_hoje_valor.value = f"R$ {lucro_periodo:.2f}"
 
@@ -1293,6 +1294,7 @@ def create_relatorio_vendas_view(page, pdv_core, handle_back):
 
                     qtd = item.get("quantidade", 0) or 0
                     preco_un = item.get("preco_unitario", 0.0) or 0.0
+                    custo_un = item.get("custo_unitario", 0.0) or 0.0
                     valor_total_item = qtd * preco_un
 
                     cor_pag = ft.Colors.BLUE_GREY_500
@@ -1350,7 +1352,7 @@ def create_relatorio_vendas_view(page, pdv_core, handle_back):
                     )
 
                     total_periodo_local += valor_total_item
-                    lucro_periodo_local += valor_total_item * 0.3
+                    lucro_periodo_local += qtd * (preco_un - custo_un)
 
             vendas_hoje_valor.value = f"R$ {total_periodo_local:.2f}"
             lucro_hoje_valor.value = f"R$ {lucro_periodo_local:.2f}"